@@ -0,0 +1,393 @@
+"""
+爬取链路基准测试
+启动本地回放服务器，对各彩票依次执行 smart_fetch 全量 / 增量模式，
+统计请求数、请求/秒、入库行数、行/秒、请求耗时 p50/p95，并可与基线比较判定性能回退；
+load 模式把同一份数据分别用 batch / upsert / bulk（LOAD DATA LOCAL INFILE）写入空表，对比入库速度
+
+基准测试写入独立的数据库（BENCH_MYSQL_DATABASE；DB_BACKEND=sqlite 时为 BENCH_SQLITE_PATH），会清空其中的彩票表
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from core.config import (DATA_DIR, DB_PERFORMANCE, DRAW_CALENDAR_CONFIG, HTTP_CACHE_CONFIG, LOG_DIR, LOTTERY_NAMES,
+                         PAGE_ARCHIVE_CONFIG, SPIDER_CONFIG, SUPPORTED_LOTTERIES)
+from core import base_database
+from core.db_pool import pool_stats
+from core.http_client import request_stats
+from core.replay_server import ReplayDataset, ReplayServer
+from cli.smart_fetch import get_lottery_modules, import_class, smart_fetch
+from core.storage import open_database
+from core.utils import load_db_config
+
+logger = logging.getLogger(__name__)
+
+BENCH_DIR = DATA_DIR / 'bench'
+
+# 与基线比较的指标
+HIGHER_IS_BETTER = ('requests_per_sec', 'rows_per_sec', 'insert_rows_per_sec')
+LOWER_IS_BETTER = ('p95_ms',)
+
+# load 模式对比的入库路径
+LOAD_PATHS = ('batch', 'upsert', 'bulk')
+
+
+def setup_logging():
+    """设置日志"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(LOG_DIR / 'bench.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def _prepare_environment(keep_rate_limit: bool) -> str:
+    """
+    切换到基准测试数据库并关闭与性能测量无关的功能
+
+    必须在创建任何爬虫之前调用（共享连接池、限速器在首次使用时按配置创建）
+
+    Returns:
+        基准测试数据库名（sqlite 后端为数据库文件路径）
+
+    Raises:
+        ValueError: 未配置 BENCH_MYSQL_DATABASE 或与正式数据库相同
+    """
+    load_dotenv()
+    if os.getenv('DB_BACKEND', 'mysql').lower() == 'sqlite':
+        # 本地数据库文件，不需要数据库服务器
+        bench_db = os.getenv('BENCH_SQLITE_PATH', str(BENCH_DIR / 'bench.db'))
+        if bench_db == os.getenv('SQLITE_PATH'):
+            raise ValueError("BENCH_SQLITE_PATH 不能与 SQLITE_PATH 相同")
+        os.environ['SQLITE_PATH'] = bench_db
+    else:
+        bench_db = os.getenv('BENCH_MYSQL_DATABASE')
+        if not bench_db:
+            raise ValueError("未配置 BENCH_MYSQL_DATABASE（基准测试会清空数据表，必须使用独立的数据库）")
+        if bench_db == os.getenv('MYSQL_DATABASE'):
+            raise ValueError("BENCH_MYSQL_DATABASE 不能与 MYSQL_DATABASE 相同")
+        os.environ['MYSQL_DATABASE'] = bench_db
+
+    # 注入的错误不发送 Telegram 通知
+    os.environ['TELEGRAM_BOT_TOKEN'] = ''
+    os.environ['TELEGRAM_CHAT_ID'] = ''
+
+    # 每次都完整下载和解析，不写入正式的缓存和归档
+    HTTP_CACHE_CONFIG['enabled'] = False
+    PAGE_ARCHIVE_CONFIG['enabled'] = False
+    # 开奖日历跟随基准测试数据库
+    DRAW_CALENDAR_CONFIG['dir'] = BENCH_DIR / 'draw_calendar'
+    if not keep_rate_limit:
+        SPIDER_CONFIG['rate_per_host'] = 0
+
+    return bench_db
+
+
+def _open_database(lottery_type: str):
+    modules = get_lottery_modules(lottery_type)
+    db = open_database(import_class(modules['database_class']), load_db_config())
+    db.connect()
+    db.create_table()
+    return db
+
+
+def _delete_latest(db, table_name: str, count: int):
+    """
+    删除最新 count 期，供增量模式重新爬取（先查出分界期号，SQLite 不支持 DELETE ... LIMIT）
+
+    删除的记录无法从统计表中扣除（最近出现的期号需要重新确定），删除后按全表重建统计表
+    """
+    cursor = db.execute_query(f"SELECT lottery_no FROM {table_name} ORDER BY lottery_no DESC LIMIT 1 OFFSET %s",
+                              (count - 1,))
+    row = cursor.fetchone()
+    cursor.close()
+    cursor = db.execute_query(f"DELETE FROM {table_name} WHERE lottery_no >= %s", (row[0],))
+    db.connection.commit()
+    cursor.close()
+    db.rebuild_stats()
+
+
+def _run_case(lottery_type: str, mode: str, dataset: ReplayDataset,
+              workers: int = None, incremental_rows: int = 5) -> Dict:
+    """执行一个基准测试用例（彩票类型 × 模式），返回指标"""
+    table_name = f'{lottery_type}_lottery'
+    modules = get_lottery_modules(lottery_type)
+    last_issue = modules['last_issue']
+    first_issue = f"{last_issue[:2]}{int(last_issue[2:]) + 1:03d}"
+
+    db = _open_database(lottery_type)
+    try:
+        if mode == 'full':
+            db.truncate_table(table_name)
+            # 归档回放的行数取决于录制时的数据，不做校验
+            expected = None
+            if dataset.source == 'fixtures':
+                expected = dataset.issue_count(lottery_type, first_issue, f"{dataset.last_year:02d}999")
+        elif db.get_total_count(table_name) < incremental_rows:
+            return {'lottery_type': lottery_type, 'mode': mode, 'success': False,
+                    'error': '数据不足，请先运行全量模式', 'elapsed_seconds': 0.0, 'requests': 0, 'status': {},
+                    'requests_per_sec': 0.0, 'rows': 0, 'rows_per_sec': 0.0, 'insert_rows_per_sec': None,
+                    'p50_ms': 0.0, 'p95_ms': 0.0}
+        else:
+            _delete_latest(db, table_name, incremental_rows)
+            expected = incremental_rows
+    finally:
+        db.close()
+
+    request_stats.reset()
+    started = time.perf_counter()
+    result = smart_fetch(lottery_type, mode=mode, workers=workers)
+    elapsed = time.perf_counter() - started
+    requests_snapshot = request_stats.snapshot()
+
+    inserted = result.get('inserted', 0)
+    error = result.get('error')
+    if not error and expected is not None and inserted != expected:
+        error = f"入库 {inserted} 条，预期 {expected} 条"
+
+    write_stage = result.get('stages', {}).get('write')
+    insert_rate = None
+    if write_stage and write_stage['busy_seconds']:
+        insert_rate = round(write_stage['rows'] / write_stage['busy_seconds'], 1)
+
+    return {
+        'lottery_type': lottery_type,
+        'mode': mode,
+        'success': bool(result.get('success')) and error is None,
+        'error': error,
+        'elapsed_seconds': round(elapsed, 3),
+        'requests': requests_snapshot['requests'],
+        'status': requests_snapshot['status'],
+        'requests_per_sec': round(requests_snapshot['requests'] / elapsed, 2) if elapsed else 0.0,
+        'rows': inserted,
+        'rows_per_sec': round(inserted / elapsed, 1) if elapsed else 0.0,
+        'insert_rows_per_sec': insert_rate,
+        'p50_ms': requests_snapshot['p50_ms'],
+        'p95_ms': requests_snapshot['p95_ms'],
+    }
+
+
+def _run_load_cases(lottery_type: str, dataset: ReplayDataset) -> List[Dict]:
+    """
+    入库路径对比：把同一份全量数据分别用 batch（先查询再分批插入）、upsert（多行 INSERT 一次提交）、
+    bulk（LOAD DATA LOCAL INFILE）写入空表，每种路径一个用例（mode 为 load-<路径>）
+    """
+    table_name = f'{lottery_type}_lottery'
+    modules = get_lottery_modules(lottery_type)
+    last_issue = modules['last_issue']
+    first_issue = f"{last_issue[:2]}{int(last_issue[2:]) + 1:03d}"
+
+    spider = import_class(modules['spider_class'])(timeout=15, retry_times=3)
+    try:
+        data = spider.fetch(start_issue=first_issue, end_issue=f"{dataset.last_year:02d}999")
+    finally:
+        spider.close()
+
+    results = []
+    insert_mode = DB_PERFORMANCE['insert_mode']
+    db = _open_database(lottery_type)
+    try:
+        for path in LOAD_PATHS:
+            db.truncate_table(table_name)
+            DB_PERFORMANCE['insert_mode'] = 'batch' if path == 'batch' else 'upsert'
+            started = time.perf_counter()
+            inserted, _, _ = db.insert_lottery_data(data, skip_existing=True,
+                                                    batch_size=DB_PERFORMANCE['batch_insert_size'],
+                                                    bulk=path == 'bulk')
+            elapsed = time.perf_counter() - started
+
+            error = None if inserted == len(data) else f"入库 {inserted} 条，预期 {len(data)} 条"
+            if path == 'bulk' and base_database._bulk_load_unavailable:
+                logger.warning("⚠️ 数据库不允许 LOAD DATA LOCAL INFILE，load-bulk 的结果为回退后的批量 INSERT")
+            rate = round(inserted / elapsed, 1) if elapsed else 0.0
+            results.append({
+                'lottery_type': lottery_type,
+                'mode': f'load-{path}',
+                'success': bool(data) and error is None,
+                'error': error if data else '没有获取到数据',
+                'elapsed_seconds': round(elapsed, 3),
+                'requests': 0,
+                'status': {},
+                'requests_per_sec': 0.0,
+                'rows': inserted,
+                'rows_per_sec': rate,
+                'insert_rows_per_sec': rate,
+                'p50_ms': 0.0,
+                'p95_ms': 0.0,
+            })
+    finally:
+        DB_PERFORMANCE['insert_mode'] = insert_mode
+        db.close()
+
+    return results
+
+
+def _compare(results: List[Dict], baseline: Dict, tolerance: float) -> List[str]:
+    """与基线比较，返回超出容差的指标说明"""
+    baseline_cases = {f"{case['lottery_type']}/{case['mode']}": case for case in baseline.get('cases', [])}
+    regressions = []
+
+    for case in results:
+        key = f"{case['lottery_type']}/{case['mode']}"
+        base = baseline_cases.get(key)
+        if not base:
+            continue
+        for metric in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+            current, previous = case.get(metric), base.get(metric)
+            if not current or not previous:
+                continue
+            change = current / previous - 1
+            regressed = change < -tolerance if metric in HIGHER_IS_BETTER else change > tolerance
+            if regressed:
+                regressions.append(f"{key} {metric}: {previous} -> {current} ({change:+.0%})")
+
+    return regressions
+
+
+def _log_results(results: List[Dict]):
+    logger.info("📊 基准测试结果:")
+    logger.info(f"   {'用例':<18}{'请求':>6}{'请求/秒':>10}{'行数':>8}{'行/秒':>10}"
+                f"{'入库行/秒':>12}{'p50(ms)':>10}{'p95(ms)':>10}{'耗时(s)':>10}")
+    for case in results:
+        key = f"{case['lottery_type']}/{case['mode']}"
+        insert_rate = f"{case['insert_rows_per_sec']:.0f}" if case['insert_rows_per_sec'] else '-'
+        logger.info(
+            f"   {key:<20}{case['requests']:>6}{case['requests_per_sec']:>10.1f}{case['rows']:>8}"
+            f"{case['rows_per_sec']:>10.0f}{insert_rate:>14}{case['p50_ms']:>10.1f}{case['p95_ms']:>10.1f}"
+            f"{case['elapsed_seconds']:>10.2f}"
+        )
+        if not case['success']:
+            logger.error(f"   ❌ {key}: {case['error']}")
+
+
+def run_benchmark(lotteries: List[str] = None,
+                  modes: List[str] = None,
+                  workers: int = None,
+                  latency_ms: float = 20.0,
+                  jitter_ms: float = 10.0,
+                  error_rate: float = 0.0,
+                  rate_limit_rate: float = 0.0,
+                  max_rows: int = 0,
+                  source: str = 'fixtures',
+                  keep_rate_limit: bool = False,
+                  baseline: Optional[str] = None,
+                  save_baseline: Optional[str] = None,
+                  tolerance: float = 0.2) -> int:
+    """
+    运行基准测试
+
+    Args:
+        lotteries: 彩票类型（默认全部）
+        modes: 'full' / 'incremental' / 'load'（默认三者；load 对比 batch / upsert / bulk 三种入库路径）
+        workers: 全量模式下载线程数（默认 SPIDER_MAX_WORKERS）
+        latency_ms / jitter_ms / error_rate / rate_limit_rate / max_rows: 回放服务器参数
+        source: 回放数据来源 'fixtures' / 'archive'
+        keep_rate_limit: 保留 SPIDER_RATE_PER_HOST 限速（默认关闭，只测量爬取链路本身）
+        baseline: 基线文件，指标回退超过 tolerance 时返回非零
+        save_baseline: 将本次结果保存为基线文件
+        tolerance: 允许的回退比例
+
+    Returns:
+        退出码：0 正常，1 用例失败或性能回退
+    """
+    setup_logging()
+    lotteries = lotteries or SUPPORTED_LOTTERIES
+    modes = modes or ['full', 'incremental', 'load']
+    if source == 'archive' and ('incremental' in modes or 'load' in modes):
+        # 归档只包含录制时请求过的期号范围，增量模式和 load 模式请求的范围通常不在其中
+        logger.warning("⚠️ 归档回放只支持全量模式，已跳过增量 / load 模式")
+        modes = [mode for mode in modes if mode == 'full']
+
+    try:
+        bench_db = _prepare_environment(keep_rate_limit)
+    except ValueError as e:
+        logger.error(f"❌ {e}")
+        return 1
+
+    dataset = ReplayDataset(source=source, max_rows=max_rows)
+    server = ReplayServer(dataset, latency_ms=latency_ms, jitter_ms=jitter_ms,
+                          error_rate=error_rate, rate_limit_rate=rate_limit_rate, seed=0)
+    SPIDER_CONFIG['base_url'] = server.start()
+
+    settings = {
+        'workers': workers or SPIDER_CONFIG['max_workers'],
+        'latency_ms': latency_ms,
+        'jitter_ms': jitter_ms,
+        'error_rate': error_rate,
+        'rate_limit_rate': rate_limit_rate,
+        'max_rows': max_rows,
+        'source': source,
+        'rate_per_host': SPIDER_CONFIG['rate_per_host'],
+    }
+    logger.info(f"🚀 基准测试开始（数据库: {bench_db}，参数: {settings}）")
+
+    results = []
+    try:
+        for lottery_type in lotteries:
+            for mode in modes:
+                logger.info(f"▶️ {LOTTERY_NAMES.get(lottery_type, lottery_type)} {mode}")
+                if mode == 'load':
+                    results.extend(_run_load_cases(lottery_type, dataset))
+                else:
+                    results.append(_run_case(lottery_type, mode, dataset, workers=workers))
+    finally:
+        server.stop()
+
+    _log_results(results)
+
+    report = {
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'settings': settings,
+        'server': dict(server.counts),
+        'backend': load_db_config()['backend'],
+        'insert_mode': DB_PERFORMANCE['insert_mode'],
+        'db_pool': pool_stats(),
+        'cases': results,
+    }
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+    report_path = BENCH_DIR / f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logger.info(f"💾 结果已保存: {report_path}")
+
+    if save_baseline:
+        with open(save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"💾 基线已保存: {save_baseline}")
+
+    exit_code = 0 if all(case['success'] for case in results) else 1
+
+    if baseline:
+        with open(baseline, 'r', encoding='utf-8') as f:
+            baseline_report = json.load(f)
+        if baseline_report.get('settings') != settings:
+            logger.warning(f"⚠️ 基线参数与本次不同，比较结果仅供参考: {baseline_report.get('settings')}")
+        regressions = _compare(results, baseline_report, tolerance)
+        if regressions:
+            logger.error(f"❌ 性能回退超过 {tolerance:.0%}:")
+            for line in regressions:
+                logger.error(f"   {line}")
+            exit_code = 1
+        else:
+            logger.info(f"✅ 与基线相比无超过 {tolerance:.0%} 的性能回退")
+
+    return exit_code
+
+
+def serve(host: str = '127.0.0.1', port: int = 8500, **options):
+    """只启动回放服务器（前台运行），配合 SPIDER_BASE_URL 手动调试爬虫"""
+    setup_logging()
+    max_rows = options.pop('max_rows', 0)
+    source = options.pop('source', 'fixtures')
+    server = ReplayServer(ReplayDataset(source=source, max_rows=max_rows), host=host, port=port, **options)
+    logger.info(f"设置 SPIDER_BASE_URL={server.base_url} 后运行 fetch 命令即可使用回放数据")
+    server.serve_forever()
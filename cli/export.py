@@ -0,0 +1,91 @@
+"""
+Parquet 导出 / 导入命令
+export：把各彩票数据表导出为按年份分区的 Parquet 数据集（供 notebook 分析）
+import：把导出的数据集写入当前后端（DB_BACKEND），不爬取直接初始化新数据库
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, List
+
+from core.config import LOG_DIR, LOTTERY_NAMES, SUPPORTED_LOTTERIES
+from core.history_parquet import export_parquet, import_parquet
+from core.storage import open_database
+from core.utils import load_db_config
+from cli.smart_fetch import get_lottery_modules, import_class
+
+logger = logging.getLogger(__name__)
+
+
+def setup_logging():
+    """设置日志"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(LOG_DIR / 'export.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def _open(lottery_type: str):
+    modules = get_lottery_modules(lottery_type)
+    return open_database(import_class(modules['database_class']), load_db_config())
+
+
+def export_history(lotteries: List[str] = None, out_dir: Path = None) -> Dict[str, Dict]:
+    """导出 Parquet
+
+    Args:
+        lotteries: 彩票类型（默认全部）
+        out_dir: 导出根目录（默认 PARQUET_EXPORT_DIR）
+
+    Returns:
+        彩票类型 -> {'rows', 'files', 'path'} 或 {'error': 错误信息}
+    """
+    setup_logging()
+    results = {}
+
+    for lottery_type in lotteries or SUPPORTED_LOTTERIES:
+        logger.info(f"📦 导出{LOTTERY_NAMES.get(lottery_type, lottery_type)}历史数据")
+        db = _open(lottery_type)
+        try:
+            db.connect()
+            results[lottery_type] = export_parquet(db, lottery_type, out_dir)
+        except Exception as e:
+            logger.error(f"❌ {lottery_type} 导出失败: {e}")
+            results[lottery_type] = {'error': str(e)}
+        finally:
+            db.close()
+
+    return results
+
+
+def import_history(lotteries: List[str] = None, in_dir: Path = None) -> Dict[str, Dict]:
+    """导入 Parquet
+
+    Args:
+        lotteries: 彩票类型（默认全部）
+        in_dir: 导出根目录（默认 PARQUET_EXPORT_DIR）
+
+    Returns:
+        彩票类型 -> {'inserted', 'duplicated', 'skipped', 'path'} 或 {'error': 错误信息}
+    """
+    setup_logging()
+    results = {}
+
+    for lottery_type in lotteries or SUPPORTED_LOTTERIES:
+        logger.info(f"📥 导入{LOTTERY_NAMES.get(lottery_type, lottery_type)}历史数据")
+        db = _open(lottery_type)
+        try:
+            db.connect()
+            db.create_table()
+            results[lottery_type] = import_parquet(db, lottery_type, in_dir)
+        except Exception as e:
+            logger.error(f"❌ {lottery_type} 导入失败: {e}")
+            results[lottery_type] = {'error': str(e)}
+        finally:
+            db.close()
+
+    return results
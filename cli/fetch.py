@@ -24,8 +24,13 @@ def setup_logging(lottery_type: str):
     )
 
 
-def fetch_full_history(lottery_type: str):
-    """爬取全量历史数据（重构版本）"""
+def fetch_full_history(lottery_type: str, workers: int = None):
+    """爬取全量历史数据（重构版本）
+
+    Args:
+        lottery_type: 彩票类型
+        workers: 下载线程数（默认读取 SPIDER_MAX_WORKERS）
+    """
     setup_logging(lottery_type)
     
     logger.info("=" * 60)
@@ -33,7 +38,7 @@ def fetch_full_history(lottery_type: str):
     logger.info("=" * 60)
     
     # 调用统一的智能爬取方法
-    result = smart_fetch(lottery_type, mode='full')
+    result = smart_fetch(lottery_type, mode='full', workers=workers)
     
     if result.get('success'):
         logger.info("=" * 60)
@@ -49,6 +54,55 @@ def fetch_full_history(lottery_type: str):
         logger.error(f"全量爬取失败: {result.get('error', '未知错误')}")
 
 
+def repair_gaps(lottery_type: str, workers: int = None):
+    """补齐数据库中缺失的期号（只请求缺失处，不重新全量爬取）
+
+    Args:
+        lottery_type: 彩票类型
+        workers: 下载线程数（默认读取 SPIDER_MAX_WORKERS）
+    """
+    setup_logging(lottery_type)
+
+    logger.info("=" * 60)
+    logger.info(f"补齐{LOTTERY_NAMES.get(lottery_type, lottery_type)}缺失期号")
+    logger.info("=" * 60)
+
+    result = smart_fetch(lottery_type, mode='repair', workers=workers)
+
+    if result.get('success'):
+        logger.info(f"缺失处: {result.get('gap_count', 0)}")
+        logger.info(f"新增数据: {result.get('inserted', 0)} 条")
+        logger.info(f"数据库总记录数: {result.get('total', 0)}")
+    else:
+        logger.error(f"补缺失败: {result.get('error', '未知错误')}")
+
+
+def reparse_archive(lottery_type: str, workers: int = None, force: bool = False):
+    """从原始页面归档离线重建数据表（解析逻辑修复后使用，不访问网络）
+
+    Args:
+        lottery_type: 彩票类型
+        workers: 解析进程数（默认读取 PAGE_ARCHIVE_REPARSE_WORKERS，0 表示 CPU 核数）
+        force: 归档解析结果少于现有数据时仍然重建
+    """
+    setup_logging(lottery_type)
+
+    logger.info("=" * 60)
+    logger.info(f"从页面归档重建{LOTTERY_NAMES.get(lottery_type, lottery_type)}数据")
+    logger.info("=" * 60)
+
+    result = smart_fetch(lottery_type, mode='reparse', workers=workers, force=force)
+
+    if result.get('success'):
+        logger.info(f"页面数: {result.get('page_count', 0)}")
+        logger.info(f"数据库总记录数: {result.get('total', 0)}")
+        if result.get('latest'):
+            latest = result['latest']
+            logger.info(f"最新一期: {latest['lottery_no']} ({latest['draw_date']})")
+    else:
+        logger.error(f"重建失败: {result.get('error', '未知错误')}")
+
+
 def fetch_incremental_data(lottery_type: str, with_predict: bool = False):
     """增量爬取最新数据（重构版本）"""
     logger.info("=" * 60)
@@ -0,0 +1,55 @@
+"""
+数据表结构迁移命令
+把旧结构（v1：号码为 VARCHAR 列）的彩票表在线迁移到当前结构（v2：TINYINT 号码列 + 号码位图生成列）
+"""
+
+import logging
+from typing import Dict, List
+
+from core.config import LOG_DIR, LOTTERY_NAMES, SUPPORTED_LOTTERIES
+from core.storage import open_database
+from core.utils import load_db_config
+from cli.smart_fetch import get_lottery_modules, import_class
+
+logger = logging.getLogger(__name__)
+
+
+def setup_logging():
+    """设置日志"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(LOG_DIR / 'migrate.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def migrate(lotteries: List[str] = None, chunk_rows: int = 2000) -> Dict[str, Dict]:
+    """迁移数据表结构
+
+    Args:
+        lotteries: 彩票类型（默认全部）
+        chunk_rows: 每个事务复制的行数
+
+    Returns:
+        彩票类型 -> 迁移结果
+    """
+    setup_logging()
+    results = {}
+
+    for lottery_type in lotteries or SUPPORTED_LOTTERIES:
+        logger.info(f"🔧 迁移{LOTTERY_NAMES.get(lottery_type, lottery_type)}数据表")
+        modules = get_lottery_modules(lottery_type)
+        db = open_database(import_class(modules['database_class']), load_db_config())
+        try:
+            db.connect()
+            results[lottery_type] = db.migrate_schema(chunk_rows=chunk_rows)
+        except Exception as e:
+            logger.error(f"❌ {lottery_type} 迁移失败: {e}")
+            results[lottery_type] = {'migrated': False, 'error': str(e)}
+        finally:
+            db.close()
+
+    return results
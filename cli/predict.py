@@ -6,6 +6,9 @@ import logging
 import os
 from core.config import LOG_DIR, LOTTERY_NAMES
 from core.utils import load_db_config
+from core.history_matrix import HistoryMatrix
+from core.history_snapshot import load_history
+from core.storage import open_database
 from core.telegram_bot import TelegramBot
 
 logger = logging.getLogger(__name__)
@@ -37,20 +40,21 @@ def predict(lottery_type: str):
     try:
         if lottery_type == 'ssq':
             from lotteries.ssq.database import SSQDatabase
-            from lotteries.ssq.predictor import SSQPredictor, SSQStatistics
+            from lotteries.ssq.predictor import SSQPredictor
             
-            db = SSQDatabase(load_db_config())
+            db = open_database(SSQDatabase, load_db_config())
             db.connect()
             
-            # 获取历史数据
-            lottery_data = db.get_all_lottery_data()
+            # 历史数据（本地快照，只从数据库拉取快照之后的新记录）
+            history = load_history(db, lottery_type)
+            history_count = len(history)
             
-            if not lottery_data:
+            if not history_count:
                 logger.error("数据库中没有历史数据，请先运行爬取命令")
                 db.close()
                 return
             
-            logger.info(f"使用 {len(lottery_data)} 条历史数据进行预测")
+            logger.info(f"使用 {history_count} 条历史数据进行预测")
             
             # 从环境变量读取配置
             default_strategies = os.getenv('DEFAULT_STRATEGIES', 'frequency').split(',')
@@ -60,8 +64,9 @@ def predict(lottery_type: str):
             logger.info(f"使用策略: {', '.join(default_strategies)}")
             logger.info(f"预测条数: {default_count}")
             
-            # 创建预测器（使用配置的策略）
-            predictor = SSQPredictor(lottery_data, strategies=default_strategies)
+            # 创建预测器（使用配置的策略；号码矩阵由快照构建一次，预测器与其统计类共用）
+            matrix = HistoryMatrix.from_snapshot(history, SSQPredictor.POOLS)
+            predictor = SSQPredictor(matrix, strategies=default_strategies)
             
             # 预测（使用配置的条数）
             predictions = predictor.predict(count=default_count)
@@ -87,7 +92,8 @@ def predict(lottery_type: str):
             logger.info("历史数据统计")
             logger.info("=" * 60)
             
-            stats = SSQStatistics(lottery_data)
+            # 统计表（入库时增量维护，读取量与号码池大小相当）
+            stats = db.load_statistics()
             
             # 红球频率
             freq_data = stats.get_frequency()
@@ -136,20 +142,21 @@ def predict(lottery_type: str):
             
         elif lottery_type == 'dlt':
             from lotteries.dlt.database import DLTDatabase
-            from lotteries.dlt.predictor import DLTPredictor, DLTStatistics
+            from lotteries.dlt.predictor import DLTPredictor
             
-            db = DLTDatabase(load_db_config())
+            db = open_database(DLTDatabase, load_db_config())
             db.connect()
             
-            # 获取历史数据
-            lottery_data = db.get_all_lottery_data()
+            # 历史数据（本地快照，只从数据库拉取快照之后的新记录）
+            history = load_history(db, lottery_type)
+            history_count = len(history)
             
-            if not lottery_data:
+            if not history_count:
                 logger.error("数据库中没有历史数据，请先运行爬取命令")
                 db.close()
                 return
             
-            logger.info(f"使用 {len(lottery_data)} 条历史数据进行预测")
+            logger.info(f"使用 {history_count} 条历史数据进行预测")
             
             # 从环境变量读取配置
             default_strategies = os.getenv('DEFAULT_STRATEGIES', 'frequency').split(',')
@@ -159,8 +166,9 @@ def predict(lottery_type: str):
             logger.info(f"使用策略: {', '.join(default_strategies)}")
             logger.info(f"预测条数: {default_count}")
             
-            # 创建预测器（使用配置的策略）
-            predictor = DLTPredictor(lottery_data, strategies=default_strategies)
+            # 创建预测器（使用配置的策略；号码矩阵由快照构建一次，预测器与其统计类共用）
+            matrix = HistoryMatrix.from_snapshot(history, DLTPredictor.POOLS)
+            predictor = DLTPredictor(matrix, strategies=default_strategies)
             
             # 预测（使用配置的条数）
             predictions = predictor.predict(count=default_count)
@@ -186,7 +194,8 @@ def predict(lottery_type: str):
             logger.info("历史数据统计")
             logger.info("=" * 60)
             
-            stats = DLTStatistics(lottery_data)
+            # 统计表（入库时增量维护，读取量与号码池大小相当）
+            stats = db.load_statistics()
             
             # 号码频率
             freq_data = stats.get_frequency()
@@ -236,20 +245,21 @@ def predict(lottery_type: str):
             
         elif lottery_type == 'qxc':
             from lotteries.qxc.database import QXCDatabase
-            from lotteries.qxc.predictor import QXCPredictor, QXCStatistics
+            from lotteries.qxc.predictor import QXCPredictor
             
-            db = QXCDatabase(load_db_config())
+            db = open_database(QXCDatabase, load_db_config())
             db.connect()
             
-            # 获取历史数据
-            lottery_data = db.get_all_lottery_data()
+            # 历史数据（本地快照，只从数据库拉取快照之后的新记录）
+            history = load_history(db, lottery_type)
+            history_count = len(history)
             
-            if not lottery_data:
+            if not history_count:
                 logger.error("数据库中没有历史数据，请先运行爬取命令")
                 db.close()
                 return
             
-            logger.info(f"使用 {len(lottery_data)} 条历史数据进行预测")
+            logger.info(f"使用 {history_count} 条历史数据进行预测")
             
             # 从环境变量读取配置
             default_strategies = os.getenv('DEFAULT_STRATEGIES', 'frequency').split(',')
@@ -259,8 +269,9 @@ def predict(lottery_type: str):
             logger.info(f"使用策略: {', '.join(default_strategies)}")
             logger.info(f"预测条数: {default_count}")
             
-            # 创建预测器
-            predictor = QXCPredictor(lottery_data, strategies=default_strategies)
+            # 创建预测器（号码矩阵由快照构建一次，预测器与其统计类共用）
+            matrix = HistoryMatrix.from_snapshot(history, QXCPredictor.POOLS)
+            predictor = QXCPredictor(matrix, strategies=default_strategies)
             
             # 预测
             predictions = predictor.predict(count=default_count)
@@ -284,7 +295,8 @@ def predict(lottery_type: str):
             logger.info("历史数据统计")
             logger.info("=" * 60)
             
-            stats = QXCStatistics(lottery_data)
+            # 统计表（入库时增量维护，读取量与号码池大小相当）
+            stats = db.load_statistics()
             
             # 号码频率
             freq_data = stats.get_frequency()
@@ -324,20 +336,21 @@ def predict(lottery_type: str):
             
         elif lottery_type == 'qlc':
             from lotteries.qlc.database import QLCDatabase
-            from lotteries.qlc.predictor import QLCPredictor, QLCStatistics
+            from lotteries.qlc.predictor import QLCPredictor
             
-            db = QLCDatabase(load_db_config())
+            db = open_database(QLCDatabase, load_db_config())
             db.connect()
             
-            # 获取历史数据
-            lottery_data = db.get_all_lottery_data()
+            # 历史数据（本地快照，只从数据库拉取快照之后的新记录）
+            history = load_history(db, lottery_type)
+            history_count = len(history)
             
-            if not lottery_data:
+            if not history_count:
                 logger.error("数据库中没有历史数据，请先运行爬取命令")
                 db.close()
                 return
             
-            logger.info(f"使用 {len(lottery_data)} 条历史数据进行预测")
+            logger.info(f"使用 {history_count} 条历史数据进行预测")
             
             # 从环境变量读取配置
             default_strategies = os.getenv('DEFAULT_STRATEGIES', 'frequency').split(',')
@@ -347,8 +360,9 @@ def predict(lottery_type: str):
             logger.info(f"使用策略: {', '.join(default_strategies)}")
             logger.info(f"预测条数: {default_count}")
             
-            # 创建预测器
-            predictor = QLCPredictor(lottery_data, strategies=default_strategies)
+            # 创建预测器（号码矩阵由快照构建一次，预测器与其统计类共用）
+            matrix = HistoryMatrix.from_snapshot(history, QLCPredictor.POOLS)
+            predictor = QLCPredictor(matrix, strategies=default_strategies)
             
             # 预测
             predictions = predictor.predict(count=default_count)
@@ -373,7 +387,8 @@ def predict(lottery_type: str):
             logger.info("历史数据统计")
             logger.info("=" * 60)
             
-            stats = QLCStatistics(lottery_data)
+            # 统计表（入库时增量维护，读取量与号码池大小相当）
+            stats = db.load_statistics()
             
             # 号码频率
             freq_data = stats.get_frequency()
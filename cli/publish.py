@@ -0,0 +1,57 @@
+"""
+发布命令
+把各彩票的历史数据按年份分区发布到 Cloudflare R2（或其他 S3 兼容存储），内容未变化的分区不上传
+"""
+
+import logging
+from typing import Dict, List
+
+from core.config import LOG_DIR, LOTTERY_NAMES, SUPPORTED_LOTTERIES
+from core.publisher import HistoryPublisher
+from core.storage import open_database
+from core.utils import load_db_config
+from cli.smart_fetch import get_lottery_modules, import_class
+
+logger = logging.getLogger(__name__)
+
+
+def setup_logging():
+    """设置日志"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(LOG_DIR / 'publish.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def publish(lotteries: List[str] = None, full: bool = False) -> Dict[str, Dict]:
+    """发布历史数据
+
+    Args:
+        lotteries: 彩票类型（默认全部）
+        full: 检查所有年份的分区（默认只检查最新年份）
+
+    Returns:
+        彩票类型 -> HistoryPublisher.publish 的结果 或 {'error': 错误信息}
+    """
+    setup_logging()
+    results = {}
+    publisher = HistoryPublisher()
+
+    for lottery_type in lotteries or SUPPORTED_LOTTERIES:
+        logger.info(f"☁️ 发布{LOTTERY_NAMES.get(lottery_type, lottery_type)}历史数据")
+        modules = get_lottery_modules(lottery_type)
+        db = open_database(import_class(modules['database_class']), load_db_config())
+        try:
+            db.connect()
+            results[lottery_type] = publisher.publish(db, lottery_type, full=full)
+        except Exception as e:
+            logger.error(f"❌ {lottery_type} 发布失败: {e}")
+            results[lottery_type] = {'error': str(e)}
+        finally:
+            db.close()
+
+    return results
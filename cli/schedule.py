@@ -6,6 +6,7 @@ import logging
 from apscheduler.schedulers.blocking import BlockingScheduler
 from datetime import datetime
 from core.config import LOG_DIR, LOTTERY_NAMES
+from core.db_pool import pool_stats
 from core.utils import load_db_config
 
 logger = logging.getLogger(__name__)
@@ -113,6 +114,8 @@ def fetch_latest_data():
         except Exception as e:
             logger.error(f"发送 Telegram 通知失败: {e}", exc_info=True)
     
+    for name, stats in pool_stats().items():
+        logger.info(f"数据库连接池 {name}: {stats}")
     logger.info(f"定时任务结束: {datetime.now()}")
 
 
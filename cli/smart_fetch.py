@@ -4,14 +4,25 @@
 """
 
 import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
-from core.config import LOTTERY_NAMES
+from typing import Dict, List, Tuple
+from core.config import DB_PERFORMANCE, LOTTERY_NAMES, PAGE_ARCHIVE_CONFIG, PUBLISH_CONFIG, SPIDER_CONFIG
+from core.draw_calendar import DrawCalendar
+from core.page_archive import PageArchive, get_page_archive
+from core.pipeline import FetchPipeline
+from core.gap_scanner import scan_gaps
+from core.history_matrix import HistoryMatrix
+from core.history_snapshot import load_history
+from core.range_planner import YEAR_MAX_ISSUE, RangePlanner
+from core.storage import open_database
 from core.utils import load_db_config
 
 logger = logging.getLogger(__name__)
 
-
 def get_lottery_modules(lottery_type: str):
     """获取彩票类型对应的模块"""
     modules = {
@@ -64,15 +75,19 @@ def smart_fetch(lottery_type: str, mode: str = 'incremental', **options) -> Dict
     
     Args:
         lottery_type: 彩票类型 ('ssq', 'dlt', 'qxc' 或 'qlc')
-        mode: 爬取模式 ('incremental' 增量, 'full' 全量, 'year' 指定年份)
+        mode: 爬取模式 ('incremental' 增量, 'full' 全量, 'year' 指定年份, 'repair' 补齐缺失期号,
+              'reparse' 从页面归档离线重建)
         **options: 其他选项
             - target_year: 指定年份（mode='year' 时使用）
             - with_predict: 是否进行预测
-            - batch_size: 批次大小（全量模式使用）
+            - batch_size: 每次入库的行数（全量模式使用，默认 SPIDER_BATCH_SIZE）
+            - workers: 全量/补缺模式下载线程数（默认 SPIDER_MAX_WORKERS）；reparse 模式解析进程数
+            - force: reparse 模式下解析结果少于现有数据时仍然重建
     
     Returns:
         dict: 爬取结果
     """
+    db = None
     try:
         # 获取模块信息
         modules = get_lottery_modules(lottery_type)
@@ -83,7 +98,7 @@ def smart_fetch(lottery_type: str, mode: str = 'incremental', **options) -> Dict
         
         # 初始化
         spider = SpiderClass(timeout=15, retry_times=3)
-        db = DatabaseClass(load_db_config())
+        db = open_database(DatabaseClass, load_db_config())
         db.connect()
         db.create_table()
         
@@ -93,7 +108,11 @@ def smart_fetch(lottery_type: str, mode: str = 'incremental', **options) -> Dict
         if mode == 'incremental':
             result = _fetch_incremental(spider, db, modules, lottery_type, **options)
         elif mode == 'full':
-            result = _fetch_full_history(spider, db, modules, lottery_type, **options)
+            result = _fetch_full_history(SpiderClass, spider, db, modules, lottery_type, **options)
+        elif mode == 'repair':
+            result = _repair_gaps(SpiderClass, spider, db, modules, lottery_type, **options)
+        elif mode == 'reparse':
+            result = _reparse_from_archive(modules['spider_class'], db, modules, lottery_type, **options)
         elif mode == 'year':
             target_year = options.get('target_year')
             if not target_year:
@@ -109,11 +128,14 @@ def smart_fetch(lottery_type: str, mode: str = 'incremental', **options) -> Dict
             'mode': mode
         })
         
+        # 有新数据时发布到对象存储（增量爬取只重写最新年份的分区，其他模式检查所有年份）
+        if PUBLISH_CONFIG['enabled'] and result.get('inserted', 0) > 0:
+            result['published'] = _publish(db, lottery_type, full=mode != 'incremental')
+
         # 如果需要预测
         if options.get('with_predict', False) and result.get('inserted', 0) >= 0:
             result['predictions'] = _generate_predictions(db, modules, lottery_type, **options)
         
-        db.close()
         return result
         
     except Exception as e:
@@ -124,40 +146,45 @@ def smart_fetch(lottery_type: str, mode: str = 'incremental', **options) -> Dict
             'error': str(e)
         }
 
+    finally:
+        # 连接归还共享连接池
+        if db is not None:
+            db.close()
+
 
 def _fetch_incremental(spider, db, modules, lottery_type, **options) -> Dict:
-    """增量爬取逻辑"""
+    """
+    增量爬取逻辑
+
+    数据库有数据时由开奖日历推算最新一期之后应已开奖的期号，只请求这些期号；
+    还没有到下一个开奖日时不发送请求
+    """
     # 获取数据库中最新期号
     latest_in_db = db.get_latest_lottery()
-    
-    # 确定爬取范围
-    current_year = datetime.now().year
-    year_short = str(current_year)[2:]
-    
+    table_name = f'{lottery_type}_lottery'
+
+    calendar = DrawCalendar.load(lottery_type)
+    calendar_changed = calendar.sync(db, table_name, latest_in_db['lottery_no'] if latest_in_db else None)
+
     if latest_in_db:
-        # 从数据库最新期号的下一期开始爬取
         latest_no = latest_in_db['lottery_no']
-        logger.info(f"数据库最新期号: {latest_no}")
-        
-        # 解析期号：2025001 -> 25, 001
-        year_part = latest_no[2:4]
-        issue_part = int(latest_no[4:])
-        
-        # 下一期
-        next_issue = issue_part + 1
-        
-        # 检查是否跨年
-        if next_issue > 200:
-            # 跨年：进入下一年的第一期
-            next_year = int(year_part) + 1
-            start_issue = f"{next_year:02d}001"
-            end_issue = f"{next_year:02d}200"
-            logger.info(f"跨年爬取：从 {2000 + next_year} 年开始")
-        else:
-            # 同年：继续当年的期号
-            start_issue = f"{year_part}{next_issue:03d}"
-            end_issue = f"{year_part}200"
-            logger.info(f"同年爬取：继续 {2000 + int(year_part)} 年")
+        logger.info(f"数据库最新期号: {latest_no} ({latest_in_db['draw_date']})")
+
+        due = calendar.due_issues()
+        if not due:
+            if calendar_changed:
+                calendar.save()
+            logger.info("最新一期之后还没有开奖，跳过请求")
+            return {
+                'success': True,
+                'inserted': 0,
+                'latest': latest_in_db,
+                'has_new_data': False
+            }
+
+        # 期号转为 5 位格式（2025001 -> 25001），跨年时范围跨越两个年份
+        start_issue, end_issue = due[0][0][2:], due[-1][0][2:]
+        logger.info(f"按开奖日历应已开奖 {len(due)} 期（{due[0][1]} - {due[-1][1]}）")
     else:
         # 数据库为空，从最后期号 +1 开始
         last_issue = modules['last_issue']
@@ -165,11 +192,15 @@ def _fetch_incremental(spider, db, modules, lottery_type, **options) -> Dict:
         last_issue_num = int(last_issue[2:])
         start_issue_num = last_issue_num + 1
         start_issue = f"{year_short}{start_issue_num:03d}"
-        end_issue = f"{year_short}200"
+        end_issue = f"{year_short}{YEAR_MAX_ISSUE}"
         logger.info(f"数据库为空，从最后期号 {last_issue} 的下一期 {start_issue} 开始")
     
     logger.info(f"爬取期号范围: {start_issue} - {end_issue}")
     
+    # 页面与上次已入库的页面一致时没有新开奖，跳过解析
+    spider.skip_unchanged = True
+    spider.parsed_pages.clear()
+    
     # 调用爬取方法
     data = spider.fetch(start_issue=start_issue, end_issue=end_issue)
     
@@ -178,8 +209,15 @@ def _fetch_incremental(spider, db, modules, lottery_type, **options) -> Dict:
         logger.info(f"获取 {len(data)} 条数据")
         inserted, duplicated, skipped = db.insert_lottery_data(data, skip_existing=True)
         logger.info(f"入库: 新增 {inserted} 条，重复 {duplicated} 条，跳过 {skipped} 条")
+        calendar.add_rows(data)
+        calendar_changed = True
     else:
         logger.info("暂无新数据")
+    # 入库成功后才记录页面正文，入库失败时下次重试仍会解析同一页面
+    spider.mark_pages_committed()
+
+    if calendar_changed:
+        calendar.save()
     
     # 获取最新一期
     latest = db.get_latest_lottery()
@@ -192,82 +230,313 @@ def _fetch_incremental(spider, db, modules, lottery_type, **options) -> Dict:
     }
 
 
-def _fetch_full_history(spider, db, modules, lottery_type, **options) -> Dict:
-    """全量爬取逻辑（按年份推进，自动查找缺失年份）"""
+def _fetch_full_history(SpiderClass, spider, db, modules, lottery_type, **options) -> Dict:
+    """
+    全量爬取逻辑（下载 → 解析 → 入库流水线）
+
+    先一次性计算缺失年份，把缺失范围按年份均分为 workers 段，由下载线程并发请求；
+    已有数据中的缺失期号（见 core.gap_scanner）作为额外的范围一并补齐。
+    解析线程解析页面并拆分被截断或超时的范围；主线程按期号顺序分批入库，
+    后面的范围仍在下载时前面的数据已经开始写入。
+    同一主机的并发数和请求速率由 core.http_client 统一限制（所有彩票爬虫共享）。
+    """
     last_issue = modules['last_issue']
     start_year = int('20' + last_issue[:2])
     current_year = datetime.now().year
-    
+    workers = options.get('workers') or SPIDER_CONFIG['max_workers']
+    table_name = f'{lottery_type}_lottery'
+
+    missing_years = _find_missing_years(db, start_year, current_year)
     logger.info(f"最后期号: {last_issue}, 起始年份: {start_year}, 当前年份: {current_year}")
-    
-    total_inserted = 0
-    year_count = 0
-    
-    # 循环爬取所有缺失年份
-    while True:
-        # 查找数据库中缺失的年份
-        target_year = None
-        
-        for year in range(start_year, current_year + 1):
-            year_short = str(year)[2:]
-            first_issue_of_year = f"20{year_short}001"  # 7位格式：2003001
-            
-            # 检查该年份的第一期是否存在
-            latest = db.get_latest_lottery()
-            if not latest or latest['lottery_no'] < first_issue_of_year:
-                target_year = year
-                break
-        
-        # 如果没有找到缺失的年份，说明数据已完整
-        if not target_year:
-            break
-        
-        # 爬取目标年份的数据
-        year_count += 1
-        year_short = str(target_year)[2:]
-        start_issue = f"{year_short}001"
-        end_issue = f"{year_short}200"
-        
-        logger.info(f"📅 爬取第 {year_count} 年: {target_year} 年数据 (期号: {start_issue} - {end_issue})")
-        
-        # 使用统一的 fetch 方法爬取该年度数据
-        data = spider.fetch(start_issue=start_issue, end_issue=end_issue)
-        
-        if not data or len(data) == 0:
-            logger.warning(f"   ⚠️ {target_year} 年无数据，跳过")
-            continue
-        
-        logger.info(f"   ✅ 获取 {len(data)} 条数据")
-        
-        # 批量插入（自动跳过已存在的数据）
-        inserted, duplicated, skipped = db.insert_lottery_data(data, skip_existing=True)
-        logger.info(f"   ✅ 入库: 新增 {inserted} 条，重复 {duplicated} 条，跳过 {skipped} 条")
-        
-        total_inserted += inserted
-        
-        # 添加延迟，避免访问过于频繁
-        import time
-        time.sleep(2)
-    
+    logger.info(f"缺失年份 {len(missing_years)} 个，下载线程数: {workers}，"
+                f"单主机并发上限: {SPIDER_CONFIG['per_host_concurrency']}")
+
+    calendar, gap_ranges = _scan_gaps(db, modules, lottery_type)
+
+    planner = RangePlanner()
+    ranges = list(gap_ranges)
+    if missing_years:
+        start_issue, end_issue = _missing_range(last_issue, missing_years)
+        logger.info(f"📅 爬取 {missing_years[0]}-{missing_years[-1]} 年数据 (期号: {start_issue} - {end_issue})")
+        ranges += planner.plan(start_issue, end_issue, parts=workers)
+
+    # 空表（首次全量导入）时走 LOAD DATA 批量导入
+    bulk = DB_PERFORMANCE['bulk_load'] and db.get_total_count(table_name) == 0
+    if bulk:
+        logger.info("📦 数据表为空，使用 LOAD DATA LOCAL INFILE 批量导入")
+
+    pipeline, stats = _run_pipeline(SpiderClass, spider, db, calendar, ranges, planner, workers,
+                                    options.get('batch_size'), bulk=bulk)
+    _finish_gaps(db, calendar, table_name, gap_ranges, stats['range_timings'])
+
     # 获取最终统计
-    table_name = f'{lottery_type}_lottery'
     total = db.get_total_count(table_name)
     latest = db.get_latest_lottery()
-    
+
     logger.info(f"✅ {modules['name']}全量爬取完成")
-    logger.info(f"爬取年份数: {year_count}")
-    logger.info(f"新增数据: {total_inserted} 条")
+    logger.info(f"爬取年份数: {len(missing_years)}")
+    logger.info(f"补缺范围数: {len(gap_ranges)}")
+    logger.info(f"新增数据: {pipeline.inserted} 条")
     logger.info(f"数据库总记录数: {total}")
-    
+
     return {
         'success': True,
-        'inserted': total_inserted,
+        'inserted': pipeline.inserted,
         'total': total,
-        'year_count': year_count,
+        'year_count': len(missing_years),
+        'gap_count': len(gap_ranges),
+        'request_count': stats['request_count'],
+        'range_timings': stats['range_timings'],
+        'stages': stats['stages'],
+        'max_queue_depth': stats['max_queue_depth'],
+        'elapsed_seconds': stats['elapsed_seconds'],
         'latest': latest
     }
 
 
+def _repair_gaps(SpiderClass, spider, db, modules, lottery_type, **options) -> Dict:
+    """
+    只补齐已有数据中的缺失期号（不爬取最新一期之后的数据）
+
+    请求数与缺失处的数量成正比，不需要重新全量爬取
+    """
+    workers = options.get('workers') or SPIDER_CONFIG['max_workers']
+    table_name = f'{lottery_type}_lottery'
+
+    calendar, gap_ranges = _scan_gaps(db, modules, lottery_type)
+    if not gap_ranges:
+        logger.info("✅ 未发现缺失期号")
+        calendar.save()
+        return {'success': True, 'inserted': 0, 'gap_count': 0, 'total': db.get_total_count(table_name),
+                'latest': db.get_latest_lottery()}
+
+    pipeline, stats = _run_pipeline(SpiderClass, spider, db, calendar, gap_ranges, RangePlanner(), workers,
+                                    options.get('batch_size'))
+    remaining = _finish_gaps(db, calendar, table_name, gap_ranges, stats['range_timings'])
+
+    total = db.get_total_count(table_name)
+    logger.info(f"✅ {modules['name']}补缺完成: {len(gap_ranges)} 处，新增 {pipeline.inserted} 条，"
+                f"数据源也没有的范围 {remaining} 处")
+
+    return {
+        'success': True,
+        'inserted': pipeline.inserted,
+        'gap_count': len(gap_ranges),
+        'total': total,
+        'request_count': stats['request_count'],
+        'range_timings': stats['range_timings'],
+        'latest': db.get_latest_lottery()
+    }
+
+
+def _scan_gaps(db, modules, lottery_type) -> Tuple[DrawCalendar, List[Tuple[str, str]]]:
+    """同步开奖日历并扫描缺失期号"""
+    latest = db.get_latest_lottery()
+    calendar = DrawCalendar.load(lottery_type)
+    calendar.sync(db, f'{lottery_type}_lottery', latest['lottery_no'] if latest else None)
+    if not latest:
+        return calendar, []
+    return calendar, scan_gaps(db, f'{lottery_type}_lottery', modules['last_issue'],
+                               calendar.weekdays(), calendar.verified_gaps)
+
+
+def _finish_gaps(db, calendar: DrawCalendar, table_name: str, gap_ranges: List[Tuple[str, str]],
+                 range_timings: List[Dict]) -> int:
+    """
+    记录请求成功但没有新增数据的补缺范围（数据源也没有这些期号，之后不再请求）并保存日历
+
+    Returns:
+        记录的范围数
+    """
+    requested = {f"{start}-{end}" for start, end in gap_ranges}
+    empty = {t['range'] for t in range_timings
+             if t['range'] in requested and t['status'] == 'ok' and t['inserted'] == 0}
+    calendar.verified_gaps |= empty
+    latest = db.get_latest_lottery()
+    calendar.sync(db, table_name, latest['lottery_no'] if latest else None)
+    calendar.save()
+    return len(empty)
+
+
+def _run_pipeline(SpiderClass, spider, db, calendar: DrawCalendar, ranges: List[Tuple[str, str]],
+                  planner: RangePlanner, workers: int, batch_size: int = None,
+                  bulk: bool = False) -> Tuple[FetchPipeline, Dict]:
+    """
+    用下载 → 解析 → 入库流水线爬取期号范围，入库的数据同时加入开奖日历
+
+    bulk=True（空表全量导入）时每 DB_BULK_LOAD_ROWS 行用 LOAD DATA LOCAL INFILE 导入一次
+    """
+    if bulk:
+        batch_size = batch_size or DB_PERFORMANCE['bulk_load_rows']
+    # 每个下载线程使用独立的爬虫实例（requests.Session 不保证线程安全，底层连接池共享）
+    local = threading.local()
+    spiders = []
+    spiders_lock = threading.Lock()
+
+    def download(start_issue: str, end_issue: str):
+        downloader = getattr(local, 'spider', None)
+        if downloader is None:
+            downloader = SpiderClass(timeout=15, retry_times=3)
+            local.spider = downloader
+            with spiders_lock:
+                spiders.append(downloader)
+        return downloader._download_range(start_issue, end_issue)
+
+    def write(rows: List[Dict]):
+        result = db.insert_lottery_data(rows, skip_existing=True, bulk=bulk)
+        calendar.add_rows(rows)
+        return result
+
+    pipeline = FetchPipeline(
+        download=download,
+        parse=spider._parse_response,
+        write=write,
+        planner=planner,
+        downloaders=workers,
+        batch_size=batch_size
+    )
+
+    stats = {'request_count': 0, 'range_timings': [], 'stages': {}, 'max_queue_depth': {}, 'elapsed_seconds': 0.0}
+    try:
+        if ranges:
+            stats = pipeline.run(ranges)
+    finally:
+        for downloader in spiders:
+            downloader.close()
+
+    _log_range_timings(stats['range_timings'], pipeline.elapsed)
+    if ranges:
+        pipeline.log_report()
+    return pipeline, stats
+
+
+def _find_missing_years(db, start_year: int, current_year: int) -> List[int]:
+    """
+    一次性计算缺失年份
+
+    判定规则与逐年模式一致：数据库最新期号所在年份之后的年份均视为缺失
+    """
+    latest = db.get_latest_lottery()
+    if not latest:
+        return list(range(start_year, current_year + 1))
+
+    latest_year = int(latest['lottery_no'][:4])
+    return list(range(max(start_year, latest_year + 1), current_year + 1))
+
+
+def _missing_range(last_issue: str, missing_years: List[int]) -> Tuple[str, str]:
+    """缺失年份对应的期号范围（5位格式）；首年为起始年份时从最后期号的下一期开始"""
+    first_short = str(missing_years[0])[2:]
+    if first_short == last_issue[:2]:
+        start_issue = f"{first_short}{int(last_issue[2:]) + 1:03d}"
+    else:
+        start_issue = f"{first_short}001"
+    end_issue = f"{str(missing_years[-1])[2:]}{YEAR_MAX_ISSUE}"
+    return start_issue, end_issue
+
+
+# 解析进程内缓存的爬虫实例和页面归档（由 _init_reparse_worker 初始化）
+_reparse_spider = None
+_reparse_archive = None
+
+
+def _init_reparse_worker(spider_class_path: str, archive_root: str):
+    """解析进程初始化：每个进程只创建一次爬虫实例"""
+    global _reparse_spider, _reparse_archive
+    _reparse_spider = import_class(spider_class_path)()
+    _reparse_archive = PageArchive(archive_root)
+
+
+def _reparse_page(entry: Dict) -> Tuple[str, List[Dict]]:
+    """在解析进程中读取归档页面并用爬虫的 _parse_html 解析"""
+    return entry['range'], _reparse_spider._parse_html(_reparse_archive.read_text(entry))
+
+
+def _reparse_from_archive(spider_class_path: str, db, modules, lottery_type, **options) -> Dict:
+    """
+    从原始页面归档重建数据表（不访问网络）
+
+    用进程池并行解析归档中的所有页面，按期号去重（较晚归档的页面优先），
+    写入影子表后与数据表原子互换（失败时原表不变）。解析结果少于现有记录数时默认放弃重建，
+    避免归档不完整导致数据丢失（可用 force 选项强制重建）。
+    """
+    archive = get_page_archive() or PageArchive()
+    entries = archive.entries(lottery_type)
+    table_name = f'{lottery_type}_lottery'
+
+    if not entries:
+        logger.warning(f"⚠️ 页面归档中没有{modules['name']}的页面，请先执行一次全量爬取")
+        return {'success': False, 'error': '页面归档为空', 'inserted': 0}
+
+    workers = options.get('workers') or PAGE_ARCHIVE_CONFIG['reparse_workers'] or os.cpu_count() or 1
+    logger.info(f"📦 从页面归档重新解析 {len(entries)} 个页面（解析进程数: {workers}）")
+
+    parse_started = time.perf_counter()
+    parsed: Dict[str, List[Dict]] = {}
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_reparse_worker,
+                             initargs=(spider_class_path, str(archive.root))) as executor:
+        for key, rows in executor.map(_reparse_page, entries, chunksize=4):
+            parsed[key] = rows
+    parse_seconds = time.perf_counter() - parse_started
+
+    # entries 按归档时间从早到晚排列，较晚的页面覆盖较早的同期数据
+    records: Dict[str, Dict] = {}
+    for entry in entries:
+        for row in parsed.get(entry['range'], []):
+            records[row['lottery_no']] = row
+
+    existing = db.get_total_count(table_name)
+    logger.info(f"   解析完成: {len(records)} 条（数据库现有 {existing} 条），耗时 {parse_seconds:.2f}s")
+
+    if not records or (len(records) < existing and not options.get('force')):
+        logger.error(f"❌ 归档解析结果（{len(records)} 条）少于数据库现有记录（{existing} 条），放弃重建；"
+                     f"确认无误后可使用 --force 强制重建")
+        return {'success': False, 'error': '归档数据不完整', 'inserted': 0, 'total': existing}
+
+    data = sorted(records.values(), key=lambda x: x['lottery_no'])
+    insert_started = time.perf_counter()
+    # 写入影子表后与数据表原子互换，入库失败时原表不变
+    inserted, duplicated, skipped = db.replace_lottery_data(data, batch_size=SPIDER_CONFIG['batch_size'],
+                                                            bulk=DB_PERFORMANCE['bulk_load'])
+    insert_seconds = time.perf_counter() - insert_started
+
+    total = db.get_total_count(table_name)
+    latest = db.get_latest_lottery()
+    logger.info(f"✅ {modules['name']}已从归档重建: 新增 {inserted} 条，重复 {duplicated} 条，跳过 {skipped} 条，"
+                f"入库耗时 {insert_seconds:.2f}s")
+
+    return {
+        'success': True,
+        'inserted': inserted,
+        'total': total,
+        'page_count': len(entries),
+        'parse_seconds': round(parse_seconds, 3),
+        'insert_seconds': round(insert_seconds, 3),
+        'latest': latest
+    }
+
+
+def _log_range_timings(range_timings: List[Dict], elapsed: float):
+    """输出每个期号范围的耗时报告，用于调整并发参数"""
+    if not range_timings:
+        return
+
+    logger.info("📊 范围耗时报告:")
+    logger.info(f"   {'期号范围':<13}{'状态':<8}{'条数':>6}{'新增':>6}{'爬取(s)':>10}{'入库(s)':>10}")
+    for t in range_timings:
+        logger.info(
+            f"   {t['range']:<17}{t['status']:<10}{t['rows']:>6}{t['inserted']:>6}"
+            f"{t['fetch_seconds']:>10.2f}{t['insert_seconds']:>10.2f}"
+        )
+
+    fetch_total = sum(t['fetch_seconds'] for t in range_timings)
+    logger.info(
+        f"   请求 {len(range_timings)} 次，爬取累计耗时 {fetch_total:.2f}s，实际总耗时 {elapsed:.2f}s，"
+        f"并发加速比 {fetch_total / elapsed if elapsed else 0:.2f}x"
+    )
+
+
 def _fetch_single_year(spider, db, modules, lottery_type, target_year: int, **options) -> Dict:
     """爬取指定年份的数据"""
     year_short = str(target_year)[2:]
@@ -300,23 +569,34 @@ def _fetch_single_year(spider, db, modules, lottery_type, target_year: int, **op
     }
 
 
+def _publish(db, lottery_type: str, full: bool) -> Dict:
+    """发布到对象存储（失败只记录警告，不影响爬取结果）"""
+    from core.publisher import HistoryPublisher
+    try:
+        return HistoryPublisher().publish(db, lottery_type, full=full)
+    except Exception as e:
+        logger.warning(f"⚠️ 发布到对象存储失败: {e}")
+        return {'error': str(e)}
+
+
 def _generate_predictions(db, modules, lottery_type, **options) -> List[Dict]:
     """生成预测结果"""
     try:
         # 动态导入预测器
         PredictorClass = import_class(modules['predictor_class'])
         
-        # 获取历史数据
-        history_data = db.get_all_lottery_data()
-        if not history_data:
-            logger.warning("无历史数据，无法进行预测")
-            return []
-        
         # 获取预测配置
         from core.config import DEFAULT_STRATEGIES, DEFAULT_PREDICTION_COUNT
         
-        # 创建预测器并预测
-        predictor = PredictorClass(history_data, strategies=DEFAULT_STRATEGIES)
+        # 创建预测器（历史数据来自本地快照，只从数据库拉取快照之后的新记录；号码矩阵构建一次，预测器与其统计类共用）
+        history = load_history(db, lottery_type)
+        matrix = HistoryMatrix.from_snapshot(history, PredictorClass.POOLS)
+        predictor = PredictorClass(matrix, strategies=DEFAULT_STRATEGIES)
+        if not predictor.history_count:
+            logger.warning("无历史数据，无法进行预测")
+            return []
+        
+        # 预测
         predictions = predictor.predict(count=DEFAULT_PREDICTION_COUNT)
         
         logger.info(f"预测结果（共 {len(predictions)} 组）")
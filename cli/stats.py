@@ -0,0 +1,57 @@
+"""
+统计表重建命令
+按数据表全量重新生成统计表（<表名>_stats：号码出现次数、最近出现期号、连号 / 奇偶形态计数）
+
+统计表在每次入库的同一事务中增量更新，一般不需要手动重建；
+统计表建立前已有数据、或手动修改过数据表时运行
+"""
+
+import logging
+from typing import Dict, List
+
+from core.config import LOG_DIR, LOTTERY_NAMES, SUPPORTED_LOTTERIES
+from core.storage import open_database
+from core.utils import load_db_config
+from cli.smart_fetch import get_lottery_modules, import_class
+
+logger = logging.getLogger(__name__)
+
+
+def setup_logging():
+    """设置日志"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(LOG_DIR / 'stats.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def rebuild_stats(lotteries: List[str] = None) -> Dict[str, Dict]:
+    """重建统计表
+
+    Args:
+        lotteries: 彩票类型（默认全部）
+
+    Returns:
+        彩票类型 -> {'draws': 统计的期数} 或 {'error': 错误信息}
+    """
+    setup_logging()
+    results = {}
+
+    for lottery_type in lotteries or SUPPORTED_LOTTERIES:
+        logger.info(f"📊 重建{LOTTERY_NAMES.get(lottery_type, lottery_type)}统计表")
+        modules = get_lottery_modules(lottery_type)
+        db = open_database(import_class(modules['database_class']), load_db_config())
+        try:
+            db.connect()
+            results[lottery_type] = {'draws': db.rebuild_stats()}
+        except Exception as e:
+            logger.error(f"❌ {lottery_type} 统计表重建失败: {e}")
+            results[lottery_type] = {'error': str(e)}
+        finally:
+            db.close()
+
+    return results
@@ -1,6 +1,6 @@
 """
 公共数据库基类
-提供数据库连接、SSL配置等通用功能
+提供数据库连接、SSL配置等通用功能（连接来自 core.db_pool 的进程内共享连接池）
 """
 
 try:
@@ -8,15 +8,37 @@ try:
 except ImportError as e:
     raise ImportError("PyMySQL 未安装。请运行 `pip install PyMySQL` 或 `pip install -r requirements.txt`. 错误详情: " + str(e))
 
+import importlib
 import logging
 import os
-from typing import Dict, Optional
+import tempfile
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from core.config import DB_PERFORMANCE
+from core.db_pool import create_connection, get_pool
+from core.history_matrix import HistoryMatrix
+from core.storage import LotteryStorage
 
 logger = logging.getLogger(__name__)
 
+# 服务器或客户端禁用 LOAD DATA LOCAL INFILE 时的错误码
+LOCAL_INFILE_DISABLED_ERRORS = {1148, 3948, 3950}
+# 本进程已确认服务器不允许 LOAD DATA LOCAL INFILE
+_bulk_load_unavailable = False
+
 
-class BaseDatabase:
-    """数据库基类，提供通用的连接和配置功能"""
+class BaseDatabase(LotteryStorage):
+    """数据库基类（MySQL 后端），提供通用的连接和配置功能"""
+
+    # 当前表结构版本：1 = 号码为 VARCHAR 列；2 = 号码为 TINYINT 列 + 每个号码池一个 BIGINT 位图（生成列）
+    SCHEMA_VERSION = 2
+    # 位图列（由子类定义，第一列用于识别表结构版本）
+    MASK_COLUMNS: Tuple[str, ...] = ()
+    # 号码列（由子类定义，顺序与 _history_record 一致）
+    HISTORY_COLUMNS: Tuple[str, ...] = ()
+    # 统计类（由子类定义，模块路径.类名，统计表的行由它生成和解析）
+    STATISTICS_CLASS = ''
 
     def __init__(self, db_config: Dict):
         """
@@ -36,46 +58,45 @@ class BaseDatabase:
         self.db_config = db_config
         self.connection = None
 
-    def connect(self):
-        """连接到数据库，使用连接池和安全配置"""
-        try:
-            params = {
-                'host': self.db_config['host'],
-                'port': self.db_config.get('port', 3306),
-                'user': self.db_config['user'],
-                'password': self.db_config['password'],
-                'database': self.db_config['database'],
-                'charset': 'utf8mb4',
-                'autocommit': False,  # 显式控制事务
-                'connect_timeout': 10,  # 连接超时
-                'read_timeout': 30,  # 读取超时
-                'write_timeout': 30,  # 写入超时
-            }
+    def _connection_params(self) -> Dict:
+        """pymysql.connect 参数（含从配置或环境变量读取的 SSL 设置）"""
+        params = {
+            'host': self.db_config['host'],
+            'port': self.db_config.get('port', 3306),
+            'user': self.db_config['user'],
+            'password': self.db_config['password'],
+            'database': self.db_config['database'],
+            'charset': 'utf8mb4',
+            'autocommit': False,  # 显式控制事务
+            'connect_timeout': DB_PERFORMANCE['connection_timeout'],  # 连接超时
+            'read_timeout': DB_PERFORMANCE['read_timeout'],  # 读取超时
+            'write_timeout': DB_PERFORMANCE['write_timeout'],  # 写入超时
+        }
+
+        use_ssl = self.db_config.get('use_ssl') or os.getenv('MYSQL_USE_SSL', 'false').lower() in ['1', 'true', 'yes']
+        ssl_ca = self.db_config.get('ssl_ca') or os.getenv('MYSQL_SSL_CA')
+        ssl_cert = self.db_config.get('ssl_cert') or os.getenv('MYSQL_SSL_CERT')
+        ssl_key = self.db_config.get('ssl_key') or os.getenv('MYSQL_SSL_KEY')
+
+        if use_ssl:
+            ssl_args = {}
+            if ssl_ca:
+                ssl_args['ca'] = ssl_ca
+            if ssl_cert:
+                ssl_args['cert'] = ssl_cert
+            if ssl_key:
+                ssl_args['key'] = ssl_key
+            params['ssl'] = ssl_args or {}
+
+        return params
 
-            # 从配置或环境变量读取 SSL 设置
-            use_ssl = self.db_config.get('use_ssl') or os.getenv('MYSQL_USE_SSL', 'false').lower() in ['1', 'true', 'yes']
-            ssl_ca = self.db_config.get('ssl_ca') or os.getenv('MYSQL_SSL_CA')
-            ssl_cert = self.db_config.get('ssl_cert') or os.getenv('MYSQL_SSL_CERT')
-            ssl_key = self.db_config.get('ssl_key') or os.getenv('MYSQL_SSL_KEY')
-
-            if use_ssl:
-                ssl_args = {}
-                if ssl_ca:
-                    ssl_args['ca'] = ssl_ca
-                if ssl_cert:
-                    ssl_args['cert'] = ssl_cert
-                if ssl_key:
-                    ssl_args['key'] = ssl_key
-                params['ssl'] = ssl_args or {}
-
-            self.connection = pymysql.connect(**params)
-            
-            # 设置会话变量，优化性能
-            with self.connection.cursor() as cursor:
-                cursor.execute("SET SESSION sql_mode='STRICT_TRANS_TABLES,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO'")
-                cursor.execute("SET SESSION time_zone='+08:00'")  # 设置时区
-            
-            logger.info("数据库连接成功")
+    def connect(self):
+        """从进程内共享的连接池借出连接（会话设置只在新建连接时执行一次）"""
+        if self.connection:
+            return
+        try:
+            self.connection = get_pool(self._connection_params()).acquire()
+            logger.debug("数据库连接成功")
         except pymysql.Error as e:
             logger.error(f"数据库连接失败: {e}")
             if 'insecure transport' in str(e).lower() or 'secure' in str(e).lower():
@@ -83,19 +104,41 @@ class BaseDatabase:
             raise
     
     def ensure_connection(self):
-        """确保数据库连接有效，如果断开则重连"""
+        """确保数据库连接有效，如果断开则换一个连接"""
         try:
             if self.connection:
-                self.connection.ping(reconnect=True)
-        except:
+                self.connection.ping(reconnect=False)
+        except Exception:
             logger.warning("数据库连接已断开，正在重连...")
+            get_pool(self._connection_params()).release(self.connection, discard=True)
+            self.connection = None
             self.connect()
 
     def close(self):
-        """关闭数据库连接"""
+        """归还数据库连接（连接由连接池保持，不真正断开）"""
         if self.connection:
-            self.connection.close()
-            logger.info("数据库连接已关闭")
+            get_pool(self._connection_params()).release(self.connection)
+            self.connection = None
+            logger.debug("数据库连接已归还连接池")
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __del__(self):
+        # 调用方异常退出未 close 时归还连接，避免占满连接池
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    @property
+    def insert_mode(self) -> str:
+        """入库方式（DB_INSERT_MODE）"""
+        return DB_PERFORMANCE['insert_mode']
 
     def execute_query(self, sql: str, params: tuple = None):
         """执行查询"""
@@ -122,3 +165,662 @@ class BaseDatabase:
             return int(row[0]) if row else 0
         finally:
             cursor.close()
+
+    def iter_rows(self, sql: str, params: tuple = None, chunk_size: int = None) -> Iterator[List[tuple]]:
+        """
+        服务端游标（SSCursor）流式读取查询结果，每次返回 chunk_size 行
+
+        结果集不会一次性读入内存；迭代结束（或生成器关闭）前连接被游标占用，
+        期间不能在同一连接上执行其他语句
+
+        Args:
+            sql: 查询语句
+            params: 查询参数
+            chunk_size: 每块行数（默认 DB_STREAM_CHUNK_ROWS）
+        """
+        if not self.connection:
+            self.connect()
+
+        chunk_size = chunk_size or DB_PERFORMANCE['stream_chunk_rows']
+        cursor = self.connection.cursor(pymysql.cursors.SSCursor)
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            # 提前结束时 close 会读完并丢弃剩余结果，连接可继续使用
+            cursor.close()
+
+    @staticmethod
+    def _history_record(row) -> Dict:
+        """(期号, 开奖日期, 号码列...) -> 预测器/统计类使用的记录（由子类实现）"""
+        raise NotImplementedError
+
+    def iter_lottery_data(self, chunk_size: int = None) -> Iterator[List[Dict]]:
+        """
+        流式读取所有中奖数据（服务端游标，按块返回，按开奖日期从新到旧）
+
+        号码为整数元组；可直接传给预测器和统计类，边读边分析，内存占用不随历史数据增长
+
+        Args:
+            chunk_size: 每块行数（默认 DB_STREAM_CHUNK_ROWS）
+        """
+        sql = f"""
+            SELECT lottery_no, draw_date, {', '.join(self.HISTORY_COLUMNS)}
+            FROM {self.table_name}
+            ORDER BY draw_date DESC, lottery_no DESC
+        """
+        for rows in self.iter_rows(sql, chunk_size=chunk_size):
+            yield [self._history_record(row) for row in rows]
+
+    def iter_history_rows(self, after: str = None, chunk_size: int = None) -> Iterator[List[tuple]]:
+        """
+        流式读取 (期号, 开奖日期, 号码列..., updated_at)，按期号从小到大（历史快照增量同步使用）
+
+        Args:
+            after: 只返回大于该期号的记录（走 lottery_no 索引）
+            chunk_size: 每块行数（默认 DB_STREAM_CHUNK_ROWS）
+        """
+        sql = f"SELECT lottery_no, draw_date, {', '.join(self.HISTORY_COLUMNS)}, updated_at FROM {self.table_name}"
+        params = None
+        if after:
+            sql += " WHERE lottery_no > %s"
+            params = (after,)
+        yield from self.iter_rows(sql + " ORDER BY lottery_no", params, chunk_size)
+
+    def history_fingerprint(self) -> Tuple[int, Optional[str]]:
+        """(记录数, 最近更新时间)：与历史快照比对，判断是否有新增、补缺或覆盖更新"""
+        if not self.connection:
+            self.connect()
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"SELECT COUNT(*), MAX(updated_at) FROM {self.table_name}")
+            count, updated_at = cursor.fetchone()
+            return int(count), str(updated_at) if updated_at is not None else None
+        finally:
+            cursor.close()
+
+    def truncate_table(self, table_name: str):
+        """清空表并重置自增 ID（重建数据时使用，保证 ID 与期号同序递增），清空数据表时统计表一并清空"""
+        if not self.connection:
+            self.connect()
+
+        clear_stats = table_name == self.table_name
+        if clear_stats:
+            self.create_stats_table()
+        cursor = self.connection.cursor()
+        try:
+            # TRUNCATE 会隐式提交，统计表用 DELETE 先清空，随 TRUNCATE 一起提交
+            if clear_stats:
+                cursor.execute(f"DELETE FROM {self.stats_table}")
+            cursor.execute(f"TRUNCATE TABLE {table_name}")
+            self.connection.commit()
+            logger.info(f"已清空表 {table_name}")
+        finally:
+            cursor.close()
+
+    def replace_lottery_data(self, data: List[Dict], batch_size: int = 100, bulk: bool = False) -> Tuple[int, int, int]:
+        """
+        用 data 整体替换数据表（从页面归档重建时使用），写入失败时原表和统计表保持不变
+
+        1. 按建表语句创建影子表 <表名>_rebuild 及其统计表
+        2. 用 insert_lottery_data 写入影子表（统计表在同一事务中生成）
+        3. 原子地把影子表与正式表互换（数据表和统计表一起），删除换下的旧表
+
+        Returns:
+            (inserted, duplicated, skipped) 元组
+        """
+        self.ensure_connection()
+        table, stats_table = self.table_name, self.stats_table
+        shadow = f"{table}_rebuild"
+
+        self._drop_tables(shadow, f"{shadow}_stats")
+        self._create_shadow_table(shadow)
+        self.table_name = shadow
+        try:
+            self.create_stats_table()
+            result = self.insert_lottery_data(data, skip_existing=False, batch_size=batch_size, bulk=bulk)
+            self.table_name = table
+            self.create_stats_table()
+            self._swap_tables([(shadow, table), (f"{shadow}_stats", stats_table)])
+        except Exception:
+            self.table_name = table
+            self._drop_tables(shadow, f"{shadow}_stats")
+            raise
+        logger.info(f"表 {table} 已整体替换为 {result[0] + result[1]} 条")
+        return result
+
+    def _create_shadow_table(self, shadow: str):
+        """按当前建表语句创建影子表"""
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(self._table_sql(shadow))
+            self.connection.commit()
+        finally:
+            cursor.close()
+
+    def _drop_tables(self, *tables: str):
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"DROP TABLE IF EXISTS {', '.join(tables)}")
+            self.connection.commit()
+        finally:
+            cursor.close()
+
+    def _swap_tables(self, pairs: List[Tuple[str, str]]):
+        """一条 RENAME TABLE 把 (影子表, 正式表) 原子地互换，随后删除换下的旧表"""
+        renames = []
+        for shadow, table in pairs:
+            renames += [f"{table} TO {table}_replaced", f"{shadow} TO {table}"]
+        self._drop_tables(*(f"{table}_replaced" for _, table in pairs))
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"RENAME TABLE {', '.join(renames)}")
+            self.connection.commit()
+        finally:
+            cursor.close()
+        self._drop_tables(*(f"{table}_replaced" for _, table in pairs))
+
+    def get_draw_dates(self, table_name: str, after: str = None) -> List[Tuple[str, str]]:
+        """
+        获取期号与开奖日期（按期号从小到大）
+
+        Args:
+            table_name: 表名
+            after: 只返回大于该期号的记录
+        """
+        if not self.connection:
+            self.connect()
+
+        cursor = self.connection.cursor()
+        try:
+            if after:
+                cursor.execute(f"SELECT lottery_no, draw_date FROM {table_name} WHERE lottery_no > %s ORDER BY lottery_no",
+                               (after,))
+            else:
+                cursor.execute(f"SELECT lottery_no, draw_date FROM {table_name} ORDER BY lottery_no")
+            return [(row[0], str(row[1])) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def get_issue_breaks(self, table_name: str, first_issue: str) -> List[Tuple[str, Optional[str], str, str]]:
+        """
+        一次扫描找出期号不连续的位置（窗口函数 LAG，需要 MySQL 8.0+ / TiDB）
+
+        同一年内期号相差大于 1、跨年、以及第一条记录不是 first_issue 的下一期时返回
+        (上一期号, 上一期开奖日期, 期号, 开奖日期)；第一条记录的上一期为 first_issue（开奖日期为 None）
+
+        Args:
+            table_name: 表名
+            first_issue: 起始期号之前的虚拟期号（7位，如 '2003000'）
+        """
+        if not self.connection:
+            self.connect()
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT prev_no, prev_date, lottery_no, draw_date
+                FROM (
+                    SELECT lottery_no, draw_date,
+                           LAG(lottery_no, 1, %s) OVER w AS prev_no,
+                           LAG(draw_date) OVER w AS prev_date
+                    FROM {table_name}
+                    WINDOW w AS (ORDER BY lottery_no)
+                ) AS t
+                WHERE LEFT(lottery_no, 4) <> LEFT(prev_no, 4)
+                   OR CAST(lottery_no AS UNSIGNED) <> CAST(prev_no AS UNSIGNED) + 1
+                ORDER BY lottery_no
+            """, (first_issue,))
+            return [
+                (row[0], str(row[1]) if row[1] is not None else None, row[2], str(row[3]))
+                for row in cursor.fetchall()
+            ]
+        finally:
+            cursor.close()
+
+    def _table_sql(self, table_name: str) -> str:
+        """当前版本的建表语句（由子类实现，表名可替换以便迁移时创建影子表）"""
+        raise NotImplementedError
+
+    # ---------- 表结构版本与迁移 ----------
+
+    def _table_columns(self, table_name: str) -> Dict[str, str]:
+        """表的列名 -> EXTRA（生成列的 EXTRA 含 GENERATED），表不存在时返回空字典"""
+        if not self.connection:
+            self.connect()
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(
+                "SELECT COLUMN_NAME, EXTRA FROM information_schema.COLUMNS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION",
+                (table_name,)
+            )
+            return {row[0]: row[1] or '' for row in cursor.fetchall()}
+        finally:
+            cursor.close()
+
+    def schema_version(self) -> int:
+        """当前表结构版本（0 表示表不存在）"""
+        columns = self._table_columns(self.table_name)
+        if not columns:
+            return 0
+        return self.SCHEMA_VERSION if self.MASK_COLUMNS[0] in columns else 1
+
+    def warn_if_outdated(self):
+        """表结构低于当前版本时提示迁移（create_table 之后调用）"""
+        version = self.schema_version()
+        if 0 < version < self.SCHEMA_VERSION:
+            logger.warning(f"⚠️ 表 {self.table_name} 为旧结构（v{version}），"
+                           f"运行 `python lottery.py migrate` 升级到 v{self.SCHEMA_VERSION}（位图列、整数号码列）")
+
+    def migrate_schema(self, chunk_rows: int = 2000) -> Dict:
+        """
+        在线迁移到当前表结构版本（影子表复制，迁移期间原表可继续读写）
+
+        1. 按当前建表语句创建影子表 <表名>_v2
+        2. 按 id 分段把原表数据复制到影子表（每段一个事务，位图由生成列自动计算）
+        3. 把复制期间原表新增（id 更大）或更新（updated_at 更新）的行补写到影子表
+        4. LOCK TABLES 锁住两张表，再补写一次上一步之后的变更，然后 RENAME TABLE
+           把原表改名为 <表名>_v1、影子表改名为正式表，解锁（写入只在最后这一小段被阻塞）
+
+        补写不带 id 列，以期号为唯一键 upsert，已复制的行按原表最新内容覆盖
+
+        旧表 <表名>_v1 保留作为备份，确认无误后可手动删除
+
+        Returns:
+            {'migrated': bool, 'from_version', 'to_version', 'rows', 'backup_table'}
+        """
+        table, shadow, backup = self.table_name, f"{self.table_name}_v2", f"{self.table_name}_v1"
+        version = self.schema_version()
+        result = {'migrated': False, 'from_version': version, 'to_version': self.SCHEMA_VERSION,
+                  'rows': 0, 'backup_table': None}
+        if version in (0, self.SCHEMA_VERSION):
+            logger.info(f"表 {table} 已是 v{self.SCHEMA_VERSION}，无需迁移" if version else f"表 {table} 不存在，无需迁移")
+            return result
+        if self._table_columns(backup):
+            raise RuntimeError(f"备份表 {backup} 已存在，请确认后删除再迁移")
+
+        cursor = self.connection.cursor()
+        locked = False
+        try:
+            cursor.execute(f"DROP TABLE IF EXISTS {shadow}")
+            cursor.execute(self._table_sql(shadow))
+            self.connection.commit()
+
+            shadow_columns = {name for name, extra in self._table_columns(shadow).items() if 'GENERATED' not in extra.upper()}
+            columns = [name for name in self._table_columns(table) if name in shadow_columns]
+            column_sql = ', '.join(columns)
+            copy_sql = (f"INSERT INTO {shadow} ({column_sql}) SELECT {column_sql} FROM {table} "
+                        f"WHERE id > %s AND id <= %s ORDER BY id")
+            # 补写不带 id：影子表的自增 id 与复制时保留的 id 不冲突，期号是唯一的键
+            delta_columns = [name for name in columns if name != 'id']
+            delta_column_sql = ', '.join(delta_columns)
+            updates = ', '.join(f"{col} = VALUES({col})" for col in delta_columns if col != 'lottery_no')
+            delta_where = "WHERE id > %s OR updated_at >= %s"
+            delta_sql = (f"INSERT INTO {shadow} ({delta_column_sql}) SELECT {delta_column_sql} FROM {table} "
+                         f"{delta_where} ORDER BY id ON DUPLICATE KEY UPDATE {updates}")
+
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0), NOW() FROM {table}")
+            last_id, copy_started = cursor.fetchone()
+            copied = 0
+            for start in range(0, last_id, chunk_rows):
+                copied += cursor.execute(copy_sql, (start, min(start + chunk_rows, last_id)))
+                self.connection.commit()
+            logger.info(f"   已复制 {copied} 条到 {shadow}")
+
+            # 复制期间的变更（不加锁，缩短下面的锁表时间）
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0), NOW() FROM {table}")
+            delta_id, delta_started = cursor.fetchone()
+            cursor.execute(f"SELECT COUNT(*) FROM {table} {delta_where}", (last_id, copy_started))
+            late = cursor.fetchone()[0]
+            cursor.execute(delta_sql, (last_id, copy_started))
+            self.connection.commit()
+
+            # 锁表补写最后的变更并改名（LOCK TABLES 会隐式提交，改名须在锁内完成）
+            cursor.execute(f"LOCK TABLES {table} WRITE, {shadow} WRITE")
+            locked = True
+            cursor.execute(f"SELECT COUNT(*) FROM {table} {delta_where}", (delta_id, delta_started))
+            late += cursor.fetchone()[0]
+            cursor.execute(delta_sql, (delta_id, delta_started))
+            self.connection.commit()
+            cursor.execute(f"RENAME TABLE {table} TO {backup}, {shadow} TO {table}")
+            cursor.execute("UNLOCK TABLES")
+            locked = False
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            rows = cursor.fetchone()[0]
+        except pymysql.Error as e:
+            self.connection.rollback()
+            logger.error(f"迁移表 {table} 失败: {e}")
+            raise
+        finally:
+            if locked:
+                cursor.execute("UNLOCK TABLES")
+            cursor.close()
+
+        logger.info(f"✅ 表 {table} 已迁移到 v{self.SCHEMA_VERSION}: {rows} 条（迁移期间补写变更 {late} 条），旧表保留为 {backup}")
+        result.update({'migrated': True, 'rows': rows, 'backup_table': backup})
+        return result
+
+    def get_overlapping_draws(self, conditions: Dict[str, Tuple[int, int]]) -> List[Dict]:
+        """
+        用位图列在 SQL 中查询与给定号码重合的历史开奖（BIT_COUNT(位图 & 号码位图) >= 最少重合数）
+
+        Args:
+            conditions: 位图列 -> (号码位图, 最少重合数)，如 {'red_mask': (mask, 4)}
+
+        Returns:
+            [{'lottery_no', 'draw_date', '<号码池>_common': 重合数, ...}]（如 red_mask -> red_common），按期号从小到大
+        """
+        if not self.connection:
+            self.connect()
+
+        selects, wheres, params = [], [], []
+        for column, (mask, _) in conditions.items():
+            selects.append(f"BIT_COUNT({column} & %s) AS {_common_key(column)}")
+            wheres.append(f"BIT_COUNT({column} & %s) >= %s")
+            params.append(mask)
+        for mask, min_common in conditions.values():
+            params.extend([mask, min_common])
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(
+                f"SELECT lottery_no, draw_date, {', '.join(selects)} FROM {self.table_name} "
+                f"WHERE {' AND '.join(wheres) or 'TRUE'} ORDER BY lottery_no",
+                params
+            )
+            return [
+                {'lottery_no': row[0], 'draw_date': str(row[1]),
+                 **{_common_key(column): int(row[2 + i]) for i, column in enumerate(conditions)}}
+                for row in cursor.fetchall()
+            ]
+        finally:
+            cursor.close()
+
+    # ---------- 统计表 ----------
+
+    @property
+    def stats_table(self) -> str:
+        """统计表表名（如 ssq_lottery_stats）"""
+        return f"{self.table_name}_stats"
+
+    def _stats_table_sql(self) -> str:
+        """统计表建表语句：每个号码一行（出现次数、最近出现的期号），连号、奇偶等形态每种一行"""
+        return f"""
+        CREATE TABLE IF NOT EXISTS {self.stats_table} (
+            kind VARCHAR(32) NOT NULL COMMENT '统计项（号码池、consecutive、odd_even，draws 为累计期数）',
+            item VARCHAR(32) NOT NULL COMMENT '号码或形态',
+            hits INT UNSIGNED NOT NULL DEFAULT 0 COMMENT '出现次数',
+            last_issue VARCHAR(20) NULL COMMENT '最近出现的期号',
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (kind, item)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+        """
+
+    def _stats_merge_sql(self) -> str:
+        """把增量累加到统计表（出现次数相加，最近期号取较大者）"""
+        return (f"INSERT INTO {self.stats_table} (kind, item, hits, last_issue) VALUES (%s, %s, %s, %s) "
+                f"ON DUPLICATE KEY UPDATE hits = hits + VALUES(hits), "
+                f"last_issue = NULLIF(GREATEST(COALESCE(last_issue, ''), COALESCE(VALUES(last_issue), '')), '')")
+
+    def create_stats_table(self):
+        """创建统计表（已存在时不变）"""
+        if not self.connection:
+            self.connect()
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(self._stats_table_sql())
+            self.connection.commit()
+        finally:
+            cursor.close()
+
+    def new_statistics(self):
+        """空的统计器（STATISTICS_CLASS 的实例）"""
+        module_name, class_name = self.STATISTICS_CLASS.rsplit('.', 1)
+        return getattr(importlib.import_module(module_name), class_name)()
+
+    def _max_id(self, cursor) -> int:
+        """当前最大 ID（写入前记录，写入后 id 大于它的即本事务新增的记录）"""
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {self.table_name}")
+        return int(cursor.fetchone()[0])
+
+    def _update_stats(self, cursor, since_id: int, rebuild: bool = False) -> int:
+        """
+        在写入事务内更新统计表（由调用方提交，写入失败回滚时统计表一同回滚）
+
+        Args:
+            cursor: 写入数据使用的游标
+            since_id: 写入前的最大 ID，只统计本事务新增的记录
+            rebuild: 覆盖写入改变了已有记录的号码时为 True，清空统计表后按全表重新统计
+
+        Returns:
+            本次统计的期数
+        """
+        if rebuild:
+            cursor.execute(f"DELETE FROM {self.stats_table}")
+            since_id = 0
+
+        statistics = self.new_statistics()
+        cursor.execute(
+            f"SELECT lottery_no, draw_date, {', '.join(self.HISTORY_COLUMNS)} FROM {self.table_name} WHERE id > %s",
+            (since_id,)
+        )
+        while True:
+            rows = cursor.fetchmany(DB_PERFORMANCE['stream_chunk_rows'])
+            if not rows:
+                break
+            statistics.update(HistoryMatrix.from_rows(rows, statistics.POOLS))
+
+        if statistics.draw_count:
+            cursor.executemany(self._stats_merge_sql(), statistics.to_rows())
+        return statistics.draw_count
+
+    def rebuild_stats(self) -> int:
+        """
+        按全表重新生成统计表（一个事务）
+
+        Returns:
+            统计的期数
+        """
+        self.create_stats_table()
+        cursor = self.connection.cursor()
+        try:
+            draws = self._update_stats(cursor, 0, rebuild=True)
+            self.connection.commit()
+        except Exception as e:
+            self.connection.rollback()
+            logger.error(f"重建统计表 {self.stats_table} 失败: {e}")
+            raise
+        finally:
+            cursor.close()
+
+        logger.info(f"📊 统计表 {self.stats_table} 已重建: {draws} 期")
+        return draws
+
+    def load_statistics(self):
+        """
+        从统计表读取统计结果（读取的行数与号码池大小相当，与历史期数无关）
+
+        统计表中的累计期数与数据表记录数不一致时（统计表建立前已有数据、清空或手动删除过记录）先重建
+        """
+        self.create_stats_table()
+        statistics = self._read_stats()
+        total = self.get_total_count(self.table_name)
+        if statistics.draw_count != total:
+            logger.info(f"统计表 {self.stats_table} 累计 {statistics.draw_count} 期，数据表 {total} 期，重新统计")
+            self.rebuild_stats()
+            statistics = self._read_stats()
+        return statistics
+
+    def _read_stats(self):
+        statistics_class = type(self.new_statistics())
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"SELECT kind, item, hits, last_issue FROM {self.stats_table}")
+            return statistics_class.from_rows(cursor.fetchall())
+        finally:
+            cursor.close()
+
+    # ---------- 批量写入 ----------
+
+    @staticmethod
+    def _upsert_clause(table_name: str, columns: Sequence[str], skip_existing: bool) -> str:
+        """
+        ON DUPLICATE KEY UPDATE 子句：跳过时为空操作，覆盖时更新数据列并刷新 updated_at
+        （列名带表名前缀，INSERT ... SELECT 的来源表有同名列时不会产生歧义）
+        """
+        if skip_existing:
+            return f"ON DUPLICATE KEY UPDATE {table_name}.{columns[0]} = {table_name}.{columns[0]}"
+        updates = ', '.join(f"{table_name}.{col} = VALUES({col})" for col in columns[1:] if col != 'created_at')
+        return f"ON DUPLICATE KEY UPDATE {updates}, {table_name}.updated_at = NOW()"
+
+    @staticmethod
+    def _upsert_counts(affected: int, rows: int, skip_existing: bool) -> Tuple[int, int, int]:
+        """由 INSERT ... ON DUPLICATE KEY 的影响行数换算 (inserted, duplicated, skipped)"""
+        if skip_existing:
+            return affected, 0, rows - affected
+        updated = min(rows, max(0, affected - rows))
+        return rows - updated, updated, 0
+
+    def upsert_rows(self, table_name: str, columns: Sequence[str], rows: List[tuple],
+                    skip_existing: bool = True, chunk_rows: int = None) -> Tuple[int, int, int]:
+        """
+        依赖期号唯一键的多行 INSERT ... ON DUPLICATE KEY，不预先查询已存在的期号，整批只提交一次
+        （统计表在同一事务中更新，见 _update_stats）
+
+        - skip_existing=True：已存在的期号保持不变（影响行数 0），影响行数即新增条数
+        - skip_existing=False：已存在的期号用新数据覆盖并刷新 updated_at（影响行数 2），
+          重复条数 = 影响行数 - 行数（同一秒内重复写入完全相同的数据时 MySQL 不计入，重复条数会偏少）
+
+        Args:
+            table_name: 表名
+            columns: 列名（第一列为 lottery_no）
+            rows: 与 columns 对应的数据
+            skip_existing: 是否跳过已存在的数据
+            chunk_rows: 单条语句的最大行数（默认 DB_UPSERT_BATCH_ROWS）
+
+        Returns:
+            (inserted, duplicated, skipped) 元组
+        """
+        if not rows:
+            return 0, 0, 0
+        if not self.connection:
+            self.connect()
+
+        chunk_rows = max(1, chunk_rows or DB_PERFORMANCE['upsert_batch_rows'])
+        row_sql = '(' + ', '.join(['%s'] * len(columns)) + ')'
+        update_sql = self._upsert_clause(table_name, columns, skip_existing)
+
+        totals = [0, 0, 0]
+        cursor = self.connection.cursor()
+        try:
+            since_id = self._max_id(cursor)
+            for i in range(0, len(rows), chunk_rows):
+                chunk = rows[i:i + chunk_rows]
+                sql = (f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES "
+                       + ', '.join([row_sql] * len(chunk)) + f" {update_sql}")
+                affected = cursor.execute(sql, [value for row in chunk for value in row])
+                for index, count in enumerate(self._upsert_counts(affected, len(chunk), skip_existing)):
+                    totals[index] += count
+            self._update_stats(cursor, since_id, rebuild=totals[1] > 0)
+            self.connection.commit()
+        except pymysql.Error as e:
+            self.connection.rollback()
+            logger.error(f"批量写入失败: {e}")
+            raise
+        finally:
+            cursor.close()
+
+        return tuple(totals)
+
+    def bulk_load_rows(self, table_name: str, columns: Sequence[str], rows: List[tuple],
+                       skip_existing: bool = True) -> Tuple[int, int, int]:
+        """
+        LOAD DATA LOCAL INFILE 批量导入（空表全量导入用）
+
+        数据按 columns 顺序写入临时 TSV，用单独开启 local_infile 的连接导入同结构的临时表，
+        再以一条 INSERT ... SELECT ... ON DUPLICATE KEY 合并到正式表（计数规则同 upsert_rows，统计表在合并的事务中更新）。
+        服务器或权限不允许时回退为 upsert_rows；服务器禁用 local_infile 时本进程之后不再尝试
+
+        Returns:
+            (inserted, duplicated, skipped) 元组
+        """
+        global _bulk_load_unavailable
+        if not rows:
+            return 0, 0, 0
+        if _bulk_load_unavailable:
+            return self.upsert_rows(table_name, columns, rows, skip_existing)
+
+        stage_table = f"{table_name}_stage"
+        column_sql = ', '.join(columns)
+        tsv_path = _write_tsv(rows)
+        connection = None
+        try:
+            connection = create_connection({**self._connection_params(), 'local_infile': True})
+            with connection.cursor() as cursor:
+                cursor.execute(f"CREATE TEMPORARY TABLE {stage_table} LIKE {table_name}")
+                loaded = cursor.execute(
+                    f"LOAD DATA LOCAL INFILE %s INTO TABLE {stage_table} CHARACTER SET utf8mb4 "
+                    f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({column_sql})",
+                    (tsv_path,)
+                )
+                if loaded != len(rows):
+                    logger.warning(f"LOAD DATA 导入 {loaded} 行，预期 {len(rows)} 行")
+                since_id = self._max_id(cursor)
+                affected = cursor.execute(
+                    f"INSERT INTO {table_name} ({column_sql}) "
+                    f"SELECT {column_sql} FROM {stage_table} ORDER BY lottery_no "
+                    + self._upsert_clause(table_name, columns, skip_existing)
+                )
+                counts = self._upsert_counts(affected, loaded, skip_existing)
+                self._update_stats(cursor, since_id, rebuild=counts[1] > 0)
+                cursor.execute(f"DROP TEMPORARY TABLE {stage_table}")
+            connection.commit()
+            return counts
+        except pymysql.Error as e:
+            if connection:
+                try:
+                    connection.rollback()
+                except pymysql.Error:
+                    pass
+            if e.args and e.args[0] in LOCAL_INFILE_DISABLED_ERRORS:
+                _bulk_load_unavailable = True
+                logger.warning(f"⚠️ 数据库不允许 LOAD DATA LOCAL INFILE，改用批量 INSERT: {e}")
+            else:
+                logger.warning(f"⚠️ LOAD DATA 导入失败，改用批量 INSERT: {e}")
+            return self.upsert_rows(table_name, columns, rows, skip_existing)
+        finally:
+            if connection:
+                connection.close()
+            os.remove(tsv_path)
+
+
+def _common_key(mask_column: str) -> str:
+    """位图列对应的重合数字段名（red_mask -> red_common）"""
+    return mask_column[:-len('_mask')] + '_common' if mask_column.endswith('_mask') else f"{mask_column}_common"
+
+
+def _tsv_field(value) -> str:
+    """LOAD DATA 默认转义规则下的字段值（None 写为 \\N）"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        value = value.strftime('%Y-%m-%d %H:%M:%S')
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def _write_tsv(rows: List[tuple]) -> str:
+    """把数据写入临时 TSV 文件，返回路径（调用方负责删除）"""
+    fd, path = tempfile.mkstemp(prefix='lottery_', suffix='.tsv')
+    with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+        for row in rows:
+            f.write('\t'.join(_tsv_field(value) for value in row) + '\n')
+    return path
@@ -4,29 +4,81 @@
 """
 
 import logging
-from typing import List, Dict, Set
+from typing import List, Dict, Iterable, Iterator, Optional, Set, Tuple
 from collections import Counter
 from abc import ABC, abstractmethod
 
+from core.history_matrix import HistoryMatrix, Pools
+from core.strategy_context import StrategyContext, Version, get_strategy_context
+
 logger = logging.getLogger(__name__)
 
 
+def iter_records(lottery_data: Iterable) -> Iterator[Dict]:
+    """
+    逐条返回历史数据
+
+    Args:
+        lottery_data: 记录列表，或按块返回记录列表的迭代器（数据库类的 iter_lottery_data）
+    """
+    for item in lottery_data:
+        if isinstance(item, dict):
+            yield item
+        else:
+            yield from item
+
+
+def to_history_matrix(lottery_data, pools: Pools, record_balls) -> HistoryMatrix:
+    """
+    把输入的历史数据转换为 HistoryMatrix（已经是 HistoryMatrix 时原样返回，与调用方共用）
+
+    Args:
+        lottery_data: HistoryMatrix、记录列表，或按块返回记录列表的迭代器
+        pools: 号码池定义
+        record_balls: 记录 -> 号码列
+    """
+    if isinstance(lottery_data, HistoryMatrix):
+        return lottery_data
+    return HistoryMatrix.from_records(iter_records(lottery_data), pools, record_balls)
+
+
 class BasePredictor(ABC):
     """预测器基类"""
 
-    def __init__(self, lottery_data: List[Dict]):
+    # 号码池定义（子类设置，名称 -> (号码列切片, 最大号码)）
+    POOLS: Pools = {}
+
+    def __init__(self, lottery_data):
         """
         初始化预测器
 
         Args:
-            lottery_data: 历史中奖数据列表
+            lottery_data: HistoryMatrix（一次运行只构建一次，与统计类共用），
+                          或历史中奖数据列表、iter_lottery_data() 返回的分块迭代器（转换为 HistoryMatrix）
         """
-        self.lottery_data = lottery_data
-        self._analyze_history()
+        self.lottery_data = lottery_data if isinstance(lottery_data, list) else []
+        self.matrix = to_history_matrix(lottery_data, self.POOLS, self.record_balls)
+        self.history_count = len(self.matrix)
+        self._analyze_history(self.matrix)
+
+    @staticmethod
+    @abstractmethod
+    def record_balls(data: Dict) -> List[int]:
+        """记录 -> 号码列（子类实现，顺序同数据库类的 HISTORY_COLUMNS）"""
+        pass
+
+    @abstractmethod
+    def _analyze_history(self, matrix: HistoryMatrix):
+        """分析历史数据（子类实现，对 HistoryMatrix 做向量化统计）"""
+        pass
+
+    def strategy_context(self) -> StrategyContext:
+        """策略上下文（同一历史版本只计算一次，多次 predict 调用、多个预测器实例共用）"""
+        return get_strategy_context(type(self).__name__, self.matrix, self._build_strategy_context)
 
     @abstractmethod
-    def _analyze_history(self):
-        """分析历史数据（子类实现）"""
+    def _build_strategy_context(self, version: Version) -> StrategyContext:
+        """由分析结果构建策略上下文（子类实现）"""
         pass
 
     @abstractmethod
@@ -54,16 +106,106 @@ class BasePredictor(ABC):
 
 
 class BaseStatistics(ABC):
-    """统计分析基类"""
+    """统计分析基类
 
-    def __init__(self, lottery_data: List[Dict]):
+    统计结果由若干计数器组成（_counters：统计项 -> Counter），可以与统计表的行相互转换（to_rows / from_rows），
+    数据库写入新开奖时在同一事务中累加，预测时直接读取，不再扫描历史数据；
+    每次累加都是对 HistoryMatrix 的向量化归约（_add_matrix）
+    """
+
+    # 号码池定义（子类设置，与预测器相同；号码池名称即统计项名称）
+    POOLS: Pools = {}
+
+    # 统计表中记录累计期数的统计项（item 为 TOTAL_ITEM，last_issue 为最新期号）
+    DRAWS_KIND = 'draws'
+    TOTAL_ITEM = 'total'
+
+    def __init__(self, lottery_data: Iterable = None):
         """
         初始化统计器
 
         Args:
-            lottery_data: 历史中奖数据列表
+            lottery_data: HistoryMatrix，或历史中奖数据列表、iter_lottery_data() 返回的分块迭代器
         """
-        self.lottery_data = lottery_data
+        self.draw_count = 0
+        self.latest_issue: Optional[str] = None
+        # 号码池 -> {号码: 最近出现的期号}
+        self.last_seen: Dict[str, Dict] = {}
+        self._reset()
+        if lottery_data is not None:
+            self.update(lottery_data)
+
+    def update(self, lottery_data):
+        """累加一批历史数据（HistoryMatrix、记录列表或分块迭代器，可多次调用，只保留统计结果）"""
+        matrix = to_history_matrix(lottery_data, self.POOLS, self.record_balls)
+        if not len(matrix):
+            return
+        self._add_matrix(matrix)
+        for kind in self.POOLS:
+            self._mark_seen(kind, matrix.last_seen(kind))
+        self.draw_count += len(matrix)
+        if self.latest_issue is None or matrix.latest_issue > self.latest_issue:
+            self.latest_issue = matrix.latest_issue
+
+    def _mark_seen(self, kind: str, latest: Dict):
+        """合并号码池中号码最近出现的期号（号码 -> 期号）"""
+        seen = self.last_seen.setdefault(kind, {})
+        for ball, lottery_no in latest.items():
+            if ball not in seen or lottery_no > seen[ball]:
+                seen[ball] = lottery_no
+
+    def get_last_seen(self) -> Dict[str, Dict]:
+        """各号码池中每个号码最近出现的期号"""
+        return {kind: dict(sorted(seen.items())) for kind, seen in self.last_seen.items()}
+
+    # ---------- 统计表 ----------
+
+    def to_rows(self) -> List[Tuple[str, str, int, Optional[str]]]:
+        """统计结果 -> 统计表的行 (kind, item, hits, last_issue)，第一行为累计期数"""
+        rows = [(self.DRAWS_KIND, self.TOTAL_ITEM, self.draw_count, self.latest_issue)]
+        for kind, counter in self._counters().items():
+            seen = self.last_seen.get(kind, {})
+            rows.extend((kind, str(item), hits, seen.get(item)) for item, hits in sorted(counter.items(), key=str))
+        return rows
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, str, int, Optional[str]]]) -> 'BaseStatistics':
+        """统计表的行 -> 统计器（读取的行数与号码池大小相当，与历史期数无关）"""
+        statistics = cls()
+        counters = statistics._counters()
+        for kind, item, hits, last_issue in rows:
+            if kind == cls.DRAWS_KIND:
+                statistics.draw_count = int(hits)
+                statistics.latest_issue = last_issue
+                continue
+            if kind not in counters:
+                continue
+            key = int(item) if item.isdigit() else item
+            counters[kind][key] = int(hits)
+            if last_issue is not None:
+                statistics.last_seen.setdefault(kind, {})[key] = last_issue
+        return statistics
+
+    @abstractmethod
+    def _reset(self):
+        """清空累计的统计结果（子类实现）"""
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def record_balls(data: Dict) -> List[int]:
+        """记录 -> 号码列（子类实现，与预测器相同）"""
+        pass
+
+    @abstractmethod
+    def _add_matrix(self, matrix: HistoryMatrix):
+        """累加一批开奖数据（子类实现，对 HistoryMatrix 做向量化归约）"""
+        pass
+
+    @abstractmethod
+    def _counters(self) -> Dict[str, Counter]:
+        """统计项 -> 计数器（子类实现，返回对象本身的计数器，from_rows 直接写入）"""
+        pass
 
     @abstractmethod
     def get_frequency(self) -> Dict:
@@ -7,13 +7,28 @@ import requests
 import logging
 import time
 import random
-from typing import Dict
+from typing import Dict, List
+
+from core.config import SPIDER_CONFIG
+from core.http_client import (create_session, get_host_semaphore, get_rate_limiter, override_base_url,
+                              release_session, request_stats)
+from core.page_archive import get_page_archive
 
 logger = logging.getLogger(__name__)
 
 
 class BaseSpider:
-    """爬虫基类，提供通用的请求和重试功能"""
+    """爬虫基类，提供通用的请求和重试功能
+
+    所有实例共享 core.http_client 中的连接池、按主机的令牌桶限速器和并发信号量，
+    多个彩票并行爬取时总请求速率仍受 SPIDER_RATE_PER_HOST 限制
+    """
+
+    # 彩票类型（子类覆盖，用于错误通知、日志和页面归档）
+    LOTTERY_TYPE = ''
+
+    # 请求来源页面（子类覆盖）
+    REFERER = None
 
     # 多个User-Agent轮换，模拟不同浏览器
     USER_AGENTS = [
@@ -24,31 +39,31 @@ class BaseSpider:
         'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
     ]
 
-    def __init__(self, timeout: int = 10, retry_times: int = 3, min_delay: float = 0.5, max_delay: float = 2.0):
+    def __init__(self, timeout: int = 10, retry_times: int = 3, min_delay: float = 0.0, max_delay: float = 0.0):
         """
         初始化爬虫
 
         Args:
             timeout: 请求超时时间（秒）
             retry_times: 失败重试次数
-            min_delay: 最小请求间隔（秒）
-            max_delay: 最大请求间隔（秒）
+            min_delay: 本实例的最小请求间隔（秒，主机级限速由共享令牌桶负责）
+            max_delay: 本实例的最大随机间隔（秒）
         """
         self.timeout = timeout
         self.retry_times = retry_times
         self.min_delay = min_delay
         self.max_delay = max_delay
-        self.session = requests.Session()
+        self.session = create_session()
         self.last_request_time = 0
-        
-        # 设置连接池
-        adapter = requests.adapters.HTTPAdapter(
-            pool_connections=10,
-            pool_maxsize=20,
-            max_retries=0  # 我们自己处理重试
-        )
-        self.session.mount('http://', adapter)
-        self.session.mount('https://', adapter)
+        # 增量模式下置为 True：页面与已确认入库的页面一致（304 或正文哈希相同）时跳过解析
+        self.skip_unchanged = False
+        # 已成功解析、尚未确认入库的页面 URL（见 mark_pages_committed）
+        self.parsed_pages: List[str] = []
+        self.archive = get_page_archive()
+
+        # SPIDER_BASE_URL 指向其他数据源（如本地回放服务器）时替换协议和主机
+        if getattr(self, 'BASE_URL', None) and SPIDER_CONFIG['base_url']:
+            self.BASE_URL = override_base_url(self.BASE_URL, SPIDER_CONFIG['base_url'])
 
     def _get_headers(self) -> Dict:
         """获取随机请求头，模拟真实浏览器"""
@@ -56,7 +71,8 @@ class BaseSpider:
             'User-Agent': random.choice(self.USER_AGENTS),
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
+            # 不声明 br：requests 未安装 brotli 时无法解码
+            'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
             'Cache-Control': 'max-age=0',
@@ -69,14 +85,22 @@ class BaseSpider:
         elapsed = time.time() - self.last_request_time
         if elapsed < self.min_delay:
             time.sleep(self.min_delay - elapsed)
-        
+
         # 额外随机延迟
         delay = random.uniform(0, self.max_delay - self.min_delay)
         if delay > 0:
             time.sleep(delay)
-        
+
         self.last_request_time = time.time()
 
+    @staticmethod
+    def _retry_after(response: requests.Response, default: int = 60) -> int:
+        """解析 Retry-After 头（秒数格式），无法解析时使用默认值"""
+        try:
+            return int(response.headers.get('Retry-After', default))
+        except ValueError:
+            return default
+
     def fetch_with_retry(self, url: str, params: Dict = None, method: str = 'GET', referer: str = None) -> requests.Response:
         """
         带重试机制的HTTP请求，模拟人类浏览行为
@@ -93,47 +117,58 @@ class BaseSpider:
         Raises:
             requests.RequestException: 请求失败
         """
+        limiter = get_rate_limiter(url)
+        semaphore = get_host_semaphore(url)
+
         for attempt in range(self.retry_times):
             try:
                 # 随机延迟，模拟人类浏览
                 self._random_delay()
-                
+
                 # 获取随机请求头
                 headers = self._get_headers()
                 if referer:
                     headers['Referer'] = referer
-                
-                if method.upper() == 'GET':
-                    response = self.session.get(
-                        url,
-                        params=params,
-                        headers=headers,
-                        timeout=self.timeout,
-                        allow_redirects=True
-                    )
-                else:
-                    response = self.session.post(
-                        url,
-                        data=params,
-                        headers=headers,
-                        timeout=self.timeout,
-                        allow_redirects=True
-                    )
-                
+
+                # 主机级限速与并发控制（所有爬虫实例共享）
+                limiter.acquire()
+                with semaphore:
+                    started = time.perf_counter()
+                    status = None
+                    try:
+                        if method.upper() == 'GET':
+                            response = self.session.get(
+                                url,
+                                params=params,
+                                headers=headers,
+                                timeout=self.timeout,
+                                allow_redirects=True
+                            )
+                        else:
+                            response = self.session.post(
+                                url,
+                                data=params,
+                                headers=headers,
+                                timeout=self.timeout,
+                                allow_redirects=True
+                            )
+                        status = response.status_code
+                    finally:
+                        request_stats.record(time.perf_counter() - started, status)
+
                 # 检查响应状态
                 if response.status_code == 429:  # Too Many Requests
-                    wait_time = int(response.headers.get('Retry-After', 60))
+                    wait_time = self._retry_after(response)
                     logger.warning(f"请求过于频繁，等待 {wait_time} 秒...")
-                    time.sleep(wait_time)
-                    continue
-                
+                    # 暂停整个主机的令牌发放，其他爬虫也一起等待
+                    limiter.pause(wait_time)
+                    if attempt < self.retry_times - 1:
+                        continue
+
                 response.raise_for_status()
-                
-                # 成功后随机短暂延迟，模拟阅读时间
-                time.sleep(random.uniform(0.1, 0.3))
-                
+
                 return response
-                
+
             except requests.Timeout as e:
                 logger.warning(f"第 {attempt + 1} 次请求超时: {e}")
                 if attempt < self.retry_times - 1:
@@ -143,7 +178,7 @@ class BaseSpider:
                 else:
                     logger.error(f"请求超时，已重试 {self.retry_times} 次")
                     raise
-                    
+
             except requests.RequestException as e:
                 logger.warning(f"第 {attempt + 1} 次请求失败: {e}")
                 if attempt < self.retry_times - 1:
@@ -153,3 +188,83 @@ class BaseSpider:
                 else:
                     logger.error(f"请求失败，已重试 {self.retry_times} 次")
                     raise
+
+    def _fetch_page(self, url: str, start_issue: str = None, end_issue: str = None) -> requests.Response:
+        """
+        下载页面并写入原始页面归档
+
+        Args:
+            url: 页面URL
+            start_issue: 起始期号（归档键，None 表示最新数据页）
+            end_issue: 结束期号（归档键）
+        """
+        response = self.fetch_with_retry(url, referer=self.REFERER)
+        if self.archive is not None:
+            try:
+                self.archive.save(self.LOTTERY_TYPE, start_issue, end_issue, response.content,
+                                  url=url, encoding=response.encoding)
+            except OSError as e:
+                logger.warning(f"页面归档失败: {e}")
+        return response
+
+    def _parse_response(self, response: requests.Response) -> List[Dict]:
+        """
+        解析响应正文，页面未变化且 skip_unchanged 时直接返回空列表
+
+        解析成功的页面记入 parsed_pages；解析失败时返回空列表，页面不会被 mark_pages_committed 记为已入库
+        """
+        if self.skip_unchanged and getattr(response, 'unchanged', False):
+            logger.info("页面与上次请求一致，跳过解析")
+            return []
+        try:
+            rows = self._parse_table(response.text)
+        except Exception as e:
+            logger.error(f"解析 HTML 失败: {e}")
+            return []
+        self.parsed_pages.append(response.url)
+        return rows
+
+    def mark_pages_committed(self):
+        """
+        页面中的数据已入库后调用：把已下载页面的当前正文记为已入库
+
+        之后再请求到相同的正文才会被 skip_unchanged 跳过；入库失败时不调用，重试会重新解析；
+        解析失败的页面不在其中，修复解析后仍会重新解析
+        """
+        for url in self.parsed_pages:
+            cache = self._response_cache(url)
+            if cache is not None:
+                cache.mark_committed(url)
+        self.parsed_pages.clear()
+        self.flush_cache()
+
+    def _response_cache(self, url: str = None):
+        """会话挂载的响应缓存（未启用缓存时为 None）"""
+        try:
+            adapter = self.session.get_adapter(url or 'https://')
+        except requests.exceptions.InvalidSchema:  # 会话已释放
+            return None
+        return getattr(adapter, 'cache', None)
+
+    def flush_cache(self):
+        """把本次爬取对响应缓存索引的修改写入磁盘（每次爬取结束时调用一次）"""
+        cache = self._response_cache()
+        if cache is not None:
+            cache.flush()
+
+    def _parse_html(self, html: str) -> List[Dict]:
+        """解析页面，解析失败时返回空列表"""
+        try:
+            return self._parse_table(html)
+        except Exception as e:
+            logger.error(f"解析 HTML 失败: {e}")
+            return []
+
+    def _parse_table(self, html: str) -> List[Dict]:
+        """解析页面中的开奖结果表格（子类实现，解析失败时抛出异常）"""
+        raise NotImplementedError
+
+    def close(self):
+        """写入响应缓存索引并释放会话（共享连接池由 core.http_client 管理，不在此关闭）"""
+        self.flush_cache()
+        release_session(self.session)
@@ -50,6 +50,13 @@ if os.getenv('MYSQL_USE_SSL', 'false').lower() in ['1', 'true', 'yes']:
     DB_CONFIG['use_ssl'] = True
     DB_CONFIG['ssl_ca'] = os.getenv('MYSQL_SSL_CA')
 
+# 嵌入式 SQLite 后端配置（DB_BACKEND=sqlite）
+SQLITE_CONFIG = {
+    'path': os.getenv('SQLITE_PATH', str(DATA_DIR / 'lottery.db')),  # 数据库文件
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),  # WAL 模式下 NORMAL 只在检查点时同步磁盘
+    'busy_timeout': float(os.getenv('SQLITE_BUSY_TIMEOUT', 30)),  # 等待其他进程写锁的最长时间（秒）
+}
+
 # 爬虫配置
 SPIDER_CONFIG = {
     'timeout': int(os.getenv('SPIDER_TIMEOUT', 15)),
@@ -57,16 +64,98 @@ SPIDER_CONFIG = {
     'min_delay': float(os.getenv('SPIDER_MIN_DELAY', 0.5)),  # 最小请求间隔（秒）
     'max_delay': float(os.getenv('SPIDER_MAX_DELAY', 2.0)),  # 最大请求间隔（秒）
     'batch_size': int(os.getenv('SPIDER_BATCH_SIZE', 100)),  # 批量处理大小
+    'pipeline_queue_size': int(os.getenv('SPIDER_PIPELINE_QUEUE_SIZE', 4)),  # 全量爬取流水线阶段间队列容量（页）
+    'max_workers': int(os.getenv('SPIDER_MAX_WORKERS', 4)),  # 全量爬取下载线程数（缺失范围按年份均分为同样多段）
+    'per_host_concurrency': int(os.getenv('SPIDER_PER_HOST_CONCURRENCY', 2)),  # 同一主机的最大并发请求数
+    'rate_per_host': float(os.getenv('SPIDER_RATE_PER_HOST', 2.0)),  # 同一主机每秒请求数（所有爬虫共享的令牌桶，0 表示不限速）
+    'rate_burst': float(os.getenv('SPIDER_RATE_BURST', 4)),  # 令牌桶容量（允许的突发请求数）
+    'pool_connections': int(os.getenv('SPIDER_POOL_CONNECTIONS', 10)),  # 共享连接池缓存的主机数
+    'pool_maxsize': int(os.getenv('SPIDER_POOL_MAXSIZE', 20)),  # 每个主机保持的最大连接数
+    'range_max_rows': int(os.getenv('SPIDER_RANGE_MAX_ROWS', 0)),  # 数据源单次响应最大行数（0 表示未知，运行时学习）
+    'range_min_span': int(os.getenv('SPIDER_RANGE_MIN_SPAN', 10)),  # 单年范围拆分的最小期数
+    'base_url': os.getenv('SPIDER_BASE_URL', ''),  # 数据源地址覆盖（如本地回放服务器 http://127.0.0.1:8500，为空时访问 500.com）
+}
+
+# HTTP 响应缓存配置
+HTTP_CACHE_CONFIG = {
+    'enabled': os.getenv('HTTP_CACHE_ENABLED', 'true').lower() in ['true', '1', 'yes'],
+    'dir': DATA_DIR / 'http_cache',
+    'max_bytes': int(float(os.getenv('HTTP_CACHE_MAX_MB', 50)) * 1024 * 1024),  # 缓存总大小上限
+}
+
+# 原始页面归档配置
+PAGE_ARCHIVE_CONFIG = {
+    'enabled': os.getenv('PAGE_ARCHIVE_ENABLED', 'true').lower() in ['true', '1', 'yes'],
+    'dir': DATA_DIR / 'page_archive',
+    'codec': os.getenv('PAGE_ARCHIVE_CODEC', 'auto'),  # auto（有 zstandard 时用 zstd）/ gzip / zstd
+    'reparse_workers': int(os.getenv('PAGE_ARCHIVE_REPARSE_WORKERS', 0)),  # 离线重新解析的进程数（0 表示 CPU 核数）
+}
+
+# 开奖日历配置（增量爬取只请求按开奖日程应已开奖的期号）
+DRAW_CALENDAR_CONFIG = {
+    'dir': DATA_DIR / 'draw_calendar',
+    # 每周开奖日（0=周一 ... 6=周日），历史数据不足时使用；数据足够时按最近开奖记录推断
+    'weekdays': {
+        'ssq': [1, 3, 6],  # 周二、四、日
+        'dlt': [0, 2, 5],  # 周一、三、六
+        'qxc': [1, 4, 6],  # 周二、五、日
+        'qlc': [0, 2, 4],  # 周一、三、五
+    },
+    'publish_time': os.getenv('DRAW_PUBLISH_TIME', '21:30'),  # 开奖当天数据源的更新时间（本地时间）
+}
+
+# 历史数据快照配置（预测时只从数据库拉取快照最新期之后的记录）
+HISTORY_SNAPSHOT_CONFIG = {
+    'enabled': os.getenv('HISTORY_SNAPSHOT_ENABLED', 'true').lower() in ['true', '1', 'yes'],
+    'dir': DATA_DIR / 'snapshot',
+}
+
+# 号码组合索引配置（双色球全部红球组合及特征列，首次使用时生成并保存）
+COMBINATION_INDEX_CONFIG = {
+    'dir': DATA_DIR / 'index',
+}
+
+# Parquet 导出 / 导入配置（export / import 命令，按年份分区：<dir>/<彩票类型>/year=YYYY/part-0.parquet）
+PARQUET_CONFIG = {
+    'dir': Path(os.getenv('PARQUET_EXPORT_DIR', str(EXPORT_DIR))),
+    'compression': os.getenv('PARQUET_COMPRESSION', 'zstd'),  # zstd / snappy / gzip / none
+}
+
+# 对象存储发布配置（Cloudflare R2 或其他 S3 兼容存储，publish 命令）
+# 每个彩票按年份分区：<prefix><彩票类型>/year=YYYY.json.gz|.json.zst，加上记录各分区内容哈希的 manifest.json
+PUBLISH_CONFIG = {
+    'enabled': os.getenv('PUBLISH_ENABLED', 'false').lower() in ['true', '1', 'yes'],  # 爬取入库后自动发布
+    'endpoint': os.getenv('R2_ENDPOINT'),
+    'access_key_id': os.getenv('R2_ACCESS_KEY_ID'),
+    'secret_access_key': os.getenv('R2_SECRET_ACCESS_KEY'),
+    'bucket_name': os.getenv('R2_BUCKET_NAME', 'lottery-backup'),
+    'region': os.getenv('R2_REGION', 'auto'),
+    'prefix': os.getenv('R2_PREFIX', 'history/'),
+    'codec': os.getenv('R2_CODEC', 'auto'),  # auto（有 zstandard 时用 zstd）/ gzip / zstd
 }
 
 # 数据库性能配置
 DB_PERFORMANCE = {
     'batch_insert_size': int(os.getenv('DB_BATCH_SIZE', 100)),  # 批量插入大小
+    'insert_mode': os.getenv('DB_INSERT_MODE', 'upsert'),  # 入库方式：upsert（多行 VALUES 一次提交）/ batch（先查已存在期号再分批插入）
+    'upsert_batch_rows': int(os.getenv('DB_UPSERT_BATCH_ROWS', 1000)),  # upsert 模式单条 INSERT 语句的最大行数
+    'bulk_load': os.getenv('DB_BULK_LOAD', 'true').lower() in ['true', '1', 'yes'],  # 空表全量导入使用 LOAD DATA LOCAL INFILE
+    'bulk_load_rows': int(os.getenv('DB_BULK_LOAD_ROWS', 5000)),  # 空表全量导入时每次写入的行数
+    'stream_chunk_rows': int(os.getenv('DB_STREAM_CHUNK_ROWS', 500)),  # 流式读取历史数据（服务端游标）每块的行数
     'connection_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 10)),
     'read_timeout': int(os.getenv('DB_READ_TIMEOUT', 30)),
     'write_timeout': int(os.getenv('DB_WRITE_TIMEOUT', 30)),
 }
 
+# 数据库连接池配置（进程内所有彩票数据库共享）
+DB_POOL_CONFIG = {
+    'min_size': int(os.getenv('DB_POOL_MIN', 1)),  # 保留的最少空闲连接数
+    'max_size': int(os.getenv('DB_POOL_MAX', 8)),  # 最大连接数
+    'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 300)),  # 空闲连接最长保留时间（秒）
+    'ping_interval': float(os.getenv('DB_POOL_PING_INTERVAL', 30)),  # 空闲超过该时间的连接借出前先检查（秒）
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),  # 等待可用连接的最长时间（秒）
+}
+
 # 安全配置
 SECURITY_CONFIG = {
     'max_retry_attempts': 3,  # 最大重试次数
@@ -0,0 +1,241 @@
+"""
+进程内共享的 MySQL 连接池
+所有彩票数据库类（SSQDatabase / DLTDatabase / QXCDatabase / QLCDatabase）按连接参数共用一个池：
+- 连接创建时执行一次会话设置（sql_mode、时区），之后复用，不再重复 TCP/TLS 握手
+- 借出时对空闲超过 DB_POOL_PING_INTERVAL 的连接做 ping 健康检查，失效则丢弃重建
+- 空闲超过 DB_POOL_MAX_IDLE 的连接在借出/归还时关闭（保留 DB_POOL_MIN 个）
+- 连接数达到 DB_POOL_MAX 时等待归还，超过 DB_POOL_TIMEOUT 抛出 TimeoutError
+- 记录借出等待时间、占用时间等指标（stats()）
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Tuple
+
+import pymysql
+
+from core.config import DB_POOL_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 新连接执行的会话设置
+SESSION_SETUP = (
+    "SET SESSION sql_mode='STRICT_TRANS_TABLES,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO'",
+    "SET SESSION time_zone='+08:00'",
+)
+
+
+def create_connection(params: Dict) -> pymysql.connections.Connection:
+    """新建连接并执行会话设置（连接池之外的专用连接，如 LOAD DATA LOCAL INFILE，也使用该函数）"""
+    connection = pymysql.connect(**params)
+    try:
+        with connection.cursor() as cursor:
+            for sql in SESSION_SETUP:
+                cursor.execute(sql)
+    except Exception:
+        connection.close()
+        raise
+    return connection
+
+
+class ConnectionPool:
+    """MySQL 连接池（线程安全）
+
+    Args:
+        params: pymysql.connect 参数
+        min_size: 保留的最少空闲连接数
+        max_size: 最大连接数（借出 + 空闲）
+        max_idle: 空闲连接的最长保留时间（秒）
+        ping_interval: 空闲超过该时间的连接借出前先 ping（秒）
+        timeout: 等待可用连接的最长时间（秒）
+    """
+
+    def __init__(self, params: Dict,
+                 min_size: int = None,
+                 max_size: int = None,
+                 max_idle: float = None,
+                 ping_interval: float = None,
+                 timeout: float = None):
+        self.params = params
+        self.min_size = DB_POOL_CONFIG['min_size'] if min_size is None else min_size
+        self.max_size = max(1, DB_POOL_CONFIG['max_size'] if max_size is None else max_size)
+        self.max_idle = DB_POOL_CONFIG['max_idle'] if max_idle is None else max_idle
+        self.ping_interval = DB_POOL_CONFIG['ping_interval'] if ping_interval is None else ping_interval
+        self.timeout = DB_POOL_CONFIG['timeout'] if timeout is None else timeout
+
+        # 空闲连接：(连接, 归还时间)，右端为最近归还
+        self._idle: deque = deque()
+        # 借出中的连接：id(连接) -> 借出时间
+        self._in_use: Dict[int, float] = {}
+        self._cond = threading.Condition()
+
+        self.counters = {'created': 0, 'reused': 0, 'pinged': 0, 'discarded': 0, 'evicted': 0, 'timeouts': 0}
+        self._wait_times = deque(maxlen=1000)
+        self._hold_times = deque(maxlen=1000)
+
+    # ---------- 连接管理 ----------
+
+    def _create(self) -> pymysql.connections.Connection:
+        return create_connection(self.params)
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _evict_idle(self, now: float) -> List:
+        """取出空闲过久的连接（调用方持有锁，返回的连接在锁外关闭）"""
+        expired = []
+        while len(self._idle) > self.min_size and now - self._idle[0][1] > self.max_idle:
+            expired.append(self._idle.popleft()[0])
+        self.counters['evicted'] += len(expired)
+        return expired
+
+    def acquire(self) -> pymysql.connections.Connection:
+        """借出连接（优先复用最近归还的连接）"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+
+        while True:
+            connection, idle_since, create = None, 0.0, False
+            with self._cond:
+                expired = self._evict_idle(time.monotonic())
+                while not self._idle and len(self._in_use) >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.counters['timeouts'] += 1
+                        raise TimeoutError(f"等待数据库连接超时（{self.timeout}s，连接池上限 {self.max_size}）")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    connection, idle_since = self._idle.pop()
+                else:
+                    create = True
+                # 先占位，避免并发创建超过上限
+                slot = object() if create else connection
+                self._in_use[id(slot)] = time.monotonic()
+
+            for stale in expired:
+                self._close_quietly(stale)
+
+            if create:
+                try:
+                    connection = self._create()
+                except Exception:
+                    with self._cond:
+                        self._in_use.pop(id(slot), None)
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._in_use[id(connection)] = self._in_use.pop(id(slot))
+            elif time.monotonic() - idle_since > self.ping_interval:
+                with self._cond:
+                    self.counters['pinged'] += 1
+                try:
+                    connection.ping(reconnect=False)
+                except Exception as e:
+                    logger.warning(f"数据库连接已失效，重新建立: {e}")
+                    self._discard(connection)
+                    continue
+
+            with self._cond:
+                self.counters['created' if create else 'reused'] += 1
+                self._wait_times.append(time.monotonic() - started)
+            return connection
+
+    def release(self, connection, discard: bool = False):
+        """归还连接（未提交的事务会回滚；discard=True 或回滚失败时关闭连接）"""
+        if not discard:
+            try:
+                connection.rollback()
+            except Exception:
+                discard = True
+
+        if discard:
+            self._discard(connection)
+            return
+
+        now = time.monotonic()
+        with self._cond:
+            checked_out = self._in_use.pop(id(connection), None)
+            if checked_out is not None:
+                self._hold_times.append(now - checked_out)
+            self._idle.append((connection, now))
+            expired = self._evict_idle(now)
+            self._cond.notify()
+        for stale in expired:
+            self._close_quietly(stale)
+
+    def _discard(self, connection):
+        with self._cond:
+            self._in_use.pop(id(connection), None)
+            self.counters['discarded'] += 1
+            self._cond.notify()
+        self._close_quietly(connection)
+
+    def close(self):
+        """关闭所有空闲连接（借出中的连接归还时照常放回）"""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+        for connection, _ in idle:
+            self._close_quietly(connection)
+
+    # ---------- 指标 ----------
+
+    def stats(self) -> Dict:
+        """
+        Returns:
+            {'in_use', 'idle', 'created', 'reused', 'pinged', 'discarded', 'evicted', 'timeouts',
+             'wait_p50_ms', 'wait_p95_ms', 'hold_p50_ms', 'hold_p95_ms'}
+        """
+        def percentile(samples: List[float], p: float) -> float:
+            if not samples:
+                return 0.0
+            ordered = sorted(samples)
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 2)
+
+        with self._cond:
+            waits, holds = list(self._wait_times), list(self._hold_times)
+            result = {'in_use': len(self._in_use), 'idle': len(self._idle), **self.counters}
+        result.update({
+            'wait_p50_ms': percentile(waits, 0.50),
+            'wait_p95_ms': percentile(waits, 0.95),
+            'hold_p50_ms': percentile(holds, 0.50),
+            'hold_p95_ms': percentile(holds, 0.95),
+        })
+        return result
+
+
+_pools: Dict[Tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_key(params: Dict) -> Tuple:
+    return (params['host'], params['port'], params['user'], params['database'], repr(params.get('ssl')))
+
+
+def get_pool(params: Dict) -> ConnectionPool:
+    """获取连接参数对应的进程内共享连接池"""
+    key = _pool_key(params)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(params)
+        return _pools[key]
+
+
+def pool_stats() -> Dict[str, Dict]:
+    """所有连接池的指标（键为 user@host:port/database）"""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {f"{key[2]}@{key[0]}:{key[1]}/{key[3]}": pool.stats() for key, pool in pools.items()}
+
+
+def close_all():
+    """关闭所有连接池的空闲连接（进程退出前调用）"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
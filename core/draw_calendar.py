@@ -0,0 +1,151 @@
+"""
+开奖日历
+按彩票类型持久化 期号 -> 开奖日期 的索引（DATA_DIR/draw_calendar/<lottery_type>.json），
+并结合每周开奖日推算截至当前应已开奖的期号：
+- 增量爬取只请求这些期号，不再固定请求 next..YY200
+- 最新一期之后还没有到开奖日时直接跳过请求
+- 跨年时新一年的第一个开奖日为 YY001，不依赖“期号超过 200 即跨年”的假设
+
+每周开奖日优先从最近的开奖记录推断（开奖日程调整后自动生效），历史不足时使用 DRAW_CALENDAR_CONFIG 中的配置
+"""
+
+import json
+import logging
+import os
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from core.config import DRAW_CALENDAR_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 推断每周开奖日使用的最近开奖次数
+RECENT_DRAWS = 60
+# 某个星期几在最近开奖中的占比低于该值时视为临时调整，不计入开奖日
+WEEKDAY_MIN_SHARE = 0.1
+
+
+class DrawCalendar:
+    """单个彩票类型的开奖日历"""
+
+    def __init__(self, lottery_type: str, path: Path = None):
+        self.lottery_type = lottery_type
+        self.path = Path(path or DRAW_CALENDAR_CONFIG['dir'] / f'{lottery_type}.json')
+        # 期号（7位）-> 开奖日期（YYYY-MM-DD）
+        self.issues: Dict[str, str] = {}
+        # 补缺时已请求但确认没有数据的期号范围（'起始期号-结束期号'，5位）
+        self.verified_gaps: Set[str] = set()
+
+    # ---------- 持久化 ----------
+
+    @classmethod
+    def load(cls, lottery_type: str, path: Path = None) -> 'DrawCalendar':
+        """读取日历，文件不存在或损坏时返回空日历"""
+        calendar = cls(lottery_type, path)
+        if calendar.path.exists():
+            try:
+                with open(calendar.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                calendar.issues = data.get('issues', {})
+                calendar.verified_gaps = set(data.get('verified_gaps', []))
+            except (OSError, ValueError) as e:
+                logger.warning(f"开奖日历损坏，将从数据库重建: {calendar.path} ({e})")
+        return calendar
+
+    def save(self):
+        """写入日历（先写临时文件再替换）"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'lottery_type': self.lottery_type,
+                'weekdays': self.weekdays(),
+                'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'issues': self.issues,
+                'verified_gaps': sorted(self.verified_gaps),
+            }, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    # ---------- 维护 ----------
+
+    @property
+    def latest_issue(self) -> Optional[str]:
+        return max(self.issues) if self.issues else None
+
+    def add(self, draws: Iterable[Tuple[str, str]]):
+        """加入 (期号, 开奖日期)"""
+        for lottery_no, draw_date in draws:
+            self.issues[str(lottery_no)] = str(draw_date)[:10]
+
+    def add_rows(self, rows: Iterable[Dict]):
+        """加入爬虫返回的数据（含 lottery_no、draw_date）"""
+        self.add((row['lottery_no'], row['draw_date']) for row in rows if row.get('draw_date'))
+
+    def sync(self, db, table_name: str, latest_in_db: Optional[str]) -> bool:
+        """
+        与数据库同步：只追加日历最新期之后的记录；数据库被清空或重建时全量重建
+
+        Returns:
+            日历是否有变化
+        """
+        calendar_latest = self.latest_issue
+        if latest_in_db == calendar_latest:
+            return False
+
+        if calendar_latest and latest_in_db and latest_in_db > calendar_latest:
+            self.add(db.get_draw_dates(table_name, after=calendar_latest))
+        else:
+            self.issues = {}
+            self.verified_gaps = set()
+            if latest_in_db:
+                self.add(db.get_draw_dates(table_name))
+            logger.info(f"开奖日历已从数据库重建: {len(self.issues)} 期")
+        return True
+
+    # ---------- 推算 ----------
+
+    def weekdays(self) -> List[int]:
+        """每周开奖日（0=周一），按最近开奖记录推断"""
+        recent = [self.issues[no] for no in sorted(self.issues)[-RECENT_DRAWS:]]
+        if len(recent) >= RECENT_DRAWS // 2:
+            counts = Counter(date.fromisoformat(d).weekday() for d in recent)
+            inferred = sorted(day for day, count in counts.items() if count >= len(recent) * WEEKDAY_MIN_SHARE)
+            if inferred:
+                return inferred
+        return list(DRAW_CALENDAR_CONFIG['weekdays'].get(self.lottery_type, []))
+
+    def due_issues(self, now: datetime = None) -> List[Tuple[str, date]]:
+        """
+        推算最新一期之后、截至 now 应已开奖的期号
+
+        开奖当天早于 DRAW_PUBLISH_TIME 时不计入当天；春节休市等停开日会被多算，
+        请求结果中不存在的期号不影响入库
+
+        Returns:
+            [(期号（7位）, 预计开奖日期), ...]，日历为空时返回空列表
+        """
+        latest = self.latest_issue
+        if not latest:
+            return []
+
+        now = now or datetime.now()
+        weekdays = set(self.weekdays())
+        publish_time = datetime.strptime(DRAW_CALENDAR_CONFIG['publish_time'], '%H:%M').time()
+        last_day = now.date() if now.time() >= publish_time else now.date() - timedelta(days=1)
+
+        year, number = int(latest[:4]), int(latest[4:])
+        day = date.fromisoformat(self.issues[latest])
+        due = []
+        while True:
+            day += timedelta(days=1)
+            if day > last_day:
+                break
+            if day.weekday() not in weekdays:
+                continue
+            if day.year != year:
+                year, number = day.year, 0
+            number += 1
+            due.append((f"{year}{number:03d}", day))
+        return due
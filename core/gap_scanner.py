@@ -0,0 +1,108 @@
+"""
+缺失期号扫描
+通过 BaseDatabase.get_issue_breaks（一次窗口函数扫描）找出期号不连续的位置，
+换算为覆盖缺失期号的最少请求范围：
+- 同一年内的空洞：精确到缺失的期号
+- 跨年处：上一年最后一期之后仍有开奖日时补上一年年尾，整年缺失时补整年，新一年不是 001 期时补年初
+  （同一个断点产生的各段首尾相连，合并为一次请求）
+
+年尾是否缺失按每周开奖日推算；请求后仍无数据的范围记入开奖日历，之后不再重复请求
+"""
+
+import logging
+from datetime import date, timedelta
+from typing import Iterable, List, Optional, Set, Tuple
+
+from core.range_planner import YEAR_MAX_ISSUE
+
+logger = logging.getLogger(__name__)
+
+
+def _issue(year: int, number: int) -> str:
+    """组装7位期号"""
+    return f"{year}{number:03d}"
+
+
+def _draws_left_in_year(draw_date: str, weekdays: Iterable[int]) -> int:
+    """开奖日期之后到当年年底还有几个开奖日"""
+    weekdays = set(weekdays)
+    day = date.fromisoformat(draw_date)
+    year_end = date(day.year, 12, 31)
+    count = 0
+    while day < year_end:
+        day += timedelta(days=1)
+        if day.weekday() in weekdays:
+            count += 1
+    return count
+
+
+def gap_range(prev_no: str, prev_date: Optional[str], next_no: str,
+              weekdays: Iterable[int]) -> Optional[Tuple[str, str]]:
+    """
+    单个断点需要补的期号范围
+
+    Args:
+        prev_no / prev_date: 断点前一期（prev_date 为 None 表示虚拟的起始期号）
+        next_no: 断点后一期
+        weekdays: 每周开奖日
+
+    Returns:
+        (起始期号, 结束期号)（7位），不需要补时返回 None
+    """
+    prev_year, prev_number = int(prev_no[:4]), int(prev_no[4:])
+    next_year, next_number = int(next_no[:4]), int(next_no[4:])
+
+    if prev_year == next_year:
+        if next_number - prev_number <= 1:
+            return None
+        return _issue(prev_year, prev_number + 1), _issue(next_year, next_number - 1)
+
+    start = end = None
+    # 上一年年尾
+    if prev_date is None or _draws_left_in_year(prev_date, weekdays) > 0:
+        start, end = _issue(prev_year, prev_number + 1), _issue(prev_year, YEAR_MAX_ISSUE)
+    # 整年缺失
+    if next_year - prev_year > 1:
+        start = start or _issue(prev_year + 1, 1)
+        end = _issue(next_year - 1, YEAR_MAX_ISSUE)
+    # 新一年年初
+    if next_number > 1:
+        start = start or _issue(next_year, 1)
+        end = _issue(next_year, next_number - 1)
+
+    if start is None:
+        return None
+    return start, end
+
+
+def scan_gaps(db, table_name: str, first_issue: str, weekdays: Iterable[int],
+              verified: Set[str] = frozenset()) -> List[Tuple[str, str]]:
+    """
+    扫描缺失期号
+
+    Args:
+        db: 数据库实例
+        table_name: 表名
+        first_issue: 起始期号之前的虚拟期号（5位，如 '03000'）
+        weekdays: 每周开奖日（0=周一）
+        verified: 已确认没有数据的范围（'起始期号-结束期号'，5位）
+
+    Returns:
+        [(起始期号, 结束期号), ...]（5位），按期号从小到大
+    """
+    weekdays = list(weekdays)
+    ranges = []
+    for prev_no, prev_date, next_no, _ in db.get_issue_breaks(table_name, f"20{first_issue}"):
+        found = gap_range(prev_no, prev_date, next_no, weekdays)
+        if not found:
+            continue
+        start_issue, end_issue = found[0][2:], found[1][2:]
+        if f"{start_issue}-{end_issue}" in verified:
+            continue
+        ranges.append((start_issue, end_issue))
+
+    if ranges:
+        logger.info(f"🔍 发现 {len(ranges)} 处缺失期号: "
+                    + ', '.join(f"{start}-{end}" for start, end in ranges[:10])
+                    + (' ...' if len(ranges) > 10 else ''))
+    return ranges
@@ -0,0 +1,160 @@
+"""
+历史号码矩阵
+每次运行从历史快照构建一次，预测器与统计类共用同一个实例：
+    issues   int32[n]          期号（按期号从小到大）
+    dates    datetime64[D][n]  开奖日期
+    balls    uint8[n, k]       号码列（顺序同数据库类的 HISTORY_COLUMNS）
+    onehot   uint8[n, m+1]     每个号码池一个（第 j 列为 1 表示该期开出号码 j），首次使用时生成并缓存
+
+号码池由各彩票的预测器模块定义（POOLS：名称 -> (号码列切片, 最大号码)），
+号码频率、最近出现期号、连号、奇偶等统计都是对矩阵的按列 / 按行归约，不再逐期循环
+"""
+
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 号码池名称 -> (号码列切片, 最大号码)
+Pools = Dict[str, Tuple[slice, int]]
+
+
+def value_counts(values: np.ndarray) -> Dict[int, int]:
+    """
+    各取值出现的次数（按首次出现的顺序）
+
+    values 的行按期号从小到大（每期一个值或一行号码），从最新一期往前数、同一期内按列顺序，
+    与按开奖日期从新到旧逐期累加的 Counter 键顺序相同，most_common() 在次数相同时的先后不变
+    """
+    values = np.asarray(values)[::-1].ravel()
+    keys, first, counts = np.unique(values, return_index=True, return_counts=True)
+    order = np.argsort(first)
+    return dict(zip(keys[order].tolist(), counts[order].tolist()))
+
+
+class HistoryMatrix:
+    """历史号码矩阵
+
+    Args:
+        issues: 期号
+        dates: 开奖日期
+        balls: 号码列
+        pools: 号码池定义
+
+    行按期号从小到大排列（快照、from_rows 构建的矩阵都满足）
+    """
+
+    def __init__(self, issues: np.ndarray, dates: np.ndarray, balls: np.ndarray, pools: Pools):
+        self.issues = np.asarray(issues, dtype=np.int32)
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        self.balls = np.asarray(balls, dtype=np.uint8)
+        if self.balls.ndim != 2:
+            self.balls = self.balls.reshape(len(self.issues), -1)
+        self.pools = pools
+        self._onehot: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.issues)
+
+    # ---------- 构建 ----------
+
+    @classmethod
+    def from_snapshot(cls, snapshot, pools: Pools) -> 'HistoryMatrix':
+        """由历史快照构建（直接使用快照的数组，不复制）"""
+        return cls(snapshot.issues, snapshot.dates, snapshot.balls, pools)
+
+    @classmethod
+    def from_rows(cls, rows: List[tuple], pools: Pools) -> 'HistoryMatrix':
+        """由 (期号, 开奖日期, 号码列...) 行构建"""
+        width = max(pool.stop for pool, _ in pools.values())
+        order = sorted(range(len(rows)), key=lambda i: str(rows[i][0]))
+        return cls(
+            np.array([int(rows[i][0]) for i in order], dtype=np.int32),
+            np.array([str(rows[i][1]) for i in order], dtype='datetime64[D]'),
+            np.array([[int(v) for v in rows[i][2:2 + width]] for i in order], dtype=np.uint8).reshape(-1, width),
+            pools
+        )
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict], pools: Pools,
+                     record_balls: Callable[[Dict], List[int]]) -> 'HistoryMatrix':
+        """
+        由记录构建（预测器 / 统计类传入记录列表时使用）
+
+        Args:
+            records: 记录（任意顺序）
+            pools: 号码池定义
+            record_balls: 记录 -> 号码列
+        """
+        rows = [(record['lottery_no'], record['draw_date'], *record_balls(record)) for record in records]
+        return cls.from_rows(rows, pools)
+
+    # ---------- 号码池 ----------
+
+    def columns(self, pool: str) -> np.ndarray:
+        """号码池对应的号码列 uint8[n, 号码个数]"""
+        return self.balls[:, self.pools[pool][0]]
+
+    def onehot(self, pool: str) -> np.ndarray:
+        """号码池的 one-hot 矩阵 uint8[n, 最大号码 + 1]（列下标即号码）"""
+        if pool not in self._onehot:
+            columns = self.columns(pool)
+            matrix = np.zeros((len(self), self.pools[pool][1] + 1), dtype=np.uint8)
+            matrix[np.arange(len(self))[:, None], columns] = 1
+            self._onehot[pool] = matrix
+        return self._onehot[pool]
+
+    # ---------- 统计（向量化归约） ----------
+
+    @property
+    def latest_issue(self) -> Optional[str]:
+        return str(int(self.issues.max())) if len(self) else None
+
+    def frequency(self, pool: str) -> Dict[int, int]:
+        """号码出现次数（只包含出现过的号码，按首次出现的顺序，见 value_counts）"""
+        return value_counts(self.columns(pool))
+
+    def last_seen(self, pool: str) -> Dict[int, str]:
+        """号码最近出现的期号（只包含出现过的号码）"""
+        hit = self.onehot(pool).astype(bool)
+        # 行按期号从小到大，每列最后一个 1 所在的行即最近出现的一期
+        last = len(self) - 1 - np.argmax(hit[::-1], axis=0)
+        balls = np.flatnonzero(hit.any(axis=0))
+        return {ball: str(int(self.issues[last[ball]])) for ball in balls.tolist()}
+
+    def masks(self, pool: str) -> np.ndarray:
+        """每期号码池的位图 uint64[n]（第 j 位表示号码 j，与数据库的 *_mask 列相同；最大号码不超过 63）"""
+        weights = np.left_shift(np.uint64(1), np.arange(self.pools[pool][1] + 1, dtype=np.uint64))
+        return (self.onehot(pool) * weights).sum(axis=1, dtype=np.uint64)
+
+    def max_consecutive(self, pool: str) -> np.ndarray:
+        """每期最长连号中相邻号码的对数（无连号为 0，如 3-4-5 为 2）"""
+        onehot = self.onehot(pool)
+        pairs = onehot[:, 1:] & onehot[:, :-1]
+        run = np.zeros(len(self), dtype=np.int64)
+        longest = np.zeros(len(self), dtype=np.int64)
+        for column in pairs.T:
+            run = (run + 1) * column
+            np.maximum(longest, run, out=longest)
+        return longest
+
+    def odd_counts(self, pool: str) -> np.ndarray:
+        """每期奇数号码的个数"""
+        return self.onehot(pool)[:, 1::2].sum(axis=1, dtype=np.int64)
+
+    def combinations(self, *pools: str) -> Set:
+        """
+        历史组合集合（号码池内的号码排序，只有一个号码的号码池取号码本身）
+
+        一个号码池时元素为号码元组，如 (1, 5, 10, 15, 20, 25)；
+        多个号码池时元素为各号码池组成的元组，如 ((1, 2, 3, 4, 5), (1, 2))、((1, 2, 3, 4, 5, 6, 7), 8)
+        """
+        parts = []
+        for pool in pools:
+            columns = np.sort(self.columns(pool), axis=1)
+            parts.append(columns[:, 0].tolist() if columns.shape[1] == 1 else list(map(tuple, columns.tolist())))
+        if len(parts) == 1:
+            return set(parts[0])
+        return set(zip(*parts))
@@ -0,0 +1,160 @@
+"""
+历史数据 Parquet 导出 / 导入
+按彩票类型导出为按年份分区的 Parquet 数据集（Hive 风格目录，pandas / pyarrow / DuckDB 可直接读取整个目录）：
+    <dir>/<lottery_type>/year=YYYY/part-0.parquet
+
+列类型：
+    lottery_no  int32     期号（7位）
+    draw_date   date32    开奖日期
+    号码列       uint8     与数据库类的 HISTORY_COLUMNS 相同（如 red1..red6, blue）
+
+导出用服务端游标按块读取（按期号从小到大，同一年份的记录写入一个文件）；
+导入按块读取 Parquet 并通过 insert_lottery_data 写入当前后端（空表时走批量导入），
+可以不爬取直接初始化新数据库
+"""
+
+import logging
+import os
+import shutil
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from core.config import DB_PERFORMANCE, PARQUET_CONFIG
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# 分区文件名
+PART_FILE = 'part-0.parquet'
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Parquet 导出 / 导入需要 pyarrow，请运行 `pip install pyarrow`")
+
+
+def history_schema(columns) -> 'pa.Schema':
+    """Parquet 列类型（期号 int32、开奖日期 date32、号码列 uint8）"""
+    _require_pyarrow()
+    return pa.schema(
+        [('lottery_no', pa.int32()), ('draw_date', pa.date32())]
+        + [(column, pa.uint8()) for column in columns]
+    )
+
+
+def _to_table(rows: List[tuple], schema: 'pa.Schema') -> 'pa.Table':
+    """(期号, 开奖日期, 号码列..., updated_at) -> Arrow 表"""
+    width = len(schema) - 2
+    arrays = [
+        pa.array([int(row[0]) for row in rows], pa.int32()),
+        pa.array([date.fromisoformat(str(row[1])) for row in rows], pa.date32()),
+    ]
+    arrays += [pa.array([int(row[2 + i]) for row in rows], pa.uint8()) for i in range(width)]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def export_parquet(db, lottery_type: str, out_dir: Path = None, chunk_size: int = None) -> Dict:
+    """
+    把数据表导出为按年份分区的 Parquet 数据集（先写入临时目录，完成后替换旧的导出）
+
+    Args:
+        db: 数据库实例（提供 HISTORY_COLUMNS、iter_history_rows）
+        lottery_type: 彩票类型
+        out_dir: 导出根目录（默认 PARQUET_CONFIG['dir']）
+        chunk_size: 服务端游标每块的行数（默认 DB_STREAM_CHUNK_ROWS）
+
+    Returns:
+        {'rows', 'files', 'path'}
+    """
+    _require_pyarrow()
+    target = Path(out_dir or PARQUET_CONFIG['dir']) / lottery_type
+    staging = target.with_name(f"{target.name}.tmp")
+    if staging.exists():
+        shutil.rmtree(staging)
+
+    schema = history_schema(db.HISTORY_COLUMNS)
+    compression = PARQUET_CONFIG['compression']
+    result = {'rows': 0, 'files': 0, 'path': str(target)}
+
+    def flush(year: str, rows: List[tuple]):
+        if not rows:
+            return
+        partition = staging / f"year={year}"
+        partition.mkdir(parents=True, exist_ok=True)
+        pq.write_table(_to_table(rows, schema), partition / PART_FILE, compression=compression)
+        result['rows'] += len(rows)
+        result['files'] += 1
+
+    # 按期号从小到大读取，同一年份的记录连续出现，只缓存当前年份
+    year, buffer = None, []
+    for chunk in db.iter_history_rows(chunk_size=chunk_size):
+        for row in chunk:
+            row_year = str(row[0])[:4]
+            if row_year != year:
+                flush(year, buffer)
+                year, buffer = row_year, []
+            buffer.append(row)
+    flush(year, buffer)
+
+    staging.mkdir(parents=True, exist_ok=True)
+    if target.exists():
+        shutil.rmtree(target)
+    os.replace(staging, target)
+    logger.info(f"📦 已导出 {result['rows']} 期到 {target}（{result['files']} 个年份分区）")
+    return result
+
+
+def iter_parquet_records(db, src_dir: Path, batch_rows: int = None) -> Iterator[List[Dict]]:
+    """
+    按块读取 Parquet 数据集，返回 insert_lottery_data 可直接写入的记录（按年份分区顺序）
+
+    Raises:
+        FileNotFoundError: 目录中没有分区文件
+        ValueError: 文件缺少号码列
+    """
+    _require_pyarrow()
+    files = sorted(Path(src_dir).glob("year=*/*.parquet"))
+    if not files:
+        raise FileNotFoundError(f"没有找到 Parquet 分区文件: {src_dir}")
+
+    columns = ['lottery_no', 'draw_date', *db.HISTORY_COLUMNS]
+    batch_rows = batch_rows or DB_PERFORMANCE['bulk_load_rows']
+    for path in files:
+        parquet_file = pq.ParquetFile(path)
+        missing = set(columns) - set(parquet_file.schema_arrow.names)
+        if missing:
+            raise ValueError(f"{path} 缺少列: {', '.join(sorted(missing))}")
+        for batch in parquet_file.iter_batches(batch_size=batch_rows, columns=columns):
+            values = [batch.column(i).to_pylist() for i in range(len(columns))]
+            yield [db._history_record(row) for row in zip(*values)]
+
+
+def import_parquet(db, lottery_type: str, in_dir: Path = None, batch_rows: int = None) -> Dict:
+    """
+    把 Parquet 数据集导入当前后端（已存在的期号跳过；空表且 DB_BULK_LOAD 开启时批量导入）
+
+    Args:
+        db: 数据库实例（已建表）
+        lottery_type: 彩票类型
+        in_dir: 导出根目录（默认 PARQUET_CONFIG['dir']，读取其中的 <lottery_type> 数据集）
+        batch_rows: 每次写入的行数（默认 DB_BULK_LOAD_ROWS）
+
+    Returns:
+        {'inserted', 'duplicated', 'skipped', 'path'}
+    """
+    source = Path(in_dir or PARQUET_CONFIG['dir']) / lottery_type
+    bulk = DB_PERFORMANCE['bulk_load'] and db.get_total_count(db.table_name) == 0
+    totals = [0, 0, 0]
+    for records in iter_parquet_records(db, source, batch_rows):
+        for index, count in enumerate(db.insert_lottery_data(records, skip_existing=True, bulk=bulk)):
+            totals[index] += count
+
+    logger.info(f"📥 已从 {source} 导入: 新增 {totals[0]} 条，跳过 {totals[2]} 条")
+    return {'inserted': totals[0], 'duplicated': totals[1], 'skipped': totals[2], 'path': str(source)}
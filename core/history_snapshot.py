@@ -0,0 +1,161 @@
+"""
+历史数据快照
+按彩票类型把全部开奖号码保存为本地 .npz 文件（HISTORY_SNAPSHOT_CONFIG['dir']/<lottery_type>.npz）：
+    issues      int32[n]          期号（7位，按期号从小到大）
+    dates       datetime64[D][n]  开奖日期
+    balls       uint8[n, k]       号码列（顺序同数据库类的 HISTORY_COLUMNS）
+    columns     str[k]            号码列名（与数据库类不一致时视为失效）
+    updated_at  str               已同步记录中最近的 updated_at
+
+每次预测先用一条聚合查询（COUNT(*)、MAX(updated_at)）与数据库比对：
+- 一致：不读取任何记录，直接使用快照
+- 不一致：按 lottery_no > 快照最新期号 拉取新增记录并追加；追加后仍不一致（补缺了更早的期号、覆盖更新）时全量重建
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from core.config import DB_PERFORMANCE, HISTORY_SNAPSHOT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class HistorySnapshot:
+    """单个彩票类型的历史数据快照
+
+    Args:
+        lottery_type: 彩票类型
+        db: 数据库实例（提供 HISTORY_COLUMNS、_history_record、iter_history_rows、history_fingerprint）
+        path: 快照文件路径（默认 HISTORY_SNAPSHOT_CONFIG['dir']/<lottery_type>.npz）
+    """
+
+    def __init__(self, lottery_type: str, db, path: Path = None):
+        self.lottery_type = lottery_type
+        self.db = db
+        self.columns = tuple(db.HISTORY_COLUMNS)
+        self.path = Path(path or HISTORY_SNAPSHOT_CONFIG['dir'] / f'{lottery_type}.npz')
+        self.updated_at: Optional[str] = None
+        self._clear()
+
+    def _clear(self):
+        self.issues = np.empty(0, dtype=np.int32)
+        self.dates = np.empty(0, dtype='datetime64[D]')
+        self.balls = np.empty((0, len(self.columns)), dtype=np.uint8)
+        self.updated_at = None
+
+    def __len__(self) -> int:
+        return len(self.issues)
+
+    # ---------- 持久化 ----------
+
+    @classmethod
+    def load(cls, lottery_type: str, db, path: Path = None) -> 'HistorySnapshot':
+        """读取快照，文件不存在、损坏或号码列不一致时返回空快照"""
+        snapshot = cls(lottery_type, db, path)
+        if not snapshot.path.exists():
+            return snapshot
+        try:
+            with np.load(snapshot.path, allow_pickle=False) as data:
+                if tuple(data['columns'].tolist()) != snapshot.columns:
+                    logger.info(f"历史快照的号码列已变化，将从数据库重建: {snapshot.path}")
+                    return snapshot
+                snapshot.issues = data['issues']
+                snapshot.dates = data['dates']
+                snapshot.balls = data['balls']
+                snapshot.updated_at = str(data['updated_at']) or None
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"历史快照损坏，将从数据库重建: {snapshot.path} ({e})")
+            snapshot._clear()
+        return snapshot
+
+    def save(self):
+        """写入快照（先写临时文件再替换）"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f,
+                     issues=self.issues,
+                     dates=self.dates,
+                     balls=self.balls,
+                     columns=np.array(self.columns),
+                     updated_at=np.array(self.updated_at or ''))
+        os.replace(tmp_path, self.path)
+
+    # ---------- 同步 ----------
+
+    @property
+    def latest_issue(self) -> Optional[str]:
+        return str(int(self.issues[-1])) if len(self.issues) else None
+
+    def _extend(self, chunks: Iterable[List[tuple]]) -> int:
+        """追加 (期号, 开奖日期, 号码列..., updated_at) 记录（按期号从小到大）"""
+        width = len(self.columns)
+        issues, dates, balls = [self.issues], [self.dates], [self.balls]
+        added = 0
+        for rows in chunks:
+            issues.append(np.array([int(row[0]) for row in rows], dtype=np.int32))
+            dates.append(np.array([str(row[1]) for row in rows], dtype='datetime64[D]'))
+            balls.append(np.array([[int(v) for v in row[2:2 + width]] for row in rows], dtype=np.uint8).reshape(-1, width))
+            latest_update = max(str(row[-1]) for row in rows)
+            if self.updated_at is None or latest_update > self.updated_at:
+                self.updated_at = latest_update
+            added += len(rows)
+        if added:
+            self.issues = np.concatenate(issues)
+            self.dates = np.concatenate(dates)
+            self.balls = np.concatenate(balls)
+        return added
+
+    def sync(self) -> int:
+        """
+        与数据库同步（只拉取快照最新期之后的记录，必要时全量重建）
+
+        Returns:
+            从数据库读取的记录数
+        """
+        count, updated_at = self.db.history_fingerprint()
+        if count == len(self) and updated_at == self.updated_at:
+            return 0
+
+        fetched = self._extend(self.db.iter_history_rows(after=self.latest_issue))
+        if count != len(self) or updated_at != self.updated_at:
+            logger.info(f"历史快照与数据库不一致（补缺或覆盖更新），全量重建: {self.lottery_type}")
+            self._clear()
+            fetched = self._extend(self.db.iter_history_rows())
+        return fetched
+
+    # ---------- 读取 ----------
+
+    def iter_lottery_data(self, chunk_size: int = None) -> Iterator[List[Dict]]:
+        """按块返回记录（格式、顺序与数据库类的 iter_lottery_data 相同，按开奖日期从新到旧）"""
+        chunk_size = chunk_size or DB_PERFORMANCE['stream_chunk_rows']
+        record = self.db._history_record
+        for end in range(len(self), 0, -chunk_size):
+            start = max(0, end - chunk_size)
+            issues = self.issues[start:end][::-1].tolist()
+            dates = self.dates[start:end][::-1].astype(str).tolist()
+            balls = self.balls[start:end][::-1].tolist()
+            yield [record((issue, day, *numbers)) for issue, day, numbers in zip(issues, dates, balls)]
+
+
+def load_history(db, lottery_type: str) -> HistorySnapshot:
+    """
+    读取并同步历史快照（预测、统计的数据来源）
+
+    快照关闭或读写失败时从数据库全量读取到内存中的快照，不写文件
+    """
+    enabled = HISTORY_SNAPSHOT_CONFIG['enabled']
+    snapshot = HistorySnapshot.load(lottery_type, db) if enabled else HistorySnapshot(lottery_type, db)
+    fetched = snapshot.sync()
+
+    if enabled and fetched:
+        try:
+            snapshot.save()
+        except OSError as e:
+            logger.warning(f"历史快照写入失败: {snapshot.path} ({e})")
+    logger.info(f"📸 历史快照: {len(snapshot)} 期（本次从数据库读取 {fetched} 期）")
+    return snapshot
@@ -0,0 +1,138 @@
+"""
+开奖结果表格的流式提取器
+使用预编译正则直接扫描 500.com 页面中的数据表格（<tbody id="tdata"> 或 <table id="tablelist">），
+逐行产出单元格文本，避免为整页构建 BeautifulSoup 树；提取失败时退回 BeautifulSoup
+"""
+
+import html as html_lib
+import logging
+import re
+from typing import Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_COMMENT_RE = re.compile(r'<!--.*?-->', re.S)
+_ROW_RE = re.compile(r'<tr\b[^>]*>(.*?)</tr\s*>', re.S | re.I)
+_CELL_RE = re.compile(r'<td\b[^>]*>(.*?)</td\s*>', re.S | re.I)
+_TAG_RE = re.compile(r'<[^>]*>')
+
+# 按 (标签, id) 缓存编译后的表格定位正则
+_table_patterns: Dict[tuple, re.Pattern] = {}
+
+
+def _table_pattern(tag: str, table_id: str) -> re.Pattern:
+    """获取定位数据表格的正则（按标签和 id 缓存）"""
+    key = (tag, table_id)
+    if key not in _table_patterns:
+        _table_patterns[key] = re.compile(
+            rf'<{tag}\b[^>]*\bid\s*=\s*["\']?{re.escape(table_id)}["\']?[^>]*>(.*?)</{tag}\s*>',
+            re.S | re.I
+        )
+    return _table_patterns[key]
+
+
+def _cell_text(cell_html: str) -> str:
+    """提取单元格文本，与 BeautifulSoup 的 get_text(strip=True) 一致：逐段去空白后直接拼接"""
+    if '<' not in cell_html:
+        return html_lib.unescape(cell_html).strip()
+    return ''.join(html_lib.unescape(part).strip() for part in _TAG_RE.split(cell_html))
+
+
+def extract_table_rows(html: str, tag: str, table_id: str) -> Optional[Iterator[List[str]]]:
+    """
+    流式提取数据表格的每一行
+
+    Args:
+        html: 页面 HTML
+        tag: 数据表格的标签（'tbody' 或 'table'）
+        table_id: 数据表格的 id
+
+    Returns:
+        逐行产出单元格文本列表的迭代器；未找到数据表格时返回 None
+    """
+    match = _table_pattern(tag, table_id).search(html)
+    if not match:
+        return None
+
+    body = match.group(1)
+    if '<!--' in body:
+        body = _COMMENT_RE.sub('', body)
+
+    return (
+        [_cell_text(cell) for cell in _CELL_RE.findall(row.group(1))]
+        for row in _ROW_RE.finditer(body)
+    )
+
+
+def _extract_table_rows_bs4(html: str, tag: str, table_id: str) -> Optional[Iterator[List[str]]]:
+    """使用 BeautifulSoup 提取数据表格的每一行（兜底方案）"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find(tag, id=table_id)
+    if not table:
+        return None
+
+    return (
+        [cell.get_text(strip=True) for cell in row.find_all('td')]
+        for row in table.find_all('tr')
+    )
+
+
+def parse_result_table(html: str,
+                       tag: str,
+                       table_id: str,
+                       parse_cells: Callable[[List[str]], Optional[Dict]],
+                       min_cells: int,
+                       skip_rows: int = 0,
+                       engine: str = 'auto') -> List[Dict]:
+    """
+    解析开奖结果表格
+
+    Args:
+        html: 页面 HTML
+        tag: 数据表格的标签（'tbody' 或 'table'）
+        table_id: 数据表格的 id
+        parse_cells: 行解析函数，输入单元格文本列表，返回结构化数据（无效行返回 None）
+        min_cells: 有效行的最少单元格数
+        skip_rows: 跳过开头的行数（如表头）
+        engine: 'auto' 流式提取失败时退回 BeautifulSoup；'stream' / 'bs4' 仅使用指定方式
+
+    Returns:
+        结构化数据列表（保持页面中的顺序）
+
+    Raises:
+        ValueError: 页面中没有数据表格（如错误页、验证页）
+    """
+    engines = ['stream', 'bs4'] if engine == 'auto' else [engine]
+    extractors = {'stream': extract_table_rows, 'bs4': _extract_table_rows_bs4}
+
+    for name in engines:
+        rows = extractors[name](html, tag, table_id)
+        if rows is None:
+            continue
+
+        results = []
+        row_count = 0
+        for index, texts in enumerate(rows):
+            if index < skip_rows:
+                continue
+            row_count += 1
+            if len(texts) < min_cells:
+                continue
+            try:
+                record = parse_cells(texts)
+            except Exception as e:
+                logger.debug(f"解析行数据失败: {e}")
+                continue
+            if record:
+                results.append(record)
+
+        # 流式提取有行但一条都没解析出来，可能是页面结构变化，交给 BeautifulSoup 再试一次
+        if results or row_count == 0 or name == engines[-1]:
+            logger.info(f"找到 {row_count} 行数据，成功解析 {len(results)} 条数据")
+            return results
+
+        logger.warning(f"流式提取未解析出有效数据（{row_count} 行），改用 BeautifulSoup 解析")
+
+    raise ValueError(f"未找到数据表格: <{tag} id=\"{table_id}\">")
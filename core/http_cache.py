@@ -0,0 +1,308 @@
+"""
+HTTP 响应磁盘缓存
+按 URL 缓存 GET 响应正文（gzip 压缩）及 ETag / Last-Modified 校验信息：
+- 再次请求时携带 If-None-Match / If-Modified-Since 发送条件请求
+- 服务器返回 304 或正文哈希相同，且这份正文的数据已由调用方确认入库（mark_committed）时，
+  将响应标记为 unchanged，调用方可跳过解析；入库失败后重试仍会重新解析
+- 缓存总大小超过上限时按最近访问时间（LRU）淘汰
+- 索引修改先记在内存中，每次爬取结束（mark_pages_committed / 爬虫 close）时加文件锁合并写入一次
+"""
+
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.config import HTTP_CACHE_CONFIG
+
+try:
+    import fcntl
+except ImportError:  # Windows：不加文件锁
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """基于磁盘的响应缓存（线程安全，多个进程可共用同一目录）
+
+    目录结构：
+        <cache_dir>/index.json    索引：url -> {key, etag, last_modified, sha256, committed_sha256, size, atime, content_type}
+        <cache_dir>/index.lock    写索引时的文件锁（fcntl 不可用时不加锁）
+        <cache_dir>/<key>.gz      gzip 压缩的响应正文
+
+    索引的修改（含访问时间）只记在内存中，flush() 时加文件锁重新读取磁盘上的索引，
+    合并本进程修改过的条目后整体替换；定时任务与手动 fetch 同时运行时不会互相覆盖
+    """
+
+    INDEX_FILE = 'index.json'
+    LOCK_FILE = 'index.lock'
+
+    def __init__(self, cache_dir: Path = None, max_bytes: int = None):
+        """
+        Args:
+            cache_dir: 缓存目录（默认 DATA_DIR/http_cache）
+            max_bytes: 缓存文件总大小上限（字节，按压缩后大小计算）
+        """
+        self.cache_dir = Path(cache_dir or HTTP_CACHE_CONFIG['dir'])
+        self.max_bytes = HTTP_CACHE_CONFIG['max_bytes'] if max_bytes is None else max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index: Dict[str, Dict] = self._load_index()
+        # 本进程修改过、尚未写入磁盘的条目：url -> 'touch'（只更新访问时间）/ 'put' / 'delete'
+        self._changes: Dict[str, str] = {}
+
+    def _load_index(self) -> Dict[str, Dict]:
+        """读取索引，损坏时重建为空索引"""
+        index_path = self.cache_dir / self.INDEX_FILE
+        if not index_path.exists():
+            return {}
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"HTTP 缓存索引损坏，已重建: {e}")
+            return {}
+
+    def _save_index(self, index: Dict[str, Dict]):
+        """写入索引（先写临时文件再替换，避免中途退出导致索引损坏）"""
+        index_path = self.cache_dir / self.INDEX_FILE
+        tmp_path = index_path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, index_path)
+
+    def _change(self, url: str, kind: str):
+        """记录条目修改（调用方持有锁；touch 不覆盖 put / delete）"""
+        if kind != 'touch' or url not in self._changes:
+            self._changes[url] = kind
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def get_entry(self, url: str) -> Optional[Dict]:
+        """获取缓存条目（不含正文）"""
+        with self._lock:
+            entry = self._index.get(url)
+            return dict(entry) if entry else None
+
+    def read_body(self, url: str) -> Optional[bytes]:
+        """读取缓存正文并刷新访问时间，文件缺失时删除条目"""
+        with self._lock:
+            entry = self._index.get(url)
+            if not entry:
+                return None
+            try:
+                with gzip.open(self.cache_dir / f"{entry['key']}.gz", 'rb') as f:
+                    body = f.read()
+            except OSError as e:
+                logger.warning(f"读取 HTTP 缓存失败，已删除条目: {e}")
+                self._index.pop(url, None)
+                self._change(url, 'delete')
+                return None
+            entry['atime'] = time.time()
+            self._change(url, 'touch')
+            return body
+
+    def store(self, url: str, body: bytes, headers) -> bool:
+        """
+        保存响应正文
+
+        Returns:
+            正文是否与已确认入库的正文一致（按 SHA-256 比较）
+        """
+        digest = hashlib.sha256(body).hexdigest()
+
+        with self._lock:
+            previous = self._index.get(url) or {}
+            committed = previous.get('committed_sha256')
+            key = self._key(url)
+            path = self.cache_dir / f"{key}.gz"
+
+            if previous.get('sha256') != digest or not path.exists():
+                with gzip.open(path, 'wb', compresslevel=6) as f:
+                    f.write(body)
+
+            self._index[url] = {
+                'key': key,
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'content_type': headers.get('Content-Type'),
+                'sha256': digest,
+                'committed_sha256': committed,
+                'size': path.stat().st_size,
+                'atime': time.time(),
+            }
+            self._change(url, 'put')
+
+        return committed == digest
+
+    def mark_committed(self, url: str):
+        """调用方已把当前缓存正文中的数据入库，之后相同的正文才会标记为 unchanged"""
+        with self._lock:
+            entry = self._index.get(url)
+            if not entry or entry.get('committed_sha256') == entry['sha256']:
+                return
+            entry['committed_sha256'] = entry['sha256']
+            self._change(url, 'put')
+
+    def touch(self, url: str, headers):
+        """304 响应时更新校验信息与访问时间"""
+        with self._lock:
+            entry = self._index.get(url)
+            if not entry:
+                return
+            etag = headers.get('ETag') or entry.get('etag')
+            last_modified = headers.get('Last-Modified') or entry.get('last_modified')
+            changed = (etag, last_modified) != (entry.get('etag'), entry.get('last_modified'))
+            entry.update(etag=etag, last_modified=last_modified, atime=time.time())
+            self._change(url, 'put' if changed else 'touch')
+
+    def invalidate(self, url: str):
+        """删除指定 URL 的缓存"""
+        with self._lock:
+            entry = self._index.pop(url, None)
+            if entry:
+                (self.cache_dir / f"{entry['key']}.gz").unlink(missing_ok=True)
+                self._change(url, 'delete')
+
+    def flush(self):
+        """
+        把本进程的修改合并写入磁盘上的索引（没有修改时不写）
+
+        持有文件锁时重新读取索引：put 覆盖该条目（另一个进程已把同一正文记为已入库时保留该记录），
+        touch 只更新访问时间，delete 删除条目；合并后按总大小上限淘汰
+        """
+        with self._lock:
+            if not self._changes:
+                return
+            with open(self.cache_dir / self.LOCK_FILE, 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    index = self._load_index()
+                    for url, kind in self._changes.items():
+                        ours, theirs = self._index.get(url), index.get(url)
+                        if kind == 'delete' or ours is None:
+                            index.pop(url, None)
+                        elif kind == 'touch':
+                            if theirs:
+                                theirs['atime'] = max(theirs.get('atime', 0), ours['atime'])
+                        else:
+                            if theirs and theirs.get('committed_sha256') == ours['sha256']:
+                                ours['committed_sha256'] = theirs['committed_sha256']
+                            index[url] = ours
+                    self._evict(index)
+                    self._save_index(index)
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+            self._index = index
+            self._changes.clear()
+
+    def _evict(self, index: Dict[str, Dict]):
+        """按最近访问时间淘汰，直到总大小不超过上限（调用方持有锁）"""
+        total = sum(entry['size'] for entry in index.values())
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for url, entry in sorted(index.items(), key=lambda item: item[1]['atime']):
+            if total <= self.max_bytes:
+                break
+            (self.cache_dir / f"{entry['key']}.gz").unlink(missing_ok=True)
+            del index[url]
+            total -= entry['size']
+            evicted += 1
+
+        logger.debug(f"HTTP 缓存淘汰 {evicted} 条，当前 {total / 1024:.1f} KB")
+
+
+class CachingAdapter(HTTPAdapter):
+    """带条件请求的 HTTPAdapter
+
+    GET 响应会附加属性：
+        response.from_cache: 正文来自本地缓存（服务器返回 304）
+        response.unchanged: 正文与已确认入库的正文一致（304 或正文哈希相同）
+    """
+
+    def __init__(self, cache: ResponseCache, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if request.method != 'GET':
+            return super().send(request, **kwargs)
+
+        url = request.url
+        entry = self.cache.get_entry(url)
+        if entry:
+            if entry.get('etag'):
+                request.headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        response = super().send(request, **kwargs)
+        response.from_cache = False
+        response.unchanged = False
+
+        if response.status_code == 304 and entry:
+            body = self.cache.read_body(url)
+            if body is not None:
+                self.cache.touch(url, response.headers)
+                return self._build_cached_response(response, entry, body)
+            # 缓存正文丢失：删除条目，不带校验信息重新请求完整页面
+            self.cache.invalidate(url)
+            response.close()
+            request.headers.pop('If-None-Match', None)
+            request.headers.pop('If-Modified-Since', None)
+            response = super().send(request, **kwargs)
+            response.from_cache = False
+            response.unchanged = False
+
+        if response.status_code == 200 and not kwargs.get('stream'):
+            response.unchanged = self.cache.store(url, response.content, response.headers)
+
+        return response
+
+    @staticmethod
+    def _build_cached_response(response: requests.Response, entry: Dict, body: bytes) -> requests.Response:
+        """将 304 响应改写为携带缓存正文的 200 响应"""
+        response.status_code = 200
+        response.reason = 'OK'
+        response._content = body
+        response._content_consumed = True
+        response.headers.pop('Content-Encoding', None)
+        response.headers['Content-Length'] = str(len(body))
+        if entry.get('content_type'):
+            response.headers['Content-Type'] = entry['content_type']
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.from_cache = True
+        response.unchanged = entry.get('committed_sha256') == entry['sha256']
+        return response
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """获取进程内共享的响应缓存"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+            # 进程退出前写入尚未保存的索引修改
+            atexit.register(_cache.flush)
+        return _cache
+
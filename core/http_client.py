@@ -0,0 +1,199 @@
+"""
+进程内共享的 HTTP 客户端层
+所有彩票爬虫共用：
+- 一个 HTTPAdapter（urllib3 为每个主机维护一个 keep-alive 连接池，复用 TLS 连接）
+- 每个主机一个令牌桶限速器（多个彩票并行爬取时总请求速率仍受限）
+- 每个主机一个并发信号量（限制同时进行的请求数）
+- 请求耗时统计（基准测试用）
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, Optional
+from urllib.parse import urlparse, urlunparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.config import HTTP_CACHE_CONFIG, SPIDER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """令牌桶限速器（线程安全）
+
+    以 rate 个/秒的速度补充令牌，最多积累 capacity 个；
+    每次请求消耗一个令牌，令牌不足时阻塞等待
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self) -> float:
+        """
+        获取一个令牌
+
+        Returns:
+            等待的秒数
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait_time = self.paused_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+            waited += wait_time
+
+    def pause(self, seconds: float):
+        """暂停发放令牌（收到 429 时让共享该主机的所有爬虫一起等待）"""
+        with self._lock:
+            now = time.monotonic()
+            self.paused_until = max(self.paused_until, now + seconds)
+            self.tokens = 0
+            self.updated = now + seconds
+
+
+class RequestStats:
+    """请求耗时与状态码统计（线程安全，只保留最近 max_samples 个耗时样本）"""
+
+    def __init__(self, max_samples: int = 10000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=max_samples)
+        self._status = Counter()
+
+    def record(self, seconds: float, status: Optional[int]):
+        """记录一次请求（status 为 None 表示连接失败或超时）"""
+        with self._lock:
+            self._latencies.append(seconds)
+            self._status[status if status is not None else 'error'] += 1
+
+    def reset(self):
+        with self._lock:
+            self._latencies.clear()
+            self._status.clear()
+
+    def snapshot(self) -> Dict:
+        """
+        Returns:
+            {'requests', 'status', 'p50_ms', 'p95_ms', 'max_ms'}
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            status = dict(self._status)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        return {
+            'requests': sum(status.values()),
+            'status': {str(code): count for code, count in sorted(status.items(), key=str)},
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'max_ms': round(latencies[-1] * 1000, 1) if latencies else 0.0,
+        }
+
+
+# 进程内所有爬虫请求的统计
+request_stats = RequestStats()
+
+
+def override_base_url(url: str, base_url: str) -> str:
+    """将 url 的协议和主机替换为 base_url 的（路径和参数不变）"""
+    if not base_url:
+        return url
+    target = urlparse(base_url)
+    return urlunparse(urlparse(url)._replace(scheme=target.scheme, netloc=target.netloc))
+
+
+_adapter: Optional[HTTPAdapter] = None
+_limiters: Dict[str, TokenBucket] = {}
+_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_lock = threading.Lock()
+
+
+def get_adapter() -> HTTPAdapter:
+    """获取进程内共享的 HTTPAdapter（启用响应缓存时为 CachingAdapter）"""
+    global _adapter
+    with _lock:
+        if _adapter is None:
+            pool_options = {
+                'pool_connections': SPIDER_CONFIG['pool_connections'],
+                'pool_maxsize': SPIDER_CONFIG['pool_maxsize'],
+                'max_retries': 0,  # 重试由 BaseSpider.fetch_with_retry 处理
+            }
+            if HTTP_CACHE_CONFIG['enabled']:
+                from core.http_cache import CachingAdapter, get_response_cache
+                _adapter = CachingAdapter(get_response_cache(), **pool_options)
+            else:
+                _adapter = HTTPAdapter(**pool_options)
+        return _adapter
+
+
+def create_session() -> requests.Session:
+    """
+    创建挂载共享连接池的会话
+
+    每个爬虫实例（每个线程）持有独立的 Session（Cookie 等状态互不影响），
+    底层连接池由所有会话共享
+    """
+    session = requests.Session()
+    adapter = get_adapter()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def release_session(session: requests.Session):
+    """释放会话：只卸载适配器，不关闭共享连接池"""
+    session.adapters.clear()
+
+
+def get_rate_limiter(url: str) -> TokenBucket:
+    """获取目标主机的令牌桶（同一主机的所有爬虫共享）"""
+    host = urlparse(url).netloc
+    with _lock:
+        if host not in _limiters:
+            _limiters[host] = TokenBucket(SPIDER_CONFIG['rate_per_host'], SPIDER_CONFIG['rate_burst'])
+        return _limiters[host]
+
+
+def get_host_semaphore(url: str) -> threading.BoundedSemaphore:
+    """获取目标主机的并发信号量（同一主机的所有爬虫共享）"""
+    host = urlparse(url).netloc
+    with _lock:
+        if host not in _semaphores:
+            _semaphores[host] = threading.BoundedSemaphore(max(1, SPIDER_CONFIG['per_host_concurrency']))
+        return _semaphores[host]
+
+
+def close_all():
+    """关闭共享连接池（进程退出前调用）"""
+    global _adapter
+    with _lock:
+        if _adapter is not None:
+            _adapter.close()
+            _adapter = None
@@ -0,0 +1,182 @@
+"""
+原始页面归档
+保存每次爬取到的页面正文，解析逻辑修复后可以离线重新解析，无需重新爬取 500.com
+
+目录结构（DATA_DIR/page_archive）：
+    blobs/<sha256 前两位>/<sha256>.gz|.zst    按内容寻址的压缩正文（相同页面只存一份）
+    index/<lottery_type>.json                 期号范围 -> {sha256, codec, size, encoding, url, fetched_at}
+
+压缩格式：安装了 zstandard 时默认使用 zstd，否则使用 gzip（PAGE_ARCHIVE_CODEC 可指定）
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.config import PAGE_ARCHIVE_CONFIG
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# 不带期号范围的请求（最新数据页）使用的键
+LATEST_KEY = 'latest'
+
+
+def _resolve_codec(codec: str) -> str:
+    """确定实际使用的压缩格式"""
+    if codec == 'auto':
+        return 'zstd' if zstandard is not None else 'gzip'
+    if codec == 'zstd' and zstandard is None:
+        logger.warning("未安装 zstandard，页面归档改用 gzip 压缩")
+        return 'gzip'
+    return codec
+
+
+def range_key(start_issue: Optional[str], end_issue: Optional[str]) -> str:
+    """期号范围对应的索引键"""
+    if start_issue is None:
+        return LATEST_KEY
+    return f"{start_issue}-{end_issue or ''}"
+
+
+class PageArchive:
+    """按内容寻址的页面归档（线程安全）"""
+
+    SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+    def __init__(self, root: Path = None, codec: str = None):
+        """
+        Args:
+            root: 归档目录（默认 DATA_DIR/page_archive）
+            codec: 压缩格式 'auto' / 'gzip' / 'zstd'
+        """
+        self.root = Path(root or PAGE_ARCHIVE_CONFIG['dir'])
+        self.codec = _resolve_codec(codec or PAGE_ARCHIVE_CONFIG['codec'])
+        (self.root / 'blobs').mkdir(parents=True, exist_ok=True)
+        (self.root / 'index').mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, Dict[str, Dict]] = {}
+
+    # ---------- 正文 ----------
+
+    def _blob_path(self, digest: str, codec: str) -> Path:
+        return self.root / 'blobs' / digest[:2] / f"{digest}{self.SUFFIXES[codec]}"
+
+    def _compress(self, body: bytes) -> bytes:
+        if self.codec == 'zstd':
+            return zstandard.ZstdCompressor(level=10).compress(body)
+        return gzip.compress(body, compresslevel=6)
+
+    @staticmethod
+    def _decompress(data: bytes, codec: str) -> bytes:
+        if codec == 'zstd':
+            if zstandard is None:
+                raise RuntimeError("归档使用 zstd 压缩，请先安装 zstandard")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def read_blob(self, digest: str, codec: str) -> bytes:
+        """读取并解压页面正文"""
+        return self._decompress(self._blob_path(digest, codec).read_bytes(), codec)
+
+    def read_text(self, entry: Dict) -> str:
+        """按归档时记录的编码读取页面文本"""
+        body = self.read_blob(entry['sha256'], entry['codec'])
+        return body.decode(entry.get('encoding') or 'utf-8', errors='replace')
+
+    # ---------- 索引 ----------
+
+    def _index_path(self, lottery_type: str) -> Path:
+        return self.root / 'index' / f"{lottery_type}.json"
+
+    def _load_index(self, lottery_type: str) -> Dict[str, Dict]:
+        """读取索引（调用方持有锁）"""
+        if lottery_type not in self._indexes:
+            path = self._index_path(lottery_type)
+            index = {}
+            if path.exists():
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        index = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"页面归档索引损坏，已重建: {path} ({e})")
+            self._indexes[lottery_type] = index
+        return self._indexes[lottery_type]
+
+    def _save_index(self, lottery_type: str):
+        """写入索引（调用方持有锁）"""
+        path = self._index_path(lottery_type)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._indexes[lottery_type], f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    # ---------- 对外接口 ----------
+
+    def save(self, lottery_type: str, start_issue: Optional[str], end_issue: Optional[str],
+             body: bytes, url: str = None, encoding: str = None) -> str:
+        """
+        归档页面正文
+
+        Returns:
+            正文的 SHA-256
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest, self.codec)
+
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(self._compress(body))
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            index = self._load_index(lottery_type)
+            index[range_key(start_issue, end_issue)] = {
+                'sha256': digest,
+                'codec': self.codec,
+                'size': len(body),
+                'encoding': encoding,
+                'url': url,
+                'fetched_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            }
+            self._save_index(lottery_type)
+
+        return digest
+
+    def entries(self, lottery_type: str) -> List[Dict]:
+        """
+        列出指定彩票类型的归档页面
+
+        Returns:
+            [{'range', 'sha256', 'codec', 'size', 'encoding', 'url', 'fetched_at'}, ...]，按归档时间从早到晚排列
+        """
+        with self._lock:
+            index = self._load_index(lottery_type)
+            items = [dict(entry, range=key) for key, entry in index.items()]
+        return sorted(items, key=lambda e: (e['fetched_at'], e['range']))
+
+
+_archive: Optional[PageArchive] = None
+_archive_lock = threading.Lock()
+
+
+def get_page_archive() -> Optional[PageArchive]:
+    """获取进程内共享的页面归档（PAGE_ARCHIVE_ENABLED=false 时返回 None）"""
+    global _archive
+    if not PAGE_ARCHIVE_CONFIG['enabled']:
+        return None
+    with _archive_lock:
+        if _archive is None:
+            _archive = PageArchive()
+        return _archive
@@ -0,0 +1,316 @@
+"""
+下载 → 解析 → 入库 三段式流水线
+- 下载：多个线程并发请求期号范围，结果放入有界队列（队列满时阻塞，形成背压）
+- 解析：单个线程解析页面，并由 RangePlanner 决定截断/超时范围的拆分
+- 入库：在调用线程（主线程）中按期号顺序分批写入，数据库连接只在主线程使用
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from core.config import SPIDER_CONFIG
+from core.range_planner import RangePlanner
+
+logger = logging.getLogger(__name__)
+
+# 队列结束标记
+_DONE = object()
+
+
+class StageStats:
+    """单个阶段的统计（线程安全）"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.rows = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, items: int = 0, rows: int = 0, busy: float = 0.0, blocked: float = 0.0):
+        with self._lock:
+            self.items += items
+            self.rows += rows
+            self.busy_seconds += busy
+            self.blocked_seconds += blocked
+
+    def to_dict(self) -> Dict:
+        return {
+            'items': self.items,
+            'rows': self.rows,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'blocked_seconds': round(self.blocked_seconds, 3),
+        }
+
+
+class FetchPipeline:
+    """期号范围爬取流水线
+
+    Args:
+        download: 下载函数 (start_issue, end_issue) -> 响应，在下载线程中调用
+        parse: 解析函数 (响应) -> 数据列表，在解析线程中调用
+        write: 写入函数 (数据列表) -> (inserted, duplicated, skipped)，在调用 run() 的线程中调用
+        planner: 范围规划器（只在解析线程中使用）
+        downloaders: 下载线程数
+        queue_size: 阶段间队列容量
+        batch_size: 每次写入的行数
+    """
+
+    def __init__(self,
+                 download: Callable[[str, str], Any],
+                 parse: Callable[[Any], List[Dict]],
+                 write: Callable[[List[Dict]], Tuple[int, int, int]],
+                 planner: RangePlanner = None,
+                 downloaders: int = 1,
+                 queue_size: int = None,
+                 batch_size: int = None):
+        self.download = download
+        self.parse = parse
+        self.write = write
+        self.planner = planner or RangePlanner()
+        self.downloaders = max(1, downloaders)
+        self.queue_size = queue_size or SPIDER_CONFIG['pipeline_queue_size']
+        self.batch_size = batch_size or SPIDER_CONFIG['batch_size']
+
+        self.stats = {name: StageStats(name) for name in ('download', 'parse', 'write')}
+        self.max_depth = {'parse': 0, 'write': 0}
+        self.range_timings: List[Dict] = []
+        self.inserted = 0
+        self.elapsed = 0.0
+
+        self._tasks: queue.Queue = queue.Queue()
+        self._parse_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        self._write_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    # ---------- 队列辅助 ----------
+
+    def _put(self, target: queue.Queue, item, depth_key: str = None) -> float:
+        """放入有界队列（满时阻塞，流水线停止时放弃），返回阻塞秒数"""
+        started = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.2)
+                break
+            except queue.Full:
+                continue
+        if depth_key:
+            self.max_depth[depth_key] = max(self.max_depth[depth_key], target.qsize())
+        return time.perf_counter() - started
+
+    def _get(self, source: queue.Queue):
+        """从队列取出（流水线停止时返回 _DONE）"""
+        while not self._stop.is_set():
+            try:
+                return source.get(timeout=0.2)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    # ---------- 各阶段 ----------
+
+    def _download_worker(self):
+        stats = self.stats['download']
+        while True:
+            task = self._get(self._tasks)
+            if task is _DONE or task is None:
+                return
+
+            start_issue, end_issue = task
+            started = time.perf_counter()
+            try:
+                result, error = self.download(start_issue, end_issue), None
+            except Exception as e:
+                result, error = None, e
+            fetch_seconds = time.perf_counter() - started
+
+            blocked = self._put(self._parse_queue, (start_issue, end_issue, result, error, fetch_seconds), 'parse')
+            stats.record(items=1, busy=fetch_seconds, blocked=blocked)
+
+    def _parse_worker(self, outstanding: int):
+        try:
+            self._parse_loop(outstanding)
+        except BaseException as e:
+            self._error = e
+            self._stop.set()
+        finally:
+            for _ in range(self.downloaders):
+                self._tasks.put(None)
+
+    def _parse_loop(self, outstanding: int):
+        stats = self.stats['parse']
+        planner = self.planner
+
+        while outstanding > 0:
+            item = self._get(self._parse_queue)
+            if item is _DONE:
+                return
+            start_issue, end_issue, result, error, fetch_seconds = item
+            outstanding -= 1
+            planner.requests += 1
+
+            timing = {
+                'range': f"{start_issue}-{end_issue}",
+                'status': 'ok',
+                'rows': 0,
+                'inserted': 0,
+                'fetch_seconds': fetch_seconds,
+                'insert_seconds': 0.0
+            }
+            self.range_timings.append(timing)
+
+            started = time.perf_counter()
+            rows: List[Dict] = []
+            if isinstance(error, requests.RequestException):
+                sub_ranges = planner.resolve(start_issue, end_issue, error=error)
+            elif error is not None:
+                logger.error(f"   ❌ {timing['range']} 下载失败: {error}")
+                sub_ranges = []
+            else:
+                try:
+                    rows = self.parse(result)
+                    sub_ranges = planner.resolve(start_issue, end_issue, rows=rows)
+                except Exception as e:
+                    logger.error(f"   ❌ {timing['range']} 解析失败: {e}")
+                    rows, sub_ranges = [], []
+            parse_seconds = time.perf_counter() - started
+
+            if sub_ranges is not None:
+                # 截断、超时或失败：丢弃本次结果，改为请求子范围
+                # 先通知入库阶段替换槽位，再提交子范围，保证事件顺序
+                timing['status'] = 'split' if sub_ranges else 'failed'
+                event = ('split', start_issue, [sub_start for sub_start, _ in sub_ranges], timing)
+                blocked = self._put(self._write_queue, event, 'write')
+                for sub_start, sub_end in sub_ranges:
+                    # 疑似截断时已取得的较新部分直接入库，只请求更早的部分
+                    kept_rows = planner.take_prefetched(sub_start, sub_end)
+                    if kept_rows is None:
+                        self._tasks.put((sub_start, sub_end))
+                        outstanding += 1
+                        continue
+                    kept_timing = dict(timing, range=f"{sub_start}-{sub_end}", status='ok',
+                                       rows=len(kept_rows), fetch_seconds=0.0)
+                    self.range_timings.append(kept_timing)
+                    self.stats['download'].record(rows=len(kept_rows))
+                    blocked += self._put(self._write_queue, ('rows', sub_start, kept_rows, kept_timing), 'write')
+                stats.record(items=1, busy=parse_seconds, blocked=blocked)
+                continue
+
+            timing['rows'] = len(rows)
+            self.stats['download'].record(rows=len(rows))
+            if not rows:
+                logger.warning(f"   ⚠️ {timing['range']} 无数据，跳过")
+            blocked = self._put(self._write_queue, ('rows', start_issue, rows, timing), 'write')
+            stats.record(items=1, rows=len(rows), busy=parse_seconds, blocked=blocked)
+
+        self._put(self._write_queue, _DONE)
+
+    def _write_rows(self, rows: List[Dict], timing: Dict):
+        """按期号从小到大分批写入"""
+        stats = self.stats['write']
+        ordered = sorted(rows, key=lambda x: x['lottery_no'])
+        duplicated = skipped = 0
+
+        for offset in range(0, len(ordered), self.batch_size):
+            chunk = ordered[offset:offset + self.batch_size]
+            started = time.perf_counter()
+            inserted, dup, skip = self.write(chunk)
+            seconds = time.perf_counter() - started
+
+            timing['insert_seconds'] += seconds
+            timing['inserted'] += inserted
+            self.inserted += inserted
+            duplicated += dup
+            skipped += skip
+            stats.record(items=1, rows=len(chunk), busy=seconds)
+
+        logger.info(f"   ✅ {timing['range']}: 获取 {len(rows)} 条，新增 {timing['inserted']} 条，重复 {duplicated} 条，跳过 {skipped} 条")
+
+    # ---------- 运行 ----------
+
+    def run(self, ranges: List[Tuple[str, str]]) -> Dict:
+        """
+        执行流水线
+
+        Args:
+            ranges: 初始期号范围列表（按期号从小到大）
+
+        Returns:
+            {'inserted', 'request_count', 'range_timings', 'stages', 'max_queue_depth', 'elapsed_seconds'}
+        """
+        run_started = time.perf_counter()
+
+        # 以起始期号为键的范围槽位：None 表示未完成，否则为 (数据, 耗时记录)
+        # 按起始期号顺序写入，保持 ID 与期号同序递增
+        slots: Dict[str, Optional[Tuple[List[Dict], Dict]]] = {start: None for start, _ in ranges}
+
+        for task in ranges:
+            self._tasks.put(task)
+
+        threads = [
+            threading.Thread(target=self._download_worker, name=f'pipeline-download-{i}', daemon=True)
+            for i in range(self.downloaders)
+        ]
+        threads.append(threading.Thread(target=self._parse_worker, args=(len(ranges),),
+                                        name='pipeline-parse', daemon=True))
+        for thread in threads:
+            thread.start()
+
+        try:
+            while ranges:
+                event = self._get(self._write_queue)
+                if event is _DONE:
+                    break
+
+                kind, start_issue, payload, timing = event
+                if kind == 'split':
+                    del slots[start_issue]
+                    for sub_start in payload:
+                        slots[sub_start] = None
+                else:
+                    slots[start_issue] = (payload, timing)
+
+                while slots and slots[min(slots)] is not None:
+                    rows, done_timing = slots.pop(min(slots))
+                    if rows:
+                        self._write_rows(rows, done_timing)
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            self.elapsed = time.perf_counter() - run_started
+
+        if self._error is not None:
+            raise self._error
+
+        self.range_timings.sort(key=lambda t: t['range'])
+        return {
+            'inserted': self.inserted,
+            'request_count': self.planner.requests,
+            'range_timings': self.range_timings,
+            'stages': {name: stats.to_dict() for name, stats in self.stats.items()},
+            'max_queue_depth': dict(self.max_depth),
+            'elapsed_seconds': round(self.elapsed, 3),
+        }
+
+    def log_report(self):
+        """输出各阶段吞吐量与队列深度"""
+        elapsed = self.elapsed or 1e-9
+        logger.info("📊 流水线阶段报告:")
+        logger.info(f"   {'阶段':<10}{'处理数':>8}{'行数':>8}{'工作(s)':>10}{'阻塞(s)':>10}{'行/秒':>10}")
+        for stats in self.stats.values():
+            rate = stats.rows / stats.busy_seconds if stats.busy_seconds else 0.0
+            logger.info(
+                f"   {stats.name:<12}{stats.items:>8}{stats.rows:>8}"
+                f"{stats.busy_seconds:>10.2f}{stats.blocked_seconds:>10.2f}{rate:>10.0f}"
+            )
+        logger.info(f"   队列最大深度: 解析 {self.max_depth['parse']}/{self.queue_size}，"
+                    f"入库 {self.max_depth['write']}/{self.queue_size}")
+        logger.info(f"   总耗时 {elapsed:.2f}s，新增 {self.inserted} 条")
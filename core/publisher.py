@@ -0,0 +1,183 @@
+"""
+对象存储发布（Cloudflare R2 或其他 S3 兼容存储）
+把四种彩票的历史数据按年份分区发布为压缩的 JSON 对象：
+
+    <prefix><lottery_type>/year=YYYY.json.gz|.json.zst   该年份的开奖记录（紧凑 JSON，按期号从小到大）
+    <prefix><lottery_type>/manifest.json                 各分区的对象键、内容哈希、期数、最新期号
+
+- 分区内容（压缩前）的 sha256 与 manifest 一致时不上传
+- 增量发布只读取并重写 manifest 中最新年份及之后的分区（跨年时包含新年份）；full=True 时检查所有年份
+- 先上传分区，最后上传 manifest，读取方按 manifest 取对象不会读到不完整的数据
+
+压缩格式：安装了 zstandard 时默认使用 zstd，否则使用 gzip（R2_CODEC 可指定），对象带 Content-Encoding
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from core.config import PUBLISH_CONFIG
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# 压缩格式 -> (对象键后缀, Content-Encoding)
+CODECS = {
+    'gzip': ('.json.gz', 'gzip'),
+    'zstd': ('.json.zst', 'zstd'),
+}
+MANIFEST_NAME = 'manifest.json'
+
+
+def _resolve_codec(codec: str) -> str:
+    """确定实际使用的压缩格式"""
+    if codec == 'auto':
+        return 'zstd' if zstandard is not None else 'gzip'
+    if codec == 'zstd' and zstandard is None:
+        logger.warning("未安装 zstandard，发布改用 gzip 压缩")
+        return 'gzip'
+    if codec not in CODECS:
+        raise ValueError(f"不支持的压缩格式: {codec}（可选: auto, {', '.join(CODECS)}）")
+    return codec
+
+
+def create_client(config: Dict = None):
+    """按 PUBLISH_CONFIG 创建 S3 客户端（R2 需要 endpoint 和访问密钥）"""
+    if boto3 is None:
+        raise RuntimeError("发布到对象存储需要 boto3，请运行 `pip install boto3`")
+    config = config or PUBLISH_CONFIG
+    return boto3.client(
+        's3',
+        endpoint_url=config['endpoint'],
+        aws_access_key_id=config['access_key_id'],
+        aws_secret_access_key=config['secret_access_key'],
+        region_name=config['region']
+    )
+
+
+class HistoryPublisher:
+    """按年份分区发布历史数据
+
+    Args:
+        client: S3 客户端（默认按 PUBLISH_CONFIG 创建）
+        bucket: 存储桶（默认 R2_BUCKET_NAME）
+        prefix: 对象键前缀（默认 R2_PREFIX）
+        codec: 压缩格式 'auto' / 'gzip' / 'zstd'（默认 R2_CODEC）
+    """
+
+    def __init__(self, client=None, bucket: str = None, prefix: str = None, codec: str = None):
+        self.client = client or create_client()
+        self.bucket = bucket or PUBLISH_CONFIG['bucket_name']
+        self.prefix = PUBLISH_CONFIG['prefix'] if prefix is None else prefix
+        self.codec = _resolve_codec(codec or PUBLISH_CONFIG['codec'])
+
+    # ---------- 对象 ----------
+
+    def _key(self, lottery_type: str, name: str) -> str:
+        return f"{self.prefix}{lottery_type}/{name}"
+
+    def _compress(self, body: bytes) -> bytes:
+        if self.codec == 'zstd':
+            return zstandard.ZstdCompressor(level=10).compress(body)
+        # mtime=0：相同内容的压缩结果相同
+        return gzip.compress(body, compresslevel=9, mtime=0)
+
+    def load_manifest(self, lottery_type: str) -> Dict:
+        """读取 manifest（不存在时返回空 manifest）"""
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(lottery_type, MANIFEST_NAME))
+        except self.client.exceptions.NoSuchKey:
+            return {'lottery_type': lottery_type, 'partitions': {}}
+        return json.loads(response['Body'].read())
+
+    def _put(self, key: str, body: bytes, encoding: Optional[str] = None):
+        extra = {'ContentEncoding': encoding} if encoding else {}
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=body, ContentType='application/json', **extra)
+
+    # ---------- 发布 ----------
+
+    @staticmethod
+    def _serialize(records: List[Dict]) -> bytes:
+        """紧凑 JSON（无缩进、无多余空格）"""
+        return json.dumps(records, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def publish(self, db, lottery_type: str, full: bool = False) -> Dict:
+        """
+        发布一个彩票类型
+
+        Args:
+            db: 数据库实例（提供 iter_history_rows、_history_record）
+            lottery_type: 彩票类型
+            full: 检查所有年份（默认只检查 manifest 中最新年份及之后的年份）
+
+        Returns:
+            {'uploaded': [年份], 'unchanged': [年份], 'rows', 'bytes'}
+        """
+        manifest = self.load_manifest(lottery_type)
+        partitions: Dict[str, Dict] = manifest.get('partitions', {})
+        if manifest.get('codec') not in (None, self.codec):
+            logger.info(f"压缩格式由 {manifest['codec']} 改为 {self.codec}，重新发布所有分区")
+            partitions, full = {}, True
+
+        after = None
+        if partitions and not full:
+            after = f"{int(max(partitions)) - 1}999"
+
+        result = {'uploaded': [], 'unchanged': [], 'rows': 0, 'bytes': 0}
+        suffix, encoding = CODECS[self.codec]
+
+        def flush(year: str, records: List[Dict]):
+            if not records:
+                return
+            body = self._serialize(records)
+            digest = hashlib.sha256(body).hexdigest()
+            result['rows'] += len(records)
+            if partitions.get(year, {}).get('sha256') == digest:
+                result['unchanged'].append(year)
+                return
+            key = self._key(lottery_type, f"year={year}{suffix}")
+            data = self._compress(body)
+            self._put(key, data, encoding)
+            partitions[year] = {'key': key, 'sha256': digest, 'rows': len(records), 'bytes': len(data),
+                                'latest_issue': records[-1]['lottery_no']}
+            result['uploaded'].append(year)
+            result['bytes'] += len(data)
+
+        # 按期号从小到大读取，同一年份的记录连续出现，只缓存当前年份
+        year, buffer = None, []
+        for chunk in db.iter_history_rows(after=after):
+            for row in chunk:
+                row_year = str(row[0])[:4]
+                if row_year != year:
+                    flush(year, buffer)
+                    year, buffer = row_year, []
+                buffer.append(db._history_record(row[:-1]))
+        flush(year, buffer)
+
+        if result['uploaded']:
+            manifest = {
+                'lottery_type': lottery_type,
+                'codec': self.codec,
+                'updated_at': datetime.now().isoformat(timespec='seconds'),
+                'total_rows': sum(p['rows'] for p in partitions.values()),
+                'latest_issue': max(p['latest_issue'] for p in partitions.values()),
+                'partitions': dict(sorted(partitions.items())),
+            }
+            self._put(self._key(lottery_type, MANIFEST_NAME),
+                      json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+
+        logger.info(f"☁️ {lottery_type} 发布完成: 上传 {len(result['uploaded'])} 个分区 {result['uploaded']}"
+                    f"（{result['bytes']} 字节），未变化 {len(result['unchanged'])} 个")
+        return result
@@ -0,0 +1,242 @@
+"""
+期号范围规划器
+500.com 的 history.php?start=&end= 接口支持任意期号范围，
+规划器优先用尽量大的范围一次请求，遇到截断或超时再自适应拆分
+"""
+
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from core.config import SPIDER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 每年期号上限（与逐年爬取使用的 YY200 保持一致）
+YEAR_MAX_ISSUE = 200
+
+
+def _year_of(issue: str) -> int:
+    """5位期号的年份部分（'03001' -> 3）"""
+    return int(issue[:2])
+
+
+def _number_of(issue: str) -> int:
+    """5位期号的序号部分（'03001' -> 1）"""
+    return int(issue[2:])
+
+
+def _issue(year: int, number: int) -> str:
+    """组装5位期号"""
+    return f"{year:02d}{number:03d}"
+
+
+def _previous_issue(issue: str) -> str:
+    """上一个期号（每年第一期的上一期为上一年的 YY200）"""
+    year, number = _year_of(issue), _number_of(issue)
+    return _issue(year, number - 1) if number > 1 else _issue(year - 1, YEAR_MAX_ISSUE)
+
+
+class RangePlanner:
+    """期号范围规划器
+
+    - plan(): 把整个范围划分为尽量少的请求（默认一次请求）
+    - split(): 跨年范围按年份对半拆分，单年范围按期号对半拆分
+    - is_truncated(): 按已确认的单次响应上限判断响应是否被截断
+    - resolve(): 截断时拆分；最早期号晚于起始期号时只补请求更早的部分，
+      更早的部分确实返回了数据才认定为截断并学习上限
+    - fetch(): 顺序执行规划，截断或超时时自动拆分重试
+    """
+
+    def __init__(self, max_rows: int = None, min_span: int = None):
+        """
+        Args:
+            max_rows: 数据源单次响应的最大行数（0 表示未知，从第一次截断的响应中学习）
+            min_span: 单年范围拆分的最小期数
+        """
+        self.max_rows = SPIDER_CONFIG['range_max_rows'] if max_rows is None else max_rows
+        self.min_span = SPIDER_CONFIG['range_min_span'] if min_span is None else min_span
+        self.requests = 0
+        self.splits = 0
+        self.failed: List[Tuple[str, str]] = []
+        # 补请求的更早范围 -> 疑似截断的响应行数（该范围返回数据时作为上限学习）
+        self._probes: Dict[Tuple[str, str], int] = {}
+        # 疑似截断时已取得的较新部分，拆分后不再重复请求
+        self._prefetched: Dict[Tuple[str, str], List[Dict]] = {}
+
+    def plan(self, start_issue: str, end_issue: str, parts: int = 1) -> List[Tuple[str, str]]:
+        """
+        规划初始请求范围
+
+        Args:
+            start_issue: 起始期号（5位格式）
+            end_issue: 结束期号（5位格式）
+            parts: 期望的分段数（并发爬取时按年份均分，默认整段一次请求）
+
+        Returns:
+            [(start_issue, end_issue), ...]，按期号从小到大排列
+        """
+        start_year, end_year = _year_of(start_issue), _year_of(end_issue)
+        years = end_year - start_year + 1
+        parts = max(1, min(parts, years))
+
+        ranges = []
+        begin = start_year
+        for i in range(parts):
+            # 前 years % parts 段各多分一年
+            size = years // parts + (1 if i < years % parts else 0)
+            finish = begin + size - 1
+            ranges.append((
+                start_issue if begin == start_year else _issue(begin, 1),
+                end_issue if finish == end_year else _issue(finish, YEAR_MAX_ISSUE)
+            ))
+            begin = finish + 1
+
+        return ranges
+
+    def split(self, start_issue: str, end_issue: str, within_year: bool = True) -> List[Tuple[str, str]]:
+        """
+        将范围对半拆分
+
+        Args:
+            start_issue: 起始期号
+            end_issue: 结束期号
+            within_year: 单年范围是否允许继续按期号拆分
+
+        Returns:
+            拆分后的两个范围；无法继续拆分时返回空列表
+        """
+        start_year, end_year = _year_of(start_issue), _year_of(end_issue)
+
+        if start_year < end_year:
+            mid_year = (start_year + end_year) // 2
+            return [
+                (start_issue, _issue(mid_year, YEAR_MAX_ISSUE)),
+                (_issue(mid_year + 1, 1), end_issue)
+            ]
+
+        if not within_year:
+            return []
+
+        start_no, end_no = _number_of(start_issue), _number_of(end_issue)
+        if end_no - start_no + 1 <= max(1, self.min_span):
+            return []
+
+        mid_no = (start_no + end_no) // 2
+        return [
+            (start_issue, _issue(start_year, mid_no)),
+            (_issue(start_year, mid_no + 1), end_issue)
+        ]
+
+    def is_truncated(self, start_issue: str, end_issue: str, rows: List[Dict]) -> bool:
+        """
+        判断响应是否被截断：行数达到已确认的数据源上限
+
+        最早返回的期号晚于起始期号不能单独作为截断依据（起始期号本身不存在时也是如此，
+        如跨年的缺口范围、拆分出的范围），由 resolve() 补请求更早的部分来确认；
+        之后出现行数更多的响应说明该上限不准确，重新学习
+        """
+        if not rows:
+            return False
+
+        if self.max_rows and len(rows) > self.max_rows:
+            logger.info(f"范围 {start_issue}-{end_issue} 返回 {len(rows)} 条，超过单次响应上限 {self.max_rows}，重新学习上限")
+            self.max_rows = 0
+
+        return bool(self.max_rows) and len(rows) >= self.max_rows
+
+    def take_prefetched(self, start_issue: str, end_issue: str) -> Optional[List[Dict]]:
+        """取出拆分时已取得数据的子范围（返回 None 表示该子范围需要请求）"""
+        return self._prefetched.pop((start_issue, end_issue), None)
+
+    def resolve(self, start_issue: str, end_issue: str,
+                rows: Optional[List[Dict]] = None,
+                error: Optional[Exception] = None) -> Optional[List[Tuple[str, str]]]:
+        """
+        根据一次请求的结果决定下一步
+
+        Returns:
+            None 表示结果可以直接使用；列表表示需要改为请求这些子范围
+            （空列表表示放弃该范围，已记录到 failed）
+        """
+        if error is not None:
+            # 超时/网络错误：只按年份拆分，避免在数据源故障时请求数爆炸
+            sub_ranges = self.split(start_issue, end_issue, within_year=False)
+            if sub_ranges:
+                self.splits += 1
+                logger.warning(f"范围 {start_issue}-{end_issue} 请求失败（{error}），拆分为 {sub_ranges}")
+            else:
+                self.failed.append((start_issue, end_issue))
+                logger.error(f"范围 {start_issue}-{end_issue} 请求失败且无法继续拆分: {error}")
+            return sub_ranges
+
+        suspected_rows = self._probes.pop((start_issue, end_issue), None)
+        if suspected_rows is not None and rows and not self.max_rows:
+            # 更早的部分确实有数据，说明上一次响应被截断
+            self.max_rows = suspected_rows
+            logger.info(f"范围 {start_issue}-{end_issue} 返回了更早的数据，数据源单次响应上限按 {self.max_rows} 条计")
+
+        if self.is_truncated(start_issue, end_issue, rows):
+            sub_ranges = self.split(start_issue, end_issue)
+            if sub_ranges:
+                self.splits += 1
+                logger.info(f"范围 {start_issue}-{end_issue} 返回 {len(rows)} 条，疑似被截断，拆分为 {sub_ranges}")
+                return sub_ranges
+            logger.warning(f"范围 {start_issue}-{end_issue} 疑似被截断但无法继续拆分，使用已返回的 {len(rows)} 条")
+            return None
+
+        oldest = min(row['lottery_no'] for row in rows)[2:] if rows else start_issue
+        if oldest > start_issue:
+            # 保留已返回的较新部分，只补请求起始期号到最早期号之前的部分
+            probe, kept = (start_issue, _previous_issue(oldest)), (oldest, end_issue)
+            self._probes[probe] = len(rows)
+            self._prefetched[kept] = rows
+            self.splits += 1
+            logger.info(f"范围 {start_issue}-{end_issue} 最早只返回到 {oldest}（{len(rows)} 条），补请求 {probe[0]}-{probe[1]}")
+            return [probe, kept]
+
+        return None
+
+    def fetch(self, fetch_func: Callable[[str, str], List[Dict]],
+              start_issue: str, end_issue: str) -> List[Dict]:
+        """
+        顺序执行范围请求，自动拆分截断或超时的范围
+
+        Args:
+            fetch_func: 请求函数 (start_issue, end_issue) -> 数据列表，失败时抛出 requests 异常
+            start_issue: 起始期号（5位格式）
+            end_issue: 结束期号（5位格式）
+
+        Returns:
+            去重后的数据列表（按期号从新到旧排列，与 500.com 一致）
+        """
+        pending = list(reversed(self.plan(start_issue, end_issue)))
+        results = {}
+
+        while pending:
+            range_start, range_end = pending.pop()
+            rows = self.take_prefetched(range_start, range_end)
+            if rows is not None:
+                for row in rows:
+                    results[row['lottery_no']] = row
+                continue
+
+            self.requests += 1
+            try:
+                rows = fetch_func(range_start, range_end)
+            except requests.RequestException as e:
+                sub_ranges = self.resolve(range_start, range_end, error=e)
+                pending.extend(reversed(sub_ranges))
+                continue
+
+            sub_ranges = self.resolve(range_start, range_end, rows=rows)
+            if sub_ranges:
+                pending.extend(reversed(sub_ranges))
+                continue
+
+            for row in rows:
+                results[row['lottery_no']] = row
+
+        logger.info(f"范围 {start_issue}-{end_issue} 共请求 {self.requests} 次，拆分 {self.splits} 次，获取 {len(results)} 条")
+        return sorted(results.values(), key=lambda x: x['lottery_no'], reverse=True)
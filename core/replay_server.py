@@ -0,0 +1,280 @@
+"""
+本地回放服务器
+模拟 500.com 的 history.php 接口，用于在不访问 500.com 的情况下测量爬取链路的性能
+
+数据来源：
+- fixtures: 以 scripts/fixtures 中的样例页面为模板，按请求的期号范围生成多年数据
+- archive:  回放页面归档（data/page_archive）中按期号范围保存的真实页面
+
+可注入的故障：固定/随机延迟、5xx 错误、429 限流（带 Retry-After）、响应行数上限（模拟截断）
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from datetime import date, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from core.config import DRAW_CALENDAR_CONFIG, PROJECT_ROOT
+from core.page_archive import PageArchive, range_key
+
+logger = logging.getLogger(__name__)
+
+FIXTURE_DIR = PROJECT_ROOT / 'scripts' / 'fixtures'
+
+# 不带参数时返回的最新期数（与 500.com 一致）
+LATEST_ROWS = 30
+
+_DATA_ROW_RE = re.compile(r'<tr\b[^>]*>(?:(?!</tr>).)*?<td>\d{5}</td>.*?</tr>', re.S)
+_ISSUE_CELL_RE = re.compile(r'<td>(\d{2})(\d{3})</td>')
+_DATE_RE = re.compile(r'\b\d{4}-\d{2}-\d{2}\b')
+
+
+class FixtureTemplate:
+    """单个彩票类型的样例页面模板：页头 + 数据行模板 + 页尾"""
+
+    def __init__(self, html: str):
+        rows = _DATA_ROW_RE.findall(html)
+        if not rows:
+            raise ValueError("样例页面中没有数据行")
+
+        first = html.index(rows[0])
+        last = html.rindex(rows[-1]) + len(rows[-1])
+        self.head = html[:first]
+        self.tail = html[last:]
+        # 按期号从小到大排列的行模板
+        self.rows = sorted(rows, key=lambda row: _ISSUE_CELL_RE.search(row).group(2))
+
+    def render_rows(self, year: int, draw_dates: List[date]) -> List[str]:
+        """生成某一年的数据行（第 n 期的开奖日期为 draw_dates[n-1]，按期号从新到旧）"""
+        rendered = []
+        for number, draw_date in enumerate(draw_dates, 1):
+            template = self.rows[(number - 1) % len(self.rows)]
+            row = _ISSUE_CELL_RE.sub(f'<td>{year:02d}{number:03d}</td>', template, count=1)
+            row = _DATE_RE.sub(draw_date.isoformat(), row, count=1)
+            rendered.append(row)
+        return rendered[::-1]
+
+
+class ReplayDataset:
+    """回放数据集
+
+    fixtures 模式下按 DRAW_CALENDAR_CONFIG 的每周开奖日生成开奖日期，
+    每年第一个开奖日为第 001 期，数据截止到 today 的前一天
+
+    Args:
+        source: 'fixtures' 或 'archive'
+        today: fixtures 模式下的“今天”（默认当前日期）
+        max_rows: 单次响应最大行数（0 表示不截断，仅 fixtures 模式）
+    """
+
+    def __init__(self, source: str = 'fixtures',
+                 today: date = None,
+                 max_rows: int = 0,
+                 fixture_dir: Path = None,
+                 archive: PageArchive = None):
+        self.source = source
+        self.today = today or date.today()
+        self.last_year = self.today.year % 100
+        self.max_rows = max_rows
+        self.fixture_dir = Path(fixture_dir or FIXTURE_DIR)
+        self.archive = archive
+        self._templates: Dict[str, FixtureTemplate] = {}
+        self._lock = threading.Lock()
+
+        if source == 'archive' and self.archive is None:
+            self.archive = PageArchive()
+
+    def _template(self, lottery_type: str) -> FixtureTemplate:
+        with self._lock:
+            if lottery_type not in self._templates:
+                path = self.fixture_dir / f'{lottery_type}_history.html'
+                self._templates[lottery_type] = FixtureTemplate(path.read_text(encoding='utf-8'))
+            return self._templates[lottery_type]
+
+    @lru_cache(maxsize=None)
+    def draw_dates(self, lottery_type: str, year: int) -> List[date]:
+        """某一年（两位）的开奖日期"""
+        weekdays = set(DRAW_CALENDAR_CONFIG['weekdays'].get(lottery_type, range(7)))
+        day = date(2000 + year, 1, 1)
+        dates = []
+        while day.year == 2000 + year and day < self.today:
+            if day.weekday() in weekdays:
+                dates.append(day)
+            day += timedelta(days=1)
+        return dates
+
+    def issue_count(self, lottery_type: str, start_issue: str, end_issue: str) -> int:
+        """fixtures 模式下期号范围内的期数（基准测试用来校验入库行数）"""
+        total = 0
+        for year in range(int(start_issue[:2]), min(int(end_issue[:2]), self.last_year) + 1):
+            count = len(self.draw_dates(lottery_type, year))
+            first = int(start_issue[2:]) if year == int(start_issue[:2]) else 1
+            last = int(end_issue[2:]) if year == int(end_issue[:2]) else count
+            total += max(0, min(last, count) - first + 1)
+        return total
+
+    def render(self, lottery_type: str, start_issue: Optional[str], end_issue: Optional[str]) -> Optional[bytes]:
+        """生成期号范围对应的页面，没有对应数据时返回 None"""
+        if self.source == 'archive':
+            return self._render_archive(lottery_type, start_issue, end_issue)
+
+        template = self._template(lottery_type)
+
+        if start_issue is None:
+            start_issue, end_issue, limit = '00001', f"{self.last_year:02d}999", LATEST_ROWS
+        else:
+            end_issue = end_issue or f"{self.last_year:02d}999"
+            limit = self.max_rows or None
+
+        rows = []
+        for year in range(min(int(end_issue[:2]), self.last_year), int(start_issue[:2]) - 1, -1):
+            for row in template.render_rows(year, self.draw_dates(lottery_type, year)):
+                issue = _ISSUE_CELL_RE.search(row)
+                issue = issue.group(1) + issue.group(2)
+                if start_issue <= issue <= end_issue:
+                    rows.append(row)
+            if limit and len(rows) >= limit:
+                break
+
+        if limit:
+            rows = rows[:limit]
+        return (template.head + '\n'.join(rows) + template.tail).encode('utf-8')
+
+    def _render_archive(self, lottery_type: str, start_issue: Optional[str], end_issue: Optional[str]) -> Optional[bytes]:
+        key = range_key(start_issue, end_issue)
+        for entry in self.archive.entries(lottery_type):
+            if entry['range'] == key:
+                return self.archive.read_text(entry).encode('utf-8')
+        return None
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        replay: 'ReplayServer' = self.server.replay
+        status, body, headers = replay.handle(self.path)
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"回放请求 {self.address_string()} {format % args}")
+
+
+class ReplayServer:
+    """本地回放服务器（后台线程运行）
+
+    Args:
+        dataset: 回放数据集
+        host: 监听地址
+        port: 监听端口（0 表示自动分配）
+        latency_ms: 每个请求的固定延迟（毫秒）
+        jitter_ms: 额外的随机延迟上限（毫秒）
+        error_rate: 返回 500 错误的概率
+        rate_limit_rate: 返回 429 的概率
+        retry_after: 429 响应的 Retry-After（秒）
+        seed: 随机种子（保证多次基准测试注入的故障一致）
+    """
+
+    def __init__(self, dataset: ReplayDataset = None,
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0,
+                 error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0,
+                 retry_after: int = 1,
+                 seed: int = None):
+        self.dataset = dataset or ReplayDataset()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {'requests': 0, 'ok': 0, 'not_found': 0, 'errors': 0, 'rate_limited': 0}
+
+        self._httpd = ThreadingHTTPServer((host, port), _ReplayHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.replay = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counts[key] += 1
+
+    def handle(self, path: str) -> Tuple[int, bytes, Dict[str, str]]:
+        """处理一个请求，返回 (状态码, 正文, 响应头)"""
+        self._count('requests')
+        with self._lock:
+            delay = self.latency_ms + self._random.uniform(0, self.jitter_ms)
+            roll = self._random.random()
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        if roll < self.rate_limit_rate:
+            self._count('rate_limited')
+            return 429, b'', {'Retry-After': str(self.retry_after)}
+        if roll < self.rate_limit_rate + self.error_rate:
+            self._count('errors')
+            return 500, b'replay: injected error', {'Content-Type': 'text/plain'}
+
+        parsed = urlparse(path)
+        lottery_type = parsed.path.strip('/').split('/')[0]
+        query = parse_qs(parsed.query)
+        start_issue = query.get('start', [None])[0]
+        end_issue = query.get('end', [None])[0]
+
+        try:
+            body = self.dataset.render(lottery_type, start_issue, end_issue)
+        except (OSError, ValueError) as e:
+            logger.warning(f"回放数据生成失败 {path}: {e}")
+            body = None
+
+        if body is None:
+            self._count('not_found')
+            return 404, b'replay: not found', {'Content-Type': 'text/plain'}
+
+        self._count('ok')
+        return 200, body, {'Content-Type': 'text/html; charset=utf-8'}
+
+    def start(self) -> str:
+        """在后台线程启动，返回服务地址"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='replay-server', daemon=True)
+        self._thread.start()
+        logger.info(f"回放服务器已启动: {self.base_url}（数据来源: {self.dataset.source}）")
+        return self.base_url
+
+    def serve_forever(self):
+        """在当前线程运行（Ctrl+C 退出）"""
+        logger.info(f"回放服务器已启动: {self.base_url}（数据来源: {self.dataset.source}）")
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._httpd.server_close()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
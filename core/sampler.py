@@ -0,0 +1,339 @@
+"""
+构造式抽样器
+按策略给出的选号方案逐个号码构造组合，每一步只从仍然可行的号码中抽取，不再“生成 -> 校验 -> 重试”：
+- 同一号码池中已选的号码不再抽取；disjoint 中的号码池之间号码也不重复（如七乐彩基本号与特别号）
+- 会与已选号码形成超过 max_run 个连号的号码不再抽取
+- 组合的最后一个号码只从“补上后既不是历史组合、也不是已生成组合”的号码中抽取（哈希集合查找）
+
+选号方案：号码池 -> [(候选号码, 个数), ...]，按顺序从每段候选号码中抽取指定个数；
+某一步候选号码中没有可行号码时放宽到该号码池的全部号码，全部号码中也没有时该组合作废并重新构造
+
+批量生成时先用 draw_batch 整批抽取（numpy 按行无放回抽取，批量方案中的候选号码和个数可以每行不同），
+只有违反约束的行才交给逐个构造的 sample 补足
+
+各彩票的 BaseStrategy 混入 SamplingStrategyMixin，共用抽样器的创建和 generate_batch
+"""
+
+import logging
+import random
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from core.strategy_context import StrategyContext
+
+logger = logging.getLogger(__name__)
+
+# 选号方案：号码池 -> [(候选号码, 个数), ...]
+Plan = Dict[str, List[Tuple[Sequence[int], int]]]
+# 批量选号方案：候选号码可以是每行一个的掩码 bool[n, 最大号码 + 1]，个数可以是每行一个的数组 int[n]
+BatchPlan = Dict[str, List[Tuple[Union[Sequence[int], np.ndarray], Union[int, np.ndarray]]]]
+# 构造出的组合：号码池 -> 号码（按抽取顺序）
+Ticket = Dict[str, List[int]]
+
+
+def row_candidates(choice: np.ndarray, options: Sequence[Sequence[int]]) -> np.ndarray:
+    """
+    每行的候选号码掩码（批量方案中代替逐个组合的随机分支）
+
+    Args:
+        choice: 每行选用的候选号码下标 int[n]
+        options: 候选号码列表
+
+    Returns:
+        bool[n, 最大号码 + 1]，第 i 行为 options[choice[i]]
+    """
+    width = max((max(balls) for balls in options if len(balls)), default=0) + 1
+    masks = np.zeros((len(options), width), dtype=bool)
+    for index, balls in enumerate(options):
+        masks[index, list(balls)] = True
+    return masks[choice]
+
+
+def _longest_runs(chosen: np.ndarray) -> np.ndarray:
+    """每行已选号码的最长连号个数"""
+    run = np.zeros(len(chosen), dtype=np.int64)
+    longest = np.zeros(len(chosen), dtype=np.int64)
+    for column in chosen.T:
+        run = (run + 1) * column
+        np.maximum(longest, run, out=longest)
+    return longest
+
+
+class ConstructiveSampler:
+    """构造式抽样器（一次预测内共用，记录已生成的组合）
+
+    Args:
+        pools: 号码池 -> 号码范围（按构造顺序，参与去重的号码池放在最后）
+        key: 组合 -> 去重用的键（与历史组合集合中的元素格式相同）
+        excluded: 历史组合集合（只读，不复制）
+        max_run: 号码池 -> 最长连号个数上限（不限制的号码池不填）
+        disjoint: 号码互不重复的号码池
+        rng: 随机数生成器（默认 random 模块）
+    """
+
+    # 连续多少次构造失败视为可选组合已用尽
+    MAX_MISSES = 20
+
+    def __init__(self, pools: Dict[str, Sequence[int]], key: Callable[[Ticket], Hashable],
+                 excluded: Set = None, max_run: Dict[str, int] = None,
+                 disjoint: Iterable[str] = (), rng: random.Random = None):
+        self.pools = pools
+        self.key = key
+        self.excluded = excluded if excluded is not None else set()
+        self.chosen: Set = set()
+        self.max_run = max_run or {}
+        self.disjoint = set(disjoint)
+        self.rng = rng or random
+
+    def add(self, ticket: Ticket):
+        """记录已生成的组合（之后不再生成）"""
+        self.chosen.add(self.key(ticket))
+
+    def _is_taken(self, ticket: Ticket) -> bool:
+        key = self.key(ticket)
+        return key in self.chosen or key in self.excluded
+
+    def _options(self, pool: str, candidates: Sequence[int], ticket: Ticket, final: bool) -> List[int]:
+        """候选号码中可行的号码"""
+        picked = set(ticket[pool])
+        if pool in self.disjoint:
+            for other in self.disjoint:
+                picked.update(ticket.get(other, ()))
+        limit = self.max_run.get(pool)
+
+        options = []
+        for ball in candidates:
+            if ball in picked:
+                continue
+            if limit is not None:
+                left = 0
+                while ball - left - 1 in ticket[pool]:
+                    left += 1
+                right = 0
+                while ball + right + 1 in ticket[pool]:
+                    right += 1
+                if left + right + 1 > limit:
+                    continue
+            if final:
+                ticket[pool].append(ball)
+                taken = self._is_taken(ticket)
+                ticket[pool].pop()
+                if taken:
+                    continue
+            options.append(ball)
+        return options
+
+    def draw(self, plan: Plan) -> Optional[Ticket]:
+        """
+        按选号方案构造一个组合（不记录为已生成）
+
+        Returns:
+            组合；该前缀下没有可行的最后一个号码时返回 None
+        """
+        ticket: Ticket = {pool: [] for pool in self.pools if pool in plan}
+        steps = [(pool, candidates) for pool in ticket
+                 for candidates, count in plan[pool] for _ in range(count)]
+        # 没有排除集合时不需要计算去重键（只构造部分号码池时 key 可能无法计算）
+        check = bool(self.excluded or self.chosen)
+
+        for index, (pool, candidates) in enumerate(steps):
+            final = check and index == len(steps) - 1
+            options = self._options(pool, candidates, ticket, final)
+            if not options:
+                options = self._options(pool, self.pools[pool], ticket, final)
+            if not options:
+                return None
+            ticket[pool].append(self.rng.choice(options))
+        return ticket
+
+    @staticmethod
+    def _mask(candidates, width: int, n: int) -> np.ndarray:
+        """候选号码 -> 掩码 bool[n, width]"""
+        if isinstance(candidates, np.ndarray) and candidates.ndim == 2:
+            mask = np.zeros((n, width), dtype=bool)
+            mask[:, :candidates.shape[1]] = candidates
+            return mask
+        mask = np.zeros(width, dtype=bool)
+        mask[list(candidates)] = True
+        return np.broadcast_to(mask, (n, width))
+
+    def draw_batch(self, plan: BatchPlan, n: int, generator: np.random.Generator) -> List[Ticket]:
+        """
+        整批构造最多 n 个组合，违反约束的行直接丢弃（由调用方用 sample 补足）
+
+        每段按行从候选号码中无放回随机抽取（随机键排序，候选号码不足时用号码池的其余号码补足，同 draw 的放宽规则），
+        连号整批校验；去重键仍逐行检查并记录（哈希集合查找）
+
+        Args:
+            plan: 批量选号方案
+            n: 组合个数
+            generator: numpy 随机数生成器
+
+        Returns:
+            通过校验的组合（已记录为已生成，号码从小到大）
+        """
+        picked: Dict[str, np.ndarray] = {}
+        valid = np.ones(n, dtype=bool)
+
+        for pool, values in self.pools.items():
+            if pool not in plan:
+                continue
+            # 候选号码可以超出号码池（同 draw），号码池只用于放宽
+            width = 1 + max([max(values)] + [
+                candidates.shape[1] - 1 if isinstance(candidates, np.ndarray) and candidates.ndim == 2
+                else max(candidates, default=0)
+                for candidates, _ in plan[pool]
+            ])
+            fallback = self._mask(values, width, n)
+            blocked = np.zeros((n, width), dtype=bool)
+            if pool in self.disjoint:
+                for other in self.disjoint & picked.keys():
+                    columns = min(width, picked[other].shape[1])
+                    blocked[:, :columns] |= picked[other][:, :columns]
+
+            chosen = np.zeros((n, width), dtype=bool)
+            for candidates, count in plan[pool]:
+                mask = self._mask(candidates, width, n)
+                keys = generator.random((n, width))
+                keys[~mask] -= 2
+                keys[(~mask & ~fallback) | blocked | chosen] = -np.inf
+                order = np.argsort(-keys, axis=1)
+                take = np.arange(width) < np.broadcast_to(count, (n,))[:, None]
+                # 可抽取的号码不足时该行作废
+                valid &= ~(take & np.isinf(np.take_along_axis(keys, order, axis=1))).any(axis=1)
+                chosen[np.nonzero(take)[0], order[take]] = True
+
+            if pool in self.max_run:
+                valid &= _longest_runs(chosen) <= self.max_run[pool]
+            picked[pool] = chosen
+
+        # 有效行 -> 每个号码池的号码列表（按行切分已选号码的列下标）
+        balls = {}
+        for pool, chosen in picked.items():
+            chosen = chosen[valid]
+            columns = np.nonzero(chosen)[1].tolist()
+            ends = np.cumsum(chosen.sum(axis=1)).tolist()
+            balls[pool] = [columns[start:end] for start, end in zip([0] + ends, ends)]
+
+        tickets = []
+        for values in zip(*balls.values()):
+            ticket = dict(zip(balls, values))
+            if self._is_taken(ticket):
+                continue
+            self.add(ticket)
+            tickets.append(ticket)
+        return tickets
+
+    def sample(self, plan: Callable[[], Plan], count: int) -> List[Ticket]:
+        """
+        构造 count 个互不相同、不在历史组合中的组合（可选组合用尽时提前结束）
+
+        Args:
+            plan: 返回选号方案的函数（每个组合调用一次，方案中可以包含随机选择）
+            count: 组合个数
+        """
+        tickets = []
+        misses = 0
+        while len(tickets) < count and misses < self.MAX_MISSES:
+            ticket = self.draw(plan())
+            if ticket is None:
+                misses += 1
+                continue
+            misses = 0
+            self.add(ticket)
+            tickets.append(ticket)
+        if len(tickets) < count:
+            logger.warning(f"可选组合已用尽，只生成了 {len(tickets)}/{count} 个组合")
+        return tickets
+
+
+class SamplingStrategyMixin:
+    """预测策略的构造式抽样与批量生成（各彩票的 BaseStrategy 混入）
+
+    子类提供：
+        POOLS: 号码池 -> (号码范围, 每注个数)，按构造顺序，参与去重的号码池放在最后
+        MAX_RUN / DISJOINT: 同 ConstructiveSampler 的 max_run / disjoint
+        ticket_key / ticket_row / row_ticket: 组合的去重键、组合 -> 号码行、号码行 -> 组合（staticmethod）
+        ticket_plan(context): 一注的选号方案
+        rng: 随机数生成器（generate_batch 临时替换）
+    """
+
+    POOLS: Dict[str, Tuple[Sequence[int], int]] = {}
+    MAX_RUN: Dict[str, int] = {}
+    DISJOINT: Tuple[str, ...] = ()
+
+    BATCH_ROUNDS = 3  # 整批抽取的轮数
+
+    @property
+    def row_width(self) -> int:
+        """号码行的列数（各号码池每注个数之和）"""
+        return sum(count for _, count in self.POOLS.values())
+
+    def ticket_plan(self, context: StrategyContext) -> Plan:
+        """一注的选号方案（子类实现）"""
+        raise NotImplementedError
+
+    def batch_plan(self, context: StrategyContext, n: int, generator: np.random.Generator) -> Optional[BatchPlan]:
+        """n 个组合的批量选号方案（默认没有，只逐个构造）
+
+        子类实现时每行的随机分支用 generator 整批抽取，与 ticket_plan 的逐个方案同分布
+
+        Args:
+            context: 策略上下文
+            n: 组合个数
+            generator: numpy 随机数生成器
+
+        Returns:
+            批量选号方案（候选号码可以是每行一个的掩码，个数可以是每行一个的数组），None 表示不支持
+        """
+        return None
+
+    def new_sampler(self, excluded: Set = None) -> ConstructiveSampler:
+        """构造式抽样器
+
+        Args:
+            excluded: 历史组合集合
+        """
+        return ConstructiveSampler(
+            pools={pool: values for pool, (values, _) in self.POOLS.items()},
+            key=self.ticket_key,
+            excluded=excluded,
+            max_run=self.MAX_RUN,
+            disjoint=self.DISJOINT,
+            rng=self.rng
+        )
+
+    def generate_batch(self, context: StrategyContext, n: int, rng: random.Random = None,
+                       existing: Iterable[Sequence[int]] = ()) -> np.ndarray:
+        """批量生成 n 个组合（频率排名、分层来自策略上下文，不再逐个组合排序）
+
+        有 batch_plan 时先整批抽取（最多 BATCH_ROUNDS 轮），剩余的组合再按 ticket_plan 用构造式抽样器逐个补足
+
+        Args:
+            context: 策略上下文（排除其中的历史组合）
+            n: 组合个数
+            rng: 随机数生成器（默认 random 模块）
+            existing: 已生成的号码行（不再生成）
+
+        Returns:
+            号码行 uint8[m, row_width]（列顺序同 ticket_row），可选组合不足时 m < n
+        """
+        previous, self.rng = self.rng, rng or random
+        try:
+            sampler = self.new_sampler(excluded=context.historical_combinations)
+            for row in existing:
+                sampler.add(self.row_ticket(row))
+            tickets = []
+            generator = np.random.default_rng(self.rng.getrandbits(64))
+            # 整批抽取（被丢弃的行再整批重抽，最多 BATCH_ROUNDS 轮）
+            for _ in range(self.BATCH_ROUNDS):
+                plan = self.batch_plan(context, n - len(tickets), generator) if len(tickets) < n else None
+                if plan is None:
+                    break
+                tickets += sampler.draw_batch(plan, n - len(tickets), generator)
+            tickets += sampler.sample(lambda: self.ticket_plan(context), n - len(tickets))
+        finally:
+            self.rng = previous
+        rows = [self.ticket_row(ticket) for ticket in tickets]
+        return np.array(rows, dtype=np.uint8).reshape(-1, self.row_width)
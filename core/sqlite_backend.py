@@ -0,0 +1,388 @@
+"""
+嵌入式 SQLite 存储后端（DB_BACKEND=sqlite）
+单机部署、本地基准测试时代替 MySQL，没有网络往返：
+- 表结构与 Cloudflare Worker 的 D1 数据库相同（直接执行 cloudflare-worker/schema.sql 中对应表的语句）
+- WAL 模式：写入时不阻塞读取（定时任务写入的同时可以预测），synchronous=NORMAL
+- 写入统一为 INSERT ... ON CONFLICT(lottery_no)，整批一个事务
+
+SQLiteBackend 与彩票数据库类组合使用（sqlite_class(SSQDatabase)），只替换连接和方言相关的方法；
+SQLiteConnection 把 pymysql 风格的调用（%s 占位符、DictCursor / SSCursor）转换为 sqlite3，
+彩票数据库类中的查询不需要修改
+"""
+
+import logging
+import re
+import sqlite3
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+
+import pymysql
+
+from core.base_database import _common_key
+from core.config import DB_PERFORMANCE, PROJECT_ROOT, SQLITE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 与 Cloudflare Worker（D1）共用的建表语句
+SCHEMA_FILE = PROJECT_ROOT / 'cloudflare-worker' / 'schema.sql'
+
+# MySQL v2 建表语句中的位图生成列：列名、表达式
+_MASK_COLUMN_RE = re.compile(r'(\w+_mask) BIGINT UNSIGNED AS \((.+)\) STORED')
+
+# 与 MySQL 一致的日期时间格式（sqlite3 默认适配器在 Python 3.12 起已弃用）
+sqlite3.register_adapter(datetime, lambda value: value.strftime('%Y-%m-%d %H:%M:%S'))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+
+
+def _schema_statements(table_name: str, schema_file: Path = SCHEMA_FILE) -> List[str]:
+    """schema.sql 中与表相关的语句（建表、索引）"""
+    sql = re.sub(r'--[^\n]*', '', schema_file.read_text(encoding='utf-8'))
+    pattern = re.compile(rf'\b{re.escape(table_name)}\b')
+    return [stmt.strip() for stmt in sql.split(';') if pattern.search(stmt)]
+
+
+def _bit_count(value: Optional[int]) -> Optional[int]:
+    return None if value is None else bin(value).count('1')
+
+
+class SQLiteCursor:
+    """pymysql 风格的游标：%s 占位符，DictCursor 时返回字典"""
+
+    def __init__(self, cursor: sqlite3.Cursor, as_dict: bool = False):
+        self._cursor = cursor
+        self._as_dict = as_dict
+
+    @staticmethod
+    def _sql(sql: str) -> str:
+        return sql.replace('%s', '?')
+
+    def execute(self, sql: str, params=None) -> int:
+        self._cursor.execute(self._sql(sql), tuple(params or ()))
+        return self._cursor.rowcount
+
+    def executemany(self, sql: str, seq_params) -> int:
+        self._cursor.executemany(self._sql(sql), seq_params)
+        return self._cursor.rowcount
+
+    def _convert(self, row):
+        if row is None or not self._as_dict:
+            return row
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        return self._convert(self._cursor.fetchone())
+
+    def fetchmany(self, size: int = None):
+        rows = self._cursor.fetchmany(size or self._cursor.arraysize)
+        return [self._convert(row) for row in rows] if self._as_dict else rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        return [self._convert(row) for row in rows] if self._as_dict else rows
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SQLiteConnection:
+    """pymysql 风格的连接（cursor(DictCursor)、ping、commit / rollback）"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 连接在爬取流水线的写入线程中使用，访问由调用方串行化
+        self._connection = sqlite3.connect(str(path), timeout=SQLITE_CONFIG['busy_timeout'], check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(f"PRAGMA synchronous={SQLITE_CONFIG['synchronous']}")
+        # 与 MySQL 同名的位计数函数（重合号码查询使用）
+        self._connection.create_function('BIT_COUNT', 1, _bit_count, deterministic=True)
+
+    def cursor(self, cursor_class: Type = None) -> SQLiteCursor:
+        as_dict = cursor_class is not None and issubclass(cursor_class, pymysql.cursors.DictCursorMixin)
+        return SQLiteCursor(self._connection.cursor(), as_dict)
+
+    def executescript(self, sql: str):
+        self._connection.executescript(sql)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def ping(self, reconnect: bool = False):
+        pass
+
+    def close(self):
+        self._connection.close()
+
+
+class SQLiteBackend:
+    """SQLite 后端（与彩票数据库类组合使用，替换 BaseDatabase 中与 MySQL 相关的方法）"""
+
+    # D1 表结构没有号码位图列，不区分版本
+    SCHEMA_VERSION = 1
+
+    @property
+    def db_path(self) -> Path:
+        path = Path(self.db_config.get('sqlite_path') or SQLITE_CONFIG['path'])
+        return path if path.is_absolute() else PROJECT_ROOT / path
+
+    # ---------- 连接 ----------
+
+    def connect(self):
+        if self.connection:
+            return
+        self.connection = SQLiteConnection(self.db_path)
+        logger.debug(f"SQLite 数据库已打开: {self.db_path}")
+
+    def ensure_connection(self):
+        if not self.connection:
+            self.connect()
+
+    def close(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    # ---------- 表结构 ----------
+
+    def _table_sql(self, table_name: str) -> str:
+        return ';\n'.join(_schema_statements(table_name)) + ';'
+
+    def create_table(self):
+        """按 cloudflare-worker/schema.sql 创建数据表和索引"""
+        self.ensure_connection()
+        self.connection.executescript(self._table_sql(self.table_name))
+        self.create_stats_table()
+        logger.info(f"表 {self.table_name} 创建成功（SQLite: {self.db_path}）")
+
+    def _stats_table_sql(self) -> str:
+        return f"""
+        CREATE TABLE IF NOT EXISTS {self.stats_table} (
+            kind TEXT NOT NULL,
+            item TEXT NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0,
+            last_issue TEXT,
+            updated_at TEXT DEFAULT (datetime('now')),
+            PRIMARY KEY (kind, item)
+        )
+        """
+
+    def _stats_merge_sql(self) -> str:
+        return (f"INSERT INTO {self.stats_table} (kind, item, hits, last_issue) VALUES (%s, %s, %s, %s) "
+                f"ON CONFLICT(kind, item) DO UPDATE SET hits = hits + excluded.hits, "
+                f"last_issue = NULLIF(max(COALESCE(last_issue, ''), COALESCE(excluded.last_issue, '')), ''), "
+                f"updated_at = datetime('now')")
+
+    def _table_exists(self, table_name: str) -> bool:
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", (table_name,))
+            return cursor.fetchone() is not None
+        finally:
+            cursor.close()
+
+    def schema_version(self) -> int:
+        self.ensure_connection()
+        return self.SCHEMA_VERSION if self._table_exists(self.table_name) else 0
+
+    def warn_if_outdated(self):
+        pass
+
+    def migrate_schema(self, chunk_rows: int = 2000) -> Dict:
+        """SQLite 表结构与 D1 相同，没有需要迁移的版本"""
+        version = self.schema_version()
+        logger.info(f"SQLite 后端使用 cloudflare-worker/schema.sql 的表结构，表 {self.table_name} 无需迁移")
+        return {'migrated': False, 'from_version': version, 'to_version': version, 'rows': 0, 'backup_table': None}
+
+    # ---------- 写入 ----------
+
+    @property
+    def insert_mode(self) -> str:
+        # 旧的 batch 方式依赖 MySQL 的 ON DUPLICATE KEY，SQLite 始终按期号唯一键 upsert
+        return 'upsert'
+
+    def truncate_table(self, table_name: str):
+        self.ensure_connection()
+        clear_stats = table_name == self.table_name
+        if clear_stats:
+            self.create_stats_table()
+        cursor = self.connection.cursor()
+        try:
+            # 统计表与数据表在同一事务中清空
+            if clear_stats:
+                cursor.execute(f"DELETE FROM {self.stats_table}")
+            cursor.execute(f"DELETE FROM {table_name}")
+            cursor.execute("DELETE FROM sqlite_sequence WHERE name = %s", (table_name,))
+            self.connection.commit()
+            logger.info(f"已清空表 {table_name}")
+        finally:
+            cursor.close()
+
+    def _create_shadow_table(self, shadow: str):
+        """按 schema.sql 的建表语句创建影子表（索引名在 SQLite 中全库唯一，互换后再为正式表创建）"""
+        pattern = re.compile(rf'\b{re.escape(self.table_name)}\b')
+        create_sql = next(stmt for stmt in _schema_statements(self.table_name) if stmt.upper().startswith('CREATE TABLE'))
+        self.connection.executescript(pattern.sub(shadow, create_sql) + ';')
+
+    def _drop_tables(self, *tables: str):
+        self.connection.executescript(''.join(f"DROP TABLE IF EXISTS {table};" for table in tables))
+
+    def _swap_tables(self, pairs: List[Tuple[str, str]]):
+        """在一个事务中改名互换 (影子表, 正式表)、删除换下的旧表并重建索引"""
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute("BEGIN")
+            for shadow, table in pairs:
+                cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_replaced")
+                cursor.execute(f"ALTER TABLE {shadow} RENAME TO {table}")
+                cursor.execute(f"DROP TABLE {table}_replaced")
+            for stmt in _schema_statements(self.table_name):
+                cursor.execute(stmt)
+            self.connection.commit()
+        except sqlite3.Error as e:
+            self.connection.rollback()
+            logger.error(f"替换表 {self.table_name} 失败: {e}")
+            raise
+        finally:
+            cursor.close()
+
+    def upsert_rows(self, table_name: str, columns: Sequence[str], rows: List[tuple],
+                    skip_existing: bool = True, chunk_rows: int = None) -> Tuple[int, int, int]:
+        """
+        INSERT ... ON CONFLICT(lottery_no)，整批一个事务（统计表在同一事务中更新）
+
+        新增条数由事务内写入前后的记录数之差得出（SQLite 的影响行数不区分新增和更新）
+        """
+        if not rows:
+            return 0, 0, 0
+        self.ensure_connection()
+
+        chunk_rows = max(1, chunk_rows or DB_PERFORMANCE['upsert_batch_rows'])
+        if skip_existing:
+            conflict_sql = f"ON CONFLICT({columns[0]}) DO NOTHING"
+        else:
+            updates = ', '.join(f"{col} = excluded.{col}" for col in columns[1:] if col != 'created_at')
+            conflict_sql = f"ON CONFLICT({columns[0]}) DO UPDATE SET {updates}, updated_at = datetime('now')"
+        sql = (f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+               + conflict_sql)
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+            before = cursor.fetchone()[0]
+            since_id = self._max_id(cursor)
+            for i in range(0, len(rows), chunk_rows):
+                cursor.executemany(sql, rows[i:i + chunk_rows])
+            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+            inserted = cursor.fetchone()[0] - before
+            self._update_stats(cursor, since_id, rebuild=not skip_existing and inserted < len(rows))
+            self.connection.commit()
+        except sqlite3.Error as e:
+            self.connection.rollback()
+            logger.error(f"批量写入失败: {e}")
+            raise
+        finally:
+            cursor.close()
+
+        existing = len(rows) - inserted
+        if skip_existing:
+            return inserted, 0, existing
+        return inserted, existing, 0
+
+    def bulk_load_rows(self, table_name: str, columns: Sequence[str], rows: List[tuple],
+                       skip_existing: bool = True) -> Tuple[int, int, int]:
+        """SQLite 没有网络往返，空表全量导入同样是一个事务内的批量写入"""
+        return self.upsert_rows(table_name, columns, rows, skip_existing=skip_existing,
+                                chunk_rows=DB_PERFORMANCE['bulk_load_rows'])
+
+    # ---------- 读取 ----------
+
+    def get_issue_breaks(self, table_name: str, first_issue: str) -> List[Tuple[str, Optional[str], str, str]]:
+        """与 BaseDatabase.get_issue_breaks 相同（窗口函数 LAG，需要 SQLite 3.25+）"""
+        self.ensure_connection()
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT prev_no, prev_date, lottery_no, draw_date
+                FROM (
+                    SELECT lottery_no, draw_date,
+                           LAG(lottery_no, 1, %s) OVER w AS prev_no,
+                           LAG(draw_date) OVER w AS prev_date
+                    FROM {table_name}
+                    WINDOW w AS (ORDER BY lottery_no)
+                ) AS t
+                WHERE substr(lottery_no, 1, 4) <> substr(prev_no, 1, 4)
+                   OR CAST(lottery_no AS INTEGER) <> CAST(prev_no AS INTEGER) + 1
+                ORDER BY lottery_no
+            """, (first_issue,))
+            return [
+                (row[0], str(row[1]) if row[1] is not None else None, row[2], str(row[3]))
+                for row in cursor.fetchall()
+            ]
+        finally:
+            cursor.close()
+
+    def _mask_expressions(self) -> Dict[str, str]:
+        """
+        位图列 -> 计算表达式
+
+        D1 表结构没有位图列，直接使用 MySQL v2 建表语句中生成列的表达式（如 (1 << red1) | ... | (1 << red6)），
+        号码列为 TEXT，参与位运算时 SQLite 按整数计算
+        """
+        return dict(_MASK_COLUMN_RE.findall(super()._table_sql(self.table_name)))
+
+    def get_overlapping_draws(self, conditions: Dict[str, Tuple[int, int]]) -> List[Dict]:
+        """用号码列现算的位图查询与给定号码重合的历史开奖（参数和返回值同 BaseDatabase.get_overlapping_draws）"""
+        self.ensure_connection()
+        expressions = self._mask_expressions()
+
+        selects, wheres, params = [], [], []
+        for column, (mask, _) in conditions.items():
+            selects.append(f"BIT_COUNT(({expressions[column]}) & %s) AS {_common_key(column)}")
+            wheres.append(f"BIT_COUNT(({expressions[column]}) & %s) >= %s")
+            params.append(mask)
+        for mask, min_common in conditions.values():
+            params.extend([mask, min_common])
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(
+                f"SELECT lottery_no, draw_date, {', '.join(selects)} FROM {self.table_name} "
+                f"WHERE {' AND '.join(wheres) or '1'} ORDER BY lottery_no",
+                params
+            )
+            return [
+                {'lottery_no': row[0], 'draw_date': str(row[1]),
+                 **{_common_key(column): int(row[2 + i]) for i, column in enumerate(conditions)}}
+                for row in cursor.fetchall()
+            ]
+        finally:
+            cursor.close()
+
+
+@lru_cache(maxsize=None)
+def sqlite_class(database_class: Type) -> Type:
+    """彩票数据库类对应的 SQLite 后端类（如 SSQDatabase -> SQLiteSSQDatabase）"""
+    return type(f"SQLite{database_class.__name__}", (SQLiteBackend, database_class), {'__module__': __name__})
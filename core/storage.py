@@ -0,0 +1,159 @@
+"""
+存储接口
+四个彩票数据库类（SSQDatabase / DLTDatabase / QXCDatabase / QLCDatabase）都实现 LotteryStorage，
+后端由 DB_BACKEND 选择：
+- mysql（默认）：BaseDatabase，进程内共享连接池
+- sqlite：SQLiteBackend（core/sqlite_backend.py），嵌入式数据库文件，单机部署和本地基准测试不需要数据库服务器
+
+命令行统一通过 open_database 创建数据库实例
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Type
+
+# 支持的存储后端
+STORAGE_BACKENDS = ('mysql', 'sqlite')
+
+
+class LotteryStorage(ABC):
+    """彩票数据存储接口"""
+
+    # 表名（子类在 __init__ 中设置）
+    table_name: str
+    # 号码列（顺序与 _history_record 一致）
+    HISTORY_COLUMNS: Tuple[str, ...] = ()
+    # 入库列（与 insert_lottery_data 生成的数据顺序一致）
+    INSERT_COLUMNS: Tuple[str, ...] = ()
+
+    # ---------- 连接 ----------
+
+    @abstractmethod
+    def connect(self):
+        """建立（或借出）连接"""
+
+    @abstractmethod
+    def ensure_connection(self):
+        """确保连接有效"""
+
+    @abstractmethod
+    def close(self):
+        """关闭（或归还）连接"""
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # ---------- 表结构 ----------
+
+    @abstractmethod
+    def create_table(self):
+        """创建数据表（已存在时不变）"""
+
+    @abstractmethod
+    def schema_version(self) -> int:
+        """表结构版本：0 = 表不存在"""
+
+    @abstractmethod
+    def migrate_schema(self, chunk_rows: int = 2000) -> Dict:
+        """迁移到当前表结构版本"""
+
+    # ---------- 写入 ----------
+
+    @property
+    @abstractmethod
+    def insert_mode(self) -> str:
+        """入库方式：upsert / batch"""
+
+    @abstractmethod
+    def insert_lottery_data(self, data: List[Dict], skip_existing: bool = True, batch_size: int = 100,
+                            bulk: bool = False) -> Tuple[int, int, int]:
+        """写入开奖数据，返回 (inserted, duplicated, skipped)"""
+
+    @abstractmethod
+    def upsert_rows(self, table_name: str, columns: Sequence[str], rows: List[tuple],
+                    skip_existing: bool = True, chunk_rows: int = None) -> Tuple[int, int, int]:
+        """按期号唯一键批量写入（整批一个事务），返回 (inserted, duplicated, skipped)"""
+
+    @abstractmethod
+    def bulk_load_rows(self, table_name: str, columns: Sequence[str], rows: List[tuple],
+                       skip_existing: bool = True) -> Tuple[int, int, int]:
+        """空表全量导入，返回 (inserted, duplicated, skipped)"""
+
+    @abstractmethod
+    def truncate_table(self, table_name: str):
+        """清空表并重置自增 ID"""
+
+    @abstractmethod
+    def replace_lottery_data(self, data: List[Dict], batch_size: int = 100, bulk: bool = False) -> Tuple[int, int, int]:
+        """用 data 整体替换数据表和统计表（原子替换，失败时原表不变），返回 (inserted, duplicated, skipped)"""
+
+    # ---------- 读取 ----------
+
+    @abstractmethod
+    def get_total_count(self, table_name: str) -> int:
+        """表中总记录数"""
+
+    @abstractmethod
+    def get_latest_lottery(self) -> Optional[Dict]:
+        """最新一期开奖数据"""
+
+    @abstractmethod
+    def get_all_lottery_data(self) -> List[Dict]:
+        """所有开奖数据（按开奖日期从新到旧）"""
+
+    @abstractmethod
+    def iter_lottery_data(self, chunk_size: int = None) -> Iterator[List[Dict]]:
+        """按块流式读取所有开奖数据（按开奖日期从新到旧）"""
+
+    @abstractmethod
+    def iter_history_rows(self, after: str = None, chunk_size: int = None) -> Iterator[List[tuple]]:
+        """按块流式读取 (期号, 开奖日期, 号码列..., updated_at)，按期号从小到大"""
+
+    @abstractmethod
+    def history_fingerprint(self) -> Tuple[int, Optional[str]]:
+        """(记录数, 最近更新时间)"""
+
+    @abstractmethod
+    def get_draw_dates(self, table_name: str, after: str = None) -> List[Tuple[str, str]]:
+        """(期号, 开奖日期)，按期号从小到大"""
+
+    @abstractmethod
+    def get_issue_breaks(self, table_name: str, first_issue: str) -> List[Tuple[str, Optional[str], str, str]]:
+        """期号不连续的位置 (上一期号, 上一期开奖日期, 期号, 开奖日期)"""
+
+    @abstractmethod
+    def get_overlapping_draws(self, conditions: Dict[str, Tuple[int, int]]) -> List[Dict]:
+        """按号码位图查询与给定号码重合的历史开奖"""
+
+    # ---------- 统计表 ----------
+
+    @abstractmethod
+    def rebuild_stats(self) -> int:
+        """按全表重新生成统计表，返回统计的期数"""
+
+    @abstractmethod
+    def load_statistics(self):
+        """从统计表读取统计器（与写入在同一事务中维护，不扫描历史数据）"""
+
+
+def open_database(database_class: Type[LotteryStorage], db_config: Dict) -> LotteryStorage:
+    """
+    按 db_config['backend'] 创建数据库实例
+
+    Args:
+        database_class: 彩票数据库类（如 SSQDatabase）
+        db_config: load_db_config() 返回的配置
+
+    Raises:
+        ValueError: 不支持的后端
+    """
+    backend = db_config.get('backend', 'mysql')
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"不支持的存储后端: {backend}（可选: {', '.join(STORAGE_BACKENDS)}）")
+    if backend == 'sqlite':
+        from core.sqlite_backend import sqlite_class
+        database_class = sqlite_class(database_class)
+    return database_class(db_config)
@@ -0,0 +1,111 @@
+"""
+策略上下文
+预测策略使用的只读数据，按历史版本计算一次并缓存：同一历史版本的多次 predict 调用、多个预测器实例共用同一个对象，
+有新开奖（期数、最新期号或号码内容变化）时重新计算：
+    frequency                号码池 -> {号码: 出现次数}
+    ranked                   号码池 -> 按频率从高到低排列的号码（同频率保持 frequency 的键顺序）
+    tiers                    号码池 -> {层名: 号码}，按各彩票策略模块的 TIERS（层名 -> 频率排名切片）预先切好
+    cumulative               号码池 -> 按 ranked 顺序的累计出现次数（加权抽样用）
+    historical_combinations  历史组合集合（哈希查找，元素格式同 HistoryMatrix.combinations）
+
+所有字段只读（映射为 MappingProxyType，号码为元组，数组不可写）
+"""
+
+import hashlib
+import logging
+import random
+from types import MappingProxyType
+from typing import Callable, Dict, Hashable, Iterable, Mapping, Tuple
+
+import numpy as np
+
+from core.history_matrix import HistoryMatrix
+
+logger = logging.getLogger(__name__)
+
+# 频率分层：号码池 -> {层名: 频率排名切片}
+Tiers = Dict[str, Dict[str, slice]]
+# 历史版本：(期数, 最新期号, 号码内容摘要)
+Version = Tuple[int, str, str]
+
+
+def history_version(matrix: HistoryMatrix) -> Version:
+    """历史版本（有新开奖或数据修正时改变）"""
+    digest = hashlib.blake2b(matrix.balls.tobytes(), digest_size=8).hexdigest()
+    return len(matrix), matrix.latest_issue, digest
+
+
+class StrategyContext:
+    """策略上下文（只读，字段见模块说明）
+
+    Args:
+        version: 历史版本
+        frequency: 号码池 -> {号码: 出现次数}
+        historical_combinations: 历史组合
+        tiers: 频率分层定义
+    """
+
+    __slots__ = ('version', 'frequency', 'ranked', 'tiers', 'cumulative', 'historical_combinations')
+
+    def __init__(self, version: Version, frequency: Dict[str, Mapping[int, int]],
+                 historical_combinations: Iterable[Hashable], tiers: Tiers = None):
+        ranked = {
+            pool: tuple(sorted(counts, key=lambda ball: counts[ball], reverse=True))
+            for pool, counts in frequency.items()
+        }
+        cumulative = {}
+        for pool, balls in ranked.items():
+            table = np.cumsum([frequency[pool][ball] for ball in balls], dtype=np.int64)
+            table.flags.writeable = False
+            cumulative[pool] = table
+
+        fields = {
+            'version': version,
+            'frequency': MappingProxyType({pool: MappingProxyType(dict(counts)) for pool, counts in frequency.items()}),
+            'ranked': MappingProxyType(ranked),
+            'tiers': MappingProxyType({
+                pool: MappingProxyType({name: ranked[pool][part] for name, part in parts.items()})
+                for pool, parts in (tiers or {}).items()
+            }),
+            'cumulative': MappingProxyType(cumulative),
+            'historical_combinations': frozenset(historical_combinations),
+        }
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"StrategyContext 是只读的，不能修改 {name}")
+
+    def tier(self, pool: str, name: str) -> Tuple[int, ...]:
+        """频率分层中的号码（如 tier('red', 'hot')）"""
+        return self.tiers[pool][name]
+
+    def weighted_choice(self, pool: str, rng: random.Random = None) -> int:
+        """按出现次数加权随机选择一个号码（累计表二分查找）"""
+        table = self.cumulative[pool]
+        if not len(table) or not table[-1]:
+            raise ValueError(f"号码池 {pool} 没有频率数据")
+        target = (rng or random).random() * int(table[-1])
+        return self.ranked[pool][int(np.searchsorted(table, target, side='right'))]
+
+
+_cache: Dict[str, StrategyContext] = {}
+
+
+def get_strategy_context(key: str, matrix: HistoryMatrix,
+                         build: Callable[[Version], StrategyContext]) -> StrategyContext:
+    """
+    进程内缓存的策略上下文（历史版本不变时直接返回，否则重新计算）
+
+    Args:
+        key: 缓存键（如预测器类名）
+        matrix: 历史号码矩阵
+        build: 历史版本 -> 策略上下文
+    """
+    version = history_version(matrix)
+    context = _cache.get(key)
+    if context is None or context.version != version:
+        context = build(version)
+        _cache[key] = context
+        logger.info(f"🧮 已计算策略上下文: {key}（{version[0]} 期，最新期号 {version[1]}）")
+    return context
@@ -4,7 +4,9 @@
 
 import os
 from dotenv import load_dotenv
-from typing import Dict
+from typing import Dict, Iterable
+
+from core.config import SQLITE_CONFIG
 
 
 def load_db_config() -> Dict:
@@ -17,6 +19,8 @@ def load_db_config() -> Dict:
     load_dotenv()
     
     db_config = {
+        'backend': os.getenv('DB_BACKEND', 'mysql').lower(),
+        'sqlite_path': os.getenv('SQLITE_PATH', SQLITE_CONFIG['path']),
         'host': os.getenv('MYSQL_HOST'),
         'port': int(os.getenv('MYSQL_PORT', 3306)),
         'user': os.getenv('MYSQL_USER'),
@@ -46,6 +50,23 @@ def format_number(num: int, width: int = 2) -> str:
     return f"{num:0{width}d}"
 
 
+def ball_mask(numbers: Iterable[int], offset: int = 0) -> int:
+    """
+    号码位图（与数据表中的位图生成列一致：第 offset + n 位表示号码 n）
+
+    Args:
+        numbers: 号码（支持 '07' 这样的字符串）
+        offset: 位偏移（七星彩按位置区分时使用）
+
+    Returns:
+        位图整数
+    """
+    mask = 0
+    for number in numbers:
+        mask |= 1 << (offset + int(number))
+    return mask
+
+
 def has_consecutive_numbers(numbers: list, max_consecutive: int = 3) -> bool:
     """
     检查列表中是否有超过指定数量的连号
@@ -5,6 +5,7 @@
 import logging
 from typing import List, Dict
 from core.base_database import BaseDatabase
+from core.utils import ball_mask
 
 logger = logging.getLogger(__name__)
 
@@ -12,24 +13,35 @@ logger = logging.getLogger(__name__)
 class DLTDatabase(BaseDatabase):
     """大乐透数据库类"""
 
+    # 号码位图列（v2 表结构）
+    MASK_COLUMNS = ('front_mask', 'back_mask')
+    # 入库列（与 insert_lottery_data 生成的数据顺序一致）
+    INSERT_COLUMNS = ('lottery_no', 'draw_date', 'front1', 'front2', 'front3', 'front4', 'front5', 'back1', 'back2', 'sorted_code')
+    # 号码列（历史数据读取、快照使用，顺序与 _history_record 一致）
+    HISTORY_COLUMNS = ('front1', 'front2', 'front3', 'front4', 'front5', 'back1', 'back2')
+    # 统计类（统计表的行由它生成和解析）
+    STATISTICS_CLASS = 'lotteries.dlt.predictor.DLTStatistics'
+
     def __init__(self, config: Dict):
         super().__init__(config)
         self.table_name = 'dlt_lottery'
 
-    def create_table(self):
-        """创建大乐透数据表"""
-        create_table_sql = f"""
-        CREATE TABLE IF NOT EXISTS {self.table_name} (
+    def _table_sql(self, table_name: str) -> str:
+        """建表语句（v2：号码为 TINYINT 列；front_mask / back_mask 为号码位图生成列，第 n 位表示号码 n）"""
+        return f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
             id INT AUTO_INCREMENT PRIMARY KEY,
             lottery_no VARCHAR(20) UNIQUE NOT NULL COMMENT '期号',
             draw_date DATE NOT NULL COMMENT '开奖日期',
-            front1 VARCHAR(2) NOT NULL COMMENT '前区号码1',
-            front2 VARCHAR(2) NOT NULL COMMENT '前区号码2',
-            front3 VARCHAR(2) NOT NULL COMMENT '前区号码3',
-            front4 VARCHAR(2) NOT NULL COMMENT '前区号码4',
-            front5 VARCHAR(2) NOT NULL COMMENT '前区号码5',
-            back1 VARCHAR(2) NOT NULL COMMENT '后区号码1',
-            back2 VARCHAR(2) NOT NULL COMMENT '后区号码2',
+            front1 TINYINT UNSIGNED NOT NULL COMMENT '前区号码1',
+            front2 TINYINT UNSIGNED NOT NULL COMMENT '前区号码2',
+            front3 TINYINT UNSIGNED NOT NULL COMMENT '前区号码3',
+            front4 TINYINT UNSIGNED NOT NULL COMMENT '前区号码4',
+            front5 TINYINT UNSIGNED NOT NULL COMMENT '前区号码5',
+            back1 TINYINT UNSIGNED NOT NULL COMMENT '后区号码1',
+            back2 TINYINT UNSIGNED NOT NULL COMMENT '后区号码2',
+            front_mask BIGINT UNSIGNED AS ((1 << front1) | (1 << front2) | (1 << front3) | (1 << front4) | (1 << front5)) STORED COMMENT '前区位图',
+            back_mask BIGINT UNSIGNED AS ((1 << back1) | (1 << back2)) STORED COMMENT '后区位图',
             sorted_code VARCHAR(50) NOT NULL COMMENT '排序后的号码组合',
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
@@ -39,6 +51,10 @@ class DLTDatabase(BaseDatabase):
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='大乐透开奖数据表';
         """
 
+    def create_table(self):
+        """创建大乐透数据表"""
+        create_table_sql = self._table_sql(self.table_name)
+
         cursor = self.connection.cursor()
         try:
             cursor.execute(create_table_sql)
@@ -50,7 +66,11 @@ class DLTDatabase(BaseDatabase):
         finally:
             cursor.close()
 
-    def insert_lottery_data(self, data: List[Dict], skip_existing: bool = True, batch_size: int = 100):
+        self.create_stats_table()
+        self.warn_if_outdated()
+
+    def insert_lottery_data(self, data: List[Dict], skip_existing: bool = True, batch_size: int = 100,
+                            bulk: bool = False):
         """
         批量插入中奖数据，使用事务保证数据一致性
         注意：入库前会按期号从小到大排序，确保 ID 和期号都是递增的
@@ -58,7 +78,8 @@ class DLTDatabase(BaseDatabase):
         Args:
             data: 中奖数据列表
             skip_existing: 是否跳过已存在的数据
-            batch_size: 批量插入大小
+            batch_size: 批量插入大小（batch 模式；upsert 模式按 DB_UPSERT_BATCH_ROWS 分段）
+            bulk: 使用 LOAD DATA LOCAL INFILE 批量导入（空表全量导入用，不可用时回退为 upsert）
 
         Returns:
             (inserted, duplicated, skipped) 元组
@@ -75,9 +96,12 @@ class DLTDatabase(BaseDatabase):
         # 按期号从小到大排序
         sorted_data = sorted(data, key=lambda x: x['lottery_no'])
 
+        # upsert / bulk 模式依赖期号唯一键判断是否已存在，不预先查询
+        upsert = bulk or self.insert_mode == 'upsert'
+
         # 如果启用跳过，先批量查询已存在的期号
         existing_nos = set()
-        if skip_existing and sorted_data:
+        if skip_existing and sorted_data and not upsert:
             lottery_nos = [item['lottery_no'] for item in sorted_data]
             cursor = self.connection.cursor()
             try:
@@ -126,7 +150,7 @@ class DLTDatabase(BaseDatabase):
                 ))
 
                 # 达到批次大小，执行插入
-                if len(batch_data) >= batch_size:
+                if not upsert and len(batch_data) >= batch_size:
                     inserted += self._batch_insert(batch_data)
                     batch_data = []
 
@@ -134,6 +158,15 @@ class DLTDatabase(BaseDatabase):
                 logger.error(f"处理数据失败 {item.get('lottery_no', 'unknown')}: {e}")
                 continue
 
+        # upsert 模式：多行 INSERT ... ON DUPLICATE KEY，整批只提交一次（bulk 模式经临时表 LOAD DATA 后合并）
+        if upsert:
+            write_rows = self.bulk_load_rows if bulk else self.upsert_rows
+            inserted, duplicated, existed = write_rows(self.table_name, self.INSERT_COLUMNS, batch_data,
+                                                       skip_existing=skip_existing)
+            skipped += existed
+            logger.info(f"批量写入完成: 新增 {inserted} 条，重复 {duplicated} 条，跳过 {skipped} 条")
+            return inserted, duplicated, skipped
+
         # 插入剩余数据
         if batch_data:
             inserted += self._batch_insert(batch_data)
@@ -154,7 +187,9 @@ class DLTDatabase(BaseDatabase):
 
         cursor = self.connection.cursor()
         try:
+            since_id = self._max_id(cursor)
             cursor.executemany(insert_sql, batch_data)
+            self._update_stats(cursor, since_id)
             self.connection.commit()
             return len(batch_data)
         except Exception as e:
@@ -219,3 +254,32 @@ class DLTDatabase(BaseDatabase):
             ]
         finally:
             cursor.close()
+
+    @staticmethod
+    def _history_record(row) -> Dict:
+        """(期号, 开奖日期, 号码列...) -> 预测器/统计类使用的记录"""
+        return {
+            'lottery_no': str(row[0]),
+            'draw_date': str(row[1]),
+            'front_balls': tuple(map(int, row[2:7])),
+            'back_balls': tuple(map(int, row[7:9]))
+        }
+
+    def find_overlapping_draws(self, front_balls: List[int], min_front: int = 3,
+                               back_balls: List[int] = None, min_back: int = 1) -> List[Dict]:
+        """
+        查询与给定号码至少有 min_front 个前区号码相同的历史开奖（v2 表结构，在 SQL 中用位图计算）
+
+        Args:
+            front_balls: 前区号码
+            min_front: 最少相同前区号码数
+            back_balls: 指定时还要求至少 min_back 个后区号码相同
+            min_back: 最少相同后区号码数
+
+        Returns:
+            [{'lottery_no', 'draw_date', 'front_common': 相同前区数, 'back_common': 相同后区数}]
+        """
+        conditions = {'front_mask': (ball_mask(front_balls), min_front)}
+        if back_balls:
+            conditions['back_mask'] = (ball_mask(back_balls), min_back)
+        return self.get_overlapping_draws(conditions)
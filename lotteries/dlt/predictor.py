@@ -4,6 +4,8 @@
 """
 
 from core.base_predictor import BasePredictor, BaseStatistics
+from core.history_matrix import HistoryMatrix, value_counts
+from core.strategy_context import StrategyContext, Version
 from core.utils import has_consecutive_numbers, format_number
 import logging
 from typing import List, Tuple, Set, Dict
@@ -11,9 +13,18 @@ from collections import Counter
 import itertools
 from datetime import datetime
 from .strategies import get_strategy, get_all_strategies
+from .strategies.base import TIERS
 
 logger = logging.getLogger(__name__)
 
+# 号码池：名称 -> (号码列切片, 最大号码)，号码列顺序同 DLTDatabase.HISTORY_COLUMNS
+POOLS = {'front': (slice(0, 5), 35), 'back': (slice(5, 7), 12)}
+
+
+def record_balls(data: dict) -> List[int]:
+    """记录 -> 号码列（前区 5 个 + 后区 2 个，号码可能是字符串或整数）"""
+    return [*sorted(int(b) for b in data['front_balls']), *sorted(int(b) for b in data['back_balls'])]
+
 
 class DLTPredictor(BasePredictor):
     """大乐透预测类（支持策略模式）"""
@@ -22,13 +33,15 @@ class DLTPredictor(BasePredictor):
     BACK_RANGE = range(1, 13)   # 后区范围 1-12
     FRONT_COUNT = 5  # 前区号码数量
     BACK_COUNT = 2   # 后区号码数量
+    POOLS = POOLS
+    record_balls = staticmethod(record_balls)
 
-    def __init__(self, lottery_data: List[dict], strategies: List[str] = None):
+    def __init__(self, lottery_data, strategies: List[str] = None):
         """
         初始化预测器
 
         Args:
-            lottery_data: 历史中奖数据列表
+            lottery_data: HistoryMatrix（或历史中奖数据列表、iter_lottery_data() 返回的分块迭代器）
             strategies: 使用的策略列表（默认 ['frequency']）
         """
         self.all_front_balls = set(self.FRONT_RANGE)
@@ -36,38 +49,23 @@ class DLTPredictor(BasePredictor):
         self.default_strategies = strategies or ['frequency']
         super().__init__(lottery_data)
 
-    def _analyze_history(self):
-        """分析历史数据"""
-        self.historical_combinations = set()
-        self.front_ball_frequency = Counter()
-        self.back_ball_frequency = Counter()
-
-        for data in self.lottery_data:
-            # 处理前区号码（可能是字符串或整数）
-            if isinstance(data['front_balls'][0], str):
-                front_balls = tuple(sorted([int(b) for b in data['front_balls']]))
-            else:
-                front_balls = tuple(sorted(data['front_balls']))
-            
-            # 处理后区号码
-            if isinstance(data['back_balls'][0], str):
-                back_balls = tuple(sorted([int(b) for b in data['back_balls']]))
-            else:
-                back_balls = tuple(sorted(data['back_balls']))
-
-            # 组合
-            combination = (front_balls, back_balls)
-            self.historical_combinations.add(combination)
-
-            # 统计频率
-            for ball in front_balls:
-                self.front_ball_frequency[ball] += 1
-
-            for ball in back_balls:
-                self.back_ball_frequency[ball] += 1
-
+    def _analyze_history(self, matrix: HistoryMatrix):
+        """分析历史数据（号码频率来自共用同一矩阵的统计类）"""
+        self.statistics = DLTStatistics(matrix)
+        self.front_ball_frequency = self.statistics.front_frequency
+        self.back_ball_frequency = self.statistics.back_frequency
+        self.historical_combinations = matrix.combinations('front', 'back')
         logger.info(f"历史中奖组合数: {len(self.historical_combinations)}")
 
+    def _build_strategy_context(self, version: Version) -> StrategyContext:
+        """策略上下文：号码频率、频率排名与分层、历史组合"""
+        return StrategyContext(
+            version,
+            {'front': self.front_ball_frequency, 'back': self.back_ball_frequency},
+            self.historical_combinations,
+            TIERS
+        )
+
     def _is_valid_combination(self, front_balls: List[int], back_balls: List[int]) -> bool:
         """
         验证组合是否有效
@@ -110,12 +108,8 @@ class DLTPredictor(BasePredictor):
         
         logger.info(f"使用策略: {', '.join(strategy_names)}")
         
-        # 构建上下文数据
-        context = {
-            'front_frequency': dict(self.front_ball_frequency),
-            'back_frequency': dict(self.back_ball_frequency),
-            'historical_combinations': self.historical_combinations
-        }
+        # 策略上下文（同一历史版本只计算一次）
+        context = self.strategy_context()
 
         # 计算每个策略生成的组合数
         count_per_strategy = count // len(strategy_names)
@@ -154,151 +148,95 @@ class DLTPredictor(BasePredictor):
         
         return final_predictions
 
-    def _predict_with_strategy(self, strategy_name: str, count: int, context: Dict, existing_predictions: List[Dict] = None) -> List[Dict]:
+    @staticmethod
+    def _sorted_code(front_balls: List[int], back_balls: List[int]) -> str:
+        """排序码（如 01,05,10,20,30-03,08）"""
+        return ','.join([f"{x:02d}" for x in sorted(front_balls)]) + '-' + ','.join([f"{x:02d}" for x in sorted(back_balls)])
+
+    def _predict_with_strategy(self, strategy_name: str, count: int, context: StrategyContext, existing_predictions: List[Dict] = None) -> List[Dict]:
         """
-        使用指定策略生成预测
+        使用指定策略生成预测（整批构造式抽样：只从有效、非历史、未生成过的组合中抽取，没有重试和超时）
 
         Args:
             strategy_name: 策略名称
             count: 生成数量
-            context: 上下文数据
+            context: 策略上下文
             existing_predictions: 已生成的预测（用于去重）
 
         Returns:
             预测结果列表
         """
-        import time
-        
         if existing_predictions is None:
             existing_predictions = []
         
         strategy = get_strategy(strategy_name)
-        predictions = []
-        max_attempts = min(count * 20, 200)  # 减少尝试次数（优化）
-        start_time = time.time()
-        max_time = 5.0  # 最大执行时间 5 秒（优化）
-        attempts = 0
 
         logger.info(f"使用 {strategy.name} 生成 {count} 个组合...")
 
-        # 已存在的组合（用于去重）
-        existing_codes = set()
-        for pred in existing_predictions:
-            existing_codes.add(pred['sorted_code'])
+        # 整批生成（频率排名只计算一次），每行 5 个前区号码 + 2 个后区号码
+        batch = strategy.generate_batch(
+            context, count,
+            existing=[pred['front_balls'] + pred['back_balls'] for pred in existing_predictions]
+        )
 
-        while len(predictions) < count and attempts < max_attempts:
-            attempts += 1
-
-            # 每 10 次检查一次时间（减少时间检查开销）
-            if attempts % 10 == 0 and time.time() - start_time > max_time:
-                logger.warning(f"{strategy.name} 预测超时，已生成 {len(predictions)} 个组合")
-                break
-
-            # 使用策略生成前区和后区
-            front_balls = strategy.generate_front_balls(context)
-            back_balls = strategy.generate_back_balls(context)
-
-            # 检查是否有效
-            if not self._is_valid_combination(front_balls, back_balls):
-                continue
-
-            # 生成排序码
-            sorted_code = ','.join([f"{x:02d}" for x in sorted(front_balls)]) + '-' + ','.join([f"{x:02d}" for x in sorted(back_balls)])
-            
-            # 检查是否重复
-            if sorted_code in existing_codes:
-                continue
-            
-            existing_codes.add(sorted_code)
-            
+        predictions = []
+        for row in batch.tolist():
+            front_balls = row[:5]
+            back_balls = row[5:]
             predictions.append({
                 'front_balls': front_balls,
                 'back_balls': back_balls,
-                'sorted_code': sorted_code,
+                'sorted_code': self._sorted_code(front_balls, back_balls),
                 'strategy': strategy_name,
                 'strategy_name': strategy.name,
                 'prediction_time': datetime.now().isoformat()
             })
 
-        logger.info(f"{strategy.name} 生成了 {len(predictions)} 个组合（尝试 {attempts} 次）")
+        logger.info(f"{strategy.name} 生成了 {len(predictions)} 个组合")
         return predictions
 
 
 class DLTStatistics(BaseStatistics):
     """大乐透统计类"""
 
-    def __init__(self, lottery_data: List[dict]):
+    POOLS = POOLS
+    record_balls = staticmethod(record_balls)
+
+    def __init__(self, lottery_data=None):
         super().__init__(lottery_data)
 
+    def _reset(self):
+        self.front_frequency = Counter()
+        self.back_frequency = Counter()
+        # 前区最长连号长度 -> 期数
+        self.consecutive_counts = Counter()
+        # 'x奇y偶' -> 期数
+        self.odd_even_counts = Counter()
+
+    def _add_matrix(self, matrix: HistoryMatrix):
+        self.front_frequency.update(matrix.frequency('front'))
+        self.back_frequency.update(matrix.frequency('back'))
+        # 最长连号长度（无连号为 1）
+        self.consecutive_counts.update(value_counts(matrix.max_consecutive('front') + 1))
+        front_count = matrix.columns('front').shape[1]
+        for odd_count, draws in value_counts(matrix.odd_counts('front')).items():
+            self.odd_even_counts[f"{odd_count}奇{front_count - odd_count}偶"] += draws
+
+    def _counters(self) -> Dict:
+        return {'front': self.front_frequency, 'back': self.back_frequency,
+                'consecutive': self.consecutive_counts, 'odd_even': self.odd_even_counts}
+
     def get_frequency(self) -> Dict:
         """获取号码频率统计"""
-        front_frequency = Counter()
-        back_frequency = Counter()
-
-        for data in self.lottery_data:
-            # 处理前区号码
-            if isinstance(data['front_balls'][0], str):
-                front_balls = [int(b) for b in data['front_balls']]
-            else:
-                front_balls = data['front_balls']
-            
-            # 处理后区号码
-            if isinstance(data['back_balls'][0], str):
-                back_balls = [int(b) for b in data['back_balls']]
-            else:
-                back_balls = data['back_balls']
-
-            for ball in front_balls:
-                front_frequency[ball] += 1
-
-            for ball in back_balls:
-                back_frequency[ball] += 1
-
         return {
-            'front_balls': dict(front_frequency),
-            'back_balls': dict(back_frequency)
+            'front_balls': dict(self.front_frequency),
+            'back_balls': dict(self.back_frequency)
         }
 
     def get_consecutive_analysis(self) -> Dict:
         """获取连号分析"""
-        consecutive_counts = Counter()
-
-        for data in self.lottery_data:
-            # 处理前区号码
-            if isinstance(data['front_balls'][0], str):
-                front_balls = sorted([int(b) for b in data['front_balls']])
-            else:
-                front_balls = sorted(data['front_balls'])
-
-            # 统计连号
-            max_consecutive = 1
-            current_consecutive = 1
-
-            for i in range(1, len(front_balls)):
-                if front_balls[i] - front_balls[i-1] == 1:
-                    current_consecutive += 1
-                    max_consecutive = max(max_consecutive, current_consecutive)
-                else:
-                    current_consecutive = 1
-
-            consecutive_counts[max_consecutive] += 1
-
-        return dict(consecutive_counts)
+        return dict(self.consecutive_counts)
 
     def get_odd_even_analysis(self) -> Dict:
         """获取奇偶分析"""
-        odd_even_counts = Counter()
-
-        for data in self.lottery_data:
-            # 处理前区号码
-            if isinstance(data['front_balls'][0], str):
-                front_balls = [int(b) for b in data['front_balls']]
-            else:
-                front_balls = data['front_balls']
-
-            odd_count = sum(1 for ball in front_balls if ball % 2 == 1)
-            even_count = len(front_balls) - odd_count
-
-            odd_even_counts[f"{odd_count}奇{even_count}偶"] += 1
-
-        return dict(odd_even_counts)
+        return dict(self.odd_even_counts)
@@ -9,31 +9,33 @@
 """
 
 import requests
-from bs4 import BeautifulSoup
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 import re
 from core.error_handler import handle_network_error, handle_parse_error
+from core.html_table import parse_result_table
+from core.base_spider import BaseSpider
 
 logger = logging.getLogger(__name__)
 
+_ISSUE5_RE = re.compile(r'^\d{5}$')
+_ISSUE7_RE = re.compile(r'^\d{7}$')
+_NUMBER_RE = re.compile(r'^\d+$')
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
 
-class DLTSpider:
+
+class DLTSpider(BaseSpider):
     """大乐透爬虫类 - 只使用 500.com"""
 
     # 数据源：500彩票网（稳定可靠）
     BASE_URL = "https://datachart.500.com/dlt/history/newinc/history.php"
 
-    HEADERS = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-        'Referer': 'https://www.500.com/',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
-    }
+    REFERER = 'https://www.500.com/'
+
+    LOTTERY_TYPE = 'dlt'
 
     def __init__(self, timeout: int = 10, retry_times: int = 3):
-        self.timeout = timeout
-        self.retry_times = retry_times
-        self.session = requests.Session()
+        super().__init__(timeout=timeout, retry_times=retry_times)
 
     def fetch(self, start_issue: str = None, end_issue: str = None, count: int = None) -> List[Dict]:
         """
@@ -68,10 +70,7 @@ class DLTSpider:
         logger.info(f"从 500.com 获取期号范围数据: {start_issue} - {end_issue}")
         
         try:
-            response = self.session.get(url, headers=self.HEADERS, timeout=self.timeout)
-            response.raise_for_status()
-            
-            data = self._parse_html(response.text)
+            data = self._request_range(start_issue, end_issue)
             logger.info(f"成功获取 {len(data)} 条数据")
             return data
             
@@ -100,17 +99,21 @@ class DLTSpider:
         """按期号范围获取（兼容旧接口）"""
         return self.fetch(start_issue=start_issue, end_issue=end_issue)
 
+    def _request_range(self, start_issue: str, end_issue: str) -> List[Dict]:
+        """按期号范围请求并解析（异常直接抛出，由调用方决定通知、重试或拆分范围）"""
+        return self._parse_response(self._download_range(start_issue, end_issue))
+
+    def _download_range(self, start_issue: str, end_issue: str) -> requests.Response:
+        """按期号范围下载页面（不解析，供流水线的下载阶段使用）"""
+        url = f"{self.BASE_URL}?start={start_issue}&end={end_issue}"
+        return self._fetch_page(url, start_issue, end_issue)
+
     def _fetch_from_500com(self) -> List[Dict]:
         """从 500.com 获取数据（不带参数返回最近30期）"""
         try:
-            response = self.session.get(
-                self.BASE_URL,
-                headers=self.HEADERS,
-                timeout=self.timeout
-            )
-            response.raise_for_status()
+            response = self._fetch_page(self.BASE_URL)
             
-            return self._parse_html(response.text)
+            return self._parse_response(response)
             
         except requests.exceptions.RequestException as e:
             # 网络错误，发送通知
@@ -124,79 +127,50 @@ class DLTSpider:
             logger.error(f"从 500.com 获取数据失败: {e}")
             return []
 
-    def _parse_html(self, html: str) -> List[Dict]:
+    def _parse_table(self, html: str) -> List[Dict]:
         """解析 500.com 的 HTML 数据
         
         注意：500.com 返回的数据已按期号从新到旧排序
         """
-        results = []
+        return parse_result_table(html, 'tbody', 'tdata', self._parse_cells, min_cells=10)
+
+    @staticmethod
+    def _parse_cells(cells: List[str]) -> Optional[Dict]:
+        """解析一行单元格文本，数据不完整时返回 None"""
+        texts = [text.replace(',', '') for text in cells]
         
-        try:
-            soup = BeautifulSoup(html, 'html.parser')
-            tbody = soup.find('tbody', id='tdata')
-            
-            if not tbody:
-                logger.warning("未找到数据表格")
-                return results
-            
-            rows = tbody.find_all('tr')
-            logger.info(f"找到 {len(rows)} 行数据")
-            
-            for row in rows:
-                try:
-                    cells = row.find_all('td')
-                    if len(cells) < 10:
-                        continue
-                    
-                    # 提取文本内容
-                    texts = [cell.get_text(strip=True).replace(',', '') for cell in cells]
-                    
-                    # 期号（第0列）
-                    lottery_no = texts[0]
-                    # 补全期号：如果是5位数字，补全为7位
-                    if lottery_no and re.match(r'^\d{5}$', lottery_no):
-                        lottery_no = '20' + lottery_no
-                    
-                    # 前区（第1-5列）
-                    front_balls = []
-                    for i in range(1, 6):
-                        if texts[i] and re.match(r'^\d+$', texts[i]):
-                            front_balls.append(int(texts[i]))
-                    front_balls = sorted(front_balls)
-                    
-                    # 后区（第6-7列）
-                    back_balls = []
-                    for i in range(6, 8):
-                        if texts[i] and re.match(r'^\d+$', texts[i]):
-                            back_balls.append(int(texts[i]))
-                    back_balls = sorted(back_balls)
-                    
-                    # 开奖日期（最后一列）
-                    draw_date = texts[-1]
-                    
-                    # 验证数据完整性
-                    if (lottery_no and re.match(r'^\d{7}$', lottery_no) and
-                        len(front_balls) == 5 and len(back_balls) == 2 and
-                        draw_date and re.match(r'^\d{4}-\d{2}-\d{2}$', draw_date)):
-                        
-                        results.append({
-                            'lottery_no': lottery_no,
-                            'draw_date': draw_date,
-                            'front_balls': front_balls,
-                            'back_balls': back_balls
-                        })
-                        
-                except Exception as e:
-                    logger.debug(f"解析行数据失败: {e}")
-                    continue
-            
-            logger.info(f"成功解析 {len(results)} 条数据")
-            
-        except Exception as e:
-            logger.error(f"解析 HTML 失败: {e}")
+        # 期号（第0列）
+        lottery_no = texts[0]
+        # 补全期号：如果是5位数字，补全为7位
+        if lottery_no and _ISSUE5_RE.match(lottery_no):
+            lottery_no = '20' + lottery_no
         
-        return results
-
-    def close(self):
-        """关闭会话"""
-        self.session.close()
+        # 前区（第1-5列）
+        front_balls = []
+        for i in range(1, 6):
+            if texts[i] and _NUMBER_RE.match(texts[i]):
+                front_balls.append(int(texts[i]))
+        front_balls = sorted(front_balls)
+        
+        # 后区（第6-7列）
+        back_balls = []
+        for i in range(6, 8):
+            if texts[i] and _NUMBER_RE.match(texts[i]):
+                back_balls.append(int(texts[i]))
+        back_balls = sorted(back_balls)
+        
+        # 开奖日期（最后一列）
+        draw_date = texts[-1]
+        
+        # 验证数据完整性
+        if not (lottery_no and _ISSUE7_RE.match(lottery_no) and
+                len(front_balls) == 5 and len(back_balls) == 2 and
+                draw_date and _DATE_RE.match(draw_date)):
+            return None
+        
+        return {
+            'lottery_no': lottery_no,
+            'draw_date': draw_date,
+            'front_balls': front_balls,
+            'back_balls': back_balls
+        }
@@ -3,9 +3,9 @@
 追求号码分布的均衡性
 """
 
+from core.strategy_context import StrategyContext
 from .base import BaseStrategy
-from typing import List, Dict
-import random
+from typing import List, Sequence, Tuple
 
 
 class BalancedStrategy(BaseStrategy):
@@ -17,29 +17,29 @@ class BalancedStrategy(BaseStrategy):
             description='追求号码分布均衡，大小号、奇偶号均衡'
         )
     
-    def generate_front_balls(self, context: Dict) -> List[int]:
-        """生成前区号码
+    def front_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """前区选号方案
         
         Args:
-            context: 包含 front_frequency 的上下文
+            context: 策略上下文
             
         Returns:
-            5个前区号码
+            2-3 个小号 + 2-3 个大号
         """
-        front_frequency = context.get('front_frequency', {})
+        front_frequency = context.frequency['front']
         
         # 将号码分为小号(1-17)、大号(18-35)
         small_balls = list(range(1, 18))
         large_balls = list(range(18, 36))
         
         # 选择 2-3 个小号，2-3 个大号
-        small_count = random.choice([2, 3])
+        small_count = self.rng.choice([2, 3])
         large_count = 5 - small_count
         
         # 如果有频率数据，优先选择中频号码
         if front_frequency:
             # 获取中频号码（排名 10-25）
-            sorted_balls = sorted(front_frequency.keys(), key=lambda x: front_frequency[x], reverse=True)
+            sorted_balls = context.ranked['front']
             mid_freq_balls = sorted_balls[10:25] if len(sorted_balls) > 25 else sorted_balls[5:]
             
             # 从中频号码中筛选小号和大号
@@ -52,30 +52,20 @@ class BalancedStrategy(BaseStrategy):
             if len(mid_large) < large_count:
                 mid_large = large_balls
             
-            selected_small = self.random_select(mid_small, small_count)
-            selected_large = self.random_select(mid_large, large_count)
-        else:
-            selected_small = self.random_select(small_balls, small_count)
-            selected_large = self.random_select(large_balls, large_count)
+            return [(mid_small, small_count), (mid_large, large_count)]
         
-        balls = selected_small + selected_large
-        
-        # 验证组合有效性
-        if not self.is_valid_front_combination(balls):
-            return self.generate_front_balls(context)
-        
-        return sorted(balls)
+        return [(small_balls, small_count), (large_balls, large_count)]
     
-    def generate_back_balls(self, context: Dict) -> List[int]:
-        """生成后区号码
+    def back_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """后区选号方案
         
         Args:
-            context: 包含 back_frequency 的上下文
+            context: 策略上下文
             
         Returns:
-            2个后区号码
+            1 个小号 + 1 个大号
         """
-        back_frequency = context.get('back_frequency', {})
+        back_frequency = context.frequency['back']
         
         # 后区追求大小号均衡：1个小号(1-6)，1个大号(7-12)
         small_back = list(range(1, 7))
@@ -83,7 +73,7 @@ class BalancedStrategy(BaseStrategy):
         
         if back_frequency:
             # 从中频号码中选择
-            sorted_back = sorted(back_frequency.keys(), key=lambda x: back_frequency[x], reverse=True)
+            sorted_back = context.ranked['back']
             mid_freq_back = sorted_back[3:9] if len(sorted_back) > 9 else sorted_back[2:]
             
             mid_small = [b for b in mid_freq_back if b in small_back]
@@ -94,14 +84,6 @@ class BalancedStrategy(BaseStrategy):
             if len(mid_large) == 0:
                 mid_large = large_back
             
-            selected = [
-                random.choice(mid_small),
-                random.choice(mid_large)
-            ]
-        else:
-            selected = [
-                random.choice(small_back),
-                random.choice(large_back)
-            ]
+            return [(mid_small, 1), (mid_large, 1)]
         
-        return sorted(selected)
+        return [(small_back, 1), (large_back, 1)]
@@ -3,15 +3,48 @@
 """
 
 import random
-from typing import List, Dict
+from typing import List, Dict, Sequence, Tuple
 from abc import ABC, abstractmethod
 
+from core.sampler import Plan, SamplingStrategyMixin, Ticket
+from core.strategy_context import StrategyContext
 
-class BaseStrategy(ABC):
-    """预测策略基类"""
+# 频率分层：号码池 -> {层名: 频率排名切片}（StrategyContext 按此预先切好）
+TIERS = {
+    'front': {'top': slice(0, 15), 'hot': slice(0, 10), 'cold': slice(-10, None)},
+    'back': {'top': slice(0, 6), 'hot': slice(0, 4), 'cold': slice(-4, None)},
+}
+
+
+def ticket_key(ticket: Ticket) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """组合的去重键（(前区, 后区)，均排序，与历史组合集合的元素相同）"""
+    return tuple(sorted(ticket['front'])), tuple(sorted(ticket['back']))
+
+
+def ticket_row(ticket: Ticket) -> List[int]:
+    """组合 -> 号码行（5 个前区号码 + 2 个后区号码（各自从小到大），列顺序同 HistoryMatrix 的号码列）"""
+    return sorted(ticket['front']) + sorted(ticket['back'])
+
+
+def row_ticket(row: Sequence[int]) -> Ticket:
+    """号码行 -> 组合"""
+    return {'front': list(row[:5]), 'back': list(row[5:])}
+
+
+class BaseStrategy(SamplingStrategyMixin, ABC):
+    """预测策略基类
+
+    子类给出选号方案（front_stages / back_stages：[(候选号码, 个数), ...]），
+    由构造式抽样器逐个号码抽取：前区不会生成 3 个及以上连号，也不会生成历史组合和重复组合
+    """
     
     FRONT_RANGE = list(range(1, 36))  # 前区范围 1-35
     BACK_RANGE = list(range(1, 13))   # 后区范围 1-12
+    POOLS = {'front': (FRONT_RANGE, 5), 'back': (BACK_RANGE, 2)}  # 先前区后后区，后区参与去重
+    MAX_RUN = {'front': 2}
+    ticket_key = staticmethod(ticket_key)
+    ticket_row = staticmethod(ticket_row)
+    row_ticket = staticmethod(row_ticket)
     
     def __init__(self, name: str, description: str):
         """初始化策略
@@ -22,31 +55,58 @@ class BaseStrategy(ABC):
         """
         self.name = name
         self.description = description
+        self.rng = random  # 随机数生成器（generate_batch 可临时替换）
     
     @abstractmethod
-    def generate_front_balls(self, context: Dict) -> List[int]:
-        """生成前区号码（子类必须实现）
+    def front_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """前区选号方案（子类必须实现）
         
         Args:
-            context: 上下文数据（历史数据、频率统计等）
+            context: 策略上下文（频率排名、分层、历史组合）
             
         Returns:
-            5个前区号码（已排序）
+            [(候选号码, 个数), ...]，个数合计 5
         """
         pass
     
     @abstractmethod
-    def generate_back_balls(self, context: Dict) -> List[int]:
-        """生成后区号码（子类必须实现）
+    def back_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """后区选号方案（子类必须实现）
         
         Args:
-            context: 上下文数据
+            context: 策略上下文
             
         Returns:
-            2个后区号码（已排序）
+            [(候选号码, 个数), ...]，个数合计 2
         """
         pass
     
+    def ticket_plan(self, context: StrategyContext) -> Plan:
+        """一注的选号方案（先前区后后区，后区的最后一个号码参与去重）"""
+        return {'front': self.front_stages(context), 'back': self.back_stages(context)}
+    
+    def generate_front_balls(self, context: StrategyContext) -> List[int]:
+        """生成前区号码
+        
+        Args:
+            context: 策略上下文（频率排名、分层、历史组合）
+            
+        Returns:
+            5个前区号码（已排序）
+        """
+        return sorted(self.new_sampler().draw({'front': self.front_stages(context)})['front'])
+    
+    def generate_back_balls(self, context: StrategyContext) -> List[int]:
+        """生成后区号码
+        
+        Args:
+            context: 策略上下文
+            
+        Returns:
+            2个后区号码（已排序）
+        """
+        return sorted(self.new_sampler().draw({'back': self.back_stages(context)})['back'])
+    
     def is_valid_front_combination(self, balls: List[int]) -> bool:
         """验证前区组合是否有效
         
@@ -81,7 +141,7 @@ class BaseStrategy(ABC):
         Returns:
             选中的元素列表
         """
-        return random.sample(array, min(n, len(array)))
+        return self.rng.sample(array, min(n, len(array)))
     
     def score_combination(self, front_balls: List[int], front_frequency: Dict) -> float:
         """计算组合得分（用于排序）
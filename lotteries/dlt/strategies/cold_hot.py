@@ -3,9 +3,12 @@
 结合冷号和热号
 """
 
+import numpy as np
+
+from core.sampler import BatchPlan
+from core.strategy_context import StrategyContext
 from .base import BaseStrategy
-from typing import List, Dict
-import random
+from typing import List, Sequence, Tuple
 
 
 class ColdHotStrategy(BaseStrategy):
@@ -17,66 +20,58 @@ class ColdHotStrategy(BaseStrategy):
             description='结合冷号（低频）和热号（高频）'
         )
     
-    def generate_front_balls(self, context: Dict) -> List[int]:
-        """生成前区号码
+    def front_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """前区选号方案
         
         Args:
-            context: 包含 front_frequency 的上下文
+            context: 策略上下文
             
         Returns:
-            5个前区号码
+            2-3 个热号 + 2-3 个冷号
         """
-        front_frequency = context.get('front_frequency', {})
+        front_frequency = context.frequency['front']
         
         if not front_frequency:
             # 如果没有频率数据，使用随机策略
-            return sorted(self.random_select(self.FRONT_RANGE, 5))
+            return [(self.FRONT_RANGE, 5)]
         
         # 获取热号（高频，前10个）
-        sorted_balls = sorted(front_frequency.keys(), key=lambda x: front_frequency[x], reverse=True)
-        hot_balls = sorted_balls[:10]
+        hot_balls = context.tier('front', 'hot')
         
         # 获取冷号（低频，后10个）
-        cold_balls = sorted_balls[-10:]
+        cold_balls = context.tier('front', 'cold')
         
         # 选择 2-3 个热号，2-3 个冷号
-        hot_count = random.choice([2, 3])
+        hot_count = self.rng.choice([2, 3])
         cold_count = 5 - hot_count
         
-        selected_hot = self.random_select(hot_balls, hot_count)
-        selected_cold = self.random_select(cold_balls, cold_count)
-        
-        balls = selected_hot + selected_cold
-        
-        # 验证组合有效性
-        if not self.is_valid_front_combination(balls):
-            return self.generate_front_balls(context)
-        
-        return sorted(balls)
+        return [(hot_balls, hot_count), (cold_balls, cold_count)]
     
-    def generate_back_balls(self, context: Dict) -> List[int]:
-        """生成后区号码
+    def back_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """后区选号方案
         
         Args:
-            context: 包含 back_frequency 的上下文
+            context: 策略上下文
             
         Returns:
-            2个后区号码
+            1 个热号 + 1 个冷号
         """
-        back_frequency = context.get('back_frequency', {})
+        back_frequency = context.frequency['back']
         
         if not back_frequency:
-            return sorted(self.random_select(self.BACK_RANGE, 2))
+            return [(self.BACK_RANGE, 2)]
         
         # 获取热号和冷号
-        sorted_back = sorted(back_frequency.keys(), key=lambda x: back_frequency[x], reverse=True)
-        hot_back = sorted_back[:4]
-        cold_back = sorted_back[-4:]
+        hot_back = context.tier('back', 'hot')
+        cold_back = context.tier('back', 'cold')
         
         # 1个热号，1个冷号
-        selected = [
-            random.choice(hot_back),
-            random.choice(cold_back)
-        ]
-        
-        return sorted(selected)
+        return [(hot_back, 1), (cold_back, 1)]
+    
+    def batch_plan(self, context: StrategyContext, n: int, generator: np.random.Generator) -> BatchPlan:
+        """批量选号方案（前区热号个数按行整批抽取）"""
+        front = [(self.FRONT_RANGE, 5)]
+        if context.frequency['front']:
+            hot_count = generator.choice([2, 3], n)
+            front = [(context.tier('front', 'hot'), hot_count), (context.tier('front', 'cold'), 5 - hot_count)]
+        return {'front': front, 'back': self.back_stages(context)}
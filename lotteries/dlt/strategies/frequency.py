@@ -3,9 +3,12 @@
 基于历史出现频率进行预测
 """
 
+import numpy as np
+
+from core.sampler import BatchPlan, row_candidates
+from core.strategy_context import StrategyContext
 from .base import BaseStrategy
-from typing import List, Dict
-import random
+from typing import List, Sequence, Tuple
 
 
 class FrequencyStrategy(BaseStrategy):
@@ -17,58 +20,57 @@ class FrequencyStrategy(BaseStrategy):
             description='基于历史出现频率，选择高频号码组合'
         )
     
-    def generate_front_balls(self, context: Dict) -> List[int]:
-        """生成前区号码
+    def front_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """前区选号方案
         
         Args:
-            context: 包含 front_frequency 的上下文
+            context: 策略上下文
             
         Returns:
-            5个前区号码
+            3-4 个高频号码 + 随机号码
         """
-        front_frequency = context.get('front_frequency', {})
+        front_frequency = context.frequency['front']
         
         if not front_frequency:
             # 如果没有频率数据，使用随机策略
-            return sorted(self.random_select(self.FRONT_RANGE, 5))
+            return [(self.FRONT_RANGE, 5)]
         
         # 获取高频号码（前15个）
-        sorted_balls = sorted(front_frequency.keys(), key=lambda x: front_frequency[x], reverse=True)
-        top_balls = sorted_balls[:15]
+        top_balls = context.tier('front', 'top')
         
         # 增加随机性：从高频号码中随机选择数量
-        high_freq_count = random.randint(3, 4)  # 3-4个高频号码
+        high_freq_count = self.rng.randint(3, 4)  # 3-4个高频号码
         random_count = 5 - high_freq_count      # 剩余的随机号码
         
-        # 选择高频号码
-        high_freq_balls = self.random_select(top_balls, high_freq_count)
-        
-        # 选择随机号码（不重复）
-        remaining_balls = [b for b in self.FRONT_RANGE if b not in high_freq_balls]
-        random_balls = self.random_select(remaining_balls, random_count)
-        
-        balls = high_freq_balls + random_balls
-        
-        # 验证组合有效性
-        if not self.is_valid_front_combination(balls):
-            return self.generate_front_balls(context)
-        
-        return sorted(balls)
+        return [(top_balls, high_freq_count), (self.FRONT_RANGE, random_count)]
     
-    def generate_back_balls(self, context: Dict) -> List[int]:
-        """生成后区号码
+    def back_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """后区选号方案
         
         Args:
-            context: 包含 back_frequency 的上下文
+            context: 策略上下文
             
         Returns:
-            2个后区号码
+            后区候选号码
         """
-        back_frequency = context.get('back_frequency', {})
+        back_frequency = context.frequency['back']
         
         # 80% 概率选择高频号码，20% 概率随机
-        if random.random() < 0.8 and back_frequency:
-            top_back = sorted(back_frequency.keys(), key=lambda x: back_frequency[x], reverse=True)[:6]
-            return sorted(self.random_select(top_back, 2))
+        if self.rng.random() < 0.8 and back_frequency:
+            top_back = context.tier('back', 'top')
+            return [(top_back, 2)]
         else:
-            return sorted(self.random_select(self.BACK_RANGE, 2))
+            return [(self.BACK_RANGE, 2)]
+    
+    def batch_plan(self, context: StrategyContext, n: int, generator: np.random.Generator) -> BatchPlan:
+        """批量选号方案（前区高频号码个数、后区 80% / 20% 分支按行整批抽取）"""
+        front = [(self.FRONT_RANGE, 5)]
+        if context.frequency['front']:
+            high_freq_count = generator.integers(3, 5, n)
+            front = [(context.tier('front', 'top'), high_freq_count), (self.FRONT_RANGE, 5 - high_freq_count)]
+        
+        back = [(self.BACK_RANGE, 2)]
+        if context.frequency['back']:
+            choice = (generator.random(n) >= 0.8).astype(np.intp)
+            back = [(row_candidates(choice, [context.tier('back', 'top'), self.BACK_RANGE]), 2)]
+        return {'front': front, 'back': back}
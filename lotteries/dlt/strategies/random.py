@@ -3,8 +3,9 @@
 完全随机选择号码
 """
 
+from core.strategy_context import StrategyContext
 from .base import BaseStrategy
-from typing import List, Dict
+from typing import List, Sequence, Tuple
 
 
 class RandomStrategy(BaseStrategy):
@@ -16,30 +17,24 @@ class RandomStrategy(BaseStrategy):
             description='完全随机选择号码，不考虑历史数据'
         )
     
-    def generate_front_balls(self, context: Dict) -> List[int]:
-        """生成前区号码
+    def front_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """前区选号方案
         
         Args:
-            context: 上下文数据（本策略不使用）
+            context: 策略上下文（本策略不使用）
             
         Returns:
-            5个前区号码
+            全部号码中随机 5 个
         """
-        balls = self.random_select(self.FRONT_RANGE, 5)
-        
-        # 验证组合有效性
-        if not self.is_valid_front_combination(balls):
-            return self.generate_front_balls(context)
-        
-        return sorted(balls)
+        return [(self.FRONT_RANGE, 5)]
     
-    def generate_back_balls(self, context: Dict) -> List[int]:
-        """生成后区号码
+    def back_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """后区选号方案
         
         Args:
-            context: 上下文数据（本策略不使用）
+            context: 策略上下文（本策略不使用）
             
         Returns:
-            2个后区号码
+            全部号码中随机 2 个
         """
-        return sorted(self.random_select(self.BACK_RANGE, 2))
+        return [(self.BACK_RANGE, 2)]
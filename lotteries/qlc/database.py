@@ -3,6 +3,7 @@
 """
 
 from core.base_database import BaseDatabase
+from core.utils import ball_mask
 from typing import List, Dict, Optional
 import logging
 from datetime import datetime
@@ -14,30 +15,36 @@ logger = logging.getLogger(__name__)
 class QLCDatabase(BaseDatabase):
     """七乐彩数据库管理类"""
 
+    # 号码位图列（v2 表结构）
+    MASK_COLUMNS = ('basic_mask', 'special_mask')
+    # 入库列（与 insert_lottery_data 生成的数据顺序一致）
+    INSERT_COLUMNS = ('lottery_no', 'draw_date', 'basic1', 'basic2', 'basic3', 'basic4', 'basic5', 'basic6', 'basic7', 'special', 'sorted_code', 'created_at')
+    # 号码列（历史数据读取、快照使用，顺序与 _history_record 一致）
+    HISTORY_COLUMNS = ('basic1', 'basic2', 'basic3', 'basic4', 'basic5', 'basic6', 'basic7', 'special')
+    # 统计类（统计表的行由它生成和解析）
+    STATISTICS_CLASS = 'lotteries.qlc.predictor.QLCStatistics'
+
     def __init__(self, db_config: Dict):
         super().__init__(db_config)
         self.table_name = 'qlc_lottery'
 
-    def create_table(self):
-        """创建七乐彩表"""
-        if not self.connection:
-            self.connect()
-
-        cursor = self.connection.cursor()
-
-        sql = """
-        CREATE TABLE IF NOT EXISTS qlc_lottery (
+    def _table_sql(self, table_name: str) -> str:
+        """建表语句（v2：号码为 TINYINT 列；basic_mask / special_mask 为号码位图生成列，第 n 位表示号码 n）"""
+        return f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
             id INT AUTO_INCREMENT PRIMARY KEY,
             lottery_no VARCHAR(20) UNIQUE NOT NULL COMMENT '期号',
             draw_date DATE NOT NULL COMMENT '开奖日期',
-            basic1 INT NOT NULL COMMENT '基本号1',
-            basic2 INT NOT NULL COMMENT '基本号2',
-            basic3 INT NOT NULL COMMENT '基本号3',
-            basic4 INT NOT NULL COMMENT '基本号4',
-            basic5 INT NOT NULL COMMENT '基本号5',
-            basic6 INT NOT NULL COMMENT '基本号6',
-            basic7 INT NOT NULL COMMENT '基本号7',
-            special INT NOT NULL COMMENT '特别号',
+            basic1 TINYINT UNSIGNED NOT NULL COMMENT '基本号1',
+            basic2 TINYINT UNSIGNED NOT NULL COMMENT '基本号2',
+            basic3 TINYINT UNSIGNED NOT NULL COMMENT '基本号3',
+            basic4 TINYINT UNSIGNED NOT NULL COMMENT '基本号4',
+            basic5 TINYINT UNSIGNED NOT NULL COMMENT '基本号5',
+            basic6 TINYINT UNSIGNED NOT NULL COMMENT '基本号6',
+            basic7 TINYINT UNSIGNED NOT NULL COMMENT '基本号7',
+            special TINYINT UNSIGNED NOT NULL COMMENT '特别号',
+            basic_mask BIGINT UNSIGNED AS ((1 << basic1) | (1 << basic2) | (1 << basic3) | (1 << basic4) | (1 << basic5) | (1 << basic6) | (1 << basic7)) STORED COMMENT '基本号位图',
+            special_mask BIGINT UNSIGNED AS (1 << special) STORED COMMENT '特别号位图',
             sorted_code VARCHAR(50) NOT NULL COMMENT '号码组合（如：01,02,03,04,05,06,07-08）',
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
@@ -46,6 +53,15 @@ class QLCDatabase(BaseDatabase):
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
         """
 
+    def create_table(self):
+        """创建七乐彩表"""
+        if not self.connection:
+            self.connect()
+
+        cursor = self.connection.cursor()
+
+        sql = self._table_sql(self.table_name)
+
         try:
             cursor.execute(sql)
             self.connection.commit()
@@ -56,6 +72,9 @@ class QLCDatabase(BaseDatabase):
         finally:
             cursor.close()
 
+        self.create_stats_table()
+        self.warn_if_outdated()
+
     def lottery_exists(self, lottery_no: str) -> bool:
         """检查期号是否已存在"""
         if not self.connection:
@@ -72,14 +91,16 @@ class QLCDatabase(BaseDatabase):
         finally:
             cursor.close()
 
-    def insert_lottery_data(self, data: List[Dict], skip_existing: bool = True, batch_size: int = 100):
+    def insert_lottery_data(self, data: List[Dict], skip_existing: bool = True, batch_size: int = 100,
+                            bulk: bool = False):
         """
         批量插入中奖数据
         
         Args:
             data: 中奖数据列表
             skip_existing: 是否跳过已存在的数据
-            batch_size: 批量插入大小
+            batch_size: 批量插入大小（batch 模式；upsert 模式按 DB_UPSERT_BATCH_ROWS 分段）
+            bulk: 使用 LOAD DATA LOCAL INFILE 批量导入（空表全量导入用，不可用时回退为 upsert）
             
         Returns:
             (inserted, duplicated, skipped) 元组
@@ -96,9 +117,12 @@ class QLCDatabase(BaseDatabase):
         # 按期号从小到大排序
         sorted_data = sorted(data, key=lambda x: x['lottery_no'])
         
+        # upsert / bulk 模式依赖期号唯一键判断是否已存在，不预先查询
+        upsert = bulk or self.insert_mode == 'upsert'
+
         # 批量查询已存在的期号
         existing_nos = set()
-        if skip_existing and sorted_data:
+        if skip_existing and sorted_data and not upsert:
             lottery_nos = [item['lottery_no'] for item in sorted_data]
             cursor = self.connection.cursor()
             try:
@@ -150,12 +174,22 @@ class QLCDatabase(BaseDatabase):
                 logger.warning(f"数据格式错误: {e}, 数据: {item}")
                 continue
 
+        # upsert 模式：多行 INSERT ... ON DUPLICATE KEY，整批只提交一次（bulk 模式经临时表 LOAD DATA 后合并）
+        if upsert:
+            write_rows = self.bulk_load_rows if bulk else self.upsert_rows
+            inserted, duplicated, existed = write_rows(self.table_name, self.INSERT_COLUMNS, batch_data,
+                                                       skip_existing=skip_existing)
+            skipped += existed
+            logger.info(f"新增 {inserted} 条，重复 {duplicated} 条，跳过 {skipped} 条")
+            return inserted, duplicated, skipped
+
         # 批量插入
         if batch_data:
             cursor = self.connection.cursor()
             try:
-                sql = """
-                INSERT INTO qlc_lottery
+                since_id = self._max_id(cursor)
+                sql = f"""
+                INSERT INTO {self.table_name}
                 (lottery_no, draw_date, basic1, basic2, basic3, basic4, basic5, basic6, basic7, special, sorted_code, created_at)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 ON DUPLICATE KEY UPDATE updated_at = NOW()
@@ -166,6 +200,7 @@ class QLCDatabase(BaseDatabase):
                     cursor.executemany(sql, batch)
                     inserted += cursor.rowcount
                 
+                self._update_stats(cursor, since_id)
                 self.connection.commit()
                 logger.info(f"新增 {inserted} 条，重复 {duplicated} 条，跳过 {skipped} 条")
                 
@@ -206,6 +241,16 @@ class QLCDatabase(BaseDatabase):
         finally:
             cursor.close()
 
+    @staticmethod
+    def _history_record(row) -> Dict:
+        """(期号, 开奖日期, 号码列...) -> 预测器/统计类使用的记录"""
+        return {
+            'lottery_no': str(row[0]),
+            'draw_date': str(row[1]),
+            'basic_balls': tuple(map(int, row[2:9])),
+            'special_ball': int(row[9])
+        }
+
     def get_latest_lottery(self) -> Optional[Dict]:
         """获取最新的中奖号码"""
         if not self.connection:
@@ -245,3 +290,20 @@ class QLCDatabase(BaseDatabase):
             return {row[0] for row in cursor.fetchall()}
         finally:
             cursor.close()
+
+    def find_overlapping_draws(self, basic_balls: List[int], min_basic: int = 4, special_ball: int = None) -> List[Dict]:
+        """
+        查询与给定号码至少有 min_basic 个基本号相同的历史开奖（v2 表结构，在 SQL 中用位图计算）
+
+        Args:
+            basic_balls: 基本号
+            min_basic: 最少相同基本号数
+            special_ball: 指定时只返回特别号相同的开奖
+
+        Returns:
+            [{'lottery_no', 'draw_date', 'basic_common': 相同基本号数, 'special_common': 特别号是否相同}]
+        """
+        conditions = {'basic_mask': (ball_mask(basic_balls), min_basic)}
+        if special_ball is not None:
+            conditions['special_mask'] = (ball_mask([special_ball]), 1)
+        return self.get_overlapping_draws(conditions)
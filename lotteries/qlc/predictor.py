@@ -3,55 +3,64 @@
 """
 
 from core.base_predictor import BasePredictor, BaseStatistics
+from core.history_matrix import HistoryMatrix, value_counts
+from core.strategy_context import StrategyContext, Version
 import logging
-from typing import List, Dict
+from typing import List
 from collections import Counter
 from datetime import datetime
 from .strategies import get_strategy, get_all_strategies
+from .strategies.base import TIERS
 
 logger = logging.getLogger(__name__)
 
+# 号码池：名称 -> (号码列切片, 最大号码)，号码列顺序同 QLCDatabase.HISTORY_COLUMNS
+POOLS = {'basic': (slice(0, 7), 30), 'special': (slice(7, 8), 30)}
+
+
+def record_balls(data: dict) -> List[int]:
+    """记录 -> 号码列（基本号 7 个 + 特别号）"""
+    return [*sorted(data['basic_balls']), data['special_ball']]
+
 
 class QLCPredictor(BasePredictor):
     """七乐彩预测类"""
 
     BASIC_RANGE = range(1, 31)  # 基本号范围 1-30
     BASIC_COUNT = 7  # 基本号个数
+    POOLS = POOLS
+    record_balls = staticmethod(record_balls)
 
-    def __init__(self, lottery_data: List[dict], strategies: List[str] = None):
+    def __init__(self, lottery_data, strategies: List[str] = None):
         """
         初始化预测器
         
         Args:
-            lottery_data: 历史中奖数据列表
+            lottery_data: HistoryMatrix（或历史中奖数据列表、iter_lottery_data() 返回的分块迭代器）
             strategies: 使用的策略列表（默认 ['frequency']）
         """
         self.all_basic_balls = set(self.BASIC_RANGE)
         self.default_strategies = strategies or ['frequency']
         super().__init__(lottery_data)
 
-    def _analyze_history(self):
-        """分析历史数据"""
-        self.historical_combinations = set()
-        self.basic_ball_frequency = Counter()
-        self.special_ball_frequency = Counter()
-        
-        for data in self.lottery_data:
-            basic_balls = tuple(sorted(data['basic_balls']))
-            special_ball = data['special_ball']
-            
-            # 记录历史组合
-            self.historical_combinations.add((basic_balls, special_ball))
-            
-            # 统计基本号频率
-            for ball in data['basic_balls']:
-                self.basic_ball_frequency[ball] += 1
-            
-            # 统计特别号频率
-            self.special_ball_frequency[special_ball] += 1
+    def _analyze_history(self, matrix: HistoryMatrix):
+        """分析历史数据（号码频率来自共用同一矩阵的统计类）"""
+        self.statistics = QLCStatistics(matrix)
+        self.basic_ball_frequency = self.statistics.basic_frequency
+        self.special_ball_frequency = self.statistics.special_frequency
+        self.historical_combinations = matrix.combinations('basic', 'special')
         
         logger.info(f"历史中奖组合数: {len(self.historical_combinations)}")
     
+    def _build_strategy_context(self, version: Version) -> StrategyContext:
+        """策略上下文：号码频率、频率排名与分层、历史组合"""
+        return StrategyContext(
+            version,
+            {'basic': self.basic_ball_frequency, 'special': self.special_ball_frequency},
+            self.historical_combinations,
+            TIERS
+        )
+    
     def _is_valid_combination(self, basic_balls: List[int]) -> bool:
         """验证基本号组合是否有效"""
         # 检查是否有重复
@@ -77,15 +86,8 @@ class QLCPredictor(BasePredictor):
         
         logger.info(f"使用策略: {', '.join(strategy_names)}")
         
-        # 构建上下文数据
-        context = {
-            'history_data': self.lottery_data,
-            'basic_frequency': dict(self.basic_ball_frequency),
-            'special_frequency': dict(self.special_ball_frequency),
-            'historical_combinations': self.historical_combinations,
-            'basic_range': self.BASIC_RANGE,
-            'basic_count': self.BASIC_COUNT
-        }
+        # 策略上下文（同一历史版本只计算一次）
+        context = self.strategy_context()
         
         # 计算每个策略生成的组合数
         count_per_strategy = max(1, count // len(strategy_names))
@@ -119,51 +121,31 @@ class QLCPredictor(BasePredictor):
         self, 
         strategy_name: str, 
         count: int, 
-        context: Dict,
+        context: StrategyContext,
         existing_predictions: List[dict]
     ) -> List[dict]:
-        """使用指定策略生成预测"""
-        import time
-        
+        """使用指定策略生成预测（整批构造式抽样：只从非历史、未生成过的组合中抽取，没有重试和超时）"""
         strategy = get_strategy(strategy_name)
-        predictions = []
-        max_attempts = min(count * 20, 200)
-        start_time = time.time()
-        max_time = 5.0
-        attempts = 0
         
         logger.info(f"使用 {strategy.name} 生成 {count} 个组合...")
         
-        while len(predictions) < count and attempts < max_attempts:
-            attempts += 1
-            
-            if attempts % 10 == 0 and time.time() - start_time > max_time:
-                logger.warning(f"{strategy.name} 预测超时，已生成 {len(predictions)} 个组合")
-                break
-            
-            # 使用策略生成基本号和特别号
-            basic_balls, special_ball = strategy.generate_balls(context)
-            
-            # 检查是否重复
-            basic_tuple = tuple(sorted(basic_balls))
-            combo = (basic_tuple, special_ball)
-            
-            is_duplicate = (
-                combo in context['historical_combinations'] or
-                any((tuple(sorted(p['basic_balls'])), p['special_ball']) == combo for p in existing_predictions) or
-                any((tuple(sorted(p['basic_balls'])), p['special_ball']) == combo for p in predictions)
-            )
-            
-            if not is_duplicate and self._is_valid_combination(basic_balls):
-                predictions.append({
-                    'basic_balls': basic_balls,
-                    'special_ball': special_ball,
-                    'strategy': strategy_name,
-                    'strategy_name': strategy.name,
-                    'prediction_time': datetime.now().isoformat()
-                })
-        
-        logger.info(f"{strategy.name} 生成了 {len(predictions)} 个组合（尝试 {attempts} 次）")
+        # 整批生成（频率排名只计算一次），每行 7 个基本号 + 特别号
+        batch = strategy.generate_batch(
+            context, count,
+            existing=[pred['basic_balls'] + [pred['special_ball']] for pred in existing_predictions]
+        )
+        predictions = [
+            {
+                'basic_balls': row[:7],
+                'special_ball': row[7],
+                'strategy': strategy_name,
+                'strategy_name': strategy.name,
+                'prediction_time': datetime.now().isoformat()
+            }
+            for row in batch.tolist()
+        ]
+        
+        logger.info(f"{strategy.name} 生成了 {len(predictions)} 个组合")
         return predictions
     
     @staticmethod
@@ -175,22 +157,31 @@ class QLCPredictor(BasePredictor):
 class QLCStatistics(BaseStatistics):
     """七乐彩统计类"""
 
-    def __init__(self, lottery_data: List[dict]):
+    POOLS = POOLS
+    record_balls = staticmethod(record_balls)
+
+    def __init__(self, lottery_data=None):
         super().__init__(lottery_data)
 
+    def _reset(self):
+        self.basic_frequency = Counter()
+        self.special_frequency = Counter()
+        # 最长连号个数 -> 期数
+        self.consecutive_counts = Counter()
+
+    def _add_matrix(self, matrix: HistoryMatrix):
+        self.basic_frequency.update(matrix.frequency('basic'))
+        self.special_frequency.update(matrix.frequency('special'))
+        self.consecutive_counts.update(value_counts(matrix.max_consecutive('basic')))
+
+    def _counters(self) -> dict:
+        return {'basic': self.basic_frequency, 'special': self.special_frequency, 'consecutive': self.consecutive_counts}
+
     def get_frequency(self) -> dict:
         """获取号码频率统计"""
-        basic_freq = Counter()
-        special_freq = Counter()
-        
-        for data in self.lottery_data:
-            for ball in data['basic_balls']:
-                basic_freq[ball] += 1
-            special_freq[data['special_ball']] += 1
-        
         return {
-            'basic_balls': dict(sorted(basic_freq.items())),
-            'special_ball': dict(sorted(special_freq.items()))
+            'basic_balls': dict(sorted(self.basic_frequency.items())),
+            'special_ball': dict(sorted(self.special_frequency.items()))
         }
     
     def get_ball_frequency(self) -> dict:
@@ -199,42 +190,9 @@ class QLCStatistics(BaseStatistics):
     
     def get_consecutive_analysis(self) -> dict:
         """分析连号情况"""
-        consecutive_stats = {
-            '无连号': 0,
-            '2个连号': 0,
-            '3个连号': 0,
-            '3个以上连号': 0
+        return {
+            '无连号': self.consecutive_counts[0],
+            '2个连号': self.consecutive_counts[1],
+            '3个连号': self.consecutive_counts[2],
+            '3个以上连号': sum(count for length, count in self.consecutive_counts.items() if length >= 3)
         }
-        
-        for data in self.lottery_data:
-            sorted_balls = sorted(data['basic_balls'])
-            max_consecutive = self._find_max_consecutive(sorted_balls)
-            
-            if max_consecutive == 0:
-                consecutive_stats['无连号'] += 1
-            elif max_consecutive == 1:
-                consecutive_stats['2个连号'] += 1
-            elif max_consecutive == 2:
-                consecutive_stats['3个连号'] += 1
-            else:
-                consecutive_stats['3个以上连号'] += 1
-        
-        return consecutive_stats
-    
-    @staticmethod
-    def _find_max_consecutive(balls: List[int]) -> int:
-        """找出最长连号个数"""
-        if not balls:
-            return 0
-        sorted_balls = sorted(balls)
-        max_consecutive = 0
-        current_consecutive = 0
-        
-        for i in range(1, len(sorted_balls)):
-            if sorted_balls[i] - sorted_balls[i-1] == 1:
-                current_consecutive += 1
-            else:
-                max_consecutive = max(max_consecutive, current_consecutive)
-                current_consecutive = 0
-        
-        return max(max_consecutive, current_consecutive)
@@ -2,9 +2,9 @@
 均衡策略 - 大小号均衡
 """
 
+from core.strategy_context import StrategyContext
 from .base import BaseStrategy
-from typing import List, Dict, Tuple
-import random
+from typing import List, Sequence, Tuple
 
 
 class BalancedStrategy(BaseStrategy):
@@ -16,21 +16,13 @@ class BalancedStrategy(BaseStrategy):
             description='大小号均衡分布（1-15为小号，16-30为大号）'
         )
     
-    def generate_balls(self, context: Dict) -> Tuple[List[int], int]:
-        """生成基本号和特别号"""
+    def basic_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """基本号选号方案（特别号使用默认方案，从剩余号码中随机选择）"""
         small_numbers = list(range(1, 16))  # 1-15
         large_numbers = list(range(16, 31))  # 16-30
         
         # 3-4个小号，3-4个大号
-        small_count = random.choice([3, 4])
+        small_count = self.rng.choice([3, 4])
         large_count = self.BASIC_COUNT - small_count
         
-        basic_balls = []
-        basic_balls.extend(self.random_select(small_numbers, small_count))
-        basic_balls.extend(self.random_select(large_numbers, large_count))
-        
-        # 从剩余号码中选择特别号
-        available_for_special = [b for b in self.BASIC_RANGE if b not in basic_balls]
-        special_ball = random.choice(available_for_special) if available_for_special else random.choice(self.BASIC_RANGE)
-        
-        return sorted(basic_balls), special_ball
+        return [(small_numbers, small_count), (large_numbers, large_count)]
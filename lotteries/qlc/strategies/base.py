@@ -3,35 +3,96 @@
 """
 
 import random
-from typing import List, Dict, Tuple
+from typing import List, Dict, Sequence, Tuple
 from abc import ABC, abstractmethod
 
+from core.sampler import Plan, SamplingStrategyMixin, Ticket
+from core.strategy_context import StrategyContext
 
-class BaseStrategy(ABC):
-    """七乐彩预测策略基类"""
+# 频率分层：号码池 -> {层名: 频率排名切片}（StrategyContext 按此预先切好）
+TIERS = {
+    'basic': {'top': slice(0, 15), 'hot': slice(0, 10), 'cold': slice(-10, None)},
+    'special': {'hot': slice(0, 5), 'cold': slice(-5, None)},
+}
+
+
+def ticket_key(ticket: Ticket) -> Tuple[Tuple[int, ...], int]:
+    """组合的去重键（(排序的基本号, 特别号)，与历史组合集合的元素相同）"""
+    return tuple(sorted(ticket['basic'])), ticket['special'][0]
+
+
+def ticket_row(ticket: Ticket) -> List[int]:
+    """组合 -> 号码行（7 个基本号（从小到大）+ 特别号，列顺序同 HistoryMatrix 的号码列）"""
+    return sorted(ticket['basic']) + ticket['special']
+
+
+def row_ticket(row: Sequence[int]) -> Ticket:
+    """号码行 -> 组合"""
+    return {'basic': list(row[:7]), 'special': list(row[7:])}
+
+
+class BaseStrategy(SamplingStrategyMixin, ABC):
+    """七乐彩预测策略基类
+
+    子类给出选号方案（basic_stages / special_stages：[(候选号码, 个数), ...]），
+    由构造式抽样器逐个号码抽取：特别号不与基本号重复，也不会生成历史组合和重复组合
+    """
     
     BASIC_RANGE = list(range(1, 31))  # 基本号范围 1-30
     BASIC_COUNT = 7  # 基本号个数
+    POOLS = {'basic': (BASIC_RANGE, BASIC_COUNT), 'special': (BASIC_RANGE, 1)}  # 特别号参与去重
+    DISJOINT = ('basic', 'special')
+    ticket_key = staticmethod(ticket_key)
+    ticket_row = staticmethod(ticket_row)
+    row_ticket = staticmethod(row_ticket)
     
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
+        self.rng = random  # 随机数生成器（generate_batch 可临时替换）
     
     @abstractmethod
-    def generate_balls(self, context: Dict) -> Tuple[List[int], int]:
-        """生成基本号和特别号（子类必须实现）
+    def basic_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """基本号选号方案（子类必须实现）
         
         Args:
-            context: 上下文数据（历史数据、频率统计等）
+            context: 策略上下文（频率排名、分层、历史组合）
             
         Returns:
-            (basic_balls, special_ball) 元组
+            [(候选号码, 个数), ...]，个数合计 7
         """
         pass
     
+    def special_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """特别号选号方案（默认从全部号码中随机选择，已选为基本号的号码自动排除）
+        
+        Args:
+            context: 策略上下文
+            
+        Returns:
+            [(候选号码, 1)]
+        """
+        return [(self.BASIC_RANGE, 1)]
+    
+    def ticket_plan(self, context: StrategyContext) -> Plan:
+        """一注的选号方案（先基本号后特别号，特别号参与去重）"""
+        return {'basic': self.basic_stages(context), 'special': self.special_stages(context)}
+    
+    def generate_balls(self, context: StrategyContext) -> Tuple[List[int], int]:
+        """生成基本号和特别号
+        
+        Args:
+            context: 策略上下文（频率排名、分层、历史组合）
+            
+        Returns:
+            (basic_balls, special_ball) 元组
+        """
+        ticket = self.new_sampler().draw(self.ticket_plan(context))
+        return sorted(ticket['basic']), ticket['special'][0]
+    
     def random_select(self, array: List, n: int) -> List:
         """从数组中随机选择 n 个不重复的元素"""
-        return random.sample(array, min(n, len(array)))
+        return self.rng.sample(array, min(n, len(array)))
     
     def get_info(self) -> Dict:
         """获取策略信息"""
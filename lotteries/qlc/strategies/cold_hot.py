@@ -2,9 +2,12 @@
 冷热号策略 - 结合冷号和热号
 """
 
+import numpy as np
+
+from core.sampler import BatchPlan, row_candidates
+from core.strategy_context import StrategyContext
 from .base import BaseStrategy
-from typing import List, Dict, Tuple
-import random
+from typing import List, Sequence, Tuple
 
 
 class ColdHotStrategy(BaseStrategy):
@@ -16,41 +19,37 @@ class ColdHotStrategy(BaseStrategy):
             description='结合冷号（低频）和热号（高频）'
         )
     
-    def generate_balls(self, context: Dict) -> Tuple[List[int], int]:
-        """生成基本号和特别号"""
-        basic_frequency = context.get('basic_frequency', {})
-        special_frequency = context.get('special_frequency', {})
+    def basic_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """基本号选号方案"""
+        basic_frequency = context.frequency['basic']
         
-        if basic_frequency:
-            # 获取热号（高频）和冷号（低频）
-            sorted_balls = sorted(basic_frequency.keys(), key=lambda x: basic_frequency[x], reverse=True)
-            hot_balls = sorted_balls[:10]  # 前10个热号
-            cold_balls = sorted_balls[-10:]  # 后10个冷号
-            
-            # 4个热号 + 3个冷号
-            basic_balls = []
-            basic_balls.extend(self.random_select(hot_balls, 4))
-            remaining_cold = [b for b in cold_balls if b not in basic_balls]
-            basic_balls.extend(self.random_select(remaining_cold, 3))
-        else:
+        if not basic_frequency:
             # 没有历史数据，随机选择
-            basic_balls = self.random_select(self.BASIC_RANGE, self.BASIC_COUNT)
+            return [(self.BASIC_RANGE, self.BASIC_COUNT)]
+        
+        # 获取热号（高频）和冷号（低频）
+        hot_balls = context.tier('basic', 'hot')  # 前10个热号
+        cold_balls = context.tier('basic', 'cold')  # 后10个冷号
         
-        # 选择特别号
-        available_for_special = [b for b in self.BASIC_RANGE if b not in basic_balls]
+        # 4个热号 + 3个冷号
+        return [(hot_balls, 4), (cold_balls, 3)]
+    
+    def special_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """特别号选号方案（候选号码都已选为基本号时自动放宽到全部号码）"""
+        special_frequency = context.frequency['special']
         
-        if special_frequency and available_for_special:
-            # 50%热号，50%冷号
-            sorted_special = sorted(special_frequency.keys(), key=lambda x: special_frequency[x], reverse=True)
-            if random.random() < 0.5:
-                # 热号
-                hot_special = [b for b in sorted_special[:5] if b in available_for_special]
-                special_ball = random.choice(hot_special) if hot_special else random.choice(available_for_special)
-            else:
-                # 冷号
-                cold_special = [b for b in sorted_special[-5:] if b in available_for_special]
-                special_ball = random.choice(cold_special) if cold_special else random.choice(available_for_special)
-        else:
-            special_ball = random.choice(available_for_special) if available_for_special else random.choice(self.BASIC_RANGE)
+        if not special_frequency:
+            return [(self.BASIC_RANGE, 1)]
         
-        return sorted(basic_balls), special_ball
+        # 50%热号，50%冷号
+        if self.rng.random() < 0.5:
+            return [(context.tier('special', 'hot'), 1)]
+        return [(context.tier('special', 'cold'), 1)]
+    
+    def batch_plan(self, context: StrategyContext, n: int, generator: np.random.Generator) -> BatchPlan:
+        """批量选号方案（特别号的热 / 冷分支按行整批抽取）"""
+        special = [(self.BASIC_RANGE, 1)]
+        if context.frequency['special']:
+            choice = (generator.random(n) >= 0.5).astype(np.intp)
+            special = [(row_candidates(choice, [context.tier('special', 'hot'), context.tier('special', 'cold')]), 1)]
+        return {'basic': self.basic_stages(context), 'special': special}
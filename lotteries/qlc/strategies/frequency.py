@@ -2,9 +2,12 @@
 频率策略 - 基于历史出现频率
 """
 
+import numpy as np
+
+from core.sampler import BatchPlan, row_candidates
+from core.strategy_context import StrategyContext
 from .base import BaseStrategy
-from typing import List, Dict, Tuple
-import random
+from typing import List, Sequence, Tuple
 
 
 class FrequencyStrategy(BaseStrategy):
@@ -16,41 +19,34 @@ class FrequencyStrategy(BaseStrategy):
             description='基于历史出现频率选择号码'
         )
     
-    def generate_balls(self, context: Dict) -> Tuple[List[int], int]:
-        """生成基本号和特别号"""
-        basic_frequency = context.get('basic_frequency', {})
-        special_frequency = context.get('special_frequency', {})
+    def basic_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """基本号选号方案"""
+        basic_frequency = context.frequency['basic']
         
         # 获取高频基本号
         if basic_frequency:
-            top_balls = sorted(basic_frequency.keys(), key=lambda x: basic_frequency[x], reverse=True)[:15]
+            top_balls = context.tier('basic', 'top')
         else:
             top_balls = self.BASIC_RANGE
         
-        # 选择7个基本号（80%高频 + 20%随机）
+        # 选择7个基本号（5个高频 + 2个随机）
         high_freq_count = 5
-        basic_balls = self.random_select(top_balls, high_freq_count)
-        
-        # 补充随机号码
-        remaining = [b for b in self.BASIC_RANGE if b not in basic_balls]
-        basic_balls.extend(self.random_select(remaining, self.BASIC_COUNT - high_freq_count))
-        
-        # 选择特别号（从未被选为基本号的号码中选择）
-        available_for_special = [b for b in self.BASIC_RANGE if b not in basic_balls]
-        
-        if special_frequency and available_for_special:
-            # 80%概率选择高频特别号
-            if random.random() < 0.8:
-                top_special = [b for b in sorted(special_frequency.keys(), 
-                              key=lambda x: special_frequency[x], reverse=True)[:5]
-                              if b in available_for_special]
-                if top_special:
-                    special_ball = random.choice(top_special)
-                else:
-                    special_ball = random.choice(available_for_special)
-            else:
-                special_ball = random.choice(available_for_special)
-        else:
-            special_ball = random.choice(available_for_special) if available_for_special else random.choice(self.BASIC_RANGE)
+        return [(top_balls, high_freq_count), (self.BASIC_RANGE, self.BASIC_COUNT - high_freq_count)]
+    
+    def special_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """特别号选号方案（高频特别号都已选为基本号时自动放宽到全部号码）"""
+        special_frequency = context.frequency['special']
         
-        return sorted(basic_balls), special_ball
+        # 80%概率选择高频特别号
+        if special_frequency and self.rng.random() < 0.8:
+            top_special = context.tier('special', 'hot')
+            return [(top_special, 1)]
+        return [(self.BASIC_RANGE, 1)]
+    
+    def batch_plan(self, context: StrategyContext, n: int, generator: np.random.Generator) -> BatchPlan:
+        """批量选号方案（特别号的 80% / 20% 分支按行整批抽取）"""
+        special = [(self.BASIC_RANGE, 1)]
+        if context.frequency['special']:
+            choice = (generator.random(n) >= 0.8).astype(np.intp)
+            special = [(row_candidates(choice, [context.tier('special', 'hot'), self.BASIC_RANGE]), 1)]
+        return {'basic': self.basic_stages(context), 'special': special}
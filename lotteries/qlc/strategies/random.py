@@ -2,9 +2,9 @@
 随机策略 - 完全随机选择
 """
 
+from core.strategy_context import StrategyContext
 from .base import BaseStrategy
-from typing import List, Dict, Tuple
-import random
+from typing import List, Sequence, Tuple
 
 
 class RandomStrategy(BaseStrategy):
@@ -16,13 +16,6 @@ class RandomStrategy(BaseStrategy):
             description='完全随机选择号码，不考虑历史数据'
         )
     
-    def generate_balls(self, context: Dict) -> Tuple[List[int], int]:
-        """生成基本号和特别号"""
-        # 随机选择7个基本号
-        basic_balls = self.random_select(self.BASIC_RANGE, self.BASIC_COUNT)
-        
-        # 从剩余号码中随机选择特别号
-        available_for_special = [b for b in self.BASIC_RANGE if b not in basic_balls]
-        special_ball = random.choice(available_for_special) if available_for_special else random.choice(self.BASIC_RANGE)
-        
-        return sorted(basic_balls), special_ball
+    def basic_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """基本号选号方案：随机选择7个基本号（特别号使用默认方案，从剩余号码中随机选择）"""
+        return [(self.BASIC_RANGE, self.BASIC_COUNT)]
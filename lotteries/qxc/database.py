@@ -3,6 +3,7 @@
 """
 
 from core.base_database import BaseDatabase
+from core.utils import ball_mask
 from typing import List, Dict, Optional
 import logging
 from datetime import datetime
@@ -14,29 +15,35 @@ logger = logging.getLogger(__name__)
 class QXCDatabase(BaseDatabase):
     """七星彩数据库管理类"""
 
+    # 号码位图列（v2 表结构）
+    MASK_COLUMNS = ('digit_mask', 'last_mask')
+    # 入库列（与 insert_lottery_data 生成的数据顺序一致）
+    INSERT_COLUMNS = ('lottery_no', 'draw_date', 'num1', 'num2', 'num3', 'num4', 'num5', 'num6', 'num7', 'sorted_code', 'created_at')
+    # 号码列（历史数据读取、快照使用，顺序与 _history_record 一致）
+    HISTORY_COLUMNS = ('num1', 'num2', 'num3', 'num4', 'num5', 'num6', 'num7')
+    # 统计类（统计表的行由它生成和解析）
+    STATISTICS_CLASS = 'lotteries.qxc.predictor.QXCStatistics'
+
     def __init__(self, db_config: Dict):
         super().__init__(db_config)
         self.table_name = 'qxc_lottery'
 
-    def create_table(self):
-        """创建七星彩表"""
-        if not self.connection:
-            self.connect()
-
-        cursor = self.connection.cursor()
-
-        sql = """
-        CREATE TABLE IF NOT EXISTS qxc_lottery (
+    def _table_sql(self, table_name: str) -> str:
+        """建表语句（v2：号码为 TINYINT 列；digit_mask 第 (位置-1)*10+数字 位表示前 6 位的数字，last_mask 第 n 位表示第 7 位为 n）"""
+        return f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
             id INT AUTO_INCREMENT PRIMARY KEY,
             lottery_no VARCHAR(20) UNIQUE NOT NULL COMMENT '期号',
             draw_date DATE NOT NULL COMMENT '开奖日期',
-            num1 INT NOT NULL COMMENT '第1位',
-            num2 INT NOT NULL COMMENT '第2位',
-            num3 INT NOT NULL COMMENT '第3位',
-            num4 INT NOT NULL COMMENT '第4位',
-            num5 INT NOT NULL COMMENT '第5位',
-            num6 INT NOT NULL COMMENT '第6位',
-            num7 INT NOT NULL COMMENT '第7位',
+            num1 TINYINT UNSIGNED NOT NULL COMMENT '第1位',
+            num2 TINYINT UNSIGNED NOT NULL COMMENT '第2位',
+            num3 TINYINT UNSIGNED NOT NULL COMMENT '第3位',
+            num4 TINYINT UNSIGNED NOT NULL COMMENT '第4位',
+            num5 TINYINT UNSIGNED NOT NULL COMMENT '第5位',
+            num6 TINYINT UNSIGNED NOT NULL COMMENT '第6位',
+            num7 TINYINT UNSIGNED NOT NULL COMMENT '第7位',
+            digit_mask BIGINT UNSIGNED AS ((1 << num1) | (1 << (10 + num2)) | (1 << (20 + num3)) | (1 << (30 + num4)) | (1 << (40 + num5)) | (1 << (50 + num6))) STORED COMMENT '前6位位图',
+            last_mask BIGINT UNSIGNED AS (1 << num7) STORED COMMENT '第7位位图',
             sorted_code VARCHAR(50) NOT NULL COMMENT '号码组合（如：1,2,3,4,5,6,7）',
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
@@ -45,6 +52,15 @@ class QXCDatabase(BaseDatabase):
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
         """
 
+    def create_table(self):
+        """创建七星彩表"""
+        if not self.connection:
+            self.connect()
+
+        cursor = self.connection.cursor()
+
+        sql = self._table_sql(self.table_name)
+
         try:
             cursor.execute(sql)
             self.connection.commit()
@@ -55,6 +71,9 @@ class QXCDatabase(BaseDatabase):
         finally:
             cursor.close()
 
+        self.create_stats_table()
+        self.warn_if_outdated()
+
     def lottery_exists(self, lottery_no: str) -> bool:
         """检查期号是否已存在"""
         if not self.connection:
@@ -71,14 +90,16 @@ class QXCDatabase(BaseDatabase):
         finally:
             cursor.close()
 
-    def insert_lottery_data(self, data: List[Dict], skip_existing: bool = True, batch_size: int = 100):
+    def insert_lottery_data(self, data: List[Dict], skip_existing: bool = True, batch_size: int = 100,
+                            bulk: bool = False):
         """
         批量插入中奖数据
         
         Args:
             data: 中奖数据列表
             skip_existing: 是否跳过已存在的数据
-            batch_size: 批量插入大小
+            batch_size: 批量插入大小（batch 模式；upsert 模式按 DB_UPSERT_BATCH_ROWS 分段）
+            bulk: 使用 LOAD DATA LOCAL INFILE 批量导入（空表全量导入用，不可用时回退为 upsert）
             
         Returns:
             (inserted, duplicated, skipped) 元组
@@ -95,9 +116,12 @@ class QXCDatabase(BaseDatabase):
         # 按期号从小到大排序
         sorted_data = sorted(data, key=lambda x: x['lottery_no'])
         
+        # upsert / bulk 模式依赖期号唯一键判断是否已存在，不预先查询
+        upsert = bulk or self.insert_mode == 'upsert'
+
         # 批量查询已存在的期号
         existing_nos = set()
-        if skip_existing and sorted_data:
+        if skip_existing and sorted_data and not upsert:
             lottery_nos = [item['lottery_no'] for item in sorted_data]
             cursor = self.connection.cursor()
             try:
@@ -146,12 +170,22 @@ class QXCDatabase(BaseDatabase):
                 logger.warning(f"数据格式错误: {e}, 数据: {item}")
                 continue
 
+        # upsert 模式：多行 INSERT ... ON DUPLICATE KEY，整批只提交一次（bulk 模式经临时表 LOAD DATA 后合并）
+        if upsert:
+            write_rows = self.bulk_load_rows if bulk else self.upsert_rows
+            inserted, duplicated, existed = write_rows(self.table_name, self.INSERT_COLUMNS, batch_data,
+                                                       skip_existing=skip_existing)
+            skipped += existed
+            logger.info(f"新增 {inserted} 条，重复 {duplicated} 条，跳过 {skipped} 条")
+            return inserted, duplicated, skipped
+
         # 批量插入
         if batch_data:
             cursor = self.connection.cursor()
             try:
-                sql = """
-                INSERT INTO qxc_lottery
+                since_id = self._max_id(cursor)
+                sql = f"""
+                INSERT INTO {self.table_name}
                 (lottery_no, draw_date, num1, num2, num3, num4, num5, num6, num7, sorted_code, created_at)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 ON DUPLICATE KEY UPDATE updated_at = NOW()
@@ -162,6 +196,7 @@ class QXCDatabase(BaseDatabase):
                     cursor.executemany(sql, batch)
                     inserted += cursor.rowcount
                 
+                self._update_stats(cursor, since_id)
                 self.connection.commit()
                 logger.info(f"新增 {inserted} 条，重复 {duplicated} 条，跳过 {skipped} 条")
                 
@@ -201,6 +236,15 @@ class QXCDatabase(BaseDatabase):
         finally:
             cursor.close()
 
+    @staticmethod
+    def _history_record(row) -> Dict:
+        """(期号, 开奖日期, 号码列...) -> 预测器/统计类使用的记录"""
+        return {
+            'lottery_no': str(row[0]),
+            'draw_date': str(row[1]),
+            'numbers': tuple(map(int, row[2:9]))
+        }
+
     def get_latest_lottery(self) -> Optional[Dict]:
         """获取最新的中奖号码"""
         if not self.connection:
@@ -239,3 +283,23 @@ class QXCDatabase(BaseDatabase):
             return {row[0] for row in cursor.fetchall()}
         finally:
             cursor.close()
+
+    def find_overlapping_draws(self, numbers: List[int], min_matches: int = 4) -> List[Dict]:
+        """
+        查询前 6 位中至少有 min_matches 位（位置和数字都相同）与给定号码一致的历史开奖
+        （v2 表结构，在 SQL 中用位图计算）；给出第 7 位时还要求第 7 位相同
+
+        Args:
+            numbers: 6 位或 7 位号码
+            min_matches: 前 6 位最少相同位数
+
+        Returns:
+            [{'lottery_no', 'draw_date', 'digit_common': 前 6 位相同位数, 'last_common': 第 7 位是否相同}]
+        """
+        digit_mask = 0
+        for position, digit in enumerate(numbers[:6]):
+            digit_mask |= ball_mask([digit], offset=position * 10)
+        conditions = {'digit_mask': (digit_mask, min_matches)}
+        if len(numbers) > 6:
+            conditions['last_mask'] = (ball_mask([numbers[6]]), 1)
+        return self.get_overlapping_draws(conditions)
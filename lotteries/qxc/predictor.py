@@ -3,50 +3,61 @@
 """
 
 from core.base_predictor import BasePredictor, BaseStatistics
+from core.history_matrix import HistoryMatrix
+from core.strategy_context import StrategyContext, Version
 import logging
-from typing import List, Dict
+from typing import List
 from collections import Counter
 from datetime import datetime
 from .strategies import get_strategy, get_all_strategies
+from .strategies.base import TIERS
 
 logger = logging.getLogger(__name__)
 
+# 号码池：名称 -> (号码列切片, 最大号码)，每个位置一个号码池（第 7 位按新规则最大为 14）
+POOLS = {f'position_{pos}': (slice(pos - 1, pos), 14 if pos == 7 else 9) for pos in range(1, 8)}
+
+
+def record_balls(data: dict) -> List[int]:
+    """记录 -> 号码列（7 个位置，保持原顺序）"""
+    return list(data['numbers'])
+
 
 class QXCPredictor(BasePredictor):
     """七星彩预测类"""
 
-    def __init__(self, lottery_data: List[dict], strategies: List[str] = None):
+    POOLS = POOLS
+    record_balls = staticmethod(record_balls)
+
+    def __init__(self, lottery_data, strategies: List[str] = None):
         """
         初始化预测器
         
         Args:
-            lottery_data: 历史中奖数据列表
+            lottery_data: HistoryMatrix（或历史中奖数据列表、iter_lottery_data() 返回的分块迭代器）
             strategies: 使用的策略列表（默认 ['frequency']）
         """
         self.default_strategies = strategies or ['frequency']
         super().__init__(lottery_data)
 
-    def _analyze_history(self):
-        """分析历史数据"""
-        self.historical_combinations = set()
-        self.position_frequency = {}  # 每个位置的号码频率
-        
-        # 初始化每个位置的频率统计
-        for pos in range(1, 8):
-            self.position_frequency[pos] = Counter()
-        
-        for data in self.lottery_data:
-            numbers = data['numbers']
-            
-            # 记录历史组合
-            self.historical_combinations.add(tuple(numbers))
-            
-            # 统计每个位置的号码频率
-            for pos, num in enumerate(numbers, 1):
-                self.position_frequency[pos][num] += 1
+    def _analyze_history(self, matrix: HistoryMatrix):
+        """分析历史数据（号码频率来自共用同一矩阵的统计类）"""
+        self.statistics = QXCStatistics(matrix)
+        self.position_frequency = self.statistics.position_frequency  # 每个位置的号码频率
+        # 七星彩按位置比较，组合不排序
+        self.historical_combinations = set(map(tuple, matrix.balls.tolist()))
         
         logger.info(f"历史中奖组合数: {len(self.historical_combinations)}")
     
+    def _build_strategy_context(self, version: Version) -> StrategyContext:
+        """策略上下文：号码频率、频率排名与分层、历史组合"""
+        return StrategyContext(
+            version,
+            {f'position_{pos}': self.position_frequency.get(pos, {}) for pos in range(1, 8)},
+            self.historical_combinations,
+            TIERS
+        )
+    
     def _is_valid_combination(self, numbers: List[int]) -> bool:
         """验证组合是否有效（七星彩没有特殊限制，总是有效）"""
         return True
@@ -66,14 +77,8 @@ class QXCPredictor(BasePredictor):
         
         logger.info(f"使用策略: {', '.join(strategy_names)}")
         
-        # 构建上下文数据
-        context = {
-            'history_data': self.lottery_data,
-            'position_frequency': {
-                pos: dict(freq) for pos, freq in self.position_frequency.items()
-            },
-            'historical_combinations': self.historical_combinations
-        }
+        # 策略上下文（同一历史版本只计算一次）
+        context = self.strategy_context()
         
         # 计算每个策略生成的组合数
         count_per_strategy = max(1, count // len(strategy_names))
@@ -107,49 +112,30 @@ class QXCPredictor(BasePredictor):
         self, 
         strategy_name: str, 
         count: int, 
-        context: Dict,
+        context: StrategyContext,
         existing_predictions: List[dict]
     ) -> List[dict]:
-        """使用指定策略生成预测"""
-        import time
-        
+        """使用指定策略生成预测（整批构造式抽样：只从非历史、未生成过的组合中抽取，没有重试和超时）"""
         strategy = get_strategy(strategy_name)
-        predictions = []
-        max_attempts = min(count * 20, 200)
-        start_time = time.time()
-        max_time = 5.0
-        attempts = 0
         
         logger.info(f"使用 {strategy.name} 生成 {count} 个组合...")
         
-        while len(predictions) < count and attempts < max_attempts:
-            attempts += 1
-            
-            if attempts % 10 == 0 and time.time() - start_time > max_time:
-                logger.warning(f"{strategy.name} 预测超时，已生成 {len(predictions)} 个组合")
-                break
-            
-            # 使用策略生成号码
-            numbers = strategy.generate_numbers(context)
-            
-            # 检查是否重复
-            numbers_tuple = tuple(numbers)
-            
-            is_duplicate = (
-                numbers_tuple in context['historical_combinations'] or
-                any(tuple(p['numbers']) == numbers_tuple for p in existing_predictions) or
-                any(tuple(p['numbers']) == numbers_tuple for p in predictions)
-            )
-            
-            if not is_duplicate:
-                predictions.append({
-                    'numbers': numbers,
-                    'strategy': strategy_name,
-                    'strategy_name': strategy.name,
-                    'prediction_time': datetime.now().isoformat()
-                })
-        
-        logger.info(f"{strategy.name} 生成了 {len(predictions)} 个组合（尝试 {attempts} 次）")
+        # 整批生成（频率排名只计算一次），每行 7 个位置的号码
+        batch = strategy.generate_batch(
+            context, count,
+            existing=[pred['numbers'] for pred in existing_predictions]
+        )
+        predictions = [
+            {
+                'numbers': row,
+                'strategy': strategy_name,
+                'strategy_name': strategy.name,
+                'prediction_time': datetime.now().isoformat()
+            }
+            for row in batch.tolist()
+        ]
+        
+        logger.info(f"{strategy.name} 生成了 {len(predictions)} 个组合")
         return predictions
     
     @staticmethod
@@ -161,23 +147,27 @@ class QXCPredictor(BasePredictor):
 class QXCStatistics(BaseStatistics):
     """七星彩统计类"""
 
-    def __init__(self, lottery_data: List[dict]):
+    POOLS = POOLS
+    record_balls = staticmethod(record_balls)
+
+    def __init__(self, lottery_data=None):
         super().__init__(lottery_data)
 
+    def _reset(self):
+        self.position_frequency = {pos: Counter() for pos in range(1, 8)}
+
+    def _add_matrix(self, matrix: HistoryMatrix):
+        for pos, freq in self.position_frequency.items():
+            freq.update(matrix.frequency(f'position_{pos}'))
+
+    def _counters(self) -> dict:
+        return {f'position_{pos}': freq for pos, freq in self.position_frequency.items()}
+
     def get_frequency(self) -> dict:
         """获取号码频率统计"""
-        position_freq = {}
-        
-        for pos in range(1, 8):
-            position_freq[pos] = Counter()
-        
-        for data in self.lottery_data:
-            for pos, num in enumerate(data['numbers'], 1):
-                position_freq[pos][num] += 1
-        
         return {
             f'position_{pos}': dict(sorted(freq.items()))
-            for pos, freq in position_freq.items()
+            for pos, freq in self.position_frequency.items()
         }
     
     def get_ball_frequency(self) -> dict:
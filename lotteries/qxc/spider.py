@@ -8,30 +8,30 @@
 """
 
 import requests
-from bs4 import BeautifulSoup
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 import re
 from core.error_handler import handle_network_error, handle_parse_error
+from core.html_table import parse_result_table
+from core.base_spider import BaseSpider
 
 logger = logging.getLogger(__name__)
 
+_ISSUE_RE = re.compile(r'^\d{5,7}$')
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
 
-class QXCSpider:
+
+class QXCSpider(BaseSpider):
     """七星彩爬虫类 - 使用 500.com"""
 
     BASE_URL = "https://datachart.500.com/qxc/history/inc/history.php"
 
-    HEADERS = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-        'Referer': 'https://www.500.com/',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
-    }
+    REFERER = 'https://www.500.com/'
+
+    LOTTERY_TYPE = 'qxc'
 
     def __init__(self, timeout: int = 10, retry_times: int = 3):
-        self.timeout = timeout
-        self.retry_times = retry_times
-        self.session = requests.Session()
+        super().__init__(timeout=timeout, retry_times=retry_times)
 
     def fetch(self, start_issue: str = None, end_issue: str = None, count: int = None) -> List[Dict]:
         """
@@ -66,10 +66,7 @@ class QXCSpider:
             logger.info(f"从 500.com 获取七星彩期号范围数据: {start_issue} - {end_issue}")
         
         try:
-            response = self.session.get(url, headers=self.HEADERS, timeout=self.timeout)
-            response.raise_for_status()
-            
-            data = self._parse_html(response.text)
+            data = self._request_range(start_issue, end_issue)
             logger.info(f"成功获取 {len(data)} 条数据")
             return data
             
@@ -91,17 +88,24 @@ class QXCSpider:
         """按期号范围获取（兼容旧接口）"""
         return self.fetch(start_issue=start_issue, end_issue=end_issue)
 
+    def _request_range(self, start_issue: str, end_issue: str = None) -> List[Dict]:
+        """按期号范围请求并解析（异常直接抛出，由调用方决定通知、重试或拆分范围）"""
+        return self._parse_response(self._download_range(start_issue, end_issue))
+
+    def _download_range(self, start_issue: str, end_issue: str = None) -> requests.Response:
+        """按期号范围下载页面（不解析，供流水线的下载阶段使用）"""
+        if end_issue is None:
+            url = f"{self.BASE_URL}?start={start_issue}"
+        else:
+            url = f"{self.BASE_URL}?start={start_issue}&end={end_issue}"
+        return self._fetch_page(url, start_issue, end_issue)
+
     def _fetch_from_500com(self) -> List[Dict]:
         """从 500.com 获取数据"""
         try:
-            response = self.session.get(
-                self.BASE_URL,
-                headers=self.HEADERS,
-                timeout=self.timeout
-            )
-            response.raise_for_status()
+            response = self._fetch_page(self.BASE_URL)
             
-            return self._parse_html(response.text)
+            return self._parse_response(response)
             
         except requests.exceptions.RequestException as e:
             error_code = getattr(e.response, 'status_code', 'UNKNOWN') if hasattr(e, 'response') and e.response else 'NETWORK'
@@ -113,83 +117,52 @@ class QXCSpider:
             logger.error(f"从 500.com 获取数据失败: {e}")
             return []
 
-    def _parse_html(self, html: str) -> List[Dict]:
+    def _parse_table(self, html: str) -> List[Dict]:
         """解析 500.com 的 HTML 数据
         
         七星彩的 HTML 结构：
-        - 数据表格的 id="tablelist"
+        - 数据表格的 id="tablelist"（第一行为表头）
         - 第0列：期号
         - 第1列：中奖号码（空格分隔的7个数字）
         - 第4列：开奖日期
         """
-        results = []
+        return parse_result_table(html, 'table', 'tablelist', self._parse_cells,
+                                  min_cells=5, skip_rows=1)
+
+    @staticmethod
+    def _parse_cells(texts: List[str]) -> Optional[Dict]:
+        """解析一行单元格文本，数据不完整时返回 None"""
+        # 第0列：期号
+        lottery_no = texts[0]
+        if not lottery_no or not _ISSUE_RE.match(lottery_no):
+            return None
         
-        try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # 查找 id="tablelist" 的数据表格
-            data_table = soup.find('table', {'id': 'tablelist'})
-            
-            if not data_table:
-                logger.warning("未找到 id='tablelist' 的数据表格")
-                return results
-            rows = data_table.find_all('tr')
-            logger.info(f"找到 {len(rows)} 行数据")
-            
-            # 跳过表头（第一行）
-            for row in rows[1:]:
-                try:
-                    cells = row.find_all('td')
-                    if len(cells) < 5:
-                        continue
-                    
-                    # 第0列：期号
-                    lottery_no = cells[0].get_text(strip=True)
-                    if not lottery_no or not re.match(r'^\d{5,7}$', lottery_no):
-                        continue
-                    
-                    # 补全期号为7位
-                    if len(lottery_no) == 5:
-                        lottery_no = '20' + lottery_no
-                    
-                    # 第1列：中奖号码（空格分隔）
-                    numbers_text = cells[1].get_text(strip=True)
-                    numbers = [int(n) for n in numbers_text.split() if n.isdigit()]
-                    
-                    if len(numbers) != 7:
-                        logger.debug(f"期号 {lottery_no} 号码数量不对: {len(numbers)}")
-                        continue
-                    
-                    # 第4列：开奖日期
-                    draw_date = cells[4].get_text(strip=True)
-                    if not re.match(r'^\d{4}-\d{2}-\d{2}$', draw_date):
-                        logger.debug(f"期号 {lottery_no} 日期格式不对: {draw_date}")
-                        continue
-                    
-                    results.append({
-                        'lottery_no': lottery_no,
-                        'draw_date': draw_date,
-                        'numbers': numbers,
-                        'num1': numbers[0],
-                        'num2': numbers[1],
-                        'num3': numbers[2],
-                        'num4': numbers[3],
-                        'num5': numbers[4],
-                        'num6': numbers[5],
-                        'num7': numbers[6]
-                    })
-                    
-                except Exception as e:
-                    logger.debug(f"解析行数据失败: {e}")
-                    continue
-            
-            logger.info(f"成功解析 {len(results)} 条数据")
-            
-        except Exception as e:
-            logger.error(f"解析 HTML 失败: {e}")
+        # 补全期号为7位
+        if len(lottery_no) == 5:
+            lottery_no = '20' + lottery_no
         
-        return results
-
-    def close(self):
-        """关闭会话"""
-        self.session.close()
+        # 第1列：中奖号码（空格分隔）
+        numbers = [int(n) for n in texts[1].split() if n.isdigit()]
+        
+        if len(numbers) != 7:
+            logger.debug(f"期号 {lottery_no} 号码数量不对: {len(numbers)}")
+            return None
+        
+        # 第4列：开奖日期
+        draw_date = texts[4]
+        if not _DATE_RE.match(draw_date):
+            logger.debug(f"期号 {lottery_no} 日期格式不对: {draw_date}")
+            return None
+        
+        return {
+            'lottery_no': lottery_no,
+            'draw_date': draw_date,
+            'numbers': numbers,
+            'num1': numbers[0],
+            'num2': numbers[1],
+            'num3': numbers[2],
+            'num4': numbers[3],
+            'num5': numbers[4],
+            'num6': numbers[5],
+            'num7': numbers[6]
+        }
@@ -2,9 +2,9 @@
 均衡策略 - 大小号均衡
 """
 
+from core.strategy_context import StrategyContext
 from .base import BaseStrategy
-from typing import List, Dict
-import random
+from typing import List, Sequence
 
 
 class BalancedStrategy(BaseStrategy):
@@ -16,24 +16,18 @@ class BalancedStrategy(BaseStrategy):
             description='大小号均衡分布（0-4为小号，5-9为大号）'
         )
     
-    def generate_numbers(self, context: Dict) -> List[int]:
-        """生成7个号码"""
+    def position_candidates(self, context: StrategyContext) -> List[Sequence[int]]:
+        """每个位置的候选号码"""
         small_numbers = list(range(0, 5))  # 0-4
         large_numbers = list(range(5, 10))  # 5-9
         
-        numbers = []
-        
         # 3-4个小号，3-4个大号
-        small_count = random.choice([3, 4])
+        small_count = self.rng.choice([3, 4])
         large_count = 7 - small_count
         
-        for _ in range(small_count):
-            numbers.append(random.choice(small_numbers))
-        
-        for _ in range(large_count):
-            numbers.append(random.choice(large_numbers))
+        candidates = [small_numbers] * small_count + [large_numbers] * large_count
         
         # 打乱顺序
-        random.shuffle(numbers)
+        self.rng.shuffle(candidates)
         
-        return numbers
+        return candidates
@@ -3,35 +3,82 @@
 """
 
 import random
-from typing import List, Dict
+from typing import List, Dict, Sequence, Tuple
 from abc import ABC, abstractmethod
 
+from core.sampler import Plan, SamplingStrategyMixin, Ticket
+from core.strategy_context import StrategyContext
 
-class BaseStrategy(ABC):
-    """七星彩预测策略基类"""
+POSITIONS = [f'position_{pos}' for pos in range(1, 8)]
+# 频率分层：号码池 -> {层名: 频率排名切片}（StrategyContext 按此预先切好）
+TIERS = {position: {'top': slice(0, 5), 'hot': slice(0, 3), 'cold': slice(-3, None)} for position in POSITIONS}
+
+
+def ticket_key(ticket: Ticket) -> Tuple[int, ...]:
+    """组合的去重键（按位置顺序的 7 个号码，与历史组合集合的元素相同）"""
+    return tuple(ticket[position][0] for position in POSITIONS)
+
+
+def ticket_row(ticket: Ticket) -> List[int]:
+    """组合 -> 号码行（7 个位置的号码，列顺序同 HistoryMatrix 的号码列）"""
+    return [ticket[position][0] for position in POSITIONS]
+
+
+def row_ticket(row: Sequence[int]) -> Ticket:
+    """号码行 -> 组合"""
+    return {position: [number] for position, number in zip(POSITIONS, row)}
+
+
+class BaseStrategy(SamplingStrategyMixin, ABC):
+    """七星彩预测策略基类
+
+    子类给出每个位置的候选号码（position_candidates），
+    由构造式抽样器逐位抽取：最后一位只从不会形成历史组合和重复组合的号码中选择
+    """
     
     NUMBER_RANGE = list(range(0, 10))  # 每位数字范围 0-9
     POSITION_COUNT = 7  # 7个位置
+    POOLS = dict.fromkeys(POSITIONS, (NUMBER_RANGE, 1))  # 逐位构造，最后一位参与去重
+    ticket_key = staticmethod(ticket_key)
+    ticket_row = staticmethod(ticket_row)
+    row_ticket = staticmethod(row_ticket)
     
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
+        self.rng = random  # 随机数生成器（generate_batch 可临时替换）
     
     @abstractmethod
-    def generate_numbers(self, context: Dict) -> List[int]:
-        """生成7个号码（子类必须实现）
+    def position_candidates(self, context: StrategyContext) -> List[Sequence[int]]:
+        """每个位置的候选号码（子类必须实现）
         
         Args:
-            context: 上下文数据（历史数据、频率统计等）
+            context: 策略上下文（频率排名、分层、历史组合）
             
         Returns:
-            7个号码
+            7个位置的候选号码
         """
         pass
     
+    def ticket_plan(self, context: StrategyContext) -> Plan:
+        """一注的选号方案（每个位置选 1 个号码）"""
+        return {position: [(candidates, 1)]
+                for position, candidates in zip(POSITIONS, self.position_candidates(context))}
+    
+    def generate_numbers(self, context: StrategyContext) -> List[int]:
+        """生成7个号码
+        
+        Args:
+            context: 策略上下文（频率排名、分层、历史组合）
+            
+        Returns:
+            7个号码
+        """
+        return ticket_row(self.new_sampler().draw(self.ticket_plan(context)))
+    
     def random_select(self, array: List, n: int) -> List:
         """从数组中随机选择 n 个元素（可重复）"""
-        return [random.choice(array) for _ in range(n)]
+        return [self.rng.choice(array) for _ in range(n)]
     
     def get_info(self) -> Dict:
         """获取策略信息"""
@@ -2,9 +2,12 @@
 冷热号策略 - 结合冷号和热号
 """
 
-from .base import BaseStrategy
-from typing import List, Dict
-import random
+import numpy as np
+
+from core.sampler import BatchPlan, row_candidates
+from core.strategy_context import StrategyContext
+from .base import BaseStrategy, POSITIONS
+from typing import List, Sequence
 
 
 class ColdHotStrategy(BaseStrategy):
@@ -16,25 +19,32 @@ class ColdHotStrategy(BaseStrategy):
             description='结合冷号（低频）和热号（高频）'
         )
     
-    def generate_numbers(self, context: Dict) -> List[int]:
-        """生成7个号码"""
-        position_frequency = context.get('position_frequency', {})
-        numbers = []
+    def position_candidates(self, context: StrategyContext) -> List[Sequence[int]]:
+        """每个位置的候选号码"""
+        candidates = []
         
-        for pos in range(1, 8):
-            pos_freq = position_frequency.get(pos, {})
-            
-            if pos_freq:
+        for position in POSITIONS:
+            if context.frequency[position]:
                 # 50% 热号，50% 冷号
-                if random.random() < 0.5:
+                if self.rng.random() < 0.5:
                     # 热号（高频）
-                    hot_numbers = sorted(pos_freq.keys(), key=lambda x: pos_freq[x], reverse=True)[:3]
-                    numbers.append(random.choice(hot_numbers))
+                    candidates.append(context.tier(position, 'hot'))
                 else:
                     # 冷号（低频）
-                    cold_numbers = sorted(pos_freq.keys(), key=lambda x: pos_freq[x])[:3]
-                    numbers.append(random.choice(cold_numbers))
+                    candidates.append(context.tier(position, 'cold'))
             else:
-                numbers.append(random.choice(self.NUMBER_RANGE))
+                candidates.append(self.NUMBER_RANGE)
         
-        return numbers
+        return candidates
+    
+    def batch_plan(self, context: StrategyContext, n: int, generator: np.random.Generator) -> BatchPlan:
+        """批量选号方案（每个位置的热 / 冷分支按行整批抽取）"""
+        plan = {}
+        for position in POSITIONS:
+            if context.frequency[position]:
+                choice = (generator.random(n) >= 0.5).astype(np.intp)
+                options = [context.tier(position, 'hot'), context.tier(position, 'cold')]
+                plan[position] = [(row_candidates(choice, options), 1)]
+            else:
+                plan[position] = [(self.NUMBER_RANGE, 1)]
+        return plan
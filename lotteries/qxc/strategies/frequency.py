@@ -2,9 +2,12 @@
 频率策略 - 基于每个位置的历史出现频率
 """
 
-from .base import BaseStrategy
-from typing import List, Dict
-import random
+import numpy as np
+
+from core.sampler import BatchPlan, row_candidates
+from core.strategy_context import StrategyContext
+from .base import BaseStrategy, POSITIONS
+from typing import List, Sequence
 
 
 class FrequencyStrategy(BaseStrategy):
@@ -16,29 +19,33 @@ class FrequencyStrategy(BaseStrategy):
             description='基于每个位置的历史出现频率选择号码'
         )
     
-    def generate_numbers(self, context: Dict) -> List[int]:
-        """生成7个号码
+    def position_candidates(self, context: StrategyContext) -> List[Sequence[int]]:
+        """每个位置的候选号码
         
         Args:
-            context: 包含 position_frequency 的上下文
+            context: 策略上下文
             
         Returns:
-            7个号码
+            7个位置的候选号码
         """
-        position_frequency = context.get('position_frequency', {})
-        numbers = []
+        candidates = []
         
-        for pos in range(1, 8):
-            pos_freq = position_frequency.get(pos, {})
-            
-            if pos_freq:
-                # 80% 概率选择高频号码
-                if random.random() < 0.8:
-                    top_numbers = sorted(pos_freq.keys(), key=lambda x: pos_freq[x], reverse=True)[:5]
-                    numbers.append(random.choice(top_numbers))
-                else:
-                    numbers.append(random.choice(self.NUMBER_RANGE))
+        for position in POSITIONS:
+            # 80% 概率选择高频号码
+            if context.frequency[position] and self.rng.random() < 0.8:
+                candidates.append(context.tier(position, 'top'))
             else:
-                numbers.append(random.choice(self.NUMBER_RANGE))
+                candidates.append(self.NUMBER_RANGE)
         
-        return numbers
+        return candidates
+    
+    def batch_plan(self, context: StrategyContext, n: int, generator: np.random.Generator) -> BatchPlan:
+        """批量选号方案（每个位置的 80% / 20% 分支按行整批抽取）"""
+        plan = {}
+        for position in POSITIONS:
+            if context.frequency[position]:
+                choice = (generator.random(n) >= 0.8).astype(np.intp)
+                plan[position] = [(row_candidates(choice, [context.tier(position, 'top'), self.NUMBER_RANGE]), 1)]
+            else:
+                plan[position] = [(self.NUMBER_RANGE, 1)]
+        return plan
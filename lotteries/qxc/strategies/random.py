@@ -2,9 +2,9 @@
 随机策略 - 完全随机选择
 """
 
+from core.strategy_context import StrategyContext
 from .base import BaseStrategy
-from typing import List, Dict
-import random
+from typing import List, Sequence
 
 
 class RandomStrategy(BaseStrategy):
@@ -16,6 +16,6 @@ class RandomStrategy(BaseStrategy):
             description='完全随机选择号码，不考虑历史数据'
         )
     
-    def generate_numbers(self, context: Dict) -> List[int]:
-        """生成7个号码"""
-        return [random.choice(self.NUMBER_RANGE) for _ in range(7)]
+    def position_candidates(self, context: StrategyContext) -> List[Sequence[int]]:
+        """每个位置的候选号码（全部号码）"""
+        return [self.NUMBER_RANGE] * 7
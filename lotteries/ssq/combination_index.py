@@ -0,0 +1,176 @@
+"""
+双色球红球组合索引
+全部 C(33,6)=1,107,568 个红球组合（按字典序）及预先计算的特征列，
+保存为 COMBINATION_INDEX_CONFIG['dir']/ssq_red.npz，首次使用时生成：
+    balls   uint8[N, 6]   红球（从小到大）
+    masks   uint64[N]     号码位图（第 n 位表示号码 n，与数据库的 red_mask 列相同）
+    sums    uint8[N]      和值
+    spans   uint8[N]      跨度（最大号 - 最小号）
+    odds    uint8[N]      奇数个数
+    zones   uint8[N, 3]   三个区间（1-11 / 12-22 / 23-33）的号码个数
+    runs    uint8[N]      最长连号长度（无连号为 1）
+
+“历史中奖”位与历史数据有关，不写入文件，由 winners(matrix) 按 HistoryMatrix 生成；
+约束检查（filter）是对索引的数组过滤，不再逐个组合循环
+"""
+
+import itertools
+import logging
+import os
+from math import comb
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from core.config import COMBINATION_INDEX_CONFIG
+from core.history_matrix import HistoryMatrix
+
+logger = logging.getLogger(__name__)
+
+BALL_COUNT = 33  # 红球 1-33
+PICK = 6  # 每注 6 个红球
+FILE_NAME = 'ssq_red.npz'
+
+# COMB[m, j] = C(m, j)，用于计算组合在字典序中的位置
+COMB = np.array([[comb(m, j) for j in range(PICK + 1)] for m in range(BALL_COUNT + 1)], dtype=np.int64)
+
+
+class SSQCombinationIndex:
+    """双色球红球组合索引（列见模块说明）"""
+
+    COLUMNS = ('balls', 'masks', 'sums', 'spans', 'odds', 'zones', 'runs')
+    SIZE = comb(BALL_COUNT, PICK)
+
+    def __init__(self, balls, masks, sums, spans, odds, zones, runs):
+        self.balls = balls
+        self.masks = masks
+        self.sums = sums
+        self.spans = spans
+        self.odds = odds
+        self.zones = zones
+        self.runs = runs
+
+    def __len__(self) -> int:
+        return len(self.masks)
+
+    # ---------- 生成 / 持久化 ----------
+
+    @classmethod
+    def build(cls) -> 'SSQCombinationIndex':
+        """生成全部组合及特征列"""
+        combos = itertools.combinations(range(1, BALL_COUNT + 1), PICK)
+        balls = np.fromiter(itertools.chain.from_iterable(combos), dtype=np.uint8,
+                            count=cls.SIZE * PICK).reshape(cls.SIZE, PICK)
+
+        steps = np.diff(balls, axis=1) == 1
+        run = np.zeros(cls.SIZE, dtype=np.uint8)
+        longest = np.zeros(cls.SIZE, dtype=np.uint8)
+        for column in steps.T:
+            run = (run + 1) * column
+            np.maximum(longest, run, out=longest)
+
+        return cls(
+            balls=balls,
+            masks=np.bitwise_or.reduce(np.left_shift(np.uint64(1), balls.astype(np.uint64)), axis=1),
+            sums=balls.sum(axis=1, dtype=np.uint16).astype(np.uint8),
+            spans=balls[:, -1] - balls[:, 0],
+            odds=(balls & 1).sum(axis=1, dtype=np.uint8),
+            zones=np.stack([(balls <= 11).sum(axis=1), ((balls > 11) & (balls <= 22)).sum(axis=1),
+                            (balls > 22).sum(axis=1)], axis=1).astype(np.uint8),
+            runs=longest + 1,
+        )
+
+    @classmethod
+    def load(cls, path: Path = None) -> 'SSQCombinationIndex':
+        """读取索引文件，不存在或损坏时重新生成并保存（保存失败只记录警告）"""
+        path = Path(path or COMBINATION_INDEX_CONFIG['dir'] / FILE_NAME)
+        if path.exists():
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    index = cls(**{column: data[column] for column in cls.COLUMNS})
+                if len(index) == cls.SIZE:
+                    return index
+                logger.info(f"组合索引不完整，重新生成: {path}")
+            except (OSError, KeyError, ValueError) as e:
+                logger.warning(f"组合索引损坏，重新生成: {path} ({e})")
+
+        index = cls.build()
+        try:
+            index.save(path)
+            logger.info(f"🗂️ 已生成双色球红球组合索引: {len(index)} 个组合 -> {path}")
+        except OSError as e:
+            logger.warning(f"组合索引写入失败: {path} ({e})")
+        return index
+
+    def save(self, path: Path):
+        """写入索引文件（先写临时文件再替换）"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **{column: getattr(self, column) for column in self.COLUMNS})
+        os.replace(tmp_path, path)
+
+    # ---------- 查找 ----------
+
+    @staticmethod
+    def positions(balls: np.ndarray) -> np.ndarray:
+        """
+        组合在索引中的行号（按字典序计算，不查表）
+
+        Args:
+            balls: 红球 [m, 6]，每行从小到大
+        """
+        values = np.asarray(balls, dtype=np.int64).reshape(-1, PICK) - 1
+        previous = np.hstack([np.full((len(values), 1), -1), values[:, :-1]])
+        remaining = PICK - np.arange(PICK)
+        # 第 i 位取值从 previous+1 到 value-1 时排在前面的组合数之和
+        before = COMB[BALL_COUNT - 1 - previous, remaining] - COMB[BALL_COUNT - values, remaining]
+        return before.sum(axis=1)
+
+    def position(self, balls: Iterable[int]) -> int:
+        """单个组合的行号"""
+        return int(self.positions(np.array(sorted(balls)))[0])
+
+    def winners(self, matrix: HistoryMatrix) -> np.ndarray:
+        """历史中奖位 bool[N]（号码矩阵中出现过的红球组合为 True）"""
+        flags = np.zeros(len(self), dtype=bool)
+        if len(matrix):
+            flags[self.positions(np.sort(matrix.columns('red'), axis=1))] = True
+        return flags
+
+    # ---------- 过滤 / 抽样 ----------
+
+    def filter(self, winners: np.ndarray = None, max_run: int = 2, within: Iterable[int] = None,
+               sum_range: Tuple[int, int] = None, span_range: Tuple[int, int] = None,
+               odd_range: Tuple[int, int] = None) -> np.ndarray:
+        """
+        满足约束的组合 bool[N]
+
+        Args:
+            winners: 历史中奖位（给出时排除历史中奖组合）
+            max_run: 最长连号长度上限（默认 2，即排除 3 个或以上连号）
+            within: 只使用这些号码
+            sum_range / span_range / odd_range: 和值、跨度、奇数个数的闭区间
+        """
+        selected = self.runs <= max_run
+        if winners is not None:
+            selected &= ~winners
+        if within is not None:
+            allowed = np.uint64(sum(1 << ball for ball in set(within)))
+            selected &= (self.masks & ~allowed) == 0
+        for column, bounds in ((self.sums, sum_range), (self.spans, span_range), (self.odds, odd_range)):
+            if bounds is not None:
+                selected &= (column >= bounds[0]) & (column <= bounds[1])
+        return selected
+
+
+_index: Optional[SSQCombinationIndex] = None
+
+
+def get_combination_index() -> SSQCombinationIndex:
+    """进程内共用的组合索引（首次调用时读取或生成）"""
+    global _index
+    if _index is None:
+        _index = SSQCombinationIndex.load()
+    return _index
@@ -4,6 +4,7 @@
 """
 
 from core.base_database import BaseDatabase
+from core.utils import ball_mask
 from typing import List, Dict, Optional
 import logging
 import json
@@ -16,6 +17,15 @@ logger = logging.getLogger(__name__)
 class SSQDatabase(BaseDatabase):
     """双色球数据库管理类"""
 
+    # 号码位图列（v2 表结构）
+    MASK_COLUMNS = ('red_mask', 'blue_mask')
+    # 入库列（与 insert_lottery_data 生成的数据顺序一致）
+    INSERT_COLUMNS = ('lottery_no', 'draw_date', 'red1', 'red2', 'red3', 'red4', 'red5', 'red6', 'blue', 'sorted_code', 'created_at')
+    # 号码列（历史数据读取、快照使用，顺序与 _history_record 一致）
+    HISTORY_COLUMNS = ('red1', 'red2', 'red3', 'red4', 'red5', 'red6', 'blue')
+    # 统计类（统计表的行由它生成和解析）
+    STATISTICS_CLASS = 'lotteries.ssq.predictor.SSQStatistics'
+
     def __init__(self, db_config: Dict):
         """
         初始化数据库连接
@@ -26,25 +36,22 @@ class SSQDatabase(BaseDatabase):
         super().__init__(db_config)
         self.table_name = 'ssq_lottery'
 
-    def create_table(self):
-        """创建双色球表（优化后的结构：每个红球一列 + 蓝球一列 + 排序号码组合）"""
-        if not self.connection:
-            self.connect()
-
-        cursor = self.connection.cursor()
-
-        sql = """
-        CREATE TABLE IF NOT EXISTS ssq_lottery (
+    def _table_sql(self, table_name: str) -> str:
+        """建表语句（v2：号码为 TINYINT 列；red_mask / blue_mask 为号码位图生成列，第 n 位表示号码 n）"""
+        return f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
             id INT AUTO_INCREMENT PRIMARY KEY,
             lottery_no VARCHAR(20) UNIQUE NOT NULL COMMENT '期号',
             draw_date DATE NOT NULL COMMENT '开奖日期',
-            red1 VARCHAR(2) NOT NULL COMMENT '红球1',
-            red2 VARCHAR(2) NOT NULL COMMENT '红球2',
-            red3 VARCHAR(2) NOT NULL COMMENT '红球3',
-            red4 VARCHAR(2) NOT NULL COMMENT '红球4',
-            red5 VARCHAR(2) NOT NULL COMMENT '红球5',
-            red6 VARCHAR(2) NOT NULL COMMENT '红球6',
-            blue VARCHAR(2) NOT NULL COMMENT '蓝球',
+            red1 TINYINT UNSIGNED NOT NULL COMMENT '红球1',
+            red2 TINYINT UNSIGNED NOT NULL COMMENT '红球2',
+            red3 TINYINT UNSIGNED NOT NULL COMMENT '红球3',
+            red4 TINYINT UNSIGNED NOT NULL COMMENT '红球4',
+            red5 TINYINT UNSIGNED NOT NULL COMMENT '红球5',
+            red6 TINYINT UNSIGNED NOT NULL COMMENT '红球6',
+            blue TINYINT UNSIGNED NOT NULL COMMENT '蓝球',
+            red_mask BIGINT UNSIGNED AS ((1 << red1) | (1 << red2) | (1 << red3) | (1 << red4) | (1 << red5) | (1 << red6)) STORED COMMENT '红球位图',
+            blue_mask BIGINT UNSIGNED AS (1 << blue) STORED COMMENT '蓝球位图',
             sorted_code VARCHAR(50) NOT NULL COMMENT '排序后的号码组合（如：02,06,08,12,22,31-22）',
             sales BIGINT COMMENT '销售额',
             pool_money BIGINT COMMENT '奖池',
@@ -55,6 +62,15 @@ class SSQDatabase(BaseDatabase):
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
         """
 
+    def create_table(self):
+        """创建双色球表（优化后的结构：每个红球一列 + 蓝球一列 + 排序号码组合）"""
+        if not self.connection:
+            self.connect()
+
+        cursor = self.connection.cursor()
+
+        sql = self._table_sql(self.table_name)
+
         try:
             cursor.execute(sql)
             self.connection.commit()
@@ -65,6 +81,9 @@ class SSQDatabase(BaseDatabase):
         finally:
             cursor.close()
 
+        self.create_stats_table()
+        self.warn_if_outdated()
+
     def lottery_exists(self, lottery_no: str) -> bool:
         """
         检查期号是否已存在
@@ -89,7 +108,8 @@ class SSQDatabase(BaseDatabase):
         finally:
             cursor.close()
 
-    def insert_lottery_data(self, data: List[Dict], skip_existing: bool = True, batch_size: int = 100):
+    def insert_lottery_data(self, data: List[Dict], skip_existing: bool = True, batch_size: int = 100,
+                            bulk: bool = False):
         """
         批量插入中奖数据，使用事务保证数据一致性
         注意：入库前会按期号从小到大排序，确保 ID 和期号都是递增的
@@ -97,7 +117,8 @@ class SSQDatabase(BaseDatabase):
         Args:
             data: 中奖数据列表（支持新旧格式）
             skip_existing: 是否跳过已存在的数据
-            batch_size: 批量插入大小
+            batch_size: 批量插入大小（batch 模式；upsert 模式按 DB_UPSERT_BATCH_ROWS 分段）
+            bulk: 使用 LOAD DATA LOCAL INFILE 批量导入（空表全量导入用，不可用时回退为 upsert）
 
         Returns:
             (inserted, duplicated, skipped) 元组
@@ -114,9 +135,12 @@ class SSQDatabase(BaseDatabase):
         # 按期号从小到大排序
         sorted_data = sorted(data, key=lambda x: x['lottery_no'])
         
+        # upsert / bulk 模式依赖期号唯一键判断是否已存在，不预先查询
+        upsert = bulk or self.insert_mode == 'upsert'
+
         # 如果启用跳过，先批量查询已存在的期号
         existing_nos = set()
-        if skip_existing and sorted_data:
+        if skip_existing and sorted_data and not upsert:
             lottery_nos = [item['lottery_no'] for item in sorted_data]
             cursor = self.connection.cursor()
             try:
@@ -169,12 +193,22 @@ class SSQDatabase(BaseDatabase):
                 logger.warning(f"数据格式错误: {e}, 数据: {item}")
                 continue
 
+        # upsert 模式：多行 INSERT ... ON DUPLICATE KEY，整批只提交一次（bulk 模式经临时表 LOAD DATA 后合并）
+        if upsert:
+            write_rows = self.bulk_load_rows if bulk else self.upsert_rows
+            inserted, duplicated, existed = write_rows(self.table_name, self.INSERT_COLUMNS, batch_data,
+                                                       skip_existing=skip_existing)
+            skipped += existed
+            logger.info(f"新增 {inserted} 条，重复 {duplicated} 条，跳过 {skipped} 条")
+            return inserted, duplicated, skipped
+
         # 批量插入
         if batch_data:
             cursor = self.connection.cursor()
             try:
-                sql = """
-                INSERT INTO ssq_lottery
+                since_id = self._max_id(cursor)
+                sql = f"""
+                INSERT INTO {self.table_name}
                 (lottery_no, draw_date, red1, red2, red3, red4, red5, red6, blue, sorted_code, created_at)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 ON DUPLICATE KEY UPDATE updated_at = NOW()
@@ -186,6 +220,7 @@ class SSQDatabase(BaseDatabase):
                     cursor.executemany(sql, batch)
                     inserted += cursor.rowcount
                 
+                self._update_stats(cursor, since_id)
                 self.connection.commit()
                 logger.info(f"新增 {inserted} 条，重复 {duplicated} 条，跳过 {skipped} 条")
                 
@@ -226,6 +261,16 @@ class SSQDatabase(BaseDatabase):
         finally:
             cursor.close()
 
+    @staticmethod
+    def _history_record(row) -> Dict:
+        """(期号, 开奖日期, 号码列...) -> 预测器/统计类使用的记录"""
+        return {
+            'lottery_no': str(row[0]),
+            'draw_date': str(row[1]),
+            'red_balls': tuple(map(int, row[2:8])),
+            'blue_ball': int(row[8])
+        }
+
     def get_latest_lottery(self) -> Optional[Dict]:
         """获取最新的中奖号码"""
         if not self.connection:
@@ -272,8 +317,29 @@ class SSQDatabase(BaseDatabase):
         finally:
             cursor.close()
 
+    def find_overlapping_draws(self, red_balls: List[int], min_red: int = 4, blue_ball: int = None) -> List[Dict]:
+        """
+        查询与给定号码至少有 min_red 个红球相同的历史开奖（v2 表结构，在 SQL 中用位图计算）
+
+        Args:
+            red_balls: 红球
+            min_red: 最少相同红球数
+            blue_ball: 指定时只返回蓝球相同的开奖
+
+        Returns:
+            [{'lottery_no', 'draw_date', 'red_common': 相同红球数, 'blue_common': 蓝球是否相同}]
+        """
+        conditions = {'red_mask': (ball_mask(red_balls), min_red)}
+        if blue_ball is not None:
+            conditions['blue_mask'] = (ball_mask([blue_ball]), 1)
+        return self.get_overlapping_draws(conditions)
+
+
 class SSQR2Storage:
-    """双色球 Cloudflare R2 存储类 (可选)"""
+    """双色球 Cloudflare R2 存储类 (可选)
+
+    整份上传一个 JSON 对象；四种彩票按年份分区、只上传有变化的分区见 core/publisher.py（publish 命令）
+    """
 
     def __init__(self, r2_config: Dict):
         """
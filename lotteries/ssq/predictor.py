@@ -4,16 +4,28 @@
 """
 
 from core.base_predictor import BasePredictor, BaseStatistics
-from core.utils import has_consecutive_numbers, format_number
+from core.history_matrix import HistoryMatrix, value_counts
+from core.strategy_context import StrategyContext, Version
+from core.utils import format_number
 import logging
-from typing import List, Tuple, Set, Dict
+from typing import List, Tuple, Set
 from collections import Counter
-import itertools
+import numpy as np
 from datetime import datetime
+from .combination_index import get_combination_index
 from .strategies import get_strategy, get_all_strategies
+from .strategies.base import TIERS
 
 logger = logging.getLogger(__name__)
 
+# 号码池：名称 -> (号码列切片, 最大号码)，号码列顺序同 SSQDatabase.HISTORY_COLUMNS
+POOLS = {'red': (slice(0, 6), 33), 'blue': (slice(6, 7), 16)}
+
+
+def record_balls(data: dict) -> List[int]:
+    """记录 -> 号码列（红球 6 个 + 蓝球）"""
+    return [*sorted(data['red_balls']), data['blue_ball']]
+
 
 class SSQPredictor(BasePredictor):
     """双色球预测类（支持策略模式）"""
@@ -21,13 +33,15 @@ class SSQPredictor(BasePredictor):
     RED_RANGE = range(1, 34)  # 红球范围 1-33
     BLUE_RANGE = range(1, 17)  # 蓝球范围 1-16
     RED_COUNT = 6  # 红球个数
+    POOLS = POOLS
+    record_balls = staticmethod(record_balls)
 
-    def __init__(self, lottery_data: List[dict], strategies: List[str] = None):
+    def __init__(self, lottery_data, strategies: List[str] = None):
         """
         初始化预测器
 
         Args:
-            lottery_data: 历史中奖数据列表
+            lottery_data: HistoryMatrix（或历史中奖数据列表、iter_lottery_data() 返回的分块迭代器）
             strategies: 使用的策略列表（默认 ['frequency']）
         """
         self.all_red_balls = set(self.RED_RANGE)
@@ -35,28 +49,40 @@ class SSQPredictor(BasePredictor):
         self.default_strategies = strategies or ['frequency']
         super().__init__(lottery_data)
 
-    def _analyze_history(self):
-        """分析历史数据"""
-        self.historical_red_combinations = set()
-        self.red_ball_frequency = Counter()
-        self.blue_ball_frequency = Counter()
-
-        for data in self.lottery_data:
-            red_balls = tuple(sorted(data['red_balls']))
-            blue_ball = data['blue_ball']
-
-            self.historical_red_combinations.add(red_balls)
-
-            for ball in data['red_balls']:
-                self.red_ball_frequency[ball] += 1
-
-            self.blue_ball_frequency[blue_ball] += 1
+    def _analyze_history(self, matrix: HistoryMatrix):
+        """分析历史数据（号码频率来自共用同一矩阵的统计类）"""
+        self.statistics = SSQStatistics(matrix)
+        self.red_ball_frequency = self.statistics.red_frequency
+        self.blue_ball_frequency = self.statistics.blue_frequency
+        self.historical_red_combinations = matrix.combinations('red')
+        self._historical_winners = None
 
         logger.info(f"历史中奖组合数: {len(self.historical_red_combinations)}")
 
+    def _build_strategy_context(self, version: Version) -> StrategyContext:
+        """策略上下文：号码频率、频率排名与分层、历史组合"""
+        return StrategyContext(
+            version,
+            {'red': self.red_ball_frequency, 'blue': self.blue_ball_frequency},
+            self.historical_red_combinations,
+            TIERS
+        )
+
+    @property
+    def combination_index(self):
+        """红球组合索引（进程内共用，首次使用时读取或生成）"""
+        return get_combination_index()
+
+    @property
+    def historical_winners(self) -> np.ndarray:
+        """组合索引的历史中奖位（按本预测器的号码矩阵生成一次）"""
+        if self._historical_winners is None:
+            self._historical_winners = self.combination_index.winners(self.matrix)
+        return self._historical_winners
+
     def _is_valid_combination(self, red_balls: List[int]) -> bool:
         """
-        验证组合是否有效
+        验证组合是否有效（查组合索引的历史中奖位和最长连号列）
 
         规则:
         1. 不能是历史中奖号码
@@ -68,15 +94,8 @@ class SSQPredictor(BasePredictor):
         Returns:
             True 表示有效
         """
-        # 检查是否是历史中奖号码
-        if tuple(sorted(red_balls)) in self.historical_red_combinations:
-            return False
-
-        # 检查是否有3个或以上连号
-        if has_consecutive_numbers(sorted(red_balls), max_consecutive=3):
-            return False
-
-        return True
+        row = self.combination_index.position(red_balls)
+        return not self.historical_winners[row] and self.combination_index.runs[row] < 3
 
     def predict_red_balls(self, count: int = 5) -> List[List[int]]:
         """
@@ -88,41 +107,42 @@ class SSQPredictor(BasePredictor):
         3. 排除超过3个连号的组合
         4. 综合考虑号码分布
 
+        候选组合和评分都是对组合索引的数组运算
+
         Args:
             count: 预测组合数
 
         Returns:
             预测的红球组合列表
         """
-        predictions = []
+        index = self.combination_index
+        valid = index.filter(winners=self.historical_winners, max_run=2)
 
         # 获取高频号码
         top_balls = self._get_top_frequency_balls(count=15)
         logger.info(f"高频号码: {top_balls}")
 
-        # 生成候选组合
-        candidate_combinations = []
-        for combo in itertools.combinations(top_balls, self.RED_COUNT):
-            if self._is_valid_combination(list(combo)):
-                candidate_combinations.append(sorted(list(combo)))
+        # 生成候选组合（高频号码组成的有效组合）
+        rows = np.flatnonzero(valid & index.filter(within=top_balls))
+        # 按号码的频率排名排列候选（得分相同时排名靠前的号码组成的组合优先）
+        rank = np.full(max(self.RED_RANGE) + 1, len(top_balls))
+        rank[top_balls] = np.arange(len(top_balls))
+        keys = np.sort(rank[index.balls[rows]], axis=1)
+        rows = rows[np.lexsort(keys.T[::-1])]
 
         # 如果高频号码的组合不足，扩展到全部号码
-        if len(candidate_combinations) < count:
+        if len(rows) < count:
             logger.info("高频号码组合不足，扩展到全部号码")
-            for combo in itertools.combinations(self.all_red_balls, self.RED_COUNT):
-                if self._is_valid_combination(list(combo)):
-                    candidate_combinations.append(sorted(list(combo)))
-                    if len(candidate_combinations) >= count * 2:
-                        break
+            # 补充全部号码中的有效组合（跳过已在候选中的），候选总数达到 count * 2 为止
+            extra = np.flatnonzero(valid)
+            extra = extra[~np.isin(extra, rows)][:count * 2 - len(rows)]
+            rows = np.concatenate([rows, extra])
 
         # 评分并选择最优组合
-        scored_combinations = [
-            (combo, self._score_combination(combo))
-            for combo in candidate_combinations
-        ]
-        scored_combinations.sort(key=lambda x: x[1], reverse=True)
+        scores = self._score_combinations(index.balls[rows], index.spans[rows])
+        best = rows[np.argsort(-scores, kind='stable')[:count]]
 
-        predictions = [combo for combo, score in scored_combinations[:count]]
+        predictions = index.balls[best].tolist()
 
         logger.info(f"生成了 {len(predictions)} 个预测组合")
         return predictions
@@ -131,35 +151,34 @@ class SSQPredictor(BasePredictor):
         """获取高频号码"""
         return [ball for ball, freq in self.red_ball_frequency.most_common(count)]
 
-    def _score_combination(self, combo: List[int]) -> float:
+    def _score_combinations(self, balls: np.ndarray, spans: np.ndarray) -> np.ndarray:
         """
-        对组合进行评分
+        对组合批量评分
 
         评分规则：
         1. 号码频率得分：高频号码得分高
         2. 分布得分：号码分布越均匀得分越高
         3. 间距得分：号码间距适当得分高
+
+        Args:
+            balls: 红球 [m, 6]（每行从小到大）
+            spans: 跨度 [m]
         """
-        score = 0
+        frequency = np.zeros(max(self.RED_RANGE) + 1, dtype=np.float64)
+        for ball, freq in self.red_ball_frequency.items():
+            frequency[ball] = freq
 
         # 频率得分 (40%)
-        frequency_score = sum(self.red_ball_frequency[ball] for ball in combo)
-        score += frequency_score * 0.4
-
-        # 分布得分 (30%) - 号码在1-33范围内的分布
-        segments = [0] * 6  # 分成6段，每段5-6个数
-        for ball in combo:
-            segment = min((ball - 1) // 6, 5)
-            segments[segment] += 1
-        distribution_score = 6 - len([s for s in segments if s == 0])
+        score = frequency[balls].sum(axis=1) * 0.4
+
+        # 分布得分 (30%) - 号码在1-33范围内分成6段（每段5-6个数），统计有号码的段数
+        segments = np.minimum((balls.astype(np.int64) - 1) // 6, 5)
+        distribution_score = 1 + (np.diff(segments, axis=1) != 0).sum(axis=1)
         score += distribution_score * 30
 
-        # 间距得分 (30%) - 相邻号码的间距
-        sorted_combo = sorted(combo)
-        gaps = [sorted_combo[i+1] - sorted_combo[i] for i in range(len(sorted_combo)-1)]
-        avg_gap = sum(gaps) / len(gaps)
-        gap_score = min(avg_gap / 6 * 100, 30)  # 理想间距约为6
-        score += gap_score
+        # 间距得分 (30%) - 相邻号码的平均间距（跨度 / 5），理想间距约为6
+        avg_gap = spans / (self.RED_COUNT - 1)
+        score += np.minimum(avg_gap / 6 * 100, 30)
 
         return score
 
@@ -195,13 +214,8 @@ class SSQPredictor(BasePredictor):
         
         logger.info(f"使用策略: {', '.join(strategy_names)}")
         
-        # 构建上下文数据
-        context = {
-            'history_data': self.lottery_data,
-            'red_frequency': dict(self.red_ball_frequency),
-            'blue_frequency': dict(self.blue_ball_frequency),
-            'historical_combinations': self.historical_red_combinations
-        }
+        # 策略上下文（同一历史版本只计算一次）
+        context = self.strategy_context()
         
         # 计算每个策略生成的组合数
         count_per_strategy = max(1, count // len(strategy_names))
@@ -236,62 +250,41 @@ class SSQPredictor(BasePredictor):
         self, 
         strategy_name: str, 
         count: int, 
-        context: Dict,
+        context: StrategyContext,
         existing_predictions: List[dict]
     ) -> List[dict]:
-        """使用指定策略生成预测（优化版：添加超时和减少尝试次数）
+        """使用指定策略生成预测（整批构造式抽样：只从有效、非历史、未生成过的组合中抽取，没有重试和超时）
         
         Args:
             strategy_name: 策略名称
             count: 生成数量
-            context: 上下文数据
+            context: 策略上下文
             existing_predictions: 已生成的预测（用于去重）
             
         Returns:
             预测结果列表
         """
-        import time
-        
         strategy = get_strategy(strategy_name)
-        predictions = []
-        max_attempts = min(count * 20, 200)  # 减少尝试次数（优化）
-        start_time = time.time()
-        max_time = 5.0  # 最大执行时间 5 秒（优化）
-        attempts = 0
         
         logger.info(f"使用 {strategy.name} 生成 {count} 个组合...")
         
-        while len(predictions) < count and attempts < max_attempts:
-            attempts += 1
-            
-            # 每 10 次检查一次时间（减少时间检查开销）
-            if attempts % 10 == 0 and time.time() - start_time > max_time:
-                logger.warning(f"{strategy.name} 预测超时，已生成 {len(predictions)} 个组合")
-                break
-            
-            # 使用策略生成红球和蓝球
-            red_balls = strategy.generate_red_balls(context)
-            blue_ball = strategy.generate_blue_ball(context)
-            
-            # 检查是否重复
-            sorted_code = tuple(sorted(red_balls))
-            
-            is_duplicate = (
-                sorted_code in context['historical_combinations'] or
-                any(tuple(sorted(p['red_balls'])) == sorted_code for p in existing_predictions) or
-                any(tuple(sorted(p['red_balls'])) == sorted_code for p in predictions)
-            )
-            
-            if not is_duplicate:
-                predictions.append({
-                    'red_balls': red_balls,
-                    'blue_ball': blue_ball,
-                    'strategy': strategy_name,
-                    'strategy_name': strategy.name,
-                    'prediction_time': datetime.now().isoformat()
-                })
+        # 整批生成（频率排名只计算一次），每行 6 个红球 + 蓝球
+        batch = strategy.generate_batch(
+            context, count,
+            existing=[pred['red_balls'] + [pred['blue_ball']] for pred in existing_predictions]
+        )
+        predictions = [
+            {
+                'red_balls': row[:6],
+                'blue_ball': row[6],
+                'strategy': strategy_name,
+                'strategy_name': strategy.name,
+                'prediction_time': datetime.now().isoformat()
+            }
+            for row in batch.tolist()
+        ]
         
-        logger.info(f"{strategy.name} 生成了 {len(predictions)} 个组合（尝试 {attempts} 次）")
+        logger.info(f"{strategy.name} 生成了 {len(predictions)} 个组合")
         return predictions
     
     @staticmethod
@@ -307,22 +300,31 @@ class SSQPredictor(BasePredictor):
 class SSQStatistics(BaseStatistics):
     """双色球统计类"""
 
-    def __init__(self, lottery_data: List[dict]):
+    POOLS = POOLS
+    record_balls = staticmethod(record_balls)
+
+    def __init__(self, lottery_data=None):
         super().__init__(lottery_data)
 
-    def get_frequency(self) -> dict:
-        """获取号码频率统计"""
-        red_freq = Counter()
-        blue_freq = Counter()
+    def _reset(self):
+        self.red_frequency = Counter()
+        self.blue_frequency = Counter()
+        # 最长连号个数 -> 期数
+        self.consecutive_counts = Counter()
+
+    def _add_matrix(self, matrix: HistoryMatrix):
+        self.red_frequency.update(matrix.frequency('red'))
+        self.blue_frequency.update(matrix.frequency('blue'))
+        self.consecutive_counts.update(value_counts(matrix.max_consecutive('red')))
 
-        for data in self.lottery_data:
-            for ball in data['red_balls']:
-                red_freq[ball] += 1
-            blue_freq[data['blue_ball']] += 1
+    def _counters(self) -> dict:
+        return {'red': self.red_frequency, 'blue': self.blue_frequency, 'consecutive': self.consecutive_counts}
 
+    def get_frequency(self) -> dict:
+        """获取号码频率统计"""
         return {
-            'red_balls': dict(sorted(red_freq.items())),
-            'blue_ball': dict(sorted(blue_freq.items()))
+            'red_balls': dict(sorted(self.red_frequency.items())),
+            'blue_ball': dict(sorted(self.blue_frequency.items()))
         }
     
     def get_ball_frequency(self) -> dict:
@@ -331,42 +333,13 @@ class SSQStatistics(BaseStatistics):
 
     def get_consecutive_analysis(self) -> dict:
         """分析连号情况"""
-        consecutive_stats = {
-            '1个连号': 0,
-            '2个连号': 0,
-            '3个连号': 0,
-            '无连号': 0
+        return {
+            '1个连号': self.consecutive_counts[1],
+            '2个连号': self.consecutive_counts[2],
+            '3个连号': sum(count for length, count in self.consecutive_counts.items() if length >= 3),
+            '无连号': self.consecutive_counts[0]
         }
 
-        for data in self.lottery_data:
-            consecutive_count = self._find_max_consecutive(data['red_balls'])
-            if consecutive_count == 0:
-                consecutive_stats['无连号'] += 1
-            elif consecutive_count == 1:
-                consecutive_stats['1个连号'] += 1
-            elif consecutive_count == 2:
-                consecutive_stats['2个连号'] += 1
-            else:
-                consecutive_stats['3个连号'] += 1
-
-        return consecutive_stats
-
-    @staticmethod
-    def _find_max_consecutive(balls: List[int]) -> int:
-        """找出最长连号个数"""
-        sorted_balls = sorted(balls)
-        max_consecutive = 0
-        current_consecutive = 0
-
-        for i in range(1, len(sorted_balls)):
-            if sorted_balls[i] - sorted_balls[i-1] == 1:
-                current_consecutive += 1
-            else:
-                max_consecutive = max(max_consecutive, current_consecutive)
-                current_consecutive = 0
-
-        return max(max_consecutive, current_consecutive)
-
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO)
@@ -9,32 +9,34 @@
 """
 
 import requests
-from bs4 import BeautifulSoup
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 import time
 import re
 from core.error_handler import handle_network_error, handle_parse_error
+from core.html_table import parse_result_table
+from core.base_spider import BaseSpider
 
 logger = logging.getLogger(__name__)
 
+_ISSUE5_RE = re.compile(r'^\d{5}$')
+_ISSUE7_RE = re.compile(r'^\d{7}$')
+_NUMBER_RE = re.compile(r'^\d+$')
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
 
-class SSQSpider:
+
+class SSQSpider(BaseSpider):
     """双色球爬虫类 - 只使用 500.com"""
 
     # 数据源：500彩票网（稳定可靠）
     BASE_URL = "https://datachart.500.com/ssq/history/newinc/history.php"
 
-    HEADERS = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-        'Referer': 'https://www.500.com/',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
-    }
+    REFERER = 'https://www.500.com/'
+
+    LOTTERY_TYPE = 'ssq'
 
     def __init__(self, timeout: int = 10, retry_times: int = 3):
-        self.timeout = timeout
-        self.retry_times = retry_times
-        self.session = requests.Session()
+        super().__init__(timeout=timeout, retry_times=retry_times)
 
     def fetch(self, start_issue: str = None, end_issue: str = None, count: int = None) -> List[Dict]:
         """
@@ -69,10 +71,7 @@ class SSQSpider:
         logger.info(f"从 500.com 获取期号范围数据: {start_issue} - {end_issue}")
         
         try:
-            response = self.session.get(url, headers=self.HEADERS, timeout=self.timeout)
-            response.raise_for_status()
-            
-            data = self._parse_html(response.text)
+            data = self._request_range(start_issue, end_issue)
             logger.info(f"成功获取 {len(data)} 条数据")
             return data
             
@@ -101,17 +100,21 @@ class SSQSpider:
         """按期号范围获取（兼容旧接口）"""
         return self.fetch(start_issue=start_issue, end_issue=end_issue)
 
+    def _request_range(self, start_issue: str, end_issue: str) -> List[Dict]:
+        """按期号范围请求并解析（异常直接抛出，由调用方决定通知、重试或拆分范围）"""
+        return self._parse_response(self._download_range(start_issue, end_issue))
+
+    def _download_range(self, start_issue: str, end_issue: str) -> requests.Response:
+        """按期号范围下载页面（不解析，供流水线的下载阶段使用）"""
+        url = f"{self.BASE_URL}?start={start_issue}&end={end_issue}"
+        return self._fetch_page(url, start_issue, end_issue)
+
     def _fetch_from_500com(self) -> List[Dict]:
         """从 500.com 获取数据（不带参数返回最近30期）"""
         try:
-            response = self.session.get(
-                self.BASE_URL,
-                headers=self.HEADERS,
-                timeout=self.timeout
-            )
-            response.raise_for_status()
+            response = self._fetch_page(self.BASE_URL)
             
-            return self._parse_html(response.text)
+            return self._parse_response(response)
             
         except requests.exceptions.RequestException as e:
             # 网络错误，发送通知
@@ -125,83 +128,54 @@ class SSQSpider:
             logger.error(f"从 500.com 获取数据失败: {e}")
             return []
 
-    def _parse_html(self, html: str) -> List[Dict]:
+    def _parse_table(self, html: str) -> List[Dict]:
         """解析 500.com 的 HTML 数据
         
         注意：500.com 返回的数据已按期号从新到旧排序
         """
-        results = []
+        return parse_result_table(html, 'tbody', 'tdata', self._parse_cells, min_cells=10)
+
+    @staticmethod
+    def _parse_cells(cells: List[str]) -> Optional[Dict]:
+        """解析一行单元格文本，数据不完整时返回 None"""
+        texts = [text.replace(',', '') for text in cells]
         
-        try:
-            soup = BeautifulSoup(html, 'html.parser')
-            tbody = soup.find('tbody', id='tdata')
-            
-            if not tbody:
-                logger.warning("未找到数据表格")
-                return results
-            
-            rows = tbody.find_all('tr')
-            logger.info(f"找到 {len(rows)} 行数据")
-            
-            for row in rows:
-                try:
-                    cells = row.find_all('td')
-                    if len(cells) < 10:
-                        continue
-                    
-                    # 提取文本内容
-                    texts = [cell.get_text(strip=True).replace(',', '') for cell in cells]
-                    
-                    # 期号（第0列）
-                    lottery_no = texts[0]
-                    # 补全期号：如果是5位数字，补全为7位
-                    if lottery_no and re.match(r'^\d{5}$', lottery_no):
-                        lottery_no = '20' + lottery_no
-                    
-                    # 红球（第1-6列）
-                    red_balls = []
-                    for i in range(1, 7):
-                        if texts[i] and re.match(r'^\d+$', texts[i]):
-                            red_balls.append(texts[i].zfill(2))
-                    
-                    # 蓝球（第7列）
-                    blue_ball = texts[7] if texts[7] and re.match(r'^\d+$', texts[7]) else None
-                    if blue_ball:
-                        blue_ball = blue_ball.zfill(2)
-                    
-                    # 开奖日期（最后一列）
-                    draw_date = texts[-1]
-                    
-                    # 验证数据完整性
-                    if (lottery_no and re.match(r'^\d{7}$', lottery_no) and
-                        len(red_balls) == 6 and blue_ball and
-                        draw_date and re.match(r'^\d{4}-\d{2}-\d{2}$', draw_date)):
-                        
-                        results.append({
-                            'lottery_no': lottery_no,
-                            'draw_date': draw_date,
-                            'red_balls': red_balls,
-                            'blue_ball': blue_ball,
-                            'red1': red_balls[0],
-                            'red2': red_balls[1],
-                            'red3': red_balls[2],
-                            'red4': red_balls[3],
-                            'red5': red_balls[4],
-                            'red6': red_balls[5],
-                            'blue': blue_ball
-                        })
-                        
-                except Exception as e:
-                    logger.debug(f"解析行数据失败: {e}")
-                    continue
-            
-            logger.info(f"成功解析 {len(results)} 条数据")
-            
-        except Exception as e:
-            logger.error(f"解析 HTML 失败: {e}")
+        # 期号（第0列）
+        lottery_no = texts[0]
+        # 补全期号：如果是5位数字，补全为7位
+        if lottery_no and _ISSUE5_RE.match(lottery_no):
+            lottery_no = '20' + lottery_no
         
-        return results
-
-    def close(self):
-        """关闭会话"""
-        self.session.close()
+        # 红球（第1-6列）
+        red_balls = []
+        for i in range(1, 7):
+            if texts[i] and _NUMBER_RE.match(texts[i]):
+                red_balls.append(texts[i].zfill(2))
+        
+        # 蓝球（第7列）
+        blue_ball = texts[7] if texts[7] and _NUMBER_RE.match(texts[7]) else None
+        if blue_ball:
+            blue_ball = blue_ball.zfill(2)
+        
+        # 开奖日期（最后一列）
+        draw_date = texts[-1]
+        
+        # 验证数据完整性
+        if not (lottery_no and _ISSUE7_RE.match(lottery_no) and
+                len(red_balls) == 6 and blue_ball and
+                draw_date and _DATE_RE.match(draw_date)):
+            return None
+        
+        return {
+            'lottery_no': lottery_no,
+            'draw_date': draw_date,
+            'red_balls': red_balls,
+            'blue_ball': blue_ball,
+            'red1': red_balls[0],
+            'red2': red_balls[1],
+            'red3': red_balls[2],
+            'red4': red_balls[3],
+            'red5': red_balls[4],
+            'red6': red_balls[5],
+            'blue': blue_ball
+        }
@@ -3,9 +3,9 @@
 追求号码分布均衡
 """
 
+from core.strategy_context import StrategyContext
 from .base import BaseStrategy
-from typing import List, Dict
-import random
+from typing import List, Sequence, Tuple
 
 
 class BalancedStrategy(BaseStrategy):
@@ -17,14 +17,14 @@ class BalancedStrategy(BaseStrategy):
             description='追求号码分布均衡，从不同区间选择号码'
         )
     
-    def generate_red_balls(self, context: Dict) -> List[int]:
-        """生成红球组合
+    def red_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """红球选号方案
         
         Args:
-            context: 上下文
+            context: 策略上下文
             
         Returns:
-            6个红球号码
+            每个区间 2 个号码
         """
         # 将红球分为3个区间
         # 区间1: 01-11
@@ -35,31 +35,22 @@ class BalancedStrategy(BaseStrategy):
         zone3 = [b for b in self.RED_RANGE if b >= 23]
         
         # 每个区间选择2个号码
-        balls = []
-        balls.extend(self.random_select(zone1, 2))
-        balls.extend(self.random_select(zone2, 2))
-        balls.extend(self.random_select(zone3, 2))
-        
-        # 验证组合有效性
-        if not self.is_valid_red_combination(balls):
-            return self.generate_red_balls(context)
-        
-        return sorted(balls)
+        return [(zone1, 2), (zone2, 2), (zone3, 2)]
     
-    def generate_blue_ball(self, context: Dict) -> int:
-        """生成蓝球
+    def blue_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """蓝球选号方案
         
         Args:
-            context: 包含 blue_frequency 的上下文
+            context: 策略上下文
             
         Returns:
-            蓝球号码
+            蓝球候选号码
         """
-        blue_frequency = context.get('blue_frequency', {})
+        blue_frequency = context.frequency['blue']
         
         # 50% 概率选择高频，50% 概率随机
-        if random.random() < 0.5 and blue_frequency:
-            top_blue = sorted(blue_frequency.keys(), key=lambda x: blue_frequency[x], reverse=True)[:8]
-            return random.choice(top_blue)
+        if self.rng.random() < 0.5 and blue_frequency:
+            top_blue = context.tier('blue', 'top')
+            return [(top_blue, 1)]
         else:
-            return random.choice(self.BLUE_RANGE)
+            return [(self.BLUE_RANGE, 1)]
@@ -3,15 +3,48 @@
 """
 
 import random
-from typing import List, Dict
+from typing import List, Dict, Sequence, Tuple
 from abc import ABC, abstractmethod
 
+from core.sampler import Plan, SamplingStrategyMixin, Ticket
+from core.strategy_context import StrategyContext
 
-class BaseStrategy(ABC):
-    """预测策略基类"""
+# 频率分层：号码池 -> {层名: 频率排名切片}（StrategyContext 按此预先切好）
+TIERS = {
+    'red': {'top': slice(0, 15), 'hot': slice(0, 10), 'warm': slice(10, 23), 'cold': slice(23, None)},
+    'blue': {'hot': slice(0, 5), 'warm': slice(5, 11), 'cold': slice(11, None), 'top': slice(0, 8)},
+}
+
+
+def ticket_key(ticket: Ticket) -> Tuple[int, ...]:
+    """组合的去重键（排序后的红球，与历史组合集合的元素相同）"""
+    return tuple(sorted(ticket['red']))
+
+
+def ticket_row(ticket: Ticket) -> List[int]:
+    """组合 -> 号码行（6 个红球（从小到大）+ 蓝球，列顺序同 HistoryMatrix 的号码列）"""
+    return sorted(ticket['red']) + ticket['blue']
+
+
+def row_ticket(row: Sequence[int]) -> Ticket:
+    """号码行 -> 组合"""
+    return {'red': list(row[:6]), 'blue': list(row[6:])}
+
+
+class BaseStrategy(SamplingStrategyMixin, ABC):
+    """预测策略基类
+
+    子类给出选号方案（red_stages / blue_stages：[(候选号码, 个数), ...]），
+    由构造式抽样器逐个号码抽取：不会生成 3 个及以上连号，也不会生成历史组合和重复组合
+    """
     
     RED_RANGE = list(range(1, 34))  # 红球范围 1-33
     BLUE_RANGE = list(range(1, 17))  # 蓝球范围 1-16
+    POOLS = {'blue': (BLUE_RANGE, 1), 'red': (RED_RANGE, 6)}  # 先蓝球后红球，红球参与去重
+    MAX_RUN = {'red': 2}
+    ticket_key = staticmethod(ticket_key)
+    ticket_row = staticmethod(ticket_row)
+    row_ticket = staticmethod(row_ticket)
     
     def __init__(self, name: str, description: str):
         """初始化策略
@@ -22,31 +55,58 @@ class BaseStrategy(ABC):
         """
         self.name = name
         self.description = description
+        self.rng = random  # 随机数生成器（generate_batch 可临时替换）
     
     @abstractmethod
-    def generate_red_balls(self, context: Dict) -> List[int]:
-        """生成红球组合（子类必须实现）
+    def red_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """红球选号方案（子类必须实现）
         
         Args:
-            context: 上下文数据（历史数据、频率统计等）
+            context: 策略上下文（频率排名、分层、历史组合）
             
         Returns:
-            6个红球号码（已排序）
+            [(候选号码, 个数), ...]，个数合计 6
         """
         pass
     
     @abstractmethod
-    def generate_blue_ball(self, context: Dict) -> int:
-        """生成蓝球（子类必须实现）
+    def blue_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """蓝球选号方案（子类必须实现）
         
         Args:
-            context: 上下文数据
+            context: 策略上下文
             
         Returns:
-            蓝球号码
+            [(候选号码, 1)]
         """
         pass
     
+    def ticket_plan(self, context: StrategyContext) -> Plan:
+        """一注的选号方案（先蓝球后红球，红球的最后一个号码参与去重）"""
+        return {'blue': self.blue_stages(context), 'red': self.red_stages(context)}
+    
+    def generate_red_balls(self, context: StrategyContext) -> List[int]:
+        """生成红球组合
+        
+        Args:
+            context: 策略上下文（频率排名、分层、历史组合）
+            
+        Returns:
+            6个红球号码（已排序）
+        """
+        return sorted(self.new_sampler().draw({'red': self.red_stages(context)})['red'])
+    
+    def generate_blue_ball(self, context: StrategyContext) -> int:
+        """生成蓝球
+        
+        Args:
+            context: 策略上下文
+            
+        Returns:
+            蓝球号码
+        """
+        return self.new_sampler().draw({'blue': self.blue_stages(context)})['blue'][0]
+    
     def is_valid_red_combination(self, balls: List[int]) -> bool:
         """验证红球组合是否有效
         
@@ -81,7 +141,7 @@ class BaseStrategy(ABC):
         Returns:
             选中的元素列表
         """
-        return random.sample(array, min(n, len(array)))
+        return self.rng.sample(array, min(n, len(array)))
     
     def score_combination(self, red_balls: List[int], red_frequency: Dict) -> float:
         """计算组合得分（用于排序）
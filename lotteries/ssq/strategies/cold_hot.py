@@ -3,9 +3,12 @@
 结合冷号和热号
 """
 
+import numpy as np
+
+from core.sampler import BatchPlan, row_candidates
+from core.strategy_context import StrategyContext
 from .base import BaseStrategy
-from typing import List, Dict
-import random
+from typing import List, Sequence, Tuple
 
 
 class ColdHotStrategy(BaseStrategy):
@@ -17,86 +20,66 @@ class ColdHotStrategy(BaseStrategy):
             description='结合热号、温号、冷号，追求冷热平衡'
         )
     
-    def generate_red_balls(self, context: Dict) -> List[int]:
-        """生成红球组合
+    def red_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """红球选号方案
         
         Args:
-            context: 包含 red_frequency 的上下文
+            context: 策略上下文
             
         Returns:
-            6个红球号码
+            3 个热号 + 2 个温号 + 1 个冷号
         """
-        red_frequency = context.get('red_frequency', {})
+        red_frequency = context.frequency['red']
         
         if not red_frequency:
             # 如果没有频率数据，使用随机策略
-            return sorted(self.random_select(self.RED_RANGE, 6))
-        
-        # 按频率排序
-        sorted_balls = sorted(red_frequency.keys(), key=lambda x: red_frequency[x], reverse=True)
-        
-        # 热号：前10个高频号码
-        hot_balls = sorted_balls[:10]
-        
-        # 温号：中间13个号码
-        warm_balls = sorted_balls[10:23] if len(sorted_balls) > 23 else sorted_balls[10:]
-        
-        # 冷号：后10个低频号码
-        cold_balls = sorted_balls[23:] if len(sorted_balls) > 23 else []
-        
-        balls = []
-        
-        # 选择 3 个热号
-        balls.extend(self.random_select(hot_balls, 3))
-        
-        # 选择 2 个温号
-        if warm_balls:
-            balls.extend(self.random_select(warm_balls, 2))
-        else:
-            balls.extend(self.random_select(hot_balls, 2))
-        
-        # 选择 1 个冷号
-        if cold_balls:
-            balls.extend(self.random_select(cold_balls, 1))
-        else:
-            remaining = [b for b in self.RED_RANGE if b not in balls]
-            balls.extend(self.random_select(remaining, 1))
-        
-        # 验证组合有效性
-        if not self.is_valid_red_combination(balls):
-            return self.generate_red_balls(context)
-        
-        return sorted(balls)
+            return [(self.RED_RANGE, 6)]
+        
+        # 热号：前10个高频号码；温号：中间13个号码；冷号：后10个低频号码
+        hot_balls = context.tier('red', 'hot')
+        warm_balls = context.tier('red', 'warm')
+        cold_balls = context.tier('red', 'cold')
+        
+        # 3 个热号；2 个温号（没有温号时用热号）；1 个冷号（没有冷号时从全部号码中选）
+        return [
+            (hot_balls, 3),
+            (warm_balls or hot_balls, 2),
+            (cold_balls or self.RED_RANGE, 1),
+        ]
     
-    def generate_blue_ball(self, context: Dict) -> int:
-        """生成蓝球
+    def blue_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """蓝球选号方案
         
         Args:
-            context: 包含 blue_frequency 的上下文
+            context: 策略上下文
             
         Returns:
-            蓝球号码
+            蓝球候选号码
         """
-        blue_frequency = context.get('blue_frequency', {})
+        blue_frequency = context.frequency['blue']
         
         if not blue_frequency:
-            return random.choice(self.BLUE_RANGE)
-        
-        # 按频率排序
-        sorted_blue = sorted(blue_frequency.keys(), key=lambda x: blue_frequency[x], reverse=True)
+            return [(self.BLUE_RANGE, 1)]
         
         # 60% 热号，30% 温号，10% 冷号
-        rand = random.random()
+        rand = self.rng.random()
         
         if rand < 0.6:
             # 热号（前5个）
-            hot_blue = sorted_blue[:5]
-            return random.choice(hot_blue)
+            return [(context.tier('blue', 'hot'), 1)]
         elif rand < 0.9:
             # 温号（中间6个）
-            warm_blue = sorted_blue[5:11] if len(sorted_blue) > 11 else sorted_blue[5:]
-            return random.choice(warm_blue) if warm_blue else random.choice(sorted_blue[:5])
+            return [(context.tier('blue', 'warm') or context.tier('blue', 'hot'), 1)]
         else:
             # 冷号（后5个）
-            cold_blue = sorted_blue[11:] if len(sorted_blue) > 11 else []
-            return random.choice(cold_blue) if cold_blue else random.choice(self.BLUE_RANGE)
+            return [(context.tier('blue', 'cold') or self.BLUE_RANGE, 1)]
+    
+    def batch_plan(self, context: StrategyContext, n: int, generator: np.random.Generator) -> BatchPlan:
+        """批量选号方案（蓝球的热 / 温 / 冷分支按行整批抽取）"""
+        blue = [(self.BLUE_RANGE, 1)]
+        if context.frequency['blue']:
+            hot = context.tier('blue', 'hot')
+            choice = np.searchsorted([0.6, 0.9], generator.random(n), side='right')
+            options = [hot, context.tier('blue', 'warm') or hot, context.tier('blue', 'cold') or self.BLUE_RANGE]
+            blue = [(row_candidates(choice, options), 1)]
+        return {'blue': blue, 'red': self.red_stages(context)}
@@ -3,8 +3,12 @@
 基于历史出现频率进行预测
 """
 
+import numpy as np
+
+from core.sampler import BatchPlan, row_candidates
+from core.strategy_context import StrategyContext
 from .base import BaseStrategy
-from typing import List, Dict
+from typing import List, Sequence, Tuple
 
 
 class FrequencyStrategy(BaseStrategy):
@@ -16,51 +20,42 @@ class FrequencyStrategy(BaseStrategy):
             description='基于历史出现频率，选择高频号码组合'
         )
     
-    def generate_red_balls(self, context: Dict) -> List[int]:
-        """生成红球组合
+    def red_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """红球选号方案
         
         Args:
-            context: 包含 red_frequency 的上下文
+            context: 策略上下文
             
         Returns:
-            6个红球号码
+            4 个高频号码 + 2 个随机号码
         """
-        red_frequency = context.get('red_frequency', {})
-        
         # 获取高频号码（前15个）
-        top_balls = sorted(red_frequency.keys(), key=lambda x: red_frequency[x], reverse=True)[:15]
-        
-        # 选择 4 个高频号码
-        high_freq_balls = self.random_select(top_balls, 4)
-        
-        # 选择 2 个随机号码（不重复）
-        remaining_balls = [b for b in self.RED_RANGE if b not in high_freq_balls]
-        random_balls = self.random_select(remaining_balls, 2)
+        top_balls = context.tier('red', 'top')
         
-        balls = high_freq_balls + random_balls
-        
-        # 验证组合有效性
-        if not self.is_valid_red_combination(balls):
-            return self.generate_red_balls(context)
-        
-        return sorted(balls)
+        return [(top_balls, 4), (self.RED_RANGE, 2)]
     
-    def generate_blue_ball(self, context: Dict) -> int:
-        """生成蓝球
+    def blue_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """蓝球选号方案
         
         Args:
-            context: 包含 blue_frequency 的上下文
+            context: 策略上下文
             
         Returns:
-            蓝球号码
+            蓝球候选号码
         """
-        import random
-        
-        blue_frequency = context.get('blue_frequency', {})
+        blue_frequency = context.frequency['blue']
         
         # 80% 概率选择高频蓝球，20% 概率随机
-        if random.random() < 0.8 and blue_frequency:
-            top_blue = sorted(blue_frequency.keys(), key=lambda x: blue_frequency[x], reverse=True)[:5]
-            return random.choice(top_blue)
+        if self.rng.random() < 0.8 and blue_frequency:
+            top_blue = context.tier('blue', 'hot')
+            return [(top_blue, 1)]
         else:
-            return random.choice(self.BLUE_RANGE)
+            return [(self.BLUE_RANGE, 1)]
+    
+    def batch_plan(self, context: StrategyContext, n: int, generator: np.random.Generator) -> BatchPlan:
+        """批量选号方案（蓝球的 80% / 20% 分支按行整批抽取）"""
+        blue = [(self.BLUE_RANGE, 1)]
+        if context.frequency['blue']:
+            choice = (generator.random(n) >= 0.8).astype(np.intp)
+            blue = [(row_candidates(choice, [context.tier('blue', 'hot'), self.BLUE_RANGE]), 1)]
+        return {'blue': blue, 'red': self.red_stages(context)}
@@ -3,9 +3,9 @@
 完全随机选择号码
 """
 
+from core.strategy_context import StrategyContext
 from .base import BaseStrategy
-from typing import List, Dict
-import random
+from typing import List, Sequence, Tuple
 
 
 class RandomStrategy(BaseStrategy):
@@ -17,30 +17,24 @@ class RandomStrategy(BaseStrategy):
             description='完全随机选择号码，不考虑历史数据'
         )
     
-    def generate_red_balls(self, context: Dict) -> List[int]:
-        """生成红球组合
+    def red_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """红球选号方案
         
         Args:
             context: 上下文（本策略不使用）
             
         Returns:
-            6个红球号码
+            全部号码中随机 6 个
         """
-        balls = self.random_select(self.RED_RANGE, 6)
-        
-        # 验证组合有效性
-        if not self.is_valid_red_combination(balls):
-            return self.generate_red_balls(context)
-        
-        return sorted(balls)
+        return [(self.RED_RANGE, 6)]
     
-    def generate_blue_ball(self, context: Dict) -> int:
-        """生成蓝球
+    def blue_stages(self, context: StrategyContext) -> List[Tuple[Sequence[int], int]]:
+        """蓝球选号方案
         
         Args:
             context: 上下文（本策略不使用）
             
         Returns:
-            蓝球号码
+            全部蓝球
         """
-        return random.choice(self.BLUE_RANGE)
+        return [(self.BLUE_RANGE, 1)]
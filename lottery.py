@@ -15,7 +15,7 @@ from core.error_handler import setup_global_exception_handler
 setup_global_exception_handler()
 
 from core.config import SUPPORTED_LOTTERIES, LOTTERY_NAMES
-from cli import fetch, predict, schedule
+from cli import bench, export, fetch, migrate, predict, publish, schedule, stats
 
 
 def main():
@@ -36,10 +36,27 @@ def main():
   python lottery.py fetch dlt --mode latest   # 仅爬取大乐透最新数据
   python lottery.py fetch qxc --mode full     # 仅爬取七星彩全量数据
   python lottery.py fetch qlc --mode full     # 仅爬取七乐彩全量数据
+  python lottery.py fetch ssq --mode full --workers 8  # 8 线程并发爬取双色球全量数据
+  python lottery.py fetch ssq --mode repair           # 只补齐双色球缺失的期号
+  python lottery.py fetch ssq --mode reparse          # 从页面归档离线重建双色球数据
   python lottery.py predict ssq               # 仅预测双色球
   python lottery.py predict dlt               # 仅预测大乐透
   python lottery.py predict qxc               # 仅预测七星彩
   python lottery.py predict qlc               # 仅预测七乐彩
+  python lottery.py migrate                   # 把旧结构数据表在线迁移到 v2（号码位图列）
+  python lottery.py rebuild-stats             # 按全部历史数据重建统计表（号码频率、遗漏、连号 / 奇偶形态）
+  python lottery.py export                    # 导出为按年份分区的 Parquet（data/export/<彩票类型>/year=YYYY/）
+  python lottery.py import ssq --dir backup/  # 从 Parquet 导入双色球历史数据（不爬取初始化新数据库）
+  python lottery.py publish                   # 按年份分区发布到 R2（只重写最新年份，内容未变的分区跳过）
+  python lottery.py publish ssq --full        # 检查双色球所有年份的分区
+
+  # 基准测试（本地回放服务器，需配置 BENCH_MYSQL_DATABASE）
+  python lottery.py bench                             # 所有类型的全量 + 增量 + 入库路径基准测试
+  python lottery.py bench ssq --mode load             # 对比 batch / upsert / LOAD DATA 三种入库路径
+  python lottery.py bench ssq --mode full --latency-ms 50
+  python lottery.py bench --save-baseline data/bench/baseline.json
+  python lottery.py bench --baseline data/bench/baseline.json --tolerance 0.2
+  python lottery.py bench --serve --port 8500         # 只启动回放服务器
 
 支持的彩票类型:
   ssq  - 双色球
@@ -61,9 +78,20 @@ def main():
     )
     fetch_parser.add_argument(
         '--mode',
-        choices=['full', 'latest'],
+        choices=['full', 'latest', 'repair', 'reparse'],
         default='latest',
-        help='爬取模式: full=全量, latest=增量（默认）'
+        help='爬取模式: full=全量, latest=增量（默认）, repair=补齐缺失期号, reparse=从页面归档离线重建'
+    )
+    fetch_parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='全量/补缺模式下载线程数（默认读取 SPIDER_MAX_WORKERS）；reparse 模式解析进程数'
+    )
+    fetch_parser.add_argument(
+        '--force',
+        action='store_true',
+        help='reparse 模式下归档解析结果少于现有数据时仍然重建'
     )
     
     # predict 命令
@@ -75,6 +103,88 @@ def main():
         help='彩票类型（可选，不指定则处理所有类型）'
     )
     
+    # migrate 命令
+    migrate_parser = subparsers.add_parser('migrate', help='数据表结构在线迁移（号码位图列）')
+    migrate_parser.add_argument(
+        'lottery',
+        nargs='?',
+        choices=SUPPORTED_LOTTERIES,
+        help='彩票类型（可选，不指定则迁移所有类型）'
+    )
+    migrate_parser.add_argument('--chunk-rows', type=int, default=2000, help='每个事务复制的行数（默认 2000）')
+
+    # rebuild-stats 命令
+    stats_parser = subparsers.add_parser('rebuild-stats', help='重建统计表（入库时自动增量更新，一般不需要手动执行）')
+    stats_parser.add_argument(
+        'lottery',
+        nargs='?',
+        choices=SUPPORTED_LOTTERIES,
+        help='彩票类型（可选，不指定则重建所有类型）'
+    )
+
+    # export 命令
+    export_parser = subparsers.add_parser('export', help='导出历史数据为 Parquet（按年份分区）')
+    export_parser.add_argument(
+        'lottery',
+        nargs='?',
+        choices=SUPPORTED_LOTTERIES,
+        help='彩票类型（可选，不指定则导出所有类型）'
+    )
+    export_parser.add_argument('--dir', type=Path, default=None, help='导出根目录（默认 PARQUET_EXPORT_DIR）')
+
+    # import 命令
+    import_parser = subparsers.add_parser('import', help='从 Parquet 导入历史数据（写入当前 DB_BACKEND）')
+    import_parser.add_argument(
+        'lottery',
+        nargs='?',
+        choices=SUPPORTED_LOTTERIES,
+        help='彩票类型（可选，不指定则导入所有类型）'
+    )
+    import_parser.add_argument('--dir', type=Path, default=None, help='导出根目录（默认 PARQUET_EXPORT_DIR）')
+
+    # publish 命令
+    publish_parser = subparsers.add_parser('publish', help='按年份分区发布历史数据到 R2 / S3 兼容存储')
+    publish_parser.add_argument(
+        'lottery',
+        nargs='?',
+        choices=SUPPORTED_LOTTERIES,
+        help='彩票类型（可选，不指定则发布所有类型）'
+    )
+    publish_parser.add_argument('--full', action='store_true', help='检查所有年份的分区（默认只重写最新年份）')
+
+    # bench 命令
+    bench_parser = subparsers.add_parser('bench', help='爬取链路基准测试（本地回放服务器）')
+    bench_parser.add_argument(
+        'lottery',
+        nargs='?',
+        choices=SUPPORTED_LOTTERIES,
+        help='彩票类型（可选，不指定则测试所有类型）'
+    )
+    bench_parser.add_argument(
+        '--mode',
+        choices=['full', 'incremental', 'load', 'all'],
+        default='all',
+        help='测试模式: full=全量, incremental=增量, load=入库路径对比（batch/upsert/bulk）, all=全部（默认）'
+    )
+    bench_parser.add_argument('--workers', type=int, default=None, help='全量模式下载线程数')
+    bench_parser.add_argument('--latency-ms', type=float, default=20.0, help='回放服务器固定延迟（毫秒，默认 20）')
+    bench_parser.add_argument('--jitter-ms', type=float, default=10.0, help='回放服务器随机延迟上限（毫秒，默认 10）')
+    bench_parser.add_argument('--error-rate', type=float, default=0.0, help='返回 500 的概率（默认 0）')
+    bench_parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='返回 429 的概率（默认 0）')
+    bench_parser.add_argument('--max-rows', type=int, default=0, help='单次响应最大行数，模拟截断（默认不截断）')
+    bench_parser.add_argument(
+        '--source',
+        choices=['fixtures', 'archive'],
+        default='fixtures',
+        help='回放数据: fixtures=由样例页面生成（默认）, archive=页面归档（仅全量模式，需与录制时相同的 --workers）'
+    )
+    bench_parser.add_argument('--keep-rate-limit', action='store_true', help='保留 SPIDER_RATE_PER_HOST 限速')
+    bench_parser.add_argument('--baseline', help='基线文件，性能回退超过容差时以非零状态退出')
+    bench_parser.add_argument('--save-baseline', help='将本次结果保存为基线文件')
+    bench_parser.add_argument('--tolerance', type=float, default=0.2, help='允许的性能回退比例（默认 0.2）')
+    bench_parser.add_argument('--serve', action='store_true', help='只启动回放服务器（前台运行）')
+    bench_parser.add_argument('--port', type=int, default=8500, help='--serve 时的监听端口（默认 8500）')
+
     # schedule 命令（不需要指定彩票类型，自动处理所有类型）
     schedule_parser = subparsers.add_parser('schedule', help='定时任务（自动处理所有彩票类型）')
     
@@ -90,7 +200,11 @@ def main():
         lotteries = [args.lottery] if args.lottery else ['ssq', 'dlt', 'qxc', 'qlc']
         for lottery in lotteries:
             if args.mode == 'full':
-                fetch.fetch_full_history(lottery)
+                fetch.fetch_full_history(lottery, workers=args.workers)
+            elif args.mode == 'repair':
+                fetch.repair_gaps(lottery, workers=args.workers)
+            elif args.mode == 'reparse':
+                fetch.reparse_archive(lottery, workers=args.workers, force=args.force)
             else:
                 fetch.fetch_latest(lottery)
     
@@ -100,6 +214,54 @@ def main():
         for lottery in lotteries:
             predict.predict(lottery)
     
+    elif args.command == 'migrate':
+        results = migrate.migrate([args.lottery] if args.lottery else None, chunk_rows=args.chunk_rows)
+        if any(result.get('error') for result in results.values()):
+            sys.exit(1)
+
+    elif args.command == 'rebuild-stats':
+        results = stats.rebuild_stats([args.lottery] if args.lottery else None)
+        if any(result.get('error') for result in results.values()):
+            sys.exit(1)
+
+    elif args.command == 'export':
+        results = export.export_history([args.lottery] if args.lottery else None, args.dir)
+        if any(result.get('error') for result in results.values()):
+            sys.exit(1)
+
+    elif args.command == 'import':
+        results = export.import_history([args.lottery] if args.lottery else None, args.dir)
+        if any(result.get('error') for result in results.values()):
+            sys.exit(1)
+
+    elif args.command == 'publish':
+        results = publish.publish([args.lottery] if args.lottery else None, full=args.full)
+        if any(result.get('error') for result in results.values()):
+            sys.exit(1)
+
+    elif args.command == 'bench':
+        server_options = {
+            'latency_ms': args.latency_ms,
+            'jitter_ms': args.jitter_ms,
+            'error_rate': args.error_rate,
+            'rate_limit_rate': args.rate_limit_rate,
+            'max_rows': args.max_rows,
+            'source': args.source,
+        }
+        if args.serve:
+            bench.serve(port=args.port, **server_options)
+            return
+        sys.exit(bench.run_benchmark(
+            lotteries=[args.lottery] if args.lottery else None,
+            modes=None if args.mode == 'all' else [args.mode],
+            workers=args.workers,
+            keep_rate_limit=args.keep_rate_limit,
+            baseline=args.baseline,
+            save_baseline=args.save_baseline,
+            tolerance=args.tolerance,
+            **server_options
+        ))
+
     elif args.command == 'schedule':
         schedule.start_schedule()
 
@@ -0,0 +1,108 @@
+"""
+HTML 解析性能基准
+对比流式提取（core.html_table）与 BeautifulSoup 解析 500.com 开奖结果页面的耗时，
+并校验两种方式的解析结果完全一致
+
+用法：
+    python scripts/bench_parse.py                 # 全部彩票类型
+    python scripts/bench_parse.py ssq dlt         # 指定彩票类型
+    python scripts/bench_parse.py --scale 20      # 将样例页面的数据行复制 20 倍（模拟多年范围页面）
+"""
+
+import argparse
+import logging
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.html_table import parse_result_table  # noqa: E402
+from lotteries.dlt.spider import DLTSpider  # noqa: E402
+from lotteries.qlc.spider import QLCSpider  # noqa: E402
+from lotteries.qxc.spider import QXCSpider  # noqa: E402
+from lotteries.ssq.spider import SSQSpider  # noqa: E402
+
+FIXTURE_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+# 彩票类型 -> (行解析函数, 表格标签, 表格 id, 最少单元格数, 跳过行数)
+TABLES = {
+    'ssq': (SSQSpider._parse_cells, 'tbody', 'tdata', 10, 0),
+    'dlt': (DLTSpider._parse_cells, 'tbody', 'tdata', 10, 0),
+    'qxc': (QXCSpider._parse_cells, 'table', 'tablelist', 5, 1),
+    'qlc': (QLCSpider._parse_cells, 'table', 'tablelist', 6, 1),
+}
+
+_DATA_ROW_RE = re.compile(r'<tr(?![^>]*class="th")\b[^>]*>.*?</tr>', re.S)
+
+
+def load_fixture(lottery_type: str, scale: int) -> str:
+    """读取样例页面，scale > 1 时将数据行复制若干倍"""
+    html = (FIXTURE_DIR / f'{lottery_type}_history.html').read_text(encoding='utf-8')
+    if scale <= 1:
+        return html
+
+    rows = _DATA_ROW_RE.findall(html)
+    if not rows:
+        return html
+    last = rows[-1]
+    position = html.rindex(last) + len(last)
+    return html[:position] + '\n'.join(rows * (scale - 1)) + html[position:]
+
+
+def run(lottery_type: str, html: str, engine: str, repeat: int):
+    """重复解析 repeat 次，返回 (最短耗时秒数, 解析结果)"""
+    parse_cells, tag, table_id, min_cells, skip_rows = TABLES[lottery_type]
+    best = None
+    results = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = parse_result_table(html, tag, table_id, parse_cells, min_cells,
+                                     skip_rows=skip_rows, engine=engine)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTML 解析性能基准')
+    parser.add_argument('lotteries', nargs='*', metavar='lottery',
+                        help=f"彩票类型（{', '.join(TABLES)}，默认全部）")
+    parser.add_argument('--scale', type=int, default=1, help='数据行复制倍数（默认 1）')
+    parser.add_argument('--repeat', type=int, default=5, help='每种方式重复次数，取最短耗时（默认 5）')
+    args = parser.parse_args()
+
+    unknown = [name for name in args.lotteries if name not in TABLES]
+    if unknown:
+        parser.error(f"不支持的彩票类型: {', '.join(unknown)}")
+
+    # 基准测试只关心耗时，屏蔽解析过程的 INFO 日志
+    logging.basicConfig(level=logging.WARNING)
+
+    print(f"{'类型':<6}{'行数':>8}{'BS4(ms)':>12}{'流式(ms)':>12}{'行/ms(流式)':>14}{'加速比':>10}  结果一致")
+    print('-' * 72)
+
+    all_match = True
+    for lottery_type in args.lotteries or list(TABLES):
+        html = load_fixture(lottery_type, args.scale)
+        bs4_seconds, bs4_rows = run(lottery_type, html, 'bs4', args.repeat)
+        stream_seconds, stream_rows = run(lottery_type, html, 'stream', args.repeat)
+
+        match = bs4_rows == stream_rows
+        all_match = all_match and match
+        speedup = bs4_seconds / stream_seconds if stream_seconds else float('inf')
+        rate = len(stream_rows) / (stream_seconds * 1000) if stream_seconds else float('inf')
+
+        print(f"{lottery_type:<6}{len(stream_rows):>8}{bs4_seconds * 1000:>12.2f}"
+              f"{stream_seconds * 1000:>12.2f}{rate:>14.1f}{speedup:>9.1f}x  {'✓' if match else '✗'}")
+
+    if not all_match:
+        print("\n❌ 流式提取与 BeautifulSoup 的解析结果不一致")
+        sys.exit(1)
+
+    print("\n✅ 解析结果一致")
+
+
+if __name__ == '__main__':
+    main()
@@ -154,6 +154,297 @@ for lottery in ssq dlt qxc qlc; do
     fi
 done
 
+# 3.6. 范围截断回放验证（回放服务器单次响应限 300 行，规划器未配置上限）
+echo "🔁 验证范围截断检测（本地回放）..."
+python -c "
+from core.config import SPIDER_CONFIG
+from core.range_planner import RangePlanner
+from core.replay_server import ReplayDataset, ReplayServer
+from cli.smart_fetch import get_lottery_modules, import_class
+
+dataset = ReplayDataset(max_rows=300)
+server = ReplayServer(dataset)
+SPIDER_CONFIG['base_url'] = server.start()
+try:
+    for lottery_type in ['ssq', 'dlt', 'qxc', 'qlc']:
+        modules = get_lottery_modules(lottery_type)
+        spider = import_class(modules['spider_class'])()
+        last_issue = modules['last_issue']
+        start_issue = f'{last_issue[:2]}{int(last_issue[2:]) + 1:03d}'
+        end_issue = f'{dataset.last_year:02d}200'
+        planner = RangePlanner(max_rows=0)
+        rows = planner.fetch(spider._request_range, start_issue, end_issue)
+        expected = dataset.issue_count(lottery_type, start_issue, end_issue)
+        assert len(rows) == expected, f'{lottery_type}: 获取 {len(rows)} 条，预期 {expected} 条'
+        assert planner.max_rows == 300, f'{lottery_type}: 学习到的上限为 {planner.max_rows}'
+        print(f'✓ {lottery_type}: {len(rows)} 条，请求 {planner.requests} 次，拆分 {planner.splits} 次')
+
+    # 起始期号不存在（跨年缺口）但未被截断：只补请求更早的部分，不学习上限
+    spider = import_class(get_lottery_modules('ssq')['spider_class'])()
+    planner = RangePlanner(max_rows=0)
+    rows = planner.fetch(spider._request_range, '05170', '06200')
+    expected = dataset.issue_count('ssq', '05170', '06200')
+    assert len(rows) == expected, f'ssq 05170-06200: 获取 {len(rows)} 条，预期 {expected} 条'
+    assert planner.max_rows == 0 and planner.requests == 2, f'ssq 05170-06200: 上限 {planner.max_rows}，请求 {planner.requests} 次'
+    print(f'✓ ssq 05170-06200: {len(rows)} 条，请求 {planner.requests} 次，未误判截断')
+finally:
+    server.stop()
+" && ((PASSED+=5)) || ((FAILED++))
+
+# 3.7. 对象存储发布验证（本地 moto S3：首次发布、重复发布、跨年增量、压缩格式切换）
+echo "☁️  验证对象存储发布（本地 moto S3）..."
+if python -c "import boto3, moto.server" 2>/dev/null; then
+    python -c "
+import gzip, json, logging, tempfile
+from pathlib import Path
+import boto3
+from moto.server import ThreadedMotoServer
+from core import publisher as publisher_module
+from core.publisher import HistoryPublisher
+from core.storage import open_database
+from lotteries.ssq.database import SSQDatabase
+
+logging.disable(logging.WARNING)
+
+def draws(year, count):
+    return [{'lottery_no': f'{year}{n:03d}', 'draw_date': f'{year}-01-{n:02d}',
+             'red_balls': [n, n + 1, n + 2, n + 3, n + 4, n + 5], 'blue_ball': n} for n in range(1, count + 1)]
+
+server = ThreadedMotoServer(ip_address='127.0.0.1', port=0)
+server.start()
+host, port = server.get_host_and_port()
+db = open_database(SSQDatabase, {'backend': 'sqlite', 'sqlite_path': str(Path(tempfile.mkdtemp()) / 'lottery.db')})
+try:
+    client = boto3.client('s3', endpoint_url=f'http://{host}:{port}', region_name='us-east-1',
+                          aws_access_key_id='test', aws_secret_access_key='test')
+    client.create_bucket(Bucket='lottery')
+    db.connect()
+    db.create_table()
+    db.insert_lottery_data(draws(2023, 5) + draws(2024, 5))
+    gzip_publisher = HistoryPublisher(client, bucket='lottery', prefix='', codec='gzip')
+
+    result = gzip_publisher.publish(db, 'ssq')
+    assert result['uploaded'] == ['2023', '2024'], f'首次发布: {result}'
+    body = client.get_object(Bucket='lottery', Key='ssq/year=2024.json.gz')['Body'].read()
+    records = json.loads(gzip.decompress(body))
+    assert [r['lottery_no'] for r in records] == [f'2024{n:03d}' for n in range(1, 6)], '分区内容不一致'
+    print('✓ 首次发布: 上传 2023、2024 两个分区')
+
+    result = gzip_publisher.publish(db, 'ssq', full=True)
+    assert not result['uploaded'] and result['unchanged'] == ['2023', '2024'], f'重复发布: {result}'
+    print('✓ 重复发布: 所有分区未变化，没有上传')
+
+    db.insert_lottery_data(draws(2025, 3))
+    result = gzip_publisher.publish(db, 'ssq')
+    assert result['uploaded'] == ['2025'] and result['unchanged'] == ['2024'], f'跨年增量发布: {result}'
+    manifest = gzip_publisher.load_manifest('ssq')
+    assert sorted(manifest['partitions']) == ['2023', '2024', '2025'] and manifest['latest_issue'] == '2025003', f'manifest: {manifest}'
+    print('✓ 跨年增量发布: 只上传新年份 2025，manifest 包含三个分区')
+
+    if publisher_module.zstandard is None:
+        print('⚠️ 未安装 zstandard，跳过压缩格式切换验证')
+    else:
+        result = HistoryPublisher(client, bucket='lottery', prefix='', codec='zstd').publish(db, 'ssq')
+        assert result['uploaded'] == ['2023', '2024', '2025'], f'压缩格式切换: {result}'
+        manifest = gzip_publisher.load_manifest('ssq')
+        assert manifest['codec'] == 'zstd' and all(p['key'].endswith('.json.zst') for p in manifest['partitions'].values())
+        print('✓ 压缩格式切换: gzip -> zstd 重新发布所有分区')
+finally:
+    db.close()
+    server.stop()
+" && ((PASSED++)) || ((FAILED++))
+else
+    echo "⚠️  未安装 moto，跳过对象存储发布验证（pip install 'moto[server]'）"
+    ((WARNINGS++))
+fi
+
+# 3.8. SQLite 迁移与整体替换往返验证（记录数、统计表、位图查询）
+echo "🗄️  验证 SQLite migrate / replace_lottery_data 往返..."
+python -c "
+import logging, tempfile
+from pathlib import Path
+from core.storage import open_database
+from lotteries.ssq.database import SSQDatabase
+from lotteries.dlt.database import DLTDatabase
+from lotteries.qlc.database import QLCDatabase
+from lotteries.qxc.database import QXCDatabase
+
+logging.disable(logging.WARNING)
+
+def ssq(n):
+    return {'red_balls': [n % 28 + k for k in range(1, 7)], 'blue_ball': n % 16 + 1}
+
+def dlt(n):
+    return {'front_balls': [n % 31 + k for k in range(1, 6)], 'back_balls': [n % 11 + 1, n % 11 + 2]}
+
+def qlc(n):
+    return {'basic_balls': [n % 23 + k for k in range(1, 8)], 'special_ball': n % 23 + 8}
+
+def qxc(n):
+    return {'numbers': [(n + k) % 10 for k in range(6)] + [n % 15]}
+
+def overlapping(db, item):
+    if 'red_balls' in item:
+        return db.find_overlapping_draws(item['red_balls'], 6, item['blue_ball'])
+    if 'front_balls' in item:
+        return db.find_overlapping_draws(item['front_balls'], 5, item['back_balls'], 2)
+    if 'basic_balls' in item:
+        return db.find_overlapping_draws(item['basic_balls'], 7, item['special_ball'])
+    return db.find_overlapping_draws(item['numbers'], 6)
+
+tmp = Path(tempfile.mkdtemp())
+for name, db_class, balls in [('ssq', SSQDatabase, ssq), ('dlt', DLTDatabase, dlt),
+                              ('qlc', QLCDatabase, qlc), ('qxc', QXCDatabase, qxc)]:
+    draws = lambda first, count: [{'lottery_no': f'2024{n:03d}', 'draw_date': f'2024-01-{n % 28 + 1:02d}', **balls(n)}
+                                  for n in range(first, first + count)]
+    db = open_database(db_class, {'backend': 'sqlite', 'sqlite_path': str(tmp / f'{name}.db')})
+    try:
+        db.connect()
+        db.create_table()
+        db.insert_lottery_data(draws(1, 30))
+        result = db.migrate_schema()
+        assert not result['migrated'] and db.get_total_count(db.table_name) == 30, f'{name} migrate: {result}'
+
+        replacement = draws(11, 40)
+        inserted, duplicated, skipped = db.replace_lottery_data(replacement, bulk=True)
+        total = db.get_total_count(db.table_name)
+        assert inserted == 40 and total == 40, f'{name} replace: 写入 {inserted}，表中 {total} 条'
+        issues = [lottery_no for lottery_no, _ in db.get_draw_dates(db.table_name)]
+        assert issues == [item['lottery_no'] for item in replacement], f'{name}: replace 后期号不一致'
+        assert db._read_stats().draw_count == 40, f'{name}: 统计表与数据表不一致'
+        for item in replacement[::7]:
+            lottery_no = item['lottery_no']
+            found = [row['lottery_no'] for row in overlapping(db, item)]
+            assert lottery_no in found, f'{name} {lottery_no}: 位图查询未命中自身 {found}'
+        print(f'✓ {name}: migrate 保留 30 条，replace 后 40 条，统计表与位图查询一致')
+    finally:
+        db.close()
+" && ((PASSED++)) || ((FAILED++))
+
+# 3.9. 批量生成约束验证（无重复、无历史组合、连号不超过 MAX_RUN、DISJOINT 号码池互不重复）
+echo "🎯 验证 generate_batch 约束..."
+python -c "
+import logging, random
+from lotteries.ssq.predictor import SSQPredictor
+from lotteries.dlt.predictor import DLTPredictor
+from lotteries.qlc.predictor import QLCPredictor
+from lotteries.qxc.predictor import QXCPredictor
+from lotteries.ssq import strategies as ssq_strategies
+from lotteries.dlt import strategies as dlt_strategies
+from lotteries.qlc import strategies as qlc_strategies
+from lotteries.qxc import strategies as qxc_strategies
+
+logging.disable(logging.WARNING)
+r = random.Random(7)
+
+def ssq(row):
+    return {'red_balls': sorted(row[:6]), 'blue_ball': row[6]}
+
+def dlt(row):
+    return {'front_balls': sorted(row[:5]), 'back_balls': sorted(row[5:])}
+
+def qlc(row):
+    return {'basic_balls': sorted(row[:7]), 'special_ball': row[7]}
+
+def qxc(row):
+    return {'numbers': list(row)}
+
+def random_row(name):
+    if name == 'ssq':
+        return r.sample(range(1, 34), 6) + [r.randint(1, 16)]
+    if name == 'dlt':
+        return r.sample(range(1, 36), 5) + r.sample(range(1, 13), 2)
+    if name == 'qlc':
+        return r.sample(range(1, 31), 8)
+    return [r.randint(0, 9) for _ in range(6)] + [r.randint(0, 14)]
+
+def history(name, record, rows):
+    return [{'lottery_no': f'{2000 + i // 150}{i % 150 + 1:03d}', 'draw_date': '2020-01-01', **record(row)}
+            for i, row in enumerate(rows)]
+
+def longest_run(numbers):
+    numbers, run, longest = sorted(numbers), 1, 1
+    for a, b in zip(numbers, numbers[1:]):
+        run = run + 1 if b == a + 1 else 1
+        longest = max(longest, run)
+    return longest
+
+for name, predictor_class, module, record in [('ssq', SSQPredictor, ssq_strategies, ssq), ('dlt', DLTPredictor, dlt_strategies, dlt),
+                                              ('qlc', QLCPredictor, qlc_strategies, qlc), ('qxc', QXCPredictor, qxc_strategies, qxc)]:
+    draws = [random_row(name) for _ in range(300)]
+    for strategy_name in module.STRATEGIES:
+        strategy = module.get_strategy(strategy_name)
+        first = strategy.generate_batch(predictor_class(history(name, record, draws)).strategy_context(), 100, rng=random.Random(1))
+        # 第一批写入历史后用同一种子重新生成：不能再出现这些组合
+        context = predictor_class(history(name, record, draws + first.tolist())).strategy_context()
+        batch = strategy.generate_batch(context, 100, rng=random.Random(1))
+        more = strategy.generate_batch(context, 50, rng=random.Random(2), existing=batch)
+        rows = batch.tolist() + more.tolist()
+        assert len(batch) == 100 and batch.shape[1] == strategy.row_width, f'{name}/{strategy_name}: 形状 {batch.shape}'
+        keys = [strategy.ticket_key(strategy.row_ticket(row)) for row in rows]
+        assert len(set(keys)) == len(keys), f'{name}/{strategy_name}: 有重复组合'
+        assert not set(keys) & context.historical_combinations, f'{name}/{strategy_name}: 生成了历史组合'
+        for row in rows:
+            ticket = strategy.row_ticket(row)
+            for pool, (_, count) in strategy.POOLS.items():
+                assert len(set(ticket[pool])) == count, f'{name}/{strategy_name} {pool} 号码个数不对: {row}'
+            for pool, max_run in strategy.MAX_RUN.items():
+                assert longest_run(ticket[pool]) <= max_run, f'{name}/{strategy_name} {pool} 连号超过 {max_run}: {row}'
+            if strategy.DISJOINT:
+                pools = [set(ticket[pool]) for pool in strategy.DISJOINT]
+                assert not set.intersection(*pools), f'{name}/{strategy_name} {strategy.DISJOINT} 有重复号码: {row}'
+    print(f'✓ {name}: {len(module.STRATEGIES)} 个策略的批量生成无重复、无历史组合，连号与互斥号码池符合约束')
+" && ((PASSED++)) || ((FAILED++))
+
+# 3.10. 流水线入库顺序验证（本地回放：多线程下载、截断拆分、空表批量导入）
+echo "🔀 验证流水线入库顺序（本地回放）..."
+python -c "
+import logging, tempfile
+from pathlib import Path
+from core.config import SPIDER_CONFIG
+from core.draw_calendar import DrawCalendar
+from core.range_planner import RangePlanner
+from core.replay_server import ReplayDataset, ReplayServer
+from core.storage import open_database
+from cli.smart_fetch import _run_pipeline, get_lottery_modules, import_class
+
+logging.disable(logging.WARNING)
+
+dataset = ReplayDataset(max_rows=300)
+server = ReplayServer(dataset, jitter_ms=30, seed=1)
+SPIDER_CONFIG['rate_per_host'] = 0  # 本地回放服务器不限速
+SPIDER_CONFIG['base_url'] = server.start()
+tmp = Path(tempfile.mkdtemp())
+try:
+    for lottery_type in ['ssq', 'dlt', 'qxc', 'qlc']:
+        modules = get_lottery_modules(lottery_type)
+        spider_class = import_class(modules['spider_class'])
+        db = open_database(import_class(modules['database_class']), {'backend': 'sqlite', 'sqlite_path': str(tmp / f'{lottery_type}.db')})
+        spider = spider_class()
+        try:
+            db.connect()
+            db.create_table()
+            # 每个范围两年（超过 300 行会被截断拆分），4 个下载线程加随机延迟，完成顺序与期号顺序不同
+            ranges = [(f'{year:02d}001', f'{year + 1:02d}200') for year in range(dataset.last_year - 7, dataset.last_year, 2)]
+            planner = RangePlanner(max_rows=0)
+            calendar = DrawCalendar(lottery_type, tmp / f'{lottery_type}.json')
+            pipeline, stats = _run_pipeline(spider_class, spider, db, calendar, ranges, planner, workers=4, bulk=True)
+            expected = dataset.issue_count(lottery_type, ranges[0][0], ranges[-1][1])
+            cursor = db.connection.cursor()
+            cursor.execute(f'SELECT lottery_no FROM {db.table_name} ORDER BY id')
+            issues = [row[0] for row in cursor.fetchall()]
+            cursor.close()
+            assert len(issues) == expected == pipeline.inserted, f'{lottery_type}: 入库 {len(issues)} 条，新增 {pipeline.inserted} 条，预期 {expected} 条'
+            assert issues == sorted(set(issues)), f'{lottery_type}: 入库顺序与期号顺序不一致或有重复'
+            assert planner.splits > 0, f'{lottery_type}: 没有发生拆分'
+            print(f'✓ {lottery_type}: {len(issues)} 条按期号顺序入库，请求 {planner.requests} 次，拆分 {planner.splits} 次')
+        finally:
+            spider.close()
+            db.close()
+finally:
+    server.stop()
+" && ((PASSED++)) || ((FAILED++))
+
 # 4. 搜索遗漏
 echo "🔎 搜索可能的遗漏..."
 MISSING=$(grep -r "ssq.*dlt.*qxc" --include="*.py" --include="*.js" --exclude-dir=node_modules --exclude-dir=venv --exclude-dir=.venv . 2>/dev/null | grep -v "qlc" | grep -v ".md" | grep -v "SESSION_HISTORY" | grep -v "INTEGRATION_CHECKLIST" | wc -l)